@@ -11,7 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Set, List, Any, Tuple
+from typing import Optional, Dict, Set, List, Any, Tuple, Iterable, Iterator
 import sys
 import pandas as pd
 import os
@@ -20,9 +20,11 @@ import asyncio
 import json
 import re
 import requests
+import threading
 from datetime import datetime, timezone
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
 from dotenv import load_dotenv
 
 # Load environment variables before any API key usage
@@ -35,20 +37,45 @@ def safe_get(obj, key, default=None):
         return obj.get(key, default)
     return default
 
+from leaklens_http import (
+    http_get, http_post, pool_stats, close_sessions, concurrency_stats, rate_limit_stats, current_priority, run_with_priority,
+    single_flight, single_flight_stats, retry_stats,
+)
+import leaklens_store
+from leaklens_histograms import activity_histograms, complexity_points
+from leaklens_intern import address_of, address_scope, address_table, intern_address
+from leaklens_pnl import FifoLotBook
+from leaklens_prices import PRICES, SOL_PRICES, prefetch_sol_prices, sol_price_at, spot_prices, spot_sol_price
+from leaklens_records import as_record, is_enhanced, record_scope
+
 # Import LeakLens analysis functions
-from leaklens_solana import (
-    analyze_wallet_execution_profiles,
-    analyze_execution_profile,
+# (leaklens_rpc / leaklens_analysis directly: the CLI module's plotting is never needed here)
+from leaklens_rpc import (
+    fetch_scope,
     fetch_transaction,
-    fetch_signatures,
     fetch_transactions_parallel,
+    sync_wallet,
+    synced_signatures,
+    get_rpc_pool,
+    run_analyzers,
+    index_transactions,
+    StreamAnalyzer,
+)
+from leaklens_analysis import (
+    analyze_wallet_execution_profiles,
+    analyze_execution_profile,
     analyze_wallet as analyze_wallet_solana,
     detect_sleep_window as detect_sleep_window_solana,
     calculate_probabilities as calculate_probabilities_solana,
     analyze_reaction_speed as analyze_reaction_speed_solana,
     analyze_opsec_failures,
     analyze_opsec_failures_from_enhanced,
+    _is_program_account,
     ReactionSpeedAnalysis,
+    ReactionFlags,
+    ActivityCounters,
+    ExecutionProfileTally,
+    OpsecCounters,
 )
 
 # Solana-only for encrypt.trade hackathon
@@ -93,33 +120,186 @@ MIN_LIQUIDITY_USD = float(os.getenv("MIN_LIQUIDITY_USD", "10000"))
 DEAD_TOKEN_DAYS = int(os.getenv("DEAD_TOKEN_DAYS", "30"))
 
 
-def helius_get_transactions(wallet: str, limit: int = 200) -> Tuple[List[dict], dict]:
-    """
-    Fetch Enhanced Transactions from Helius (parsed).
-    Docs: GET https://api.helius.xyz/v0/addresses/{address}/transactions?api-key=...
-    """
-    helius_key = os.getenv("HELIUS_API_KEY")
-    if not helius_key:
-        return [], {"error": "missing_helius_key"}
+# Enhanced Transactions API returns at most this many transactions per call
+HELIUS_TX_PAGE_SIZE = 100
+# Wall-clock budget (seconds) for following the Enhanced API cursor across pages
+HELIUS_TX_TIME_BUDGET = float(os.getenv("LEAKLENS_HELIUS_TIME_BUDGET", "20"))
+
+
+def _helius_tx_page(wallet: str, helius_key: str, limit: int, before: Optional[str] = None) -> Tuple[List[dict], dict]:
+    """Fetch one page of Enhanced Transactions (newest first, older than `before` when given)."""
     try:
         url = f"https://api.helius.xyz/v0/addresses/{wallet}/transactions"
-        params = {"api-key": helius_key, "limit": int(min(limit, 100))}
-        resp = requests.get(url, params=params, timeout=15, headers={"Accept": "application/json"})
+        params = {"api-key": helius_key, "limit": int(min(limit, HELIUS_TX_PAGE_SIZE))}
+        if before:
+            params["before"] = before
+        resp = http_get(url, params=params, timeout=15, headers={"Accept": "application/json"})
         if resp.status_code != 200:
             return [], {"error": f"helius_tx_status_{resp.status_code}", "body": resp.text[:200]}
         data = resp.json()
         if isinstance(data, list):
+            _cache_enhanced(data)
             return data, {"status": "ok", "count": len(data)}
         return [], {"error": "helius_tx_unexpected_shape"}
     except Exception as e:
         return [], {"error": f"helius_tx_exception_{str(e)[:120]}"}
 
 
-def _build_df_and_lists_from_helius_enhanced(enhanced_txs: List[dict]) -> Tuple[pd.DataFrame, List[dict], Dict[str, dict], List[dict]]:
+def _cache_enhanced(txs: List[dict]):
+    """Write Enhanced Transactions through to the local cache, keyed by signature."""
+    leaklens_store.put_transactions(
+        {tx["signature"]: tx for tx in txs if isinstance(tx, dict) and tx.get("signature")},
+        leaklens_store.KIND_ENHANCED,
+    )
+
+
+def helius_parse_transactions(signatures: List[str]) -> Tuple[Dict[str, dict], dict]:
+    """
+    Enhanced Transactions for specific signatures: cached ones come from the local store,
+    the rest from POST /v0/transactions (100 per call). Returns (signature -> tx, debug).
+    """
+    out = leaklens_store.get_transactions(signatures, leaklens_store.KIND_ENHANCED)
+    missing = [s for s in dict.fromkeys(signatures) if s and s not in out]
+    dbg = {"cached": len(out), "fetched": 0}
+    helius_key = os.getenv("HELIUS_API_KEY")
+    if missing and not helius_key:
+        dbg["error"] = "missing_helius_key"
+        return out, dbg
+    for i in range(0, len(missing), HELIUS_TX_PAGE_SIZE):
+        chunk = missing[i:i + HELIUS_TX_PAGE_SIZE]
+        try:
+            resp = http_post(f"https://api.helius.xyz/v0/transactions?api-key={helius_key}",
+                             json={"transactions": chunk}, timeout=20, headers={"Accept": "application/json"})
+            if resp.status_code != 200:
+                dbg["error"] = f"helius_parse_status_{resp.status_code}"
+                break
+            data = resp.json()
+        except Exception as e:
+            dbg["error"] = f"helius_parse_exception_{str(e)[:120]}"
+            break
+        txs = [tx for tx in (data if isinstance(data, list) else []) if isinstance(tx, dict) and tx.get("signature")]
+        _cache_enhanced(txs)
+        for tx in txs:
+            out[tx["signature"]] = tx
+        dbg["fetched"] += len(txs)
+    return out, dbg
+
+
+def helius_synced_transactions(wallet: str, limit: int = 200) -> Tuple[List[dict], dict]:
+    """
+    Enhanced Transactions for a wallet synced before: refresh its signature watermark, then
+    parse only signatures not already cached. Returns ([], dbg) when the wallet has no sync
+    state yet or too few transactions resolve, so the caller lists via the Enhanced API instead.
+    """
+    state = leaklens_store.get_wallet_sync(wallet)
+    if not state or not state.get("newest_signature"):
+        return [], {"error": "not_synced"}
+    sigs = [s["signature"] for s in synced_signatures(wallet, limit)]
+    by_sig, dbg = helius_parse_transactions(sigs)
+    txs = [by_sig[s] for s in sigs if s in by_sig]
+    dbg.update({"source": "sync", "count": len(txs)})
+    if not txs or (dbg.get("error") and len(txs) < len(sigs)):
+        dbg.setdefault("error", "sync_incomplete")
+        return [], dbg
+    dbg["status"] = "ok"
+    return txs, dbg
+
+
+def record_enhanced_history(wallet: str, enhanced: List[dict], limit: int):
+    """
+    Seed a wallet's sync watermark from a full Enhanced listing (newest first).
+    Never marked complete: the Enhanced API can return short pages with older history left,
+    so only a getSignaturesForAddress backfill (sync_wallet) may confirm the oldest signature.
+    """
+    records = [
+        {"signature": tx.get("signature"), "slot": tx.get("slot"), "blockTime": tx.get("timestamp") or 0}
+        for tx in enhanced if isinstance(tx, dict) and tx.get("signature")
+    ]
+    if records:
+        leaklens_store.record_wallet_signatures(wallet, records, reset=True, complete=False)
+
+
+def iter_helius_transaction_pages(wallet: str, limit: int = 200, time_budget: Optional[float] = None,
+                                  before: Optional[str] = None, debug: Optional[dict] = None) -> Iterator[List[dict]]:
+    """
+    Yield Enhanced Transactions pages (newest first), following the `before` cursor
+    until `limit` transactions, a short page, an error or `time_budget` seconds.
+    Page N+1 is requested while the caller is still parsing page N.
+    Pass a `debug` dict to receive the status/count/pages/error summary.
+    """
+    dbg = debug if debug is not None else {}
+    helius_key = os.getenv("HELIUS_API_KEY")
+    if not helius_key:
+        dbg["error"] = "missing_helius_key"
+        return
+    budget = HELIUS_TX_TIME_BUDGET if time_budget is None else time_budget
+    deadline = time.monotonic() + budget
+    remaining = max(0, int(limit))
+    dbg.update({"count": 0, "pages": 0})
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    priority = current_priority()
+    try:
+        if remaining <= 0:
+            return
+        requested = min(remaining, HELIUS_TX_PAGE_SIZE)
+        pending = executor.submit(run_with_priority, priority, _helius_tx_page, wallet, helius_key, requested, before)
+        while pending is not None:
+            page, page_dbg = pending.result()
+            if page_dbg.get("error"):
+                # First page failing is a hard error; later pages just truncate the history
+                dbg["error" if dbg["pages"] == 0 else "partial_error"] = page_dbg["error"]
+                if page_dbg.get("body"):
+                    dbg["body"] = page_dbg["body"]
+                return
+            page = page[:remaining]
+            remaining -= len(page)
+            dbg["pages"] += 1
+            dbg["count"] += len(page)
+            dbg["status"] = "ok"
+
+            pending = None
+            cursor = (page[-1].get("signature") if page and isinstance(page[-1], dict) else None)
+            if remaining > 0 and len(page) >= requested and cursor:
+                if time.monotonic() < deadline:
+                    requested = min(remaining, HELIUS_TX_PAGE_SIZE)
+                    # The prefetch is on this request's critical path: same priority as the caller
+                    pending = executor.submit(run_with_priority, priority, _helius_tx_page, wallet, helius_key, requested, cursor)
+                else:
+                    dbg["truncated"] = "time_budget"
+            if page:
+                yield page
+    finally:
+        executor.shutdown(wait=False)
+
+
+def helius_get_transactions(wallet: str, limit: int = 200, time_budget: Optional[float] = None) -> Tuple[List[dict], dict]:
+    """
+    Fetch Enhanced Transactions from Helius (parsed), paginating past 100 via the `before` cursor.
+    Docs: GET https://api.helius.xyz/v0/addresses/{address}/transactions?api-key=...
+    Concurrent calls for the same wallet/limit (ego network, swap worker, other requests) share one fetch.
+    """
+    txs, dbg = single_flight(("helius_api", "transactions", wallet, int(limit), time_budget),
+                             _helius_get_transactions, wallet, limit, time_budget)
+    return list(txs), dict(dbg)
+
+
+def _helius_get_transactions(wallet: str, limit: int, time_budget: Optional[float]) -> Tuple[List[dict], dict]:
+    dbg: dict = {}
+    txs: List[dict] = []
+    for page in iter_helius_transaction_pages(wallet, limit=limit, time_budget=time_budget, debug=dbg):
+        txs.extend(page)
+    if dbg.get("error"):
+        return [], dbg
+    return txs, dbg
+
+
+def _build_df_and_lists_from_helius_enhanced(enhanced_txs: Iterable[dict]) -> Tuple[pd.DataFrame, List[dict], Dict[str, dict], List[dict]]:
     """
     Build df, tx_details_list, tx_details_map, signatures from Helius Enhanced Transactions.
     Used on Vercel to avoid 100x getTransaction RPC rate limits; one Helius API call gives stable count.
     Enhanced tx have signature, timestamp, fee, slot, type; we use compute_units=0, instructions=0.
+    Accepts any iterable, so pages from iter_helius_transaction_pages are parsed as they arrive.
     """
     transactions = []
     tx_details_list = []
@@ -158,25 +338,10 @@ def _build_df_and_lists_from_helius_enhanced(enhanced_txs: List[dict]) -> Tuple[
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# Price fetching (CoinGecko for SOL; Helius for wallet context when available)
+# Price fetching (price oracle in leaklens_prices; Helius for wallet context when available)
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
-def _token_prices_sol_only(addresses: List[str]) -> Dict[str, float]:
-    """
-    Fetch SOL price from CoinGecko. Other mints are not priced (no Jupiter).
-    Returns dict with WSOL_MINT -> price when SOL is in addresses.
-    """
-    if not addresses:
-        return {}
-    if WSOL_MINT not in addresses:
-        return {}
-    sol = _coingecko_sol_price()
-    if sol > 0:
-        return {WSOL_MINT: sol}
-    return {}
-
-
 def helius_token_prices(wallet: str, mints: List[str]) -> Dict[str, float]:
     """
     Fetch token prices from Helius balances endpoint.
@@ -190,13 +355,8 @@ def helius_token_prices(wallet: str, mints: List[str]) -> Dict[str, float]:
     
     out: Dict[str, float] = {}
     try:
-        resp = requests.get(
-            f"https://api.helius.xyz/v0/addresses/{wallet}/balances?api-key={helius_key}",
-            timeout=12,
-            headers={"Accept": "application/json"}
-        )
-        if resp.status_code == 200:
-            data = resp.json()
+        data, bal_dbg = _helius_balances(wallet)
+        if bal_dbg.get("status") == "ok":
             tokens = data.get("tokens", [])
             print(f"[Helius] Found {len(tokens)} tokens in balances response")
             
@@ -205,8 +365,10 @@ def helius_token_prices(wallet: str, mints: List[str]) -> Dict[str, float]:
             if isinstance(native_balance, dict):
                 sol_usd = _safe_float(native_balance.get("usdValue") or native_balance.get("value"), 0.0)
                 if sol_usd > 0 and WSOL_MINT in mints:
-                    sol_amount = _safe_float(native_balance.get("uiAmount") or native_balance.get("amount"), 0.0)
+                    # uiAmount is in SOL; the raw amount is in lamports
+                    sol_amount = _safe_float(native_balance.get("uiAmount"), 0.0) or _safe_float(native_balance.get("amount"), 0.0) / 1e9
                     if sol_amount > 0:
+                        # Derived from this wallet's balance: used for this response only, not the shared oracle
                         out[WSOL_MINT] = sol_usd / sol_amount
                         print(f"[Helius] Got SOL price from nativeBalance: ${out[WSOL_MINT]:.2f}")
             
@@ -225,7 +387,7 @@ def helius_token_prices(wallet: str, mints: List[str]) -> Dict[str, float]:
                 print(f"[Helius] Balances API doesn't include USD values per token. Sample token keys: {list(tokens[0].keys()) if tokens else 'no tokens'}")
                 print(f"[Helius] Full response structure: {list(data.keys())}")
         else:
-            print(f"[Helius] Balances API returned status {resp.status_code}: {resp.text[:200]}")
+            print(f"[Helius] Balances API failed: {bal_dbg.get('error')}")
     except Exception as e:
         print(f"[Helius] Exception fetching token prices: {str(e)[:150]}")
     return out
@@ -233,32 +395,14 @@ def helius_token_prices(wallet: str, mints: List[str]) -> Dict[str, float]:
 
 
 
-def _coingecko_sol_price() -> float:
-    """Fetch current SOL price from CoinGecko. Returns 0 on failure."""
-    try:
-        resp = requests.get(
-            "https://api.coingecko.com/api/v3/simple/price",
-            params={"ids": "solana", "vs_currencies": "usd"},
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            return _safe_float(
-                (resp.json() or {}).get("solana", {}).get("usd", 0.0), 0.0
-            )
-    except Exception:
-        pass
-    return 0.0
-
-
 def fetch_token_prices(addresses: List[str], wallet: str = None) -> Dict[str, float]:
     """
-    Fetch current prices for a list of mints.
-    Uses CoinGecko for SOL; Helius balances for wallet context when provided.
-    Other tokens have no price source (Jupiter removed).
+    Fetch current prices for a list of mints in one batched, cached oracle lookup;
+    Helius balances fill in SOL for wallet context when provided.
     """
     if not addresses:
         return {}
-    prices: Dict[str, float] = _token_prices_sol_only(addresses)
+    prices: Dict[str, float] = spot_prices(addresses)
     missing = [m for m in addresses if m not in prices or prices.get(m, 0) <= 0]
     if missing and wallet:
         helius_prices = helius_token_prices(wallet, missing)
@@ -270,30 +414,9 @@ def fetch_token_prices(addresses: List[str], wallet: str = None) -> Dict[str, fl
 
 
 
-# Cache current SOL price to avoid repeated calls
-_cached_sol_price = None
-_cached_sol_price_time = 0
-
-
 def coingecko_sol_price_at(unixtime: int) -> float:
-    """Fetch SOL historical price from Coingecko."""
-    try:
-        # Coingecko historical price endpoint
-        date_str = datetime.fromtimestamp(unixtime, tz=timezone.utc).strftime("%d-%m-%Y")
-        resp = requests.get(
-            "https://api.coingecko.com/api/v3/coins/solana/history",
-            params={"date": date_str},
-            timeout=10
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            # Coingecko returns market_data.current_price.usd for historical
-            price = data.get("market_data", {}).get("current_price", {}).get("usd", 0.0)
-            if price and price > 0:
-                return float(price)
-    except Exception as e:
-        print(f"[Coingecko] Exception fetching SOL historical price: {str(e)[:100]}")
-    return 0.0
+    """SOL historical price from the price-history store (filled from Coingecko, one range request per gap)."""
+    return sol_price_at(unixtime)
 
 
 def historical_price_at(mint: str, unixtime: int) -> float:
@@ -301,7 +424,6 @@ def historical_price_at(mint: str, unixtime: int) -> float:
     Historical price at or near timestamp (seconds); falls back to current price.
     For SOL, uses Coingecko. For other tokens, returns 0 (no historical data available).
     """
-    global _cached_sol_price, _cached_sol_price_time
     if not mint:
         return 0.0
     # If timestamp is missing/invalid, use current price
@@ -315,25 +437,8 @@ def historical_price_at(mint: str, unixtime: int) -> float:
         sol_price = coingecko_sol_price_at(unixtime)
         if sol_price > 0:
             return sol_price
-        # Fallback to current price
-        import time as time_module
-        now = time_module.time()
-        if _cached_sol_price is None or (now - _cached_sol_price_time) > 300:  # 5 min cache
-            current = fetch_token_prices([WSOL_MINT])
-            _cached_sol_price = current.get(WSOL_MINT, 0.0)
-            # If still no price, try Coingecko
-            if not _cached_sol_price:
-                try:
-                    resp = requests.get("https://api.coingecko.com/api/v3/simple/price",
-                                       params={"ids": "solana", "vs_currencies": "usd"},
-                                       timeout=10)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        _cached_sol_price = _safe_float(data.get("solana", {}).get("usd", 0.0), 0.0)
-                except Exception:
-                    pass
-            _cached_sol_price_time = now
-        return _cached_sol_price if _cached_sol_price else 0.0
+        # Fallback to current price (cached by the oracle)
+        return spot_sol_price()
     
     # For other tokens, no historical data available - return 0
     return 0.0
@@ -348,120 +453,30 @@ def _raw_amount_to_ui(raw: dict) -> float:
         return 0.0
 
 
-def compute_token_trading_pnl_fifo(swaps: List[dict]) -> dict:
+def compute_token_trading_pnl_fifo(swaps: List[dict], book: Optional[FifoLotBook] = None) -> dict:
     """
     Compute realized PnL per token from detected swap deltas using FIFO cost basis,
     denominated in the base asset (SOL or USDC/USDT). Historical USD via Coingecko (SOL only).
     Key fix: FIFO lots are keyed by (mint, base) to avoid corruption when same token
     is traded in different bases (e.g., bought in USDC, sold in SOL).
+    book: a FifoLotBook restored from a checkpoint; swaps are then added on top of it.
     """
-    # Inventory lots: (mint, base) -> list[(qty, cost_per_unit_in_base)]
-    lots: Dict[Tuple[str, str], List[Tuple[float, float]]] = {}
-    realized: Dict[Tuple[str, str], float] = {}  # (mint, base) -> pnl (base units)
-    realized_usd: Dict[Tuple[str, str], float] = {}
-    stats: Dict[Tuple[str, str], dict] = {}
-    debug = {"swaps_parsed": 0, "swaps_skipped": 0, "historical_prices_available": False}
-
-    for ev in swaps or []:
-        token_in = ev.get("token_in")
-        token_out = ev.get("token_out")
-        amt_in = _safe_float(ev.get("amount_in"), 0.0)
-        amt_out = _safe_float(ev.get("amount_out"), 0.0)
-        ts = ev.get("timestamp")
-
-        if not token_in or not token_out or amt_in <= 0 or amt_out <= 0:
-            debug["swaps_skipped"] += 1
-            continue
+    # SOL/USD for every SOL-based swap in one range request; sells below read it from memory
+    prefetch_sol_prices(ev.get("timestamp") for ev in swaps or []
+                        if WSOL_MINT in (ev.get("token_in"), ev.get("token_out")))
 
-        # Determine base: prefer stable over SOL (only use SOL as fallback)
-        base = None
-        if token_in in STABLE_MINTS:
-            # Prefer stable on input side
-            base = "STABLE"
-            traded_mint = token_out
-            qty = amt_out
-            cost_total = amt_in
-            proceeds_total = 0.0
-        elif token_out in STABLE_MINTS:
-            # Prefer stable on output side
-            base = "STABLE"
-            traded_mint = token_in
-            qty = amt_in
-            cost_total = 0.0
-            proceeds_total = amt_out
-        elif token_in == WSOL_MINT:
-            # SOL as base (fallback when no stable present)
-            base = "SOL"
-            traded_mint = token_out
-            qty = amt_out
-            cost_total = amt_in
-            proceeds_total = 0.0
-        elif token_out == WSOL_MINT:
-            # SOL as base (fallback when no stable present)
-            base = "SOL"
-            traded_mint = token_in
-            qty = amt_in
-            cost_total = 0.0
-            proceeds_total = amt_out
-        else:
-            debug["swaps_skipped"] += 1
-            continue
-
-        debug["swaps_parsed"] += 1
-        key = (traded_mint, base)
-        st = stats.setdefault(key, {"trades": 0, "spent": 0.0, "received": 0.0})
-        st["trades"] += 1
-
-        if cost_total > 0 and proceeds_total == 0:
-            # BUY: add FIFO lot (keyed by mint+base)
-            cost_per_unit = cost_total / qty
-            lots.setdefault(key, []).append((qty, cost_per_unit))
-            st["spent"] += cost_total
-        elif proceeds_total > 0 and cost_total == 0:
-            # SELL: consume FIFO lots to compute cost basis (from same mint+base key)
-            remaining = qty
-            cost_basis_total = 0.0
-            inv = lots.get(key, [])
-            while remaining > 0 and inv:
-                lot_qty, lot_cpu = inv[0]
-                take = min(remaining, lot_qty)
-                cost_basis_total += take * lot_cpu
-                lot_qty -= take
-                remaining -= take
-                if lot_qty <= 1e-12:
-                    inv.pop(0)
-                else:
-                    inv[0] = (lot_qty, lot_cpu)
-            lots[key] = inv
-            if remaining > 1e-9:
-                continue
-            pnl = proceeds_total - cost_basis_total
-            realized[key] = realized.get(key, 0.0) + pnl
-            st["received"] += proceeds_total
-            if base == "STABLE":
-                usd_price = 1.0  # Stable tokens are already in USD
-            else:
-                usd_price = historical_price_at(WSOL_MINT, ts)
-                if usd_price > 0:
-                    debug["historical_prices_available"] = True
-            realized_usd[key] = realized_usd.get(key, 0.0) + pnl * usd_price
-
-    # Build output rows
-    rows = []
-    for (mint, base), pnl in realized.items():
-        rows.append({
-            "mint": mint,
-            "base": base,
-            "realized_pnl": pnl,
-            "realized_pnl_usd": realized_usd.get((mint, base), 0.0),
-            **stats.get((mint, base), {})
-        })
+    if book is None:
+        book = FifoLotBook()
+    book.usd_price = lambda ts: historical_price_at(WSOL_MINT, ts)
+    book.add_many(swaps or [])
+    debug = dict(book.debug)
+    rows = book.rows()
 
     rows_sorted = sorted(rows, key=lambda r: r["realized_pnl"])
     rows_sorted_usd = sorted(rows, key=lambda r: r.get("realized_pnl_usd", 0))
     total_usd = round(sum(r.get("realized_pnl_usd", 0.0) for r in rows), 2)
     return {
-        "window": {"transactions_used": len(swaps or [])},
+        "window": {"transactions_used": book.events},
         "totals": {
             "distinct_pairs": len(rows),
             "realized_pnl_sol": round(sum(r["realized_pnl"] for r in rows if r["base"] == "SOL"), 6),
@@ -485,17 +500,34 @@ def compute_income_sources_from_enhanced(wallet: str, enhanced_txs: List[dict])
     - stable token received (USDC/USDT)
     - other token received (count + unique mints), excluding swaps
     """
-    income = {
-        "sol_received": {"count": 0, "total_sol": 0.0},
-        "stable_received": {"count": 0, "total_stable": 0.0},
-        "tokens_received": {"count": 0, "unique_mints": set()}
-    }
-
+    income = IncomeSources(wallet)
     for tx in enhanced_txs or []:
+        income.add(tx)
+    return income.result()
+
+
+class IncomeSources(StreamAnalyzer):
+    """Streaming compute_income_sources_from_enhanced (Enhanced transfers; other transactions add nothing)."""
+
+    def __init__(self, wallet: str, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.wallet = wallet
+        self.income = {
+            "sol_received": {"count": 0, "total_sol": 0.0},
+            "stable_received": {"count": 0, "total_stable": 0.0},
+            "tokens_received": {"count": 0, "unique_mints": set()}
+        }
+
+    def update(self, sig_info: dict, tx: dict):
+        self.add(tx)
+
+    def add(self, tx: dict):
+        wallet = self.wallet
+        income = self.income
         # Skip swaps; those are trading flow, not "income"
         # Check both tx type and events to catch all swap variations
         if tx.get("type") == "SWAP" or (tx.get("events") or {}).get("swap"):
-            continue
+            return
 
         # Native transfers
         for nt in tx.get("nativeTransfers") or []:
@@ -526,10 +558,16 @@ def compute_income_sources_from_enhanced(wallet: str, enhanced_txs: List[dict])
                     income["tokens_received"]["count"] += 1
                     income["tokens_received"]["unique_mints"].add(mint)
 
-    income["sol_received"]["total_sol"] = round(income["sol_received"]["total_sol"], 6)
-    income["stable_received"]["total_stable"] = round(income["stable_received"]["total_stable"], 6)
-    income["tokens_received"]["unique_mints"] = len(income["tokens_received"]["unique_mints"])
-    return income
+    def result(self) -> dict:
+        income = self.income
+        return {
+            "sol_received": {"count": income["sol_received"]["count"],
+                             "total_sol": round(income["sol_received"]["total_sol"], 6)},
+            "stable_received": {"count": income["stable_received"]["count"],
+                                "total_stable": round(income["stable_received"]["total_stable"], 6)},
+            "tokens_received": {"count": income["tokens_received"]["count"],
+                                "unique_mints": len(income["tokens_received"]["unique_mints"])},
+        }
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -571,6 +609,11 @@ class WalletAnalysisRequest(BaseModel):
     chain: Optional[str] = "solana"  # Solana only for encrypt.trade hackathon
 
 
+class WalletSyncRequest(BaseModel):
+    wallet: str
+    limit: Optional[int] = 100
+
+
 class TransactionAnalysisRequest(BaseModel):
     signature: str
 
@@ -587,12 +630,34 @@ def mempool_forensics(request: MempoolForensicsRequest):
     Returns execution profile classification (RETAIL, URGENT_USER, PRO_TRADER, MEV_STYLE).
     """
     try:
-        result = analyze_wallet_execution_profiles(request.wallet, request.limit)
+        with address_scope():
+            result = analyze_wallet_execution_profiles(request.wallet, request.limit)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.post("/sync-wallet")
+def sync_wallet_endpoint(request: WalletSyncRequest):
+    """
+    Incrementally refresh a wallet's stored signature history.
+    Only signatures newer than the last sync are fetched (until= watermark); returns that delta.
+    """
+    try:
+        delta = sync_wallet(request.wallet, limit=request.limit or 100)
+        return {
+            "wallet": request.wallet,
+            "synced": delta["synced"],
+            "new_count": delta["new_count"],
+            "new": delta["new"],
+            "backfilled": delta["backfilled"],
+            "state": delta["state"],
+            "error": delta["error"],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
+
+
 @app.post("/analyze-transaction")
 def analyze_transaction(request: TransactionAnalysisRequest):
     """
@@ -603,7 +668,8 @@ def analyze_transaction(request: TransactionAnalysisRequest):
         if not tx_details:
             raise HTTPException(status_code=404, detail="Transaction not found")
         
-        result = analyze_execution_profile(tx_details)
+        with address_scope():
+            result = analyze_execution_profile(tx_details)
         result["signature"] = request.signature
         return result
     except HTTPException:
@@ -623,7 +689,8 @@ def opsec_failures(request: OpsecAnalysisRequest):
     - Memo usage breadcrumbs
     """
     try:
-        result = analyze_opsec_failures(request.wallet, limit=request.limit)
+        with address_scope():
+            result = analyze_opsec_failures(request.wallet, limit=request.limit)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Opsec analysis failed: {str(e)}")
@@ -640,7 +707,7 @@ def get_jupiter_portfolio(wallet: str):
             "Accept": "application/json",
             "User-Agent": "LeakLens/1.0 (+https://encrypt.trade)"
         }
-        response = requests.get(url, timeout=8, headers=headers)
+        response = http_get(url, timeout=8, headers=headers)
         
         # If Jupiter API returns 404 or other errors, return empty portfolio instead of failing
         if response.status_code == 404:
@@ -680,64 +747,22 @@ def _safe_float(x: Any, default: float = 0.0) -> float:
 
 def _extract_wallet_sol_delta(tx: dict, wallet: str) -> float:
     """Approximate SOL delta for the wallet from pre/post balances (excludes fee if fee payer)."""
-    try:
-        meta = tx.get("meta") or {}
-        msg = (tx.get("transaction") or {}).get("message") or {}
-        keys = msg.get("accountKeys") or []
-        accounts = []
-        for k in keys:
-            if isinstance(k, dict):
-                accounts.append(k.get("pubkey", ""))
-            else:
-                accounts.append(str(k))
-        if wallet not in accounts:
-            return 0.0
-        idx = accounts.index(wallet)
-        pre = (meta.get("preBalances") or [])
-        post = (meta.get("postBalances") or [])
-        if idx >= len(pre) or idx >= len(post):
-            return 0.0
-        lamport_delta = (post[idx] or 0) - (pre[idx] or 0)
-        fee = meta.get("fee") or 0
-        # Most of the time wallet is fee payer; add fee back so "economic" delta isn't skewed.
-        return (lamport_delta + fee) / 1e9
-    except Exception:
+    rec = as_record(tx)
+    if rec is None or not rec.has_meta:
+        return 0.0
+    lamport_delta = rec.sol_delta(wallet)
+    if lamport_delta is None:
         return 0.0
+    # Most of the time wallet is fee payer; add fee back so "economic" delta isn't skewed.
+    return (lamport_delta + rec.fee) / 1e9
 
 
 def _extract_token_deltas(tx: dict, wallet: str) -> Dict[str, float]:
     """Return mint -> uiAmount delta for token accounts owned by wallet."""
-    meta = tx.get("meta") or {}
-    pre = meta.get("preTokenBalances") or []
-    post = meta.get("postTokenBalances") or []
-
-    def to_map(items: list) -> Dict[Tuple[str, int], float]:
-        m = {}
-        for it in items:
-            if not isinstance(it, dict):
-                continue
-            if it.get("owner") != wallet:
-                continue
-            mint = it.get("mint")
-            idx = it.get("accountIndex")
-            ui = it.get("uiTokenAmount") or {}
-            amt = ui.get("uiAmount")
-            if amt is None:
-                amt = _safe_float(ui.get("uiAmountString"), 0.0)
-            if mint and idx is not None:
-                m[(mint, int(idx))] = _safe_float(amt, 0.0)
-        return m
-
-    pre_m = to_map(pre)
-    post_m = to_map(post)
-    keys = set(pre_m.keys()) | set(post_m.keys())
-    deltas: Dict[str, float] = {}
-    for k in keys:
-        mint, _ = k
-        d = post_m.get(k, 0.0) - pre_m.get(k, 0.0)
-        if abs(d) > 1e-12:
-            deltas[mint] = deltas.get(mint, 0.0) + d
-    return deltas
+    rec = as_record(tx)
+    if rec is None or not rec.has_meta:
+        return {}
+    return dict(rec.token_deltas_of(wallet))
 
 
 def detect_swaps_from_helius(enhanced_txs: List[dict]) -> List[dict]:
@@ -748,128 +773,171 @@ def detect_swaps_from_helius(enhanced_txs: List[dict]) -> List[dict]:
     """
     swaps = []
     for tx in (enhanced_txs or []):
-        if not isinstance(tx, dict):
+        if isinstance(tx, dict):
+            swaps.extend(_helius_swap_events(tx))
+    return swaps
+
+
+def _helius_swap_events(tx: dict) -> List[dict]:
+    """Swaps from one Enhanced transaction's parsed swap events (or the transaction itself if typed SWAP)."""
+    swaps = []
+    events = tx.get("events") or {}
+    swap_events = events.get("swap") or []
+    
+    # Also check for type field indicating swap
+    if not swap_events and tx.get("type") == "SWAP":
+        swap_events = [tx]
+    
+    for ev in swap_events:
+        if not isinstance(ev, dict):
             continue
         
-        # Check for parsed swap events in various formats
-        events = tx.get("events") or {}
-        swap_events = events.get("swap") or []
+        # Extract swap details from Helius format (multiple field name variations)
+        token_in = (ev.get("tokenIn") or ev.get("token_in") or ev.get("source") or 
+                   ev.get("inputMint") or ev.get("input_mint") or "")
+        token_out = (ev.get("tokenOut") or ev.get("token_out") or ev.get("destination") or 
+                    ev.get("outputMint") or ev.get("output_mint") or "")
         
-        # Also check for type field indicating swap
-        if not swap_events and tx.get("type") == "SWAP":
-            swap_events = [tx]
+        # Amount extraction with multiple fallbacks
+        amt_in = _safe_float(
+            ev.get("amountIn") or ev.get("amount_in") or 
+            ev.get("inputAmount") or ev.get("input_amount") or 0.0, 0.0
+        )
+        amt_out = _safe_float(
+            ev.get("amountOut") or ev.get("amount_out") or 
+            ev.get("outputAmount") or ev.get("output_amount") or 0.0, 0.0
+        )
         
-        # Check for nativeTransfers that might indicate swaps
-        native_transfers = tx.get("nativeTransfers") or []
-        token_transfers = tx.get("tokenTransfers") or []
+        ts = (ev.get("timestamp") or tx.get("timestamp") or 
+              tx.get("blockTime") or tx.get("block_time") or 0)
+        sig = (ev.get("signature") or tx.get("signature") or 
+               tx.get("transactionSignature") or "")
         
-        # If we have both native and token transfers, might be a swap
-        if not swap_events and (native_transfers or token_transfers):
-            # Try to infer swap from transfer patterns
-            # This is a fallback - prefer explicit swap events
-            pass
-        
-        for ev in swap_events:
-            if not isinstance(ev, dict):
-                continue
-            
-            # Extract swap details from Helius format (multiple field name variations)
-            token_in = (ev.get("tokenIn") or ev.get("token_in") or ev.get("source") or 
-                       ev.get("inputMint") or ev.get("input_mint") or "")
-            token_out = (ev.get("tokenOut") or ev.get("token_out") or ev.get("destination") or 
-                        ev.get("outputMint") or ev.get("output_mint") or "")
-            
-            # Amount extraction with multiple fallbacks
-            amt_in = _safe_float(
-                ev.get("amountIn") or ev.get("amount_in") or 
-                ev.get("inputAmount") or ev.get("input_amount") or 0.0, 0.0
-            )
-            amt_out = _safe_float(
-                ev.get("amountOut") or ev.get("amount_out") or 
-                ev.get("outputAmount") or ev.get("output_amount") or 0.0, 0.0
-            )
-            
-            ts = (ev.get("timestamp") or tx.get("timestamp") or 
-                  tx.get("blockTime") or tx.get("block_time") or 0)
-            sig = (ev.get("signature") or tx.get("signature") or 
-                   tx.get("transactionSignature") or "")
-            
-            if token_in and token_out and amt_in > 0 and amt_out > 0:
-                swaps.append({
-                    "signature": sig,
-                    "token_in": token_in,
-                    "amount_in": amt_in,
-                    "token_out": token_out,
-                    "amount_out": amt_out,
-                    "timestamp": ts
-                })
+        if token_in and token_out and amt_in > 0 and amt_out > 0:
+            swaps.append({
+                "signature": sig,
+                "token_in": token_in,
+                "amount_in": amt_in,
+                "token_out": token_out,
+                "amount_out": amt_out,
+                "timestamp": ts
+            })
     return swaps
 
 
+def _swap_from_deltas(wallet: str, sig: str, tx: dict) -> Tuple[Optional[dict], str]:
+    """
+    Swap event for one transaction from the wallet's balance deltas.
+    Returns (swap, "") or (None, reason) with reason "no_deltas" / "no_swap_pattern".
+    """
+    token_deltas = _extract_token_deltas(tx, wallet)
+    sol_delta = _extract_wallet_sol_delta(tx, wallet)
+
+    # Build combined deltas (SOL + tokens), filter dust
+    all_deltas: Dict[str, float] = {}
+    if abs(sol_delta) > 1e-9:
+        all_deltas[WSOL_MINT] = sol_delta
+    for mint, delta in token_deltas.items():
+        if abs(delta) > 1e-9:
+            # Aggregate deltas for same mint (multiple accounts)
+            all_deltas[mint] = all_deltas.get(mint, 0.0) + delta
+
+    # Filter out dust and separate negatives/positives
+    nz = [(m, d) for m, d in all_deltas.items() if abs(d) > 1e-9]
+    if not nz:
+        return None, "no_deltas"
+
+    negs = [(m, d) for m, d in nz if d < 0]
+    poss = [(m, d) for m, d in nz if d > 0]
+
+    # Swap requires at least one negative and one positive delta
+    if not negs or not poss:
+        return None, "no_swap_pattern"
+
+    # Choose dominant legs: most negative (token_in) and most positive (token_out)
+    token_in, delta_in = min(negs, key=lambda x: x[1])  # most negative
+    token_out, delta_out = max(poss, key=lambda x: x[1])  # most positive
+
+    # Skip pure SOL-to-SOL transactions (fees, rent, noise)
+    if token_in == WSOL_MINT and token_out == WSOL_MINT:
+        return None, "no_swap_pattern"
+
+    ts = tx.get("blockTime") or tx.get("timestamp") or 0
+    return {
+        "signature": sig,
+        "token_in": token_in,
+        "amount_in": abs(delta_in),
+        "token_out": token_out,
+        "amount_out": delta_out,
+        "timestamp": ts
+    }, ""
+
+
 def detect_swaps_delta(wallet: str, tx_details_map: Dict[str, dict]) -> List[dict]:
     """
     Protocol-agnostic swap detection via balance deltas (fallback method).
     Rule: at least one negative delta and one positive delta (handles multi-hop, WSOL, fees).
     """
     swaps = []
-    skipped_no_deltas = 0
-    skipped_no_swap_pattern = 0
+    skipped = {"no_deltas": 0, "no_swap_pattern": 0}
     for sig, tx in (tx_details_map or {}).items():
         if not tx or not tx.get("meta"):
             continue
-        token_deltas = _extract_token_deltas(tx, wallet)
-        sol_delta = _extract_wallet_sol_delta(tx, wallet)
-
-        # Build combined deltas (SOL + tokens), filter dust
-        all_deltas: Dict[str, float] = {}
-        if abs(sol_delta) > 1e-9:
-            all_deltas[WSOL_MINT] = sol_delta
-        for mint, delta in token_deltas.items():
-            if abs(delta) > 1e-9:
-                # Aggregate deltas for same mint (multiple accounts)
-                all_deltas[mint] = all_deltas.get(mint, 0.0) + delta
-
-        # Filter out dust and separate negatives/positives
-        nz = [(m, d) for m, d in all_deltas.items() if abs(d) > 1e-9]
-        if not nz:
-            skipped_no_deltas += 1
-            continue
-        
-        negs = [(m, d) for m, d in nz if d < 0]
-        poss = [(m, d) for m, d in nz if d > 0]
-        
-        # Swap requires at least one negative and one positive delta
-        if not negs or not poss:
-            skipped_no_swap_pattern += 1
-            continue
-        
-        # Choose dominant legs: most negative (token_in) and most positive (token_out)
-        token_in, delta_in = min(negs, key=lambda x: x[1])  # most negative
-        token_out, delta_out = max(poss, key=lambda x: x[1])  # most positive
-        
-        # Skip pure SOL-to-SOL transactions (fees, rent, noise)
-        if token_in == WSOL_MINT and token_out == WSOL_MINT:
-            skipped_no_swap_pattern += 1
-            continue
-        
-        ts = tx.get("blockTime") or tx.get("timestamp") or 0
-        swaps.append({
-            "signature": sig,
-            "token_in": token_in,
-            "amount_in": abs(delta_in),
-            "token_out": token_out,
-            "amount_out": delta_out,
-            "timestamp": ts
-        })
+        swap, reason = _swap_from_deltas(wallet, sig, tx)
+        if swap:
+            swaps.append(swap)
+        else:
+            skipped[reason] += 1
     
     # Debug info (can be removed later)
     if swaps:
         import logging
-        logging.debug(f"detect_swaps_delta: found {len(swaps)} swaps, skipped_no_deltas={skipped_no_deltas}, skipped_no_swap_pattern={skipped_no_swap_pattern}")
+        logging.debug(f"detect_swaps_delta: found {len(swaps)} swaps, skipped_no_deltas={skipped['no_deltas']}, skipped_no_swap_pattern={skipped['no_swap_pattern']}")
     
     return swaps
 
 
+class SwapDetector(StreamAnalyzer):
+    """
+    Streaming swap detection in wallet signature order, whatever the arrival order.
+    RPC transactions: detect_swaps_delta. Helius Enhanced: parsed swap events when any transaction
+    has them, else detect_swaps_delta_from_enhanced. method names the source used by result().
+    """
+
+    def __init__(self, wallet: str, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.wallet = wallet
+        self.swaps: Dict[str, dict] = {}
+        self.parsed: Dict[str, List[dict]] = {}
+        self.method = "delta_based"
+        self._enhanced = False
+
+    def update(self, sig_info: dict, tx: dict):
+        sig = sig_info.get("signature") or sig_info.get("transactionSignature") or ""
+        if is_enhanced(tx):
+            self._enhanced = True
+            events = _helius_swap_events(tx)
+            if events:
+                self.parsed[sig] = events
+            swap = _swap_from_transfers(self.wallet, tx)
+            if swap:
+                self.swaps[sig] = swap
+            return
+        if not tx.get("meta"):
+            return
+        swap, _ = _swap_from_deltas(self.wallet, sig, tx)
+        if swap:
+            self.swaps[sig] = swap
+
+    def result(self) -> List[dict]:
+        order = list(dict.fromkeys(s.get("signature") or s.get("transactionSignature") for s in self.signatures))
+        if self.parsed:
+            self.method = "helius_parsed"
+            return [ev for sig in order for ev in self.parsed.get(sig, [])]
+        self.method = "enhanced_delta" if self._enhanced else "delta_based"
+        return [self.swaps[sig] for sig in order if sig in self.swaps]
+
+
 def _token_amount_from_enhanced(tt: dict) -> float:
     """Parse token amount from Helius enhanced tokenTransfers (amount/decimals or uiAmount)."""
     raw = tt.get("tokenAmount")
@@ -897,69 +965,84 @@ def detect_swaps_delta_from_enhanced(wallet: str, enhanced_txs: List[dict]) -> L
     for tx in enhanced_txs or []:
         if not isinstance(tx, dict):
             continue
-        sig = tx.get("signature") or tx.get("transactionSignature") or ""
-        ts = tx.get("timestamp") or tx.get("blockTime") or 0
-        all_deltas: Dict[str, float] = {}
+        swap = _swap_from_transfers(wallet, tx)
+        if swap:
+            swaps.append(swap)
+    return swaps
 
-        for nt in tx.get("nativeTransfers") or []:
-            if not isinstance(nt, dict):
-                continue
-            fr = nt.get("fromUserAccount") or nt.get("from")
-            to = nt.get("toUserAccount") or nt.get("to")
-            amt_lamports = _safe_float(nt.get("amount"), 0.0)
-            if amt_lamports <= 0 or not fr or not to:
-                continue
-            amt_sol = amt_lamports / 1e9
-            if to == wallet and fr != wallet:
-                all_deltas[WSOL_MINT] = all_deltas.get(WSOL_MINT, 0.0) + amt_sol
-            elif fr == wallet and to != wallet:
-                all_deltas[WSOL_MINT] = all_deltas.get(WSOL_MINT, 0.0) - amt_sol
 
-        for tt in tx.get("tokenTransfers") or []:
-            if not isinstance(tt, dict):
-                continue
-            fr = tt.get("fromUserAccount") or tt.get("from")
-            to = tt.get("toUserAccount") or tt.get("to")
-            mint = tt.get("mint") or ""
-            if not mint:
-                continue
-            amt = _token_amount_from_enhanced(tt)
-            if amt <= 0:
-                continue
-            if to == wallet and fr != wallet:
-                all_deltas[mint] = all_deltas.get(mint, 0.0) + amt
-            elif fr == wallet and to != wallet:
-                all_deltas[mint] = all_deltas.get(mint, 0.0) - amt
+def _swap_from_transfers(wallet: str, tx: dict) -> Optional[dict]:
+    """Swap event for one Enhanced transaction from the wallet's net native/token transfers, or None."""
+    sig = tx.get("signature") or tx.get("transactionSignature") or ""
+    ts = tx.get("timestamp") or tx.get("blockTime") or 0
+    all_deltas: Dict[str, float] = {}
 
-        nz = [(m, d) for m, d in all_deltas.items() if abs(d) > 1e-12]
-        if not nz:
+    for nt in tx.get("nativeTransfers") or []:
+        if not isinstance(nt, dict):
             continue
-        negs = [(m, d) for m, d in nz if d < 0]
-        poss = [(m, d) for m, d in nz if d > 0]
-        if not negs or not poss:
+        fr = nt.get("fromUserAccount") or nt.get("from")
+        to = nt.get("toUserAccount") or nt.get("to")
+        amt_lamports = _safe_float(nt.get("amount"), 0.0)
+        if amt_lamports <= 0 or not fr or not to:
             continue
-        token_in, delta_in = min(negs, key=lambda x: x[1])
-        token_out, delta_out = max(poss, key=lambda x: x[1])
-        if token_in == WSOL_MINT and token_out == WSOL_MINT:
+        amt_sol = amt_lamports / 1e9
+        if to == wallet and fr != wallet:
+            all_deltas[WSOL_MINT] = all_deltas.get(WSOL_MINT, 0.0) + amt_sol
+        elif fr == wallet and to != wallet:
+            all_deltas[WSOL_MINT] = all_deltas.get(WSOL_MINT, 0.0) - amt_sol
+
+    for tt in tx.get("tokenTransfers") or []:
+        if not isinstance(tt, dict):
             continue
-        swaps.append({
-            "signature": sig,
-            "token_in": token_in,
-            "amount_in": abs(delta_in),
-            "token_out": token_out,
-            "amount_out": delta_out,
-            "timestamp": ts
-        })
-    return swaps
+        fr = tt.get("fromUserAccount") or tt.get("from")
+        to = tt.get("toUserAccount") or tt.get("to")
+        mint = tt.get("mint") or ""
+        if not mint:
+            continue
+        amt = _token_amount_from_enhanced(tt)
+        if amt <= 0:
+            continue
+        if to == wallet and fr != wallet:
+            all_deltas[mint] = all_deltas.get(mint, 0.0) + amt
+        elif fr == wallet and to != wallet:
+            all_deltas[mint] = all_deltas.get(mint, 0.0) - amt
+
+    nz = [(m, d) for m, d in all_deltas.items() if abs(d) > 1e-12]
+    if not nz:
+        return None
+    negs = [(m, d) for m, d in nz if d < 0]
+    poss = [(m, d) for m, d in nz if d > 0]
+    if not negs or not poss:
+        return None
+    token_in, delta_in = min(negs, key=lambda x: x[1])
+    token_out, delta_out = max(poss, key=lambda x: x[1])
+    if token_in == WSOL_MINT and token_out == WSOL_MINT:
+        return None
+    return {
+        "signature": sig,
+        "token_in": token_in,
+        "amount_in": abs(delta_in),
+        "token_out": token_out,
+        "amount_out": delta_out,
+        "timestamp": ts
+    }
 
 
 def _helius_balances(wallet: str) -> Tuple[dict, dict]:
-    """Fetch Helius balances payload; returns (payload, debug)."""
+    """
+    Fetch Helius balances payload; returns (payload, debug).
+    Shared by net worth, token prices and the portfolio fallback; concurrent calls share one request.
+    """
+    payload, dbg = single_flight(("helius_api", "balances", wallet), _fetch_helius_balances, wallet)
+    return payload, dict(dbg)
+
+
+def _fetch_helius_balances(wallet: str) -> Tuple[dict, dict]:
     helius_key = os.getenv("HELIUS_API_KEY")
     if not helius_key:
         return {"nativeBalance": 0, "tokens": []}, {"error": "missing_helius_key"}
     try:
-        resp = requests.get(
+        resp = http_get(
             f"https://api.helius.xyz/v0/addresses/{wallet}/balances?api-key={helius_key}",
             timeout=12,
             headers={"Accept": "application/json"}
@@ -971,27 +1054,23 @@ def _helius_balances(wallet: str) -> Tuple[dict, dict]:
         return {"nativeBalance": 0, "tokens": []}, {"error": f"helius_balances_exception_{str(e)[:80]}"}
 
 
-def compute_networth_breakdown(wallet: str) -> dict:
+def compute_networth_breakdown(wallet: str, balances: Optional[Tuple[dict, dict]] = None,
+                               sol_price: Optional[float] = None) -> dict:
     """
     Net worth - SOL balance only.
-    Returns SOL balance and USD value using Coingecko price.
+    Returns SOL balance and USD value using the oracle's SOL price.
+    balances / sol_price: already loaded (_helius_balances result, USD price) to skip fetching them.
     """
-    bal_payload, bal_dbg = _helius_balances(wallet)
+    bal_payload, bal_dbg = balances if balances is not None else _helius_balances(wallet)
     sol_balance = (bal_payload.get("nativeBalance") or 0) / 1e9
     
-    # Get SOL price from Coingecko
-    sol_price = 0.0
-    try:
-        resp = requests.get("https://api.coingecko.com/api/v3/simple/price", 
-                           params={"ids": "solana", "vs_currencies": "usd"}, 
-                           timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            sol_price = _safe_float(data.get("solana", {}).get("usd", 0.0), 0.0)
-            if sol_price > 0:
-                print(f"[NetWorth] SOL price: ${sol_price:.2f}")
-    except Exception as e:
-        print(f"[NetWorth] Coingecko price fetch failed: {str(e)[:100]}")
+    # Get SOL price from the price oracle
+    if sol_price is None:
+        sol_price = spot_sol_price()
+    if sol_price > 0:
+        print(f"[NetWorth] SOL price: ${sol_price:.2f}")
+    else:
+        print("[NetWorth] SOL price unavailable")
     
     total_usd = sol_balance * sol_price if sol_price else 0.0
     
@@ -1317,9 +1396,21 @@ def compute_surveillance_exposure_score(
     }
 
 
-def classify_node_type(addr: str, enhanced_txs: List[dict] = None) -> dict:
+def _has_meme_transfer(tx: dict) -> bool:
+    """True if any token transfer in an Enhanced transaction looks like a memecoin (by mint)."""
+    for transfer in tx.get("tokenTransfers") or []:
+        if not isinstance(transfer, dict):
+            continue
+        mint = transfer.get("mint") or ""
+        if any(symbol in str(mint).upper() for symbol in KNOWN_MEME_SYMBOLS):
+            return True
+    return False
+
+
+def classify_node_type(addr: str, enhanced_txs: List[dict] = None, meme_indicators: Optional[int] = None) -> dict:
     """
     Classify a node type based on address patterns and transaction history.
+    meme_indicators: memecoin transactions among the recent ones, if already counted (else from enhanced_txs).
     Returns: {type, label, color, icon, risk_level}
     """
     # Check if known exchange
@@ -1356,18 +1447,9 @@ def classify_node_type(addr: str, enhanced_txs: List[dict] = None) -> dict:
         }
     
     # Check transaction patterns for memecoin activity
-    if enhanced_txs:
-        meme_indicators = 0
-        for tx in enhanced_txs[:50]:  # Check recent transactions
-            token_transfers = tx.get("tokenTransfers") or []
-            for transfer in token_transfers:
-                if not isinstance(transfer, dict):
-                    continue
-                mint = transfer.get("mint") or ""
-                if any(symbol in str(mint).upper() for symbol in KNOWN_MEME_SYMBOLS):
-                    meme_indicators += 1
-                    break
-        
+    if meme_indicators is None and enhanced_txs:
+        meme_indicators = sum(1 for tx in enhanced_txs[:50] if _has_meme_transfer(tx))  # Check recent transactions
+    if meme_indicators:
         if meme_indicators >= 3:
             return {
                 "type": "memecoin",
@@ -1442,7 +1524,7 @@ def check_sns_domain(wallet: str) -> dict:
         # Try Bonfida SNS reverse lookup
         # Bonfida provides SNS reverse resolution API
         try:
-            resp = requests.get(
+            resp = http_get(
                 f"https://sns-api.bonfida.com/v1/reverse/{wallet}",
                 timeout=5,
                 headers={"Accept": "application/json"}
@@ -1483,47 +1565,70 @@ def get_notable_transactions(wallet: str, tx_details_map: Dict[str, dict], signa
     Identify notable transactions (large transfers) that are often shared publicly.
     Returns top transactions sorted by amount.
     """
-    notable_txs = []
-    
+    notable = NotableTransactions(wallet, limit=50)
     if signatures:
-        for sig_info in signatures[:50]:
-            if not isinstance(sig_info, dict):
-                continue
-            sig = sig_info.get("signature") or sig_info.get("transactionSignature") or ""
-            block_time = sig_info.get("blockTime") or sig_info.get("block_time")
-            if not sig or not block_time:
-                continue
-            
-            # Check if this is a notable transaction (large amounts)
-            tx_details = tx_details_map.get(sig)
-            if not tx_details or not isinstance(tx_details, dict):
-                continue
-            meta = tx_details.get("meta") or {}
-            pre_balances = meta.get("preBalances") or []
-            post_balances = meta.get("postBalances") or []
-            if pre_balances and post_balances:
-                msg = (tx_details.get("transaction") or {}).get("message") or {}
-                keys = msg.get("accountKeys") or []
-                wallet_idx = None
-                for i, k in enumerate(keys):
-                    if isinstance(k, dict):
-                        addr = k.get("pubkey", "")
-                    else:
-                        addr = str(k)
-                    if addr == wallet:
-                        wallet_idx = i
-                        break
-                if wallet_idx is not None and wallet_idx < len(pre_balances) and wallet_idx < len(post_balances):
-                    delta = (post_balances[wallet_idx] - pre_balances[wallet_idx]) / 1e9
-                    if abs(delta) > 1.0:
-                        notable_txs.append({
-                            "signature": sig,
-                            "amount": abs(delta),
-                            "timestamp": block_time,
-                            "type": "large_transfer" if delta > 0 else "large_withdrawal",
-                            "delta": delta
-                        })
-        
+        run_analyzers(signatures, tx_details_map or {}, [notable])
+    return notable.result()
+
+
+def get_notable_transactions_from_enhanced(wallet: str, enhanced_txs: List[dict]) -> dict:
+    """Notable (large SOL) tx from Helius Enhanced nativeTransfers. Same return shape as get_notable_transactions."""
+    notable = NotableTransactions(wallet)
+    run_analyzers(*index_transactions(enhanced_txs), [notable])
+    return notable.result()
+
+
+class NotableTransactions(StreamAnalyzer):
+    """
+    Streaming notable-transaction finder: wallet SOL moves above 1 SOL, from balance deltas
+    (RPC) or net nativeTransfers (Helius Enhanced). result() keeps the 10 largest.
+    """
+
+    def __init__(self, wallet: str, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.wallet = wallet
+        self.found: Dict[str, dict] = {}
+
+    def update(self, sig_info: dict, tx: dict):
+        sig = sig_info.get("signature") or sig_info.get("transactionSignature") or ""
+        block_time = sig_info.get("blockTime") or sig_info.get("block_time")
+        if not sig or not block_time:
+            return
+        delta = self._sol_delta(tx)
+        if delta is not None and abs(delta) > 1.0:
+            self.found[sig] = {
+                "signature": sig,
+                "amount": abs(delta),
+                "timestamp": block_time,
+                "type": "large_transfer" if delta > 0 else "large_withdrawal",
+                "delta": delta
+            }
+
+    def _sol_delta(self, tx: dict) -> Optional[float]:
+        wallet = self.wallet
+        if is_enhanced(tx):
+            sol_in = 0.0
+            sol_out = 0.0
+            for nt in tx.get("nativeTransfers") or []:
+                if not isinstance(nt, dict):
+                    continue
+                fr = nt.get("fromUserAccount") or nt.get("from")
+                to = nt.get("toUserAccount") or nt.get("to")
+                amt = _safe_float(nt.get("amount"), 0.0) / 1e9
+                if to == wallet and fr != wallet:
+                    sol_in += amt
+                elif fr == wallet and to != wallet:
+                    sol_out += amt
+            return sol_in - sol_out
+        rec = as_record(tx)
+        if rec is None or not rec.has_meta:
+            return None
+        lamport_delta = rec.sol_delta(wallet)
+        return lamport_delta / 1e9 if lamport_delta is not None else None
+
+    def result(self) -> dict:
+        order = dict.fromkeys(s.get("signature") or s.get("transactionSignature") for s in self.signatures)
+        notable_txs = [self.found[sig] for sig in order if sig in self.found]
         if notable_txs:
             # Sort by amount, take top 10
             notable_txs.sort(key=lambda x: x["amount"], reverse=True)
@@ -1543,81 +1648,77 @@ def get_notable_transactions(wallet: str, tx_details_map: Dict[str, dict], signa
                     for tx in top_notable
                 ]
             }
-    
-    return {
-        "count": 0,
-        "transactions": []
-    }
-
-
-def get_notable_transactions_from_enhanced(wallet: str, enhanced_txs: List[dict]) -> dict:
-    """Notable (large SOL) tx from Helius Enhanced nativeTransfers. Same return shape as get_notable_transactions."""
-    notable_txs = []
-    for tx in enhanced_txs or []:
-        if not isinstance(tx, dict):
-            continue
-        sig = tx.get("signature") or tx.get("transactionSignature") or ""
-        ts = tx.get("timestamp") or tx.get("blockTime") or 0
-        if not sig or not ts:
-            continue
-        sol_in = 0.0
-        sol_out = 0.0
-        for nt in tx.get("nativeTransfers") or []:
-            if not isinstance(nt, dict):
-                continue
-            fr = nt.get("fromUserAccount") or nt.get("from")
-            to = nt.get("toUserAccount") or nt.get("to")
-            amt = _safe_float(nt.get("amount"), 0.0) / 1e9
-            if to == wallet and fr != wallet:
-                sol_in += amt
-            elif fr == wallet and to != wallet:
-                sol_out += amt
-        delta = sol_in - sol_out
-        if abs(delta) > 1.0:
-            notable_txs.append({
-                "signature": sig,
-                "amount": abs(delta),
-                "timestamp": ts,
-                "type": "large_transfer" if delta > 0 else "large_withdrawal",
-                "delta": delta
-            })
-    if notable_txs:
-        notable_txs.sort(key=lambda x: x["amount"], reverse=True)
-        top = notable_txs[:10]
+        
         return {
-            "count": len(top),
-            "transactions": [
-                {"signature": t["signature"], "amount": f"{t['amount']:.4f} SOL", "amount_raw": t["amount"], "type": t["type"], "timestamp": t["timestamp"], "delta": t["delta"]}
-                for t in top
-            ]
+            "count": 0,
+            "transactions": []
         }
-    return {"count": 0, "transactions": []}
 
 
-def analyze_ego_network(wallet: str, tx_details_map: Dict[str, dict], limit: int = 100) -> dict:
+def analyze_ego_network(wallet: str, tx_details_map: Dict[str, dict], limit: int = 100,
+                        enhanced_txs: Optional[List[dict]] = None) -> dict:
     """
     Analyze ego-network of linked wallets using heuristic inference.
     Returns top 5-15 linked wallets with connection reasons.
+    enhanced_txs: Helius Enhanced transactions already fetched (otherwise fetched here).
     """
     # Try to get Helius enhanced transactions for better parsed data
-    enhanced_txs, _ = helius_get_transactions(wallet, limit=min(limit, 100))
-    
-    # Extract all counterparties from transactions
-    counterparties: Dict[str, dict] = {}  # address -> {count, reasons, timestamps, fees}
-    
-    # First, try using Helius enhanced transactions (better parsed)
-    for tx in enhanced_txs:
-        if not isinstance(tx, dict):
-            continue
-        
+    if enhanced_txs is None:
+        enhanced_txs, _ = helius_get_transactions(wallet, limit=min(limit, 100))
+    else:
+        enhanced_txs = enhanced_txs[:min(limit, 100)]
+    ego = EgoNetwork(wallet)
+    if enhanced_txs:
+        run_analyzers(*index_transactions(enhanced_txs), [ego])
+    elif tx_details_map:
+        # Fallback: use raw transaction data if Helius enhanced transactions aren't available
+        run_analyzers(list(tx_details_map), tx_details_map, [ego])
+    return ego.result()
+
+
+class EgoNetwork(StreamAnalyzer):
+    """
+    Streaming analyze_ego_network: counterparties collected per transaction from Helius Enhanced
+    transfers (or, for RPC transactions, every account plus the wallet's balance delta);
+    result() scores them and builds the graph.
+    """
+
+    def __init__(self, wallet: str, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.wallet = wallet
+        self.counterparties: Dict[int, dict] = {}  # interned address id -> {count, reasons, timestamps, fees}
+        self.meme_signatures: Set[str] = set()
+
+    def _counterparty(self, addr_id: int) -> dict:
+        cp = self.counterparties.get(addr_id)
+        if cp is None:
+            cp = self.counterparties[addr_id] = {
+                "count": 0,
+                "reasons": [],
+                "timestamps": [],
+                "fees": [],
+                "inflows": 0.0,
+                "outflows": 0.0
+            }
+        return cp
+
+    def update(self, sig_info: dict, tx: dict):
+        if is_enhanced(tx):
+            if _has_meme_transfer(tx):
+                self.meme_signatures.add(sig_info.get("signature") or "")
+            self._update_transfers(tx)
+        else:
+            self._update_balances(tx)
+
+    def _update_transfers(self, tx: dict):
+        wallet = self.wallet
         # Get timestamp
         block_time = tx.get("timestamp")
         if not block_time:
-            continue
+            return
         
         # Extract counterparties from native transfers
-        native_transfers = tx.get("nativeTransfers") or []
-        for transfer in native_transfers:
+        for transfer in tx.get("nativeTransfers") or []:
             if not isinstance(transfer, dict):
                 continue
             from_addr = transfer.get("fromUserAccount") or transfer.get("from")
@@ -1630,17 +1731,7 @@ def analyze_ego_network(wallet: str, tx_details_map: Dict[str, dict], limit: int
             # Determine direction relative to target wallet
             if from_addr == wallet and to_addr != wallet:
                 # Wallet sent to counterparty
-                addr = to_addr
-                if addr not in counterparties:
-                    counterparties[addr] = {
-                        "count": 0,
-                        "reasons": [],
-                        "timestamps": [],
-                        "fees": [],
-                        "inflows": 0.0,
-                        "outflows": 0.0
-                    }
-                cp = counterparties[addr]
+                cp = self._counterparty(intern_address(to_addr))
                 cp["count"] += 1
                 cp["timestamps"].append(block_time)
                 cp["outflows"] += amount
@@ -1649,17 +1740,7 @@ def analyze_ego_network(wallet: str, tx_details_map: Dict[str, dict], limit: int
             
             elif to_addr == wallet and from_addr != wallet:
                 # Wallet received from counterparty
-                addr = from_addr
-                if addr not in counterparties:
-                    counterparties[addr] = {
-                        "count": 0,
-                        "reasons": [],
-                        "timestamps": [],
-                        "fees": [],
-                        "inflows": 0.0,
-                        "outflows": 0.0
-                    }
-                cp = counterparties[addr]
+                cp = self._counterparty(intern_address(from_addr))
                 cp["count"] += 1
                 cp["timestamps"].append(block_time)
                 cp["inflows"] += amount
@@ -1667,8 +1748,7 @@ def analyze_ego_network(wallet: str, tx_details_map: Dict[str, dict], limit: int
                     cp["reasons"].append("funding_source")
         
         # Also check token transfers
-        token_transfers = tx.get("tokenTransfers") or []
-        for transfer in token_transfers:
+        for transfer in tx.get("tokenTransfers") or []:
             if not isinstance(transfer, dict):
                 continue
             from_addr = transfer.get("fromUserAccount") or transfer.get("from")
@@ -1679,336 +1759,395 @@ def analyze_ego_network(wallet: str, tx_details_map: Dict[str, dict], limit: int
             
             if from_addr == wallet and to_addr != wallet:
                 addr = to_addr
-                if addr not in counterparties:
-                    counterparties[addr] = {
-                        "count": 0,
-                        "reasons": [],
-                        "timestamps": [],
-                        "fees": [],
-                        "inflows": 0.0,
-                        "outflows": 0.0
-                    }
-                cp = counterparties[addr]
-                cp["count"] += 1
-                cp["timestamps"].append(block_time)
-                if "token_transfer" not in cp["reasons"]:
-                    cp["reasons"].append("token_transfer")
-            
             elif to_addr == wallet and from_addr != wallet:
                 addr = from_addr
-                if addr not in counterparties:
-                    counterparties[addr] = {
-                        "count": 0,
-                        "reasons": [],
-                        "timestamps": [],
-                        "fees": [],
-                        "inflows": 0.0,
-                        "outflows": 0.0
-                    }
-                cp = counterparties[addr]
-                cp["count"] += 1
-                cp["timestamps"].append(block_time)
-                if "token_transfer" not in cp["reasons"]:
-                    cp["reasons"].append("token_transfer")
-    
-    # Fallback: use raw transaction data if Helius enhanced transactions aren't available
-    if not enhanced_txs and tx_details_map:
-        for sig, tx in (tx_details_map or {}).items():
-            if not tx:
-                continue
-            
-            meta = tx.get("meta") or {}
-            msg = (tx.get("transaction") or {}).get("message") or {}
-            keys = msg.get("accountKeys") or []
-            
-            # Extract all account addresses
-            accounts = []
-            for k in keys:
-                if isinstance(k, dict):
-                    addr = k.get("pubkey", "")
-                else:
-                    addr = str(k)
-                if addr and addr != wallet and len(addr) >= 32:  # Valid Solana address
-                    accounts.append(addr)
-            
-            # Get transaction timestamp
-            block_time = meta.get("blockTime")
-            if not block_time:
-                continue
-            
-            # Get fee
-            fee = meta.get("fee") or 0
-            
-            # Analyze pre/post balances to determine direction
-            pre_balances = meta.get("preBalances") or []
-            post_balances = meta.get("postBalances") or []
-            
-            wallet_idx = None
-            for i, k in enumerate(keys):
-                if isinstance(k, dict):
-                    addr = k.get("pubkey", "")
-                else:
-                    addr = str(k)
-                if addr == wallet:
-                    wallet_idx = i
-                    break
-            
-            if wallet_idx is None or wallet_idx >= len(pre_balances) or wallet_idx >= len(post_balances):
+            else:
                 continue
-            
-            wallet_delta = (post_balances[wallet_idx] - pre_balances[wallet_idx]) / 1e9
-            
-            # Track counterparties
-            for addr in set(accounts):  # Deduplicate
-                if addr not in counterparties:
-                    counterparties[addr] = {
-                        "count": 0,
-                        "reasons": [],
-                        "timestamps": [],
-                        "fees": [],
-                        "inflows": 0.0,
-                        "outflows": 0.0
-                    }
-                
-                cp = counterparties[addr]
-                cp["count"] += 1
-                cp["timestamps"].append(block_time)
-                cp["fees"].append(fee)
-                
-                # Determine relationship type
-                if wallet_delta > 0.001:  # Received SOL
-                    cp["inflows"] += wallet_delta
-                    if "funding_source" not in cp["reasons"]:
-                        cp["reasons"].append("funding_source")
-                elif wallet_delta < -0.001:  # Sent SOL
-                    cp["outflows"] += abs(wallet_delta)
-                    if "cashout_target" not in cp["reasons"]:
-                        cp["reasons"].append("cashout_target")
-    
-    # Score and rank counterparties
-    scored: List[Tuple[str, float, dict]] = []
-    
-    for addr, data in counterparties.items():
-        # Lower threshold: need at least 1 interaction (any interaction is a potential link)
-        if data["count"] < 1:
-            continue
-        
-        score = 0.0
-        reasons = []
-        
-        # Base score for any interaction
-        score += data["count"] * 2
+            cp = self._counterparty(intern_address(addr))
+            cp["count"] += 1
+            cp["timestamps"].append(block_time)
+            if "token_transfer" not in cp["reasons"]:
+                cp["reasons"].append("token_transfer")
+
+    def _update_balances(self, tx: dict):
+        wallet = self.wallet
+        rec = as_record(tx)
+        if rec is None or not rec.has_meta:
+            return
         
-        # Funding overlap (lowered threshold)
-        if data["inflows"] > 0.01:  # At least 0.01 SOL received (lowered from 0.1)
-            score += data["inflows"] * 20  # Increased weight
-            if "funding" not in reasons:
-                reasons.append("funding")
-        
-        # Cash-out overlap (lowered threshold)
-        if data["outflows"] > 0.01:  # At least 0.01 SOL sent (lowered from 0.1)
-            score += data["outflows"] * 20  # Increased weight
-            if "cashout" not in reasons:
-                reasons.append("cashout")
-        
-        # Interaction frequency (lowered threshold)
-        if data["count"] >= 2:  # Lowered from 3
-            score += data["count"] * 10  # Increased weight
-            if "repeated" not in reasons:
-                reasons.append("repeated")
+        # Get transaction timestamp
+        block_time = rec.block_time
+        if not block_time:
+            return
         
-        # Timing correlation (transactions close together)
-        if len(data["timestamps"]) >= 2:
-            timestamps_sorted = sorted(data["timestamps"])
-            time_diffs = [timestamps_sorted[i+1] - timestamps_sorted[i] 
-                         for i in range(len(timestamps_sorted)-1)]
-            avg_diff = sum(time_diffs) / len(time_diffs) if time_diffs else float('inf')
-            if avg_diff < 3600:  # Within 1 hour
-                score += 30  # Increased weight
-                if "timing" not in reasons:
-                    reasons.append("timing")
+        # Analyze balance delta to determine direction
+        lamport_delta = rec.sol_delta(wallet)
+        if lamport_delta is None:
+            return
+        wallet_delta = lamport_delta / 1e9
         
-        # Fee similarity (similar fee patterns) - only if we have fee data
-        if len(data["fees"]) >= 2:
-            fees_set = set(data["fees"])
-            if len(fees_set) <= 2:  # Very similar fees
-                score += 15  # Increased weight
-                if "fee_pattern" not in reasons:
-                    reasons.append("fee_pattern")
+        # Track counterparties (every other address in the transaction, minus programs and sysvars)
+        programs = set(rec.program_ids)
+        for addr_id, addr in dict(zip(rec.account_ids, rec.accounts)).items():
+            if addr == wallet or addr in programs or _is_program_account(addr):
+                continue
+            cp = self._counterparty(addr_id)
+            cp["count"] += 1
+            cp["timestamps"].append(block_time)
+            cp["fees"].append(rec.fee)
+            
+            # Determine relationship type
+            if wallet_delta > 0.001:  # Received SOL
+                cp["inflows"] += wallet_delta
+                if "funding_source" not in cp["reasons"]:
+                    cp["reasons"].append("funding_source")
+            elif wallet_delta < -0.001:  # Sent SOL
+                cp["outflows"] += abs(wallet_delta)
+                if "cashout_target" not in cp["reasons"]:
+                    cp["reasons"].append("cashout_target")
+
+    def result(self) -> dict:
+        wallet = self.wallet
+        # Addresses restored for scoring and output
+        counterparties = {address_of(addr_id): cp for addr_id, cp in self.counterparties.items()}
+        # Memecoin activity among the 50 most recent transactions
+        meme_indicators = sum(1 for s in self.signatures[:50] if s.get("signature") in self.meme_signatures)
         
-        # Always include if there's any interaction
-        if score > 0 or data["count"] > 0:
-            # Combine reasons from both sources
-            all_reasons = list(set(data["reasons"] + reasons))
-            scored.append((addr, score, {
-                "reasons": all_reasons[:3],  # Limit to top 3 reasons
-                "interactions": data["count"],
-                "inflows": round(data["inflows"], 4),
-                "outflows": round(data["outflows"], 4)
-            }))
-    
-    # Sort by score and take top 15
-    scored.sort(key=lambda x: x[1], reverse=True)
-    
-    # If no scored links but we have counterparties, include top ones by interaction count
-    if len(scored) == 0 and len(counterparties) > 0:
-        # Fallback: rank by interaction count
-        fallback_scored = []
+        # Score and rank counterparties
+        scored: List[Tuple[str, float, dict]] = []
+
         for addr, data in counterparties.items():
-            fallback_scored.append((addr, data["count"], {
-                "reasons": data["reasons"][:2] if data["reasons"] else ["interaction"],
-                "interactions": data["count"],
-                "inflows": round(data["inflows"], 4),
-                "outflows": round(data["outflows"], 4)
-            }))
-        fallback_scored.sort(key=lambda x: x[1], reverse=True)
-        scored = fallback_scored[:15]
-    
-    top_linked = scored[:15]
-    
-    print(f"[EgoNetwork] Found {len(counterparties)} unique counterparties, {len(scored)} scored, {len(top_linked)} top links")
-    
-    # Build network structure with enhanced metadata
-    target_node_class = classify_node_type(wallet, enhanced_txs)
-    nodes = [{
-        "id": wallet,
-        "label": wallet[:8] + "...",
-        "type": "target",
-        "node_type": target_node_class["type"],
-        "node_label": target_node_class["label"],
-        "color": target_node_class["color"],
-        "icon": target_node_class["icon"],
-        "risk_level": target_node_class["risk_level"]
-    }]
-    
-    edges = []
-    exchanges_found = []
-    repeated_counterparties = []
-    strongest_links = []
-    
-    for addr, score, info in top_linked:
-        # Classify node type
-        node_class = classify_node_type(addr, enhanced_txs)
-        
-        # Calculate edge confidence
-        cp_data = counterparties.get(addr, {})
-        confidence = calculate_edge_confidence(cp_data)
-        
-        # Calculate edge weight (based on interaction count and SOL volume)
-        total_sol = cp_data.get("inflows", 0) + cp_data.get("outflows", 0)
-        edge_weight = min((info["interactions"] * 0.1 + total_sol * 0.5), 1.0)
-        
-        nodes.append({
-            "id": addr,
-            "label": addr[:8] + "...",
-            "type": "linked",
-            "score": round(score, 1),
-            "node_type": node_class["type"],
-            "node_label": node_class["label"],
-            "color": node_class["color"],
-            "icon": node_class["icon"],
-            "risk_level": node_class["risk_level"],
-            "description": node_class["description"]
-        })
-        
-        # Create edge with enhanced metadata
-        reason_str = ", ".join(info["reasons"][:2]) if info["reasons"] else "linked"
-        edge_data = {
-            "source": wallet,
-            "target": addr,
-            "reason": reason_str,
-            "strength": min(score / 50.0, 1.0),  # Normalize to 0-1
-            "confidence": round(confidence, 2),
-            "weight": round(edge_weight, 2),
-            "interactions": info["interactions"],
-            "total_sol": round(total_sol, 4),
-            "inflows": info["inflows"],
-            "outflows": info["outflows"],
-            "has_funding": "funding" in reason_str or "funding_source" in info.get("reasons", []),
-            "has_cashout": "cashout" in reason_str or "cashout_target" in info.get("reasons", []),
-            "has_timing": "timing" in reason_str or "timing" in info.get("reasons", []),
-            "has_repeated": "repeated" in reason_str or "repeated" in info.get("reasons", [])
-        }
-        edges.append(edge_data)
-        
-        # Track for summary
-        if node_class["type"] == "exchange":
-            exchanges_found.append({
-                "address": addr,
-                "label": node_class["label"],
-                "interactions": info["interactions"],
-                "total_sol": round(total_sol, 4)
+            # Lower threshold: need at least 1 interaction (any interaction is a potential link)
+            if data["count"] < 1:
+                continue
+
+            score = 0.0
+            reasons = []
+
+            # Base score for any interaction
+            score += data["count"] * 2
+
+            # Funding overlap (lowered threshold)
+            if data["inflows"] > 0.01:  # At least 0.01 SOL received (lowered from 0.1)
+                score += data["inflows"] * 20  # Increased weight
+                if "funding" not in reasons:
+                    reasons.append("funding")
+
+            # Cash-out overlap (lowered threshold)
+            if data["outflows"] > 0.01:  # At least 0.01 SOL sent (lowered from 0.1)
+                score += data["outflows"] * 20  # Increased weight
+                if "cashout" not in reasons:
+                    reasons.append("cashout")
+
+            # Interaction frequency (lowered threshold)
+            if data["count"] >= 2:  # Lowered from 3
+                score += data["count"] * 10  # Increased weight
+                if "repeated" not in reasons:
+                    reasons.append("repeated")
+
+            # Timing correlation (transactions close together)
+            if len(data["timestamps"]) >= 2:
+                timestamps_sorted = sorted(data["timestamps"])
+                time_diffs = [timestamps_sorted[i+1] - timestamps_sorted[i] 
+                             for i in range(len(timestamps_sorted)-1)]
+                avg_diff = sum(time_diffs) / len(time_diffs) if time_diffs else float('inf')
+                if avg_diff < 3600:  # Within 1 hour
+                    score += 30  # Increased weight
+                    if "timing" not in reasons:
+                        reasons.append("timing")
+
+            # Fee similarity (similar fee patterns) - only if we have fee data
+            if len(data["fees"]) >= 2:
+                fees_set = set(data["fees"])
+                if len(fees_set) <= 2:  # Very similar fees
+                    score += 15  # Increased weight
+                    if "fee_pattern" not in reasons:
+                        reasons.append("fee_pattern")
+
+            # Always include if there's any interaction
+            if score > 0 or data["count"] > 0:
+                # Combine reasons from both sources
+                all_reasons = list(set(data["reasons"] + reasons))
+                scored.append((addr, score, {
+                    "reasons": all_reasons[:3],  # Limit to top 3 reasons
+                    "interactions": data["count"],
+                    "inflows": round(data["inflows"], 4),
+                    "outflows": round(data["outflows"], 4)
+                }))
+
+        # Sort by score and take top 15
+        scored.sort(key=lambda x: x[1], reverse=True)
+
+        # If no scored links but we have counterparties, include top ones by interaction count
+        if len(scored) == 0 and len(counterparties) > 0:
+            # Fallback: rank by interaction count
+            fallback_scored = []
+            for addr, data in counterparties.items():
+                fallback_scored.append((addr, data["count"], {
+                    "reasons": data["reasons"][:2] if data["reasons"] else ["interaction"],
+                    "interactions": data["count"],
+                    "inflows": round(data["inflows"], 4),
+                    "outflows": round(data["outflows"], 4)
+                }))
+            fallback_scored.sort(key=lambda x: x[1], reverse=True)
+            scored = fallback_scored[:15]
+
+        top_linked = scored[:15]
+
+        print(f"[EgoNetwork] Found {len(counterparties)} unique counterparties, {len(scored)} scored, {len(top_linked)} top links")
+
+        # Build network structure with enhanced metadata
+        target_node_class = classify_node_type(wallet, meme_indicators=meme_indicators)
+        nodes = [{
+            "id": wallet,
+            "label": wallet[:8] + "...",
+            "type": "target",
+            "node_type": target_node_class["type"],
+            "node_label": target_node_class["label"],
+            "color": target_node_class["color"],
+            "icon": target_node_class["icon"],
+            "risk_level": target_node_class["risk_level"]
+        }]
+
+        edges = []
+        exchanges_found = []
+        repeated_counterparties = []
+        strongest_links = []
+
+        for addr, score, info in top_linked:
+            # Classify node type
+            node_class = classify_node_type(addr, meme_indicators=meme_indicators)
+
+            # Calculate edge confidence
+            cp_data = counterparties.get(addr, {})
+            confidence = calculate_edge_confidence(cp_data)
+
+            # Calculate edge weight (based on interaction count and SOL volume)
+            total_sol = cp_data.get("inflows", 0) + cp_data.get("outflows", 0)
+            edge_weight = min((info["interactions"] * 0.1 + total_sol * 0.5), 1.0)
+
+            nodes.append({
+                "id": addr,
+                "label": addr[:8] + "...",
+                "type": "linked",
+                "score": round(score, 1),
+                "node_type": node_class["type"],
+                "node_label": node_class["label"],
+                "color": node_class["color"],
+                "icon": node_class["icon"],
+                "risk_level": node_class["risk_level"],
+                "description": node_class["description"]
             })
-        
-        if info["interactions"] >= 3:
-            repeated_counterparties.append({
+
+            # Create edge with enhanced metadata
+            reason_str = ", ".join(info["reasons"][:2]) if info["reasons"] else "linked"
+            edge_data = {
+                "source": wallet,
+                "target": addr,
+                "reason": reason_str,
+                "strength": min(score / 50.0, 1.0),  # Normalize to 0-1
+                "confidence": round(confidence, 2),
+                "weight": round(edge_weight, 2),
+                "interactions": info["interactions"],
+                "total_sol": round(total_sol, 4),
+                "inflows": info["inflows"],
+                "outflows": info["outflows"],
+                "has_funding": "funding" in reason_str or "funding_source" in info.get("reasons", []),
+                "has_cashout": "cashout" in reason_str or "cashout_target" in info.get("reasons", []),
+                "has_timing": "timing" in reason_str or "timing" in info.get("reasons", []),
+                "has_repeated": "repeated" in reason_str or "repeated" in info.get("reasons", [])
+            }
+            edges.append(edge_data)
+
+            # Track for summary
+            if node_class["type"] == "exchange":
+                exchanges_found.append({
+                    "address": addr,
+                    "label": node_class["label"],
+                    "interactions": info["interactions"],
+                    "total_sol": round(total_sol, 4)
+                })
+
+            if info["interactions"] >= 3:
+                repeated_counterparties.append({
+                    "address": addr,
+                    "label": node_class["label"],
+                    "interactions": info["interactions"],
+                    "confidence": round(confidence, 2)
+                })
+
+            strongest_links.append({
                 "address": addr,
                 "label": node_class["label"],
-                "interactions": info["interactions"],
-                "confidence": round(confidence, 2)
+                "score": round(score, 1),
+                "confidence": round(confidence, 2),
+                "reasons": reason_str
             })
-        
-        strongest_links.append({
-            "address": addr,
-            "label": node_class["label"],
-            "score": round(score, 1),
-            "confidence": round(confidence, 2),
-            "reasons": reason_str
-        })
-    
-    # Sort strongest links
-    strongest_links.sort(key=lambda x: x["score"], reverse=True)
-    
-    # Calculate risk highlights
-    risk_highlights = []
-    if exchanges_found:
-        risk_highlights.append(f"{len(exchanges_found)} exchange(s) detected (KYC risk)")
-    if len(repeated_counterparties) >= 5:
-        risk_highlights.append(f"{len(repeated_counterparties)} repeated counterparties (linkability risk)")
-    high_confidence_links = [e for e in edges if e["confidence"] >= 0.7]
-    if high_confidence_links:
-        risk_highlights.append(f"{len(high_confidence_links)} high-confidence links (≥70%)")
-    
-    return {
-        "nodes": nodes,
-        "edges": edges,
-        "total_links": len(top_linked),
-        "summary": {
-            "strongest_links": strongest_links[:5],
-            "exchanges": exchanges_found,
-            "repeated_counterparties": repeated_counterparties[:10],
-            "risk_highlights": risk_highlights
-        },
-        "note": "Heuristic inference - similar methods used by surveillance firms to link wallets",
-        "debug": {
-            "counterparties_found": len(counterparties),
-            "scored_count": len(scored)
+
+        # Sort strongest links
+        strongest_links.sort(key=lambda x: x["score"], reverse=True)
+
+        # Calculate risk highlights
+        risk_highlights = []
+        if exchanges_found:
+            risk_highlights.append(f"{len(exchanges_found)} exchange(s) detected (KYC risk)")
+        if len(repeated_counterparties) >= 5:
+            risk_highlights.append(f"{len(repeated_counterparties)} repeated counterparties (linkability risk)")
+        high_confidence_links = [e for e in edges if e["confidence"] >= 0.7]
+        if high_confidence_links:
+            risk_highlights.append(f"{len(high_confidence_links)} high-confidence links (≥70%)")
+
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "total_links": len(top_linked),
+            "summary": {
+                "strongest_links": strongest_links[:5],
+                "exchanges": exchanges_found,
+                "repeated_counterparties": repeated_counterparties[:10],
+                "risk_highlights": risk_highlights
+            },
+            "note": "Heuristic inference - similar methods used by surveillance firms to link wallets",
+            "debug": {
+                "counterparties_found": len(counterparties),
+                "scored_count": len(scored)
+            }
         }
-    }
 
 
-def _worker_mempool(wallet: str, limit: int, use_helius_primary: bool, enhanced_all: List[dict],
-                   signatures: list, tx_details_map: dict) -> Tuple[str, dict]:
+# ═══════════════════════════════════════════════════════════════════════════════
+# Request context (data shared by the /analyze-wallet workers)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class AnalysisContext:
+    """
+    Data for one /analyze-wallet request. Each source is loaded at most once, on first use,
+    and shared by every worker; the request's own fetch results are handed in with provide().
+    Sources: enhanced (Helius Enhanced txs), tx_details (RPC transactions by signature),
+    rpc_subset (RPC details for the first signatures when only Enhanced data was fetched),
+    balances (Helius /balances, which also carries token symbols/decimals), portfolio (Jupiter),
+    sol_price (SOL/USD) and prices (mint -> USD for SOL and every held mint, only needed when the
+    portfolio falls back to Helius). report() lists what was fetched,
+    what was provided, and how often each source was served.
+    """
+
+    def __init__(self, wallet: str, limit: int, use_helius_primary: bool):
+        self.wallet = wallet
+        self.limit = limit
+        self.use_helius_primary = use_helius_primary
+        self.signatures: list = []
+        self.enhanced_debug: dict = {}
+        self._values: Dict[str, Any] = {}
+        self._errors: Dict[str, BaseException] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._sources: Dict[str, dict] = {}
+        self._workers: Dict[str, List[str]] = {}
+        self._loaders = {
+            "enhanced": self._load_enhanced,
+            "tx_details": lambda: {},
+            "rpc_subset": self._load_rpc_subset,
+            "balances": lambda: _helius_balances(self.wallet),
+            "portfolio": lambda: get_jupiter_portfolio(self.wallet),
+            "sol_price": spot_sol_price,
+            "prices": self._load_prices,
+        }
+
+    def provide(self, name: str, value: Any):
+        """Hand in data the request already has (served without a fetch)."""
+        with self._lock:
+            self._values[name] = value
+            self._sources[name] = {"origin": "request", "seconds": 0.0, "served": 0}
+
+    def get(self, name: str) -> Any:
+        """Value of a source, loading it on first use (concurrent callers wait for one load)."""
+        with self._lock:
+            if name not in self._values and name not in self._errors:
+                lock = self._locks.setdefault(name, threading.Lock())
+            else:
+                lock = None
+        if lock is not None:
+            with lock:
+                if name not in self._values and name not in self._errors:
+                    t = time.perf_counter()
+                    try:
+                        value = self._loaders[name]()
+                    except Exception as e:
+                        value = None
+                        with self._lock:
+                            self._errors[name] = e
+                    with self._lock:
+                        if name not in self._errors:
+                            self._values[name] = value
+                        self._sources[name] = {"origin": "fetched", "seconds": round(time.perf_counter() - t, 3),
+                                               "served": 0}
+        with self._lock:
+            self._sources[name]["served"] += 1
+            if name in self._errors:
+                raise self._errors[name]
+            return self._values[name]
+
+    def declare(self, worker: str, needs: Iterable[str]):
+        self._workers[worker] = list(needs)
+
+    def report(self) -> dict:
+        """What this request fetched, what it was handed, and how often each source was reused."""
+        with self._lock:
+            sources = {name: dict(info) for name, info in self._sources.items()}
+            for name, err in self._errors.items():
+                sources[name]["error"] = str(err)[:120]
+        return {
+            "sources": sources,
+            "workers": dict(self._workers),
+            "fetched": sorted(n for n, i in sources.items() if i["origin"] == "fetched"),
+            "reused": sum(max(0, i["served"] - 1) for i in sources.values()),
+        }
+
+    # ─── Loaders ─────────────────────────────────────────────────────────────
+
+    def _load_enhanced(self) -> List[dict]:
+        if not self.use_helius_primary:
+            return []
+        enhanced, self.enhanced_debug = helius_get_transactions(self.wallet, limit=self.limit)
+        return enhanced or []
+
+    def _load_rpc_subset(self) -> Dict[str, dict]:
+        subset = []
+        for s in (self.signatures or [])[:25]:  # fewer RPC calls for faster response
+            if isinstance(s, dict):
+                s = s.get("signature") or s.get("transactionSignature")
+            if isinstance(s, str) and s:
+                subset.append(s)
+        rpc_map = fetch_transactions_parallel(subset) if subset else {}
+        return {k: v for k, v in (rpc_map or {}).items() if v is not None}
+
+    def _load_prices(self) -> Dict[str, float]:
+        payload, _ = self.get("balances")
+        mints = [t.get("mint") for t in payload.get("tokens") or [] if isinstance(t, dict) and t.get("mint")]
+        return spot_prices([WSOL_MINT] + mints)
+
+
+def _needs(*sources: str):
+    """Declare the AnalysisContext sources a worker reads."""
+    def mark(fn):
+        fn.needs = sources
+        return fn
+    return mark
+
+
+@_needs("tx_details", "enhanced", "rpc_subset")
+def _worker_mempool(ctx: AnalysisContext) -> Tuple[str, dict]:
     """Run mempool/execution profile analysis. Returns ('mempool_data', result)."""
     try:
+        signatures = ctx.signatures or []
         mempool_limit = min(50, len(signatures))
-        mempool_tx_map = dict(tx_details_map) if tx_details_map else {}
-        if use_helius_primary and enhanced_all and not tx_details_map:
-            subset_n = min(25, len(signatures))  # fewer RPC calls for faster response
-            sig_strings = []
-            for s in (signatures or [])[:subset_n]:
-                if isinstance(s, dict):
-                    x = s.get("signature") or s.get("transactionSignature")
-                    if x:
-                        sig_strings.append(x)
-                elif isinstance(s, str):
-                    sig_strings.append(s)
-            rpc_map = fetch_transactions_parallel(sig_strings, max_workers=2) if sig_strings else {}
-            mempool_tx_map = {k: v for k, v in (rpc_map or {}).items() if v is not None}
-            mempool_limit = subset_n
+        mempool_tx_map = dict(ctx.get("tx_details") or {})
+        if ctx.use_helius_primary and ctx.get("enhanced") and not mempool_tx_map:
+            mempool_tx_map = ctx.get("rpc_subset")
+            mempool_limit = min(25, len(signatures))
         data = analyze_wallet_execution_profiles(
-            wallet, limit=mempool_limit,
-            signatures=(signatures or [])[:mempool_limit],
+            ctx.wallet, limit=mempool_limit,
+            signatures=signatures[:mempool_limit],
             tx_details_map=mempool_tx_map
         )
         return ("mempool_data", data if isinstance(data, dict) else {})
@@ -2016,44 +2155,48 @@ def _worker_mempool(wallet: str, limit: int, use_helius_primary: bool, enhanced_
         return ("mempool_data", {})
 
 
-def _worker_opsec(wallet: str, limit: int, use_helius_primary: bool, enhanced_all: List[dict],
-                  signatures: list, tx_details_map: dict) -> Tuple[str, dict]:
+@_needs("enhanced", "tx_details")
+def _worker_opsec(ctx: AnalysisContext) -> Tuple[str, dict]:
     """Run opsec failure analysis. Returns ('opsec_data', result)."""
     fallback = {
-        "wallet": wallet,
-        "total_transactions": len(signatures or []),
+        "wallet": ctx.wallet,
+        "total_transactions": len(ctx.signatures or []),
         "critical_leaks": [], "funding_sources": [], "withdrawal_targets": [],
         "memo_usage": 0, "exposure_score": 0, "cumulative_exposure": "UNKNOWN",
         "weakest_link": "Opsec analysis unavailable due to data type mismatch."
     }
     try:
-        if use_helius_primary and enhanced_all:
-            data = analyze_opsec_failures_from_enhanced(wallet, enhanced_all)
+        enhanced = ctx.get("enhanced")
+        if ctx.use_helius_primary and enhanced:
+            data = analyze_opsec_failures_from_enhanced(ctx.wallet, enhanced)
         else:
             data = analyze_opsec_failures(
-                wallet, limit=min(80, limit),
-                signatures=signatures or [],
-                tx_details_map=tx_details_map or {}
+                ctx.wallet, limit=min(80, ctx.limit),
+                signatures=ctx.signatures or [],
+                tx_details_map=ctx.get("tx_details") or {}
             )
         return ("opsec_data", data if isinstance(data, dict) else fallback)
     except (AttributeError, TypeError, Exception):
         return ("opsec_data", fallback)
 
 
-def _worker_portfolio(wallet: str) -> Tuple[str, Tuple[dict, dict, dict]]:
+@_needs("portfolio", "balances", "prices")
+def _worker_portfolio(ctx: AnalysisContext) -> Tuple[str, Tuple[dict, dict, dict]]:
     """Run portfolio fetch + summary. Returns ('portfolio', (portfolio_data, portfolio_summary, portfolio_debug))."""
     portfolio_data = {"tokens": [], "totalValue": 0}
     portfolio_summary = {}
     portfolio_debug = {"source": "none"}
     try:
-        portfolio_resp = get_jupiter_portfolio(wallet)
+        portfolio_resp = ctx.get("portfolio")
         portfolio_data = portfolio_resp if isinstance(portfolio_resp, dict) else {"tokens": [], "totalValue": 0}
         tokens = portfolio_data.get("tokens", []) if isinstance(portfolio_data, dict) else []
         portfolio_summary = summarize_portfolio(tokens, portfolio_data.get("totalValue", 0))
         if portfolio_summary:
             portfolio_debug = {"source": "jupiter", "status": "ok"}
         else:
-            helius_summary, helius_status = helius_portfolio_summary(wallet)
+            balances = ctx.get("balances")
+            prices = ctx.get("prices") if not balances[1].get("error") else None
+            helius_summary, helius_status = helius_portfolio_summary(ctx.wallet, balances=balances, prices=prices)
             if helius_summary:
                 portfolio_summary = helius_summary
                 portfolio_debug = {"source": "helius", **(helius_status or {})}
@@ -2070,67 +2213,157 @@ def _worker_portfolio(wallet: str) -> Tuple[str, Tuple[dict, dict, dict]]:
     return ("portfolio", (portfolio_data, portfolio_summary, portfolio_debug))
 
 
-def _worker_networth(wallet: str) -> Tuple[str, dict]:
+@_needs("balances", "sol_price")
+def _worker_networth(ctx: AnalysisContext) -> Tuple[str, dict]:
     """Run net worth breakdown. Returns ('networth', result)."""
     try:
-        return ("networth", compute_networth_breakdown(wallet))
+        return ("networth", compute_networth_breakdown(ctx.wallet, balances=ctx.get("balances"), sol_price=ctx.get("sol_price")))
     except Exception:
         return ("networth", {})
 
 
-def _worker_swap_pnl_income(wallet: str, enhanced_all: List[dict], use_helius_primary: bool,
-                            tx_details_map: dict, limit: int) -> Tuple[str, Tuple[list, dict, dict, dict]]:
-    """Run swap detection, PnL, income. Returns ('swap_pnl_income', (swap_events, trading_pnl, income_sources, all_dbg))."""
-    all_dbg: dict = {}
-    enhanced = enhanced_all or []
-    if not enhanced and use_helius_primary:
-        enhanced, all_dbg = helius_get_transactions(wallet, limit=min(max(limit, 100), 100))
-    swap_events = detect_swaps_from_helius(enhanced)
-    if not swap_events:
-        if use_helius_primary and enhanced:
-            swap_events = detect_swaps_delta_from_enhanced(wallet, enhanced)
+@_needs("enhanced", "tx_details")
+def _worker_swap_pnl_income(ctx: AnalysisContext,
+                            streamed: Optional[Dict[str, Any]] = None) -> Tuple[str, Tuple[list, dict, dict, dict]]:
+    """
+    Run swap detection, PnL, income. Returns ('swap_pnl_income', (swap_events, trading_pnl, income_sources, all_dbg)).
+    streamed: results of the single-pass analyzers; swaps (swap_events, swap_method) and income_sources
+    found there are used instead of scanning the transactions again, and delta_swap_events stands in
+    for the RPC transactions when no Helius source has swaps.
+    """
+    streamed = streamed or {}
+    enhanced = ctx.get("enhanced")
+    all_dbg: dict = dict(ctx.enhanced_debug or {})
+    if "swap_events" in streamed:
+        swap_events = streamed["swap_events"]
+        all_dbg["swap_method"] = streamed.get("swap_method", "delta_based")
+    else:
+        swap_events = detect_swaps_from_helius(enhanced)
+        if swap_events:
+            all_dbg["swap_method"] = "helius_parsed"
+        elif ctx.use_helius_primary and enhanced:
+            swap_events = detect_swaps_delta_from_enhanced(ctx.wallet, enhanced)
             all_dbg["swap_method"] = "enhanced_delta"
+        elif "delta_swap_events" in streamed:
+            swap_events = streamed["delta_swap_events"]
+            all_dbg["swap_method"] = "delta_based"
         else:
-            swap_events = detect_swaps_delta(wallet, tx_details_map or {})
+            swap_events = detect_swaps_delta(ctx.wallet, ctx.get("tx_details") or {})
             all_dbg["swap_method"] = "delta_based"
-    else:
-        all_dbg["swap_method"] = "helius_parsed"
     trading_pnl = compute_token_trading_pnl_fifo(swap_events)
     trading_pnl.setdefault("debug", {})["helius_swaps"] = all_dbg
     trading_pnl.setdefault("debug", {})["swaps_count"] = len(swap_events)
-    income_sources = compute_income_sources_from_enhanced(wallet, enhanced)
+    income_sources = streamed.get("income_sources") or compute_income_sources_from_enhanced(ctx.wallet, enhanced)
     income_sources.setdefault("debug", all_dbg)
     income_sources["debug"]["tx_count"] = len(enhanced)
     return ("swap_pnl_income", (swap_events, trading_pnl, income_sources, all_dbg))
 
 
-def _worker_ego_network(wallet: str, tx_details_map: dict, limit: int) -> Tuple[str, dict]:
+@_needs("enhanced", "tx_details")
+def _worker_ego_network(ctx: AnalysisContext) -> Tuple[str, dict]:
     """Run ego network analysis. Returns ('ego_network', result)."""
     try:
-        return ("ego_network", analyze_ego_network(wallet, tx_details_map or {}, limit=min(100, limit)))
+        enhanced = ctx.get("enhanced") if ctx.use_helius_primary else None
+        return ("ego_network", analyze_ego_network(ctx.wallet, ctx.get("tx_details") or {}, limit=min(100, ctx.limit),
+                                                   enhanced_txs=enhanced))
     except Exception:
         return ("ego_network", {})
 
 
-def _worker_notable(wallet: str, use_helius_primary: bool, enhanced_all: List[dict],
-                    tx_details_map: dict, signatures: list) -> Tuple[str, dict]:
+@_needs("enhanced", "tx_details")
+def _worker_notable(ctx: AnalysisContext) -> Tuple[str, dict]:
     """Run notable transactions. Returns ('notable_transactions', result)."""
     try:
-        if use_helius_primary and enhanced_all:
-            return ("notable_transactions", get_notable_transactions_from_enhanced(wallet, enhanced_all))
-        return ("notable_transactions", get_notable_transactions(wallet, tx_details_map or {}, signatures or []))
+        enhanced = ctx.get("enhanced")
+        if ctx.use_helius_primary and enhanced:
+            return ("notable_transactions", get_notable_transactions_from_enhanced(ctx.wallet, enhanced))
+        return ("notable_transactions", get_notable_transactions(ctx.wallet, ctx.get("tx_details") or {}, ctx.signatures or []))
     except Exception:
         return ("notable_transactions", {})
 
 
+def _analyze_wallet_streaming(wallet: str, limit: int, with_swaps: bool) -> Tuple[pd.DataFrame, list, dict, list, Dict[str, Any]]:
+    """
+    RPC path: run the per-transaction analyzers while transactions are still arriving, so their
+    results are ready when the fetch ends. Returns analyze_wallet's tuple plus the finished results
+    (keys: activity, reaction, mempool_data, opsec_data, notable_transactions, ego_network and,
+    with with_swaps, swap_events / swap_method; without it, delta_swap_events for when no Helius
+    source has swaps). Raw transactions are not kept: the list and map come back empty.
+    """
+    activity = ActivityCounters()
+    reaction = ReactionFlags(wallet)
+    execution = ExecutionProfileTally(wallet, limit=50)
+    opsec = OpsecCounters(wallet, limit=min(80, limit))
+    notable = NotableTransactions(wallet, limit=50)
+    ego = EgoNetwork(wallet)
+    analyzers: List[StreamAnalyzer] = [activity, reaction, execution, opsec, notable, ego]
+    swaps = SwapDetector(wallet)
+    analyzers.append(swaps)
+    df, tx_details_list, tx_details_map, signatures = analyze_wallet_solana(wallet, limit=limit, analyzers=analyzers,
+                                                                            keep_details=False)
+    streamed: Dict[str, Any] = {}
+    if not df.empty:
+        streamed = {
+            "activity": activity.result(),
+            "reaction": reaction.result(),
+            "mempool_data": execution.result(),
+            "opsec_data": opsec.result(),
+            "notable_transactions": notable.result(),
+            "ego_network": ego.result(),
+        }
+        if with_swaps:
+            streamed["swap_events"] = swaps.result()
+            streamed["swap_method"] = swaps.method
+        else:
+            streamed["delta_swap_events"] = swaps.result()
+    return df, tx_details_list, tx_details_map, signatures, streamed
+
+
+def _analyze_enhanced_single_pass(wallet: str, enhanced_all: List[dict], limit: int) -> Dict[str, Any]:
+    """
+    Helius path: one traversal of the Enhanced transactions feeds every per-transaction analyzer
+    (same result keys as _analyze_wallet_streaming, plus income_sources).
+    """
+    signatures, tx_map = index_transactions(enhanced_all)
+    reaction = ReactionFlags(wallet)
+    opsec = OpsecCounters(wallet)
+    notable = NotableTransactions(wallet)
+    ego = EgoNetwork(wallet, limit=min(100, limit))
+    swaps = SwapDetector(wallet)
+    income = IncomeSources(wallet)
+    try:
+        run_analyzers(signatures, tx_map, [reaction, opsec, notable, ego, swaps, income])
+        return {
+            "reaction": reaction.result(),
+            "opsec_data": opsec.result(),
+            "notable_transactions": notable.result(),
+            "ego_network": ego.result(),
+            "swap_events": swaps.result(),
+            "swap_method": swaps.method,
+            "income_sources": income.result(),
+        }
+    except Exception:
+        # Malformed payloads: leave each analysis to its own worker (which degrades per analysis)
+        traceback.print_exc()
+        return {}
+
+
 @app.post("/analyze-wallet")
 def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
     """
     Comprehensive Solana wallet analysis for surveillance exposure detection.
     Built for encrypt.trade hackathon.
-    On Vercel, use Helius Enhanced Transactions for main tx list (1 API call) to avoid RPC
+    On Vercel, use Helius Enhanced Transactions for main tx list (1 API call per 100 txs) to avoid RPC
     rate limits; local uses RPC (fetch_signatures + getTransaction) for full meta/compute data.
+    With LEAKLENS_FETCH_ENGINE=async every transaction fetch of the request runs on one event loop.
+    Transaction records and interned addresses are shared by the request's analyzers and
+    released when it returns.
     """
+    with fetch_scope(), address_scope(), record_scope():
+        return _analyze_wallet_comprehensive(request)
+
+
+def _analyze_wallet_comprehensive(request: WalletAnalysisRequest) -> dict:
     try:
         # Ensure request.wallet is a string
         if not isinstance(request.wallet, str):
@@ -2143,15 +2376,31 @@ def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
         limit = request.limit or 100
         enhanced_all: List[dict] = []
         all_dbg: dict = {}
+        streamed: Dict[str, Any] = {}
 
         if use_helius_primary:
-            enhanced_all, all_dbg = helius_get_transactions(request.wallet, limit=min(limit, 100))
-            if enhanced_all and isinstance(enhanced_all, list):
-                df, tx_details_list, tx_details_map, signatures = _build_df_and_lists_from_helius_enhanced(enhanced_all)
+            # Known wallet: fetch only signatures newer than the stored watermark
+            synced, sync_dbg = helius_synced_transactions(request.wallet, limit=limit)
+            if synced:
+                enhanced_all.extend(synced)
+                all_dbg.update(sync_dbg)
+                df, tx_details_list, tx_details_map, signatures = _build_df_and_lists_from_helius_enhanced(synced)
+            else:
+                # Parse each Enhanced page while the next one is in flight
+                def _stream_pages():
+                    for page in iter_helius_transaction_pages(request.wallet, limit=limit, debug=all_dbg):
+                        enhanced_all.extend(page)
+                        yield from page
+
+                df, tx_details_list, tx_details_map, signatures = _build_df_and_lists_from_helius_enhanced(_stream_pages())
+                if enhanced_all and not (all_dbg.get("partial_error") or all_dbg.get("truncated")):
+                    record_enhanced_history(request.wallet, enhanced_all, limit)
+            if enhanced_all:
+                streamed = _analyze_enhanced_single_pass(request.wallet, enhanced_all, limit)
             else:
-                df, tx_details_list, tx_details_map, signatures = analyze_wallet_solana(request.wallet, limit=limit)
+                df, tx_details_list, tx_details_map, signatures, streamed = _analyze_wallet_streaming(request.wallet, limit, with_swaps=False)
         else:
-            df, tx_details_list, tx_details_map, signatures = analyze_wallet_solana(request.wallet, limit=limit)
+            df, tx_details_list, tx_details_map, signatures, streamed = _analyze_wallet_streaming(request.wallet, limit, with_swaps=True)
         
         # Validate return types
         if not isinstance(tx_details_list, list):
@@ -2166,19 +2415,21 @@ def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
         if df.empty:
             raise HTTPException(status_code=404, detail="No transactions found for this wallet")
         
-        # Calculate hourly and daily counts
-        hourly_counts = [0] * 24
-        daily_counts = [0] * 7
-        for _, row in df.iterrows():
-            hourly_counts[row["hour"]] += 1
-            daily_counts[row["day_of_week"]] += 1
+        # Activity histograms, complexity buckets and fail rate in one vectorized pass
+        hist = activity_histograms(df)
+
+        # Calculate hourly and daily counts (already tallied while streaming on the RPC path)
+        if "activity" in streamed:
+            hourly_counts, daily_counts = streamed["activity"]
+        else:
+            hourly_counts, daily_counts = hist.hourly, hist.daily
         
         # Detect sleep window
         sleep = detect_sleep_window_solana(hourly_counts)
         
-        # Analyze reaction speed for bot detection
+        # Analyze reaction speed for bot detection (already paired in the single pass when streamed)
         try:
-            reaction = analyze_reaction_speed_solana(request.wallet, tx_details_list)
+            reaction = streamed["reaction"] if "reaction" in streamed else analyze_reaction_speed_solana(request.wallet, tx_details_list)
         except (AttributeError, TypeError) as e:
             print("\n" + "="*60)
             print("ATTRIBUTE/TYPE ERROR IN analyze_reaction_speed – using default reaction data")
@@ -2191,23 +2442,41 @@ def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
         probs = calculate_probabilities_solana(df, hourly_counts, daily_counts, sleep)
         
         # Run independent I/O- and CPU-heavy steps in parallel for faster response
-        parallel_results: Dict[str, Any] = {}
+        # Analyses fed by the single pass over the transactions are already done
+        parallel_results: Dict[str, Any] = {
+            k: streamed[k] for k in ("mempool_data", "opsec_data", "ego_network", "notable_transactions") if k in streamed
+        }
+        # Workers share one request context: each upstream source is fetched at most once
+        ctx = AnalysisContext(request.wallet, limit, use_helius_primary)
+        ctx.signatures = signatures
+        ctx.provide("tx_details", tx_details_map)
+        if enhanced_all or not use_helius_primary:
+            ctx.provide("enhanced", enhanced_all)
+        workers = [_worker_portfolio, _worker_networth]
+        if "ego_network" not in parallel_results:
+            workers.append(_worker_ego_network)
+        if "notable_transactions" not in parallel_results:
+            workers.append(_worker_notable)
+        if "mempool_data" not in parallel_results:
+            workers.append(_worker_mempool)
+        if "opsec_data" not in parallel_results:
+            workers.append(_worker_opsec)
+        for worker in [_worker_swap_pnl_income] + workers:
+            ctx.declare(worker.__name__.replace("_worker_", ""), worker.needs)
         with ThreadPoolExecutor(max_workers=7) as executor:
-            futures = [
-                executor.submit(_worker_mempool, request.wallet, limit, use_helius_primary, enhanced_all, signatures, tx_details_map),
-                executor.submit(_worker_opsec, request.wallet, limit, use_helius_primary, enhanced_all, signatures, tx_details_map),
-                executor.submit(_worker_portfolio, request.wallet),
-                executor.submit(_worker_networth, request.wallet),
-                executor.submit(_worker_swap_pnl_income, request.wallet, enhanced_all, use_helius_primary, tx_details_map, limit),
-                executor.submit(_worker_ego_network, request.wallet, tx_details_map, limit),
-                executor.submit(_worker_notable, request.wallet, use_helius_primary, enhanced_all, tx_details_map, signatures),
-            ]
+            # Each worker runs in a copy of the request context (shares the request's fetch engine)
+            futures = [executor.submit(copy_context().run, _worker_swap_pnl_income, ctx, streamed)]
+            futures += [executor.submit(copy_context().run, worker, ctx) for worker in workers]
             for fut in as_completed(futures):
                 try:
                     key, value = fut.result()
                     parallel_results[key] = value
                 except Exception:
                     pass
+        data_sources = ctx.report()
+        # Addresses interned by this request (its own table, dropped when it returns)
+        data_sources["address_table"] = address_table().stats()
+        print(f"[Context] {request.wallet[:8]}... fetched {data_sources['fetched']}, reused {data_sources['reused']}x")
         mempool_data = parallel_results.get("mempool_data", {})
         opsec_data = parallel_results.get("opsec_data", {})
         if not isinstance(opsec_data, dict):
@@ -2220,31 +2489,15 @@ def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
         ego_network = parallel_results.get("ego_network", {})
         notable_transactions = parallel_results.get("notable_transactions", {})
         
-        # Prepare transaction complexity data
-        complexity_data = []
-        for _, row in df.iterrows():
-            complexity_value = row.get(compute_unit_field, 0)
-            
-            # Solana compute units classification
-            if complexity_value > 300000:
-                tx_type = "Complex"
-            elif complexity_value > 150000:
-                tx_type = "Jito Bundle"
-            else:
-                tx_type = "Standard"
-            
-            complexity_data.append({
-                "hour": int(row["hour"]),
-                compute_unit_field: int(complexity_value),
-                "type": tx_type
-            })
+        # Prepare transaction complexity data (only the first 200 are returned)
+        complexity_data = complexity_points(df, limit=200, field_name=compute_unit_field)
         
         # Calculate risk assessment
-        total_tx = len(df)
-        fail_rate = (~df["success"]).sum() / total_tx if total_tx > 0 else 0
+        total_tx = hist.total
+        fail_rate = hist.fail_rate
         
         # Solana high complexity threshold
-        high_complexity_ratio = (df[compute_unit_field] > 200000).sum() / total_tx if total_tx > 0 else 0
+        high_complexity_ratio = hist.high_complexity_ratio
         
         low_risk_count = ((fail_rate < 0.05) and (high_complexity_ratio < 0.1))
         medium_risk_count = ((fail_rate >= 0.05 and fail_rate < 0.2) or (high_complexity_ratio >= 0.1 and high_complexity_ratio < 0.3))
@@ -2311,6 +2564,10 @@ def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
                 if most_recent_timestamp and isinstance(most_recent_timestamp, (int, float)):
                     from datetime import datetime
                     most_recent_timestamp = datetime.utcfromtimestamp(most_recent_timestamp).isoformat() + 'Z'
+        elif "block_time" in df.columns and df["block_time"].notna().any():
+            # Streaming path keeps no details; the newest block time is in the profile rows
+            from datetime import datetime
+            most_recent_timestamp = datetime.utcfromtimestamp(int(df["block_time"].max())).isoformat() + 'Z'
 
         # Compute surveillance exposure score
         swap_count = len(swap_events)
@@ -2376,7 +2633,7 @@ def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
                 "airdrop_farmer": round(probs.degen * 0.5, 2),
                 "professional": round(probs.professional * 0.5, 2)
             },
-            "transaction_complexity": complexity_data[:200],  # Limit for performance
+            "transaction_complexity": complexity_data,
             "risk_assessment": {
                 "level": risk_level,
                 "score": risk_score,
@@ -2418,8 +2675,10 @@ def analyze_wallet_comprehensive(request: WalletAnalysisRequest):
                 "instant_reactions": reaction.instant_reactions,
                 "fast_reactions": reaction.fast_reactions,
                 "human_reactions": reaction.human_reactions,
-                "total_pairs": reaction.total_reaction_pairs
-            }
+                "total_pairs": reaction.total_reaction_pairs,
+                "distribution": reaction.distribution
+            },
+            "data_sources": data_sources
         }
     except HTTPException:
         raise
@@ -2450,6 +2709,21 @@ def health():
     return {"status": "healthy", "version": "2.0.0"}
 
 
+@app.get("/upstream-stats")
+def upstream_stats():
+    """Transport statistics for upstream providers (connection reuse, latency, status codes, concurrency windows, rate-limit waits)."""
+    from leaklens_async import async_stats
+    return {"pools": pool_stats(), "concurrency": concurrency_stats(), "rate_limits": rate_limit_stats(),
+            "rpc_endpoints": get_rpc_pool().snapshot(), "single_flight": single_flight_stats(),
+            "retries": retry_stats(), "tx_cache": leaklens_store.cache_stats(),
+            "async_engine": async_stats(), "price_oracle": PRICES.stats(), "sol_price_history": SOL_PRICES.stats()}
+
+
+@app.on_event("shutdown")
+def _close_upstream_sessions():
+    close_sessions()
+
+
 def summarize_portfolio(tokens: list, total_value: float = 0) -> dict:
     """Lightweight server-side portfolio summary to avoid extra client work."""
     filtered = [t for t in (tokens or []) if isinstance(t, dict) and (t.get("usdValue") or 0) > 0]
@@ -2476,10 +2750,12 @@ def summarize_portfolio(tokens: list, total_value: float = 0) -> dict:
     }
 
 
-def helius_portfolio_summary(wallet: str) -> tuple:
+def helius_portfolio_summary(wallet: str, balances: Optional[Tuple[dict, dict]] = None,
+                             prices: Optional[Dict[str, float]] = None) -> tuple:
     """
-    Fallback portfolio summary using Helius token accounts + CoinGecko SOL price.
+    Fallback portfolio summary using Helius token accounts + oracle prices.
     Only returns a summary (no token list) to keep it lightweight.
+    balances / prices: already loaded (_helius_balances result, mint -> USD) to skip fetching them.
     """
     helius_key = os.getenv("HELIUS_API_KEY")
     if not helius_key:
@@ -2487,14 +2763,9 @@ def helius_portfolio_summary(wallet: str) -> tuple:
     
     # Fetch token accounts via Helius balances endpoint (includes uiAmount)
     try:
-        acc_resp = requests.get(
-            f"https://api.helius.xyz/v0/addresses/{wallet}/balances?api-key={helius_key}",
-            timeout=12,
-            headers={"Accept": "application/json"}
-        )
-        if acc_resp.status_code != 200:
-            return {}, {"error": f"helius_balances_status_{acc_resp.status_code}"}
-        acc_json = acc_resp.json()
+        acc_json, acc_dbg = balances if balances is not None else _helius_balances(wallet)
+        if acc_dbg.get("error"):
+            return {}, {"error": acc_dbg["error"]}
         tokens = acc_json.get("tokens", [])
         sol_balance = acc_json.get("nativeBalance", 0) / 1e9 if acc_json.get("nativeBalance") else 0
         if not tokens and sol_balance == 0:
@@ -2502,18 +2773,16 @@ def helius_portfolio_summary(wallet: str) -> tuple:
     except Exception as e:
         return {}, {"error": f"helius_balances_exception_{str(e)[:60]}"}
     
-    # Compute USD values (CoinGecko for SOL only; other tokens 0)
+    # Compute USD values: SOL and every token mint priced in one oracle lookup
     enriched = []
-    sol_price_val = _coingecko_sol_price()
-    prices = {"SOL": {"price": sol_price_val}} if sol_price_val else {}
-    price_status = "coingecko_sol" if sol_price_val else "coingecko_failed"
+    tokens = [t for t in tokens if isinstance(t, dict)]
+    if prices is None:
+        prices = spot_prices([WSOL_MINT] + [t.get("mint") for t in tokens if t.get("mint")])
+    price_status = f"priced_{sum(1 for t in tokens if prices.get(t.get('mint')))}_of_{len(tokens)}" if prices else "price_failed"
     for t in tokens:
-        if not isinstance(t, dict):
-            continue
         symbol = t.get("symbol", "")
         ui_amt = t.get("uiAmount", 0) or 0
-        price_entry = prices.get(symbol) or {}
-        price = price_entry.get("price", 0)
+        price = prices.get(t.get("mint"), 0)
         usd_value = ui_amt * price if price else 0
         enriched.append({
             "symbol": symbol,
@@ -2521,7 +2790,7 @@ def helius_portfolio_summary(wallet: str) -> tuple:
         })
     
     # Add SOL
-    sol_price = (prices.get("SOL") or {}).get("price", 0)
+    sol_price = prices.get(WSOL_MINT, 0)
     if sol_balance and sol_price:
         enriched.append({
             "symbol": "SOL",
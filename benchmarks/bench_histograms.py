@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Activity-histogram micro-benchmark: the vectorized pass in leaklens_histograms against the
+per-row DataFrame.iterrows loops it replaced (hourly/daily counts, complexity rows, fail rate),
+on synthetic profile frames.
+
+    python benchmarks/bench_histograms.py [--sizes 1000,100000,1000000] [--runs 3] [--loop-max 100000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from leaklens_histograms import activity_histograms, complexity_points  # noqa: E402
+
+
+def synthetic_profile(n: int, seed: int = 0) -> pd.DataFrame:
+    """Profile frame with the columns analyze_wallet produces."""
+    rng = np.random.default_rng(seed)
+    block_time = rng.integers(1_600_000_000, 1_760_000_000, n)
+    seconds = block_time % 86400
+    return pd.DataFrame({
+        "hour": seconds // 3600,
+        "day_of_week": (block_time // 86400 + 3) % 7,
+        "compute_units": rng.integers(0, 400_000, n),
+        "success": rng.random(n) > 0.05,
+        "block_time": block_time,
+    })
+
+
+def loop_baseline(df: pd.DataFrame) -> tuple:
+    """The iterrows code previously run by analyze_wallet_comprehensive."""
+    hourly_counts = [0] * 24
+    daily_counts = [0] * 7
+    for _, row in df.iterrows():
+        hourly_counts[row["hour"]] += 1
+        daily_counts[row["day_of_week"]] += 1
+    complexity_data = []
+    for _, row in df.iterrows():
+        value = row.get("compute_units", 0)
+        tx_type = "Complex" if value > 300000 else "Jito Bundle" if value > 150000 else "Standard"
+        complexity_data.append({"hour": int(row["hour"]), "compute_units": int(value), "type": tx_type})
+    total = len(df)
+    fail_rate = (~df["success"]).sum() / total if total else 0
+    return hourly_counts, daily_counts, complexity_data[:200], fail_rate
+
+
+def vectorized(df: pd.DataFrame) -> tuple:
+    hist = activity_histograms(df)
+    return hist.hourly, hist.daily, complexity_points(df, limit=200), hist.fail_rate
+
+
+def timeit(fn, df: pd.DataFrame, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        fn(df)
+        times.append(time.perf_counter() - t)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LeakLens histogram benchmark")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated transaction counts")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--loop-max", type=int, default=100000,
+                        help="skip the iterrows baseline above this many rows (0 = always run)")
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'iterrows ms':>12} {'vectorized ms':>14} {'speedup':>8}")
+    for n in (int(s) for s in args.sizes.split(",") if s.strip()):
+        df = synthetic_profile(n)
+        fast = timeit(vectorized, df, args.runs)
+        if args.loop_max and n > args.loop_max:
+            print(f"{n:>12} {'skipped':>12} {fast * 1000:>14.2f} {'-':>8}")
+            continue
+        if loop_baseline(df) != vectorized(df):
+            raise SystemExit(f"results differ at n={n}")
+        slow = timeit(loop_baseline, df, 1 if n > 10000 else args.runs)
+        print(f"{n:>12} {slow * 1000:>12.1f} {fast * 1000:>14.2f} {slow / fast:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark: time to import each LeakLens entry module in a fresh interpreter
+(what a Vercel cold start pays) and which heavy libraries it pulls in.
+
+    python benchmarks/bench_import.py [--runs 5] [module ...]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["leaklens_rpc", "leaklens_analysis", "leaklens_solana", "backend_api"]
+HEAVY = ["matplotlib", "pandas", "numpy", "fastapi"]
+
+_PROBE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules) or "-")
+"""
+
+
+def measure(module: str, runs: int) -> tuple:
+    """Median and min import time (seconds) over fresh interpreters, plus heavy modules loaded."""
+    env = dict(os.environ)
+    env.setdefault("HELIUS_API_KEY", "bench")
+    env["LEAKLENS_TX_CACHE"] = "0"
+    times = []
+    loaded = ""
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+                             cwd=ROOT, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{out.stderr.strip()[-500:]}")
+        elapsed, loaded = out.stdout.strip().splitlines()[-1].split(" ", 1)
+        times.append(float(elapsed))
+    return statistics.median(times), min(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LeakLens import-time benchmark")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<20} {'median ms':>10} {'min ms':>8}  heavy imports")
+    for module in args.modules:
+        try:
+            median, best, loaded = measure(module, args.runs)
+        except RuntimeError as e:
+            print(f"{module:<20} {'error':>10}  {e}")
+            continue
+        print(f"{module:<20} {median * 1000:>10.1f} {best * 1000:>8.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
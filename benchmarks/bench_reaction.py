@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Reaction-speed join benchmark: receive -> action matching (leaklens_reaction.join_reactions)
+and the full ReactionSpeedAnalysis on synthetic bot-like wallets.
+
+    python benchmarks/bench_reaction.py [--sizes 1000,100000,1000000] [--runs 5]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from leaklens_analysis import _reaction_speed_from_flags  # noqa: E402
+from leaklens_reaction import join_reactions  # noqa: E402
+
+
+def synthetic_flags(n: int, seed: int = 0) -> tuple:
+    """Newest-first timestamps a few seconds apart with interleaved receives and actions."""
+    rng = np.random.default_rng(seed)
+    timestamps = 1_700_000_000 + np.cumsum(rng.integers(0, 8, n))[::-1]
+    return timestamps, rng.random(n) < 0.4, rng.random(n) < 0.6
+
+
+def median_ms(fn, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LeakLens reaction-speed benchmark")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated transaction counts")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'reactions':>10} {'join ms':>9} {'analysis ms':>12}")
+    for n in (int(s) for s in args.sizes.split(",") if s.strip()):
+        timestamps, receives, actions = synthetic_flags(n)
+        flags = list(zip(timestamps.tolist(), receives.tolist(), actions.tolist()))
+        reactions = join_reactions(timestamps, receives, actions)
+        join = median_ms(lambda: join_reactions(timestamps, receives, actions), args.runs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = median_ms(lambda: _reaction_speed_from_flags(flags), args.runs)
+        print(f"{n:>12} {reactions.size:>10} {join:>9.2f} {full:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
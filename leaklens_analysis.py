@@ -0,0 +1,1088 @@
+"""LeakLens Analysis - Wallet profiling, execution profiles, opsec and connection analysis for Solana."""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Set, Tuple
+from collections import defaultdict
+from decimal import Decimal
+from leaklens_intern import address_of, address_table, intern_address
+from leaklens_reaction import REACTION_WINDOW, join_reactions, reaction_distribution
+from leaklens_records import SOURCE_ENHANCED, TxRecord, as_record, is_enhanced
+from leaklens_rpc import (
+    fetch_signatures, synced_signatures, fetch_transactions_parallel, run_pipeline, run_analyzers,
+    index_transactions, StreamAnalyzer, _signature_of,
+)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# KNOWN ADDRESSES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Known labels for common addresses
+KNOWN_LABELS = {
+    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": "Raydium LP V4",
+    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": "Jupiter V6",
+    "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P": "Pump.fun",
+    "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc": "Orca Whirlpool",
+    "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin": "Serum DEX V3",
+    "So11111111111111111111111111111111111111112": "Wrapped SOL",
+    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA": "Token Program",
+    "11111111111111111111111111111111": "System Program",
+    "ComputeBudget111111111111111111111111111111": "Compute Budget Program",
+}
+
+# Jito tip accounts for private execution detection
+JITO_TIP_ACCOUNTS = [
+    "96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5",
+    "HFqU5x63VTqvTsszeoPhtUYj9rdag4djXeFQiDmJzTMX",
+    "Cw8CFyM9FkoPhlTnrKMhTHqXheqJZNs4Fl31iWBP6UBu",
+    "ADuUkR4ykG49feZ5bwhvq0A25pl1QMrBSnXRKKkeoX8q",
+    "DttWaMuVvTiduZRNgLcGW9t66tePvm6znsc5tqQZFQk6",
+    "3AVi9Tg9Uo68tJfuvoKvqKNWKkC5wPdSSdeBnIzKZ6jJ",
+    "DoPtqvycNsD9nuNSqMZ5J1GzV91qfQ4t7x1qF4aPiPce",
+]
+
+
+def get_label(address: str) -> str:
+    """Get human-readable label for an address"""
+    return KNOWN_LABELS.get(address, address[:8] + "..." + address[-4:])
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DATA CLASSES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class ProfileProbabilities:
+    """Probability estimates for different wallet profiles"""
+    bot: float = 0.0
+    eu_trader: float = 0.0
+    us_trader: float = 0.0
+    asia_trader: float = 0.0
+    retail_hobbyist: float = 0.0
+    professional: float = 0.0
+    whale: float = 0.0
+    degen: float = 0.0
+    
+    def normalize(self):
+        geo_total = self.eu_trader + self.us_trader + self.asia_trader
+        if geo_total > 0:
+            self.eu_trader = (self.eu_trader / geo_total) * 100
+            self.us_trader = (self.us_trader / geo_total) * 100
+            self.asia_trader = (self.asia_trader / geo_total) * 100
+        
+        occ_total = self.retail_hobbyist + self.professional
+        if occ_total > 0:
+            self.retail_hobbyist = (self.retail_hobbyist / occ_total) * 100
+            self.professional = (self.professional / occ_total) * 100
+
+
+@dataclass
+class SleepWindow:
+    start_hour: int
+    end_hour: int
+    activity_during_sleep: int
+    confidence: float
+
+
+@dataclass
+class WalletConnection:
+    """Represents a connection between two wallets"""
+    wallet_a: str
+    wallet_b: str
+    tx_count: int = 0
+    total_volume: float = 0.0
+    first_interaction: Optional[datetime] = None
+    last_interaction: Optional[datetime] = None
+    signatures: List[str] = field(default_factory=list)
+    direction: str = "bidirectional"  # "a_to_b", "b_to_a", "bidirectional"
+
+
+@dataclass
+class ReactionSpeedAnalysis:
+    """Analysis of reaction speed for bot detection"""
+    bot_confidence: float = 0.0
+    avg_reaction_time: float = 0.0
+    median_reaction_time: float = 0.0
+    fastest_reaction: float = 0.0
+    instant_reactions: int = 0  # < 5 seconds
+    fast_reactions: int = 0  # 5-30 seconds
+    human_reactions: int = 0  # > 30 seconds
+    total_reaction_pairs: int = 0
+    distribution: Dict[str, object] = field(default_factory=dict)  # buckets + percentiles of reaction times
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MEMPOOL FORENSICS - Priority Fee & Execution Style Detection
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def detect_jito_tip(tx_details: dict) -> Tuple[bool, float]:
+    """
+    Detect if transaction includes Jito tip (private execution indicator).
+    Returns (has_jito_tip, tip_amount_sol).
+    """
+    rec = as_record(tx_details)
+    if rec is None or not rec.has_meta:
+        return False, 0.0
+
+    # Check balance changes of Jito tip accounts (first one in account order)
+    for i, account in enumerate(rec.accounts[:len(rec.sol_deltas)]):
+        if account in JITO_TIP_ACCOUNTS:
+            tip_lamports = rec.sol_deltas[i]
+            if tip_lamports > 0:
+                return True, tip_lamports / 1e9  # Convert to SOL
+
+    return False, 0.0
+
+
+def analyze_execution_profile(tx_details: dict) -> dict:
+    """
+    Analyze transaction for execution profile classification.
+    Returns dict with execution_profile, priority_fee, compute_unit_limit, jito_tip, etc.
+    """
+    result = {
+        "execution_profile": "RETAIL",
+        "priority_fee_microlamports": 0,
+        "compute_unit_limit": None,
+        "has_jito_tip": False,
+        "jito_tip_sol": 0.0,
+        "indicators": []
+    }
+    
+    if not tx_details:
+        return result
+    
+    try:
+        # Compute Budget values are parsed once into the record
+        rec = as_record(tx_details)
+        max_priority_fee = rec.cu_price
+        max_cu_limit = rec.cu_limit
+        result["priority_fee_microlamports"] = max_priority_fee
+        result["compute_unit_limit"] = max_cu_limit
+        
+        # Check for Jito tip
+        has_jito, jito_tip = detect_jito_tip(rec)
+        result["has_jito_tip"] = has_jito
+        result["jito_tip_sol"] = jito_tip
+        
+        # Classify execution profile
+        if has_jito and jito_tip > 0:
+            result["execution_profile"] = "MEV_STYLE"
+            result["indicators"].append(f"Jito tip: {jito_tip:.6f} SOL")
+        elif max_priority_fee > 1000000 or (max_cu_limit and max_cu_limit > 1400000):
+            # High priority fee (>1M microlamports) or very high CU limit indicates urgent/pro trader
+            if max_priority_fee > 1000000:
+                result["execution_profile"] = "URGENT_USER"
+                result["indicators"].append(f"High priority fee: {max_priority_fee/1e6:.2f}M microlamports")
+            if max_cu_limit and max_cu_limit > 1400000:
+                result["execution_profile"] = "PRO_TRADER"
+                result["indicators"].append(f"High CU limit: {max_cu_limit:,}")
+        elif max_priority_fee > 100000 or (max_cu_limit and max_cu_limit > 200000):
+            # Moderate priority indicates urgent user
+            result["execution_profile"] = "URGENT_USER"
+            if max_priority_fee > 100000:
+                result["indicators"].append(f"Moderate priority fee: {max_priority_fee/1e6:.2f}M microlamports")
+        else:
+            result["execution_profile"] = "RETAIL"
+            if max_priority_fee > 0:
+                result["indicators"].append(f"Low priority fee: {max_priority_fee/1e6:.3f}M microlamports")
+            else:
+                result["indicators"].append("No priority fee set")
+    
+    except Exception as e:
+        result["indicators"].append(f"Analysis error: {str(e)}")
+    
+    return result
+
+
+class ExecutionProfileTally(StreamAnalyzer):
+    """Incremental execution-profile counts (analyze_execution_profile per transaction)."""
+
+    def __init__(self, wallet: str, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.wallet = wallet
+        self.profile_counts = {"RETAIL": 0, "URGENT_USER": 0, "PRO_TRADER": 0, "MEV_STYLE": 0}
+        self.total_priority_fee = 0
+        self.total_jito_tips = 0.0
+        self.jito_tip_count = 0
+
+    def update(self, sig_info: dict, tx: dict):
+        profile_data = analyze_execution_profile(tx)
+        profile = profile_data["execution_profile"]
+        self.profile_counts[profile] = self.profile_counts.get(profile, 0) + 1
+
+        if profile_data["priority_fee_microlamports"] > 0:
+            self.total_priority_fee += profile_data["priority_fee_microlamports"]
+
+        if profile_data["has_jito_tip"]:
+            self.total_jito_tips += profile_data["jito_tip_sol"]
+            self.jito_tip_count += 1
+
+    def result(self) -> dict:
+        profile_counts = self.profile_counts
+        total_tx = len(self.signatures)
+        if not total_tx:
+            return {
+                "wallet": self.wallet,
+                "total_transactions": 0,
+                "profiles": {},
+                "aggregate_profile": "UNKNOWN"
+            }
+
+        # Determine aggregate profile
+        if profile_counts["MEV_STYLE"] > total_tx * 0.3:
+            aggregate = "MEV_STYLE"
+        elif profile_counts["PRO_TRADER"] > total_tx * 0.3:
+            aggregate = "PRO_TRADER"
+        elif profile_counts["URGENT_USER"] > total_tx * 0.3:
+            aggregate = "URGENT_USER"
+        else:
+            aggregate = "RETAIL"
+
+        return {
+            "wallet": self.wallet,
+            "total_transactions": total_tx,
+            "profiles": {
+                "RETAIL": profile_counts["RETAIL"],
+                "URGENT_USER": profile_counts["URGENT_USER"],
+                "PRO_TRADER": profile_counts["PRO_TRADER"],
+                "MEV_STYLE": profile_counts["MEV_STYLE"]
+            },
+            "profile_percentages": {
+                "RETAIL": round((profile_counts["RETAIL"] / total_tx * 100) if total_tx > 0 else 0, 2),
+                "URGENT_USER": round((profile_counts["URGENT_USER"] / total_tx * 100) if total_tx > 0 else 0, 2),
+                "PRO_TRADER": round((profile_counts["PRO_TRADER"] / total_tx * 100) if total_tx > 0 else 0, 2),
+                "MEV_STYLE": round((profile_counts["MEV_STYLE"] / total_tx * 100) if total_tx > 0 else 0, 2)
+            },
+            "aggregate_profile": aggregate,
+            "statistics": {
+                "avg_priority_fee_microlamports": round(self.total_priority_fee / total_tx if total_tx > 0 else 0, 2),
+                "total_jito_tips_sol": round(self.total_jito_tips, 6),
+                "jito_tip_count": self.jito_tip_count,
+                "jito_tip_percentage": round((self.jito_tip_count / total_tx * 100) if total_tx > 0 else 0, 2)
+            }
+        }
+
+
+def analyze_wallet_execution_profiles(wallet: str, limit: int = 100, signatures: Optional[List[dict]] = None, tx_details_map: Optional[Dict[str, dict]] = None) -> dict:
+    """
+    Analyze wallet's execution profiles across multiple transactions.
+    Allows passing pre-fetched signatures and transaction details to avoid re-fetch.
+    """
+    if signatures is None:
+        signatures = fetch_signatures(wallet, limit)
+    else:
+        signatures = signatures[:limit]
+
+    tally = ExecutionProfileTally(wallet)
+    if not signatures:
+        return tally.result()
+
+    if tx_details_map is None:
+        sig_strings = [s for s in (_signature_of(si) for si in signatures) if s]
+        tx_details_map = fetch_transactions_parallel(sig_strings) if sig_strings else {}
+
+    run_analyzers(signatures, tx_details_map, [tally])
+    return tally.result()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROFILE COMMAND - Single Wallet Analysis
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ActivityCounters(StreamAnalyzer):
+    """Hourly (UTC) and weekday transaction counts from block times."""
+
+    def __init__(self, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.hourly_counts = [0] * 24
+        self.daily_counts = [0] * 7
+
+    def update(self, sig_info: dict, tx: dict):
+        block_time = sig_info.get("blockTime") or sig_info.get("block_time")
+        if not block_time:
+            return
+        utc_time = datetime.fromtimestamp(block_time, tz=timezone.utc)
+        self.hourly_counts[utc_time.hour] += 1
+        self.daily_counts[utc_time.weekday()] += 1
+
+    def result(self) -> Tuple[List[int], List[int]]:
+        return self.hourly_counts, self.daily_counts
+
+
+class _ProfileRows(StreamAnalyzer):
+    """
+    Per-transaction rows for the profile DataFrame plus, with keep_details, the raw transactions
+    later steps reuse. Rows are a few scalars per transaction; without keep_details no payload
+    outlives its update(), so the pass holds O(history) rows but not O(history) transactions.
+    """
+
+    def __init__(self, keep_details: bool = True):
+        super().__init__()
+        self.keep_details = keep_details
+        self.rows: Dict[int, dict] = {}
+        self.details: Dict[int, dict] = {}
+        self.tx_details_map: Dict[str, dict] = {}
+        self._order: Dict[str, int] = {}
+
+    def start(self, signatures: List[dict]):
+        super().start(signatures)
+        for idx, sig_info in enumerate(signatures):
+            self._order.setdefault(_signature_of(sig_info), idx)
+
+    def update(self, sig_info: dict, tx_details: dict):
+        signature = _signature_of(sig_info)
+        if self.keep_details:
+            self.tx_details_map[signature] = tx_details
+        block_time = sig_info.get("blockTime") or sig_info.get("block_time")
+        if not block_time or not signature:
+            return
+
+        compute_units = 0
+        fee = 0
+        instructions = 0
+
+        rec = as_record(tx_details, signature)
+        if rec is not None and rec.has_meta:
+            compute_units = rec.compute_units
+            fee = rec.fee
+            instructions = rec.n_instructions
+
+        utc_time = datetime.fromtimestamp(block_time, tz=timezone.utc)
+        idx = self._order[signature]
+        self.rows[idx] = {
+            "signature": signature,
+            "timestamp": utc_time,
+            "hour": utc_time.hour,
+            "day_of_week": utc_time.weekday(),
+            "day_name": utc_time.strftime("%A"),
+            "compute_units": compute_units,
+            "fee_lamports": fee,
+            "fee_sol": fee / 1e9,
+            "instructions": instructions,
+            "success": sig_info.get("err") is None,
+            "slot": sig_info.get("slot", 0),
+            "block_time": block_time
+        }
+        # Store tx details for reaction speed analysis (only if valid)
+        if self.keep_details:
+            self.details[idx] = {
+                "timestamp": block_time,
+                "details": tx_details
+            }
+
+    def result(self) -> Tuple[List[dict], List[dict]]:
+        """Rows and details in signature (newest-first) order, independent of arrival order."""
+        order = sorted(self.rows)
+        return [self.rows[i] for i in order], [self.details[i] for i in order if i in self.details]
+
+
+def analyze_wallet(wallet: str, limit: int = 100, min_block_time: Optional[int] = None, min_slot: Optional[int] = None,
+                   analyzers: Optional[List[StreamAnalyzer]] = None, keep_details: bool = True) -> tuple:
+    """
+    Fetch and analyze wallet transactions - returns (DataFrame, tx_details_list, tx_details_map, signatures)
+    Transactions are analyzed as they arrive (run_pipeline); extra streaming analyzers passed in
+    (e.g. ExecutionProfileTally, OpsecCounters) are fed in the same pass and hold their results.
+    keep_details=False returns an empty list and map instead of every raw transaction, for
+    callers whose analyzers already consumed everything they need.
+    """
+    print(f"\n[*] Fetching last {limit} transactions...")
+    
+    if min_block_time is None and min_slot is None:
+        # Re-analysis only lists signatures newer than the stored watermark
+        signatures = synced_signatures(wallet, limit)
+    else:
+        signatures = fetch_signatures(wallet, limit, min_block_time=min_block_time, min_slot=min_slot)
+    
+    if not signatures:
+        return pd.DataFrame(), [], {}, []
+    
+    print(f"[+] Found {len(signatures)} transactions")
+    print(f"[-] Analyzing details as they arrive...\n")
+    
+    rows = _ProfileRows(keep_details=keep_details)
+    records = [si for si in signatures if isinstance(si, dict)]
+    valid_results = run_pipeline(records, [rows] + list(analyzers or []))
+    
+    # If too many fetches failed, warn user
+    if valid_results < len(records) * 0.5:
+        print(f"    [!] Warning: Only {valid_results}/{len(records)} transactions fetched successfully")
+        print(f"    [!] Some data may be incomplete (RPC connection issues)")
+    
+    transactions, tx_details_list = rows.result()
+    print(f"\n[+] Analyzed {len(transactions)} transactions\n")
+    
+    return pd.DataFrame(transactions), tx_details_list, rows.tx_details_map, signatures
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# OPSEC FAILURES - Deanonymization Surface Mapping
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _is_program_account(account: str) -> bool:
+    """Heuristic to filter out obvious program IDs from counterparty analysis."""
+    if not account or len(account) < 30:
+        return True
+    return (account in KNOWN_LABELS or account == "ComputeBudget111111111111111111111111111111"
+            or account.startswith("Sysvar"))
+
+
+class OpsecCounters(StreamAnalyzer):
+    """
+    Incremental opsec signals: funding/withdrawal counterparties from balance deltas and memo usage.
+    Helius Enhanced transactions are read from their nativeTransfers instead (no memo data).
+    Counterparties are keyed by interned address id.
+    """
+
+    def __init__(self, wallet: str, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.wallet = wallet
+        self.wallet_id = intern_address(wallet)
+        self.funding_counterparties: Dict[int, Dict[str, float]] = defaultdict(lambda: {"count": 0, "lamports": 0})
+        self.withdrawal_counterparties: Dict[int, Dict[str, float]] = defaultdict(lambda: {"count": 0, "lamports": 0})
+        self.memo_hits = 0
+
+    def update(self, sig_info: dict, tx_details: dict):
+        wallet = self.wallet
+        rec = as_record(tx_details, _signature_of(sig_info))
+        if rec is None:
+            return
+        if rec.source == SOURCE_ENHANCED:
+            self._update_transfers(rec)
+            return
+        if not rec.has_meta:
+            return
+
+        # Skip if wallet not in account list
+        wallet_idx = rec.account_index(wallet)
+        if wallet_idx is None or wallet_idx >= len(rec.sol_deltas):
+            return
+
+        wallet_delta = rec.sol_deltas[wallet_idx]
+
+        # Count memo usage
+        self.memo_hits += rec.memo_count
+
+        # We need a counterparty to attribute the movement to; pick the account with the largest opposite delta
+        wallet_id = self.wallet_id
+        deltas = [(aid, delta, acc) for aid, acc, delta in zip(rec.account_ids, rec.accounts, rec.sol_deltas) if aid != wallet_id]
+
+        if wallet_delta > 0:
+            # Incoming funds: look for most negative delta as likely funder
+            possible_sources = [d[:2] for d in deltas if d[1] < 0 and not _is_program_account(d[2])]
+            if possible_sources:
+                source, amt = sorted(possible_sources, key=lambda x: x[1])[0]
+                self.funding_counterparties[source]["count"] += 1
+                self.funding_counterparties[source]["lamports"] += abs(amt)
+        elif wallet_delta < 0:
+            # Outgoing funds: look for most positive delta as likely receiver
+            possible_targets = [d[:2] for d in deltas if d[1] > 0 and not _is_program_account(d[2])]
+            if possible_targets:
+                target, amt = sorted(possible_targets, key=lambda x: x[1], reverse=True)[0]
+                self.withdrawal_counterparties[target]["count"] += 1
+                self.withdrawal_counterparties[target]["lamports"] += abs(amt)
+
+    def _update_transfers(self, rec: TxRecord):
+        wallet = self.wallet
+        for fr, to, amt_lamports in rec.native_transfers:
+            if not fr or not to or amt_lamports <= 0:
+                continue
+            if _is_program_account(fr) or _is_program_account(to):
+                continue
+            if to == wallet and fr != wallet:
+                stats = self.funding_counterparties[intern_address(fr)]
+            elif fr == wallet and to != wallet:
+                stats = self.withdrawal_counterparties[intern_address(to)]
+            else:
+                continue
+            stats["count"] += 1
+            stats["lamports"] += amt_lamports
+
+    def result(self) -> dict:
+        wallet = self.wallet
+        signatures = self.signatures
+        if not signatures:
+            return {
+                "wallet": wallet,
+                "total_transactions": 0,
+                "critical_leaks": [],
+                "funding_sources": [],
+                "withdrawal_targets": [],
+                "memo_usage": 0,
+                "exposure_score": 0,
+                "cumulative_exposure": "UNKNOWN",
+                "weakest_link": "No on-chain activity found to analyze."
+            }
+        funding_counterparties = self.funding_counterparties
+        withdrawal_counterparties = self.withdrawal_counterparties
+        memo_hits = self.memo_hits
+
+        def summarize(counter: Dict[int, Dict[str, float]]):
+            summary = []
+            for acc_id, stats in counter.items():
+                acc = address_of(acc_id)
+                summary.append({
+                    "wallet": acc,
+                    "label": get_label(acc),
+                    "count": int(stats["count"]),
+                    "total_sol": float(Decimal(stats["lamports"]) / Decimal(1e9))
+                })
+            return sorted(summary, key=lambda x: (x["count"], x["total_sol"]), reverse=True)
+
+        funding_summary = summarize(funding_counterparties)
+        withdrawal_summary = summarize(withdrawal_counterparties)
+
+        critical_leaks = []
+        exposure_score = 10  # Base for simply being active
+
+        if funding_summary and funding_summary[0]["count"] >= 3:
+            leak = funding_summary[0]
+            critical_leaks.append({
+                "type": "repeat_funding_source",
+                "detail": f"Wallet funded {leak['count']}x by {leak['wallet']} (≈{leak['total_sol']:.3f} SOL)",
+                "deanon_impact": "Strong linkage to a single funding wallet"
+            })
+            exposure_score += 30
+
+        if withdrawal_summary and withdrawal_summary[0]["count"] >= 3:
+            leak = withdrawal_summary[0]
+            critical_leaks.append({
+                "type": "repeat_cashout_target",
+                "detail": f"Wallet frequently pays out to {leak['wallet']} ({leak['count']}x, ≈{leak['total_sol']:.3f} SOL)",
+                "deanon_impact": "Likely owned exit wallet; ties identity"
+            })
+            exposure_score += 30
+
+        if memo_hits > 0:
+            critical_leaks.append({
+                "type": "memo_breadcrumbs",
+                "detail": f"Found {memo_hits} memo instructions attached to transactions",
+                "deanon_impact": "Memos can carry human-readable identifiers"
+            })
+            exposure_score += 15
+
+        # If no critical leaks were found but there is activity, provide a softer note
+        if not critical_leaks and (funding_summary or withdrawal_summary or memo_hits > 0):
+            critical_leaks.append({
+                "type": "low_signal",
+                "detail": "Limited deanonymization signals detected; still review funding/withdrawal patterns.",
+                "deanon_impact": "Monitor reuse of sources/targets and memo usage."
+            })
+
+        # Clamp exposure score
+        exposure_score = min(100, exposure_score)
+        if exposure_score >= 70:
+            cumulative = "HIGH"
+        elif exposure_score >= 40:
+            cumulative = "MEDIUM"
+        else:
+            cumulative = "LOW"
+
+        weakest_link = critical_leaks[0]["detail"] if critical_leaks else "No critical exposure detected."
+
+        return {
+            "wallet": wallet,
+            "total_transactions": len(signatures),
+            "critical_leaks": critical_leaks,
+            "funding_sources": funding_summary[:5],
+            "withdrawal_targets": withdrawal_summary[:5],
+            "memo_usage": memo_hits,
+            "exposure_score": exposure_score,
+            "cumulative_exposure": cumulative,
+            "weakest_link": weakest_link
+        }
+
+
+def analyze_opsec_failures(wallet: str, limit: int = 100, signatures: Optional[List[dict]] = None, tx_details_map: Optional[Dict[str, dict]] = None) -> dict:
+    """
+    Map operational security failures for a wallet.
+
+    Signals:
+    - Reused funding sources (same wallet topping up multiple times)
+    - Reused withdrawal targets (same exit wallet repeatedly used)
+    - Memo usage (human-readable breadcrumbs)
+    - Balance-change deltas to infer counterparties without labels
+    """
+    if signatures is None:
+        signatures = fetch_signatures(wallet, limit)
+    else:
+        signatures = signatures[:limit]
+
+    counters = OpsecCounters(wallet)
+    if not signatures:
+        return counters.result()
+
+    if tx_details_map is None:
+        sig_strings = [s for s in (_signature_of(si) for si in signatures) if s]
+        tx_details_map = fetch_transactions_parallel(sig_strings) if sig_strings else {}
+
+    run_analyzers(signatures, tx_details_map, [counters])
+    return counters.result()
+
+
+def analyze_opsec_failures_from_enhanced(wallet: str, enhanced_txs: List[dict]) -> dict:
+    """
+    Opsec signals from Helius Enhanced (nativeTransfers). No memo (enhanced lacks instructions).
+    Same return shape as analyze_opsec_failures for API compatibility.
+    """
+    signatures, tx_map = index_transactions(enhanced_txs)
+    counters = OpsecCounters(wallet)
+    run_analyzers(signatures, tx_map, [counters])
+    return counters.result()
+
+
+def detect_sleep_window(hourly_counts: list) -> SleepWindow:
+    min_sum = float('inf')
+    sleep_start = 0
+    total_tx = sum(hourly_counts)
+    
+    for i in range(24):
+        window_sum = sum(hourly_counts[(i + j) % 24] for j in range(6))
+        if window_sum < min_sum:
+            min_sum = window_sum
+            sleep_start = i
+    
+    sleep_ratio = min_sum / total_tx if total_tx > 0 else 0
+    confidence = max(0, min(100, (1 - sleep_ratio * 4) * 100))
+    
+    return SleepWindow(
+        start_hour=sleep_start,
+        end_hour=(sleep_start + 6) % 24,
+        activity_during_sleep=min_sum,
+        confidence=confidence
+    )
+
+
+class ReactionFlags(StreamAnalyzer):
+    """
+    Per-transaction reaction flags (token receive / wallet action) for analyze_reaction_speed;
+    result() joins each receive with the next action into a ReactionSpeedAnalysis.
+    """
+
+    def __init__(self, wallet: str, limit: Optional[int] = None):
+        super().__init__(limit)
+        self.wallet = wallet
+        self.flags: Dict[int, Tuple[int, bool, bool]] = {}
+        self._order: Dict[str, int] = {}
+
+    def start(self, signatures: List[dict]):
+        super().start(signatures)
+        self._order = {}
+        for idx, sig_info in enumerate(self.signatures):
+            self._order.setdefault(_signature_of(sig_info), idx)
+
+    def update(self, sig_info: dict, tx_details: dict):
+        block_time = sig_info.get("blockTime") or sig_info.get("block_time")
+        signature = _signature_of(sig_info)
+        if not block_time or not signature:
+            return
+        self.flags[self._order[signature]] = (
+            block_time, has_token_receive(tx_details, self.wallet), has_token_action(tx_details, self.wallet)
+        )
+
+    def result(self) -> ReactionSpeedAnalysis:
+        return _reaction_speed_from_flags([self.flags[i] for i in sorted(self.flags)])
+
+
+def analyze_reaction_speed(wallet: str, tx_details_list: list) -> ReactionSpeedAnalysis:
+    """
+    Analyze reaction speed between token receives and subsequent actions.
+    Bot Detection Logic: Humans take time to think (>30s), Bots react instantly (<5s)
+    """
+    flags = []
+    for tx in tx_details_list if isinstance(tx_details_list, list) else []:
+        if not isinstance(tx, dict) or "timestamp" not in tx or "details" not in tx:
+            continue
+        details = tx.get("details")
+        if details and isinstance(details, dict):
+            flags.append((tx.get("timestamp", 0), has_token_receive(details, wallet), has_token_action(details, wallet)))
+        else:
+            flags.append((tx.get("timestamp", 0), None, None))
+    return _reaction_speed_from_flags(flags)
+
+
+def _reaction_speed_from_flags(flags: List[Tuple[int, Optional[bool], Optional[bool]]],
+                               window: float = REACTION_WINDOW) -> ReactionSpeedAnalysis:
+    """Reaction metrics from (timestamp, has_receive, has_action) per transaction (any order)."""
+    print(f"\n[*] Analyzing reaction speed for bot detection...")
+    
+    if len(flags) < 2:
+        return ReactionSpeedAnalysis()
+    
+    timestamps = np.fromiter((f[0] or 0 for f in flags), dtype=np.float64, count=len(flags))
+    receives = np.fromiter((bool(f[1]) for f in flags), dtype=bool, count=len(flags))
+    actions = np.fromiter((bool(f[2]) for f in flags), dtype=bool, count=len(flags))
+    reaction_times = join_reactions(timestamps, receives, actions, window)
+    
+    # Calculate metrics
+    total_reactions = int(reaction_times.size)
+    
+    if total_reactions == 0:
+        return ReactionSpeedAnalysis()
+    
+    instant_count = int(np.count_nonzero(reaction_times < 5))
+    fast_count = int(np.count_nonzero(reaction_times < 30)) - instant_count
+    human_count = total_reactions - instant_count - fast_count
+    
+    avg_reaction = float(reaction_times.mean())
+    median_reaction = float(np.sort(reaction_times)[total_reactions // 2])
+    fastest_reaction = float(reaction_times.min())
+    
+    # Bot confidence calculation
+    instant_ratio = instant_count / total_reactions
+    fast_ratio = fast_count / total_reactions
+    human_ratio = human_count / total_reactions
+    
+    # High confidence bot if mostly instant reactions
+    if instant_ratio > 0.7:
+        bot_confidence = 95.0
+    elif instant_ratio > 0.5:
+        bot_confidence = 85.0
+    elif instant_ratio + fast_ratio > 0.7:
+        bot_confidence = 70.0
+    elif avg_reaction < 10:
+        bot_confidence = 60.0
+    elif avg_reaction < 30:
+        bot_confidence = 40.0
+    else:
+        bot_confidence = max(0, 30 - (human_ratio * 40))
+    
+    print(f"[+] Analyzed {total_reactions} reaction patterns")
+    
+    return ReactionSpeedAnalysis(
+        bot_confidence=bot_confidence,
+        avg_reaction_time=avg_reaction,
+        median_reaction_time=median_reaction,
+        fastest_reaction=fastest_reaction,
+        instant_reactions=instant_count,
+        fast_reactions=fast_count,
+        human_reactions=human_count,
+        total_reaction_pairs=total_reactions,
+        distribution=reaction_distribution(reaction_times)
+    )
+
+
+def has_token_receive(tx_details: dict, wallet: str) -> bool:
+    """Check if transaction involves receiving tokens. Supports RPC meta and Helius enhanced."""
+    rec = as_record(tx_details)
+    if rec is None:
+        return False
+    # Helius enhanced: tokenTransfers/nativeTransfers
+    if is_enhanced(tx_details):
+        return (any(to == wallet and amt > 0 for _, to, _, amt in rec.token_transfers)
+                or any(to == wallet and amt > 0 for _, to, amt in rec.native_transfers))
+    if not rec.has_meta:
+        return False
+    # Token balance increased, or SOL balance increased
+    if any(d > 0 for d in rec.token_deltas_of(wallet).values()):
+        return True
+    sol_delta = rec.sol_delta(wallet)
+    return sol_delta is not None and sol_delta > 0
+
+
+def has_token_action(tx_details: dict, wallet: str) -> bool:
+    """Check if transaction involves sending/swapping tokens. Supports RPC meta and Helius enhanced."""
+    rec = as_record(tx_details)
+    if rec is None:
+        return False
+    # Helius enhanced: feePayer + tokenTransfers/nativeTransfers
+    if is_enhanced(tx_details):
+        if rec.fee_payer != wallet:
+            return False
+        return (any(fr == wallet for fr, _, _, _ in rec.token_transfers)
+                or any(fr == wallet and to != wallet and amt > 0 for fr, to, amt in rec.native_transfers))
+    # Wallet initiated the transaction (is signer), so some action was taken
+    return rec.has_meta and rec.is_signer(wallet)
+
+
+def calculate_probabilities(df: pd.DataFrame, hourly_counts: list, daily_counts: list, sleep: SleepWindow) -> ProfileProbabilities:
+    probs = ProfileProbabilities()
+    total_tx = len(df)
+    
+    if total_tx == 0:
+        return probs
+    
+    # Bot detection
+    hourly_std = np.std(hourly_counts)
+    hourly_range = max(hourly_counts) - min(hourly_counts)
+    
+    if hourly_range < 3 or hourly_std < 1.5:
+        probs.bot = 95.0
+    elif hourly_range < 5:
+        probs.bot = 70.0
+    elif sleep.activity_during_sleep > total_tx * 0.2:
+        probs.bot = 60.0
+    elif sleep.confidence < 50:
+        probs.bot = 40.0
+    else:
+        probs.bot = max(0, 30 - sleep.confidence * 0.3)
+    
+    # Geographic inference
+    s = sleep.start_hour
+    
+    if 20 <= s or s <= 2:
+        probs.eu_trader = 80 + (10 if s in [22, 23, 0] else 0)
+    elif 18 <= s <= 19 or 3 <= s <= 4:
+        probs.eu_trader = 40
+    else:
+        probs.eu_trader = 10
+    
+    if 3 <= s <= 8:
+        probs.us_trader = 80 + (10 if s in [5, 6, 7] else 0)
+    elif 9 <= s <= 10 or 1 <= s <= 2:
+        probs.us_trader = 40
+    else:
+        probs.us_trader = 10
+    
+    if 12 <= s <= 18:
+        probs.asia_trader = 80 + (10 if s in [14, 15, 16] else 0)
+    elif 10 <= s <= 11 or 19 <= s <= 20:
+        probs.asia_trader = 40
+    else:
+        probs.asia_trader = 10
+    
+    # Occupation inference
+    weekend_tx = daily_counts[5] + daily_counts[6]
+    weekday_tx = sum(daily_counts[:5])
+    
+    if weekday_tx > 0:
+        weekend_ratio = (weekend_tx / 2) / (weekday_tx / 5)
+    else:
+        weekend_ratio = 2.0 if weekend_tx > 0 else 1.0
+    
+    if weekend_ratio > 2.0:
+        probs.retail_hobbyist = 90
+        probs.professional = 10
+    elif weekend_ratio > 1.3:
+        probs.retail_hobbyist = 70
+        probs.professional = 30
+    elif weekend_ratio < 0.3:
+        probs.retail_hobbyist = 10
+        probs.professional = 90
+    elif weekend_ratio < 0.6:
+        probs.retail_hobbyist = 30
+        probs.professional = 70
+    else:
+        probs.retail_hobbyist = 50
+        probs.professional = 50
+    
+    # Whale detection
+    avg_cu = df["compute_units"].mean()
+    avg_fee = df["fee_sol"].mean()
+    
+    if avg_cu > 300000 or avg_fee > 0.01:
+        probs.whale = 85
+    elif avg_cu > 200000 or avg_fee > 0.005:
+        probs.whale = 60
+    elif avg_cu > 100000:
+        probs.whale = 30
+    else:
+        probs.whale = 10
+    
+    # Degen detection
+    fail_rate = (~df["success"]).sum() / total_tx
+    high_cu_ratio = (df["compute_units"] > 200000).sum() / total_tx
+    
+    if fail_rate > 0.3 or high_cu_ratio > 0.5:
+        probs.degen = 85
+    elif fail_rate > 0.15 or high_cu_ratio > 0.3:
+        probs.degen = 60
+    elif fail_rate > 0.08:
+        probs.degen = 40
+    else:
+        probs.degen = 15
+    
+    probs.normalize()
+    return probs
+
+
+def get_complexity_color(cu: int) -> str:
+    if cu < 50000:
+        return '#22c55e'
+    elif cu < 150000:
+        return '#eab308'
+    elif cu < 300000:
+        return '#f97316'
+    else:
+        return '#ef4444'
+
+
+def get_complexity_label(cu: float) -> str:
+    if cu < 50000:
+        return 'Simple'
+    elif cu < 150000:
+        return 'Moderate'
+    elif cu < 300000:
+        return 'Complex'
+    else:
+        return 'Heavy'
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONNECT COMMAND - Find Connections Between Wallets
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_IGNORED_ACCOUNTS = ("", "11111111111111111111111111111111", "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+
+
+def extract_accounts_from_tx(tx_details: dict) -> Set[str]:
+    """Extract all account addresses involved in a transaction"""
+    return set(address_table().addresses(extract_account_ids(tx_details)))
+
+
+def extract_account_ids(tx_details: dict) -> Set[int]:
+    """extract_accounts_from_tx as interned address ids (what the connection scans compare)."""
+    rec = as_record(tx_details)
+    if rec is None:
+        return set()
+    
+    # Account keys (instruction accounts are drawn from them) plus program IDs
+    accounts = set(rec.account_ids)
+    accounts.update(intern_address(p) for p in rec.program_ids)
+    
+    # Remove empty strings and system programs
+    for address in _IGNORED_ACCOUNTS:
+        accounts.discard(intern_address(address))
+    
+    return accounts
+
+
+def find_connections(wallets: List[str], limit: int = 100) -> Dict[Tuple[str, str], WalletConnection]:
+    """Find connections between multiple wallets"""
+    
+    print(f"\n[*] Analyzing connections between {len(wallets)} wallets...")
+    
+    # Collect all transactions for each wallet
+    wallet_txs: Dict[str, List[dict]] = {}
+    wallet_accounts: Dict[str, Dict[str, Set[int]]] = {}  # wallet -> {signature -> interned account ids}
+    
+    for wallet in wallets:
+        print(f"\n[-] Fetching transactions for {get_label(wallet)}...")
+        signatures = fetch_signatures(wallet, limit)
+        
+        wallet_txs[wallet] = []
+        wallet_accounts[wallet] = {}
+        
+        # Fetch all transactions in parallel (MUCH FASTER!)
+        sig_strings = [sig_info["signature"] for sig_info in signatures]
+        tx_details_map = fetch_transactions_parallel(sig_strings)
+        
+        for idx, sig_info in enumerate(signatures):
+            progress = (idx + 1) / len(signatures)
+            bar_len = 30
+            filled = int(bar_len * progress)
+            bar = '█' * filled + '░' * (bar_len - filled)
+            print(f"\r    [{bar}] {idx + 1}/{len(signatures)}", end="", flush=True)
+            
+            signature = sig_info["signature"]
+            tx_details = tx_details_map.get(signature)
+            
+            if tx_details:
+                wallet_txs[wallet].append({
+                    "signature": signature,
+                    "block_time": sig_info.get("blockTime"),
+                    "details": tx_details
+                })
+                wallet_accounts[wallet][signature] = extract_account_ids(tx_details)
+        
+        print()
+    
+    # Find connections
+    connections: Dict[Tuple[str, str], WalletConnection] = {}
+    
+    print("\n[*] Analyzing connections...")
+    
+    wallet_ids = {wallet: intern_address(wallet) for wallet in wallets}
+    for i, wallet_a in enumerate(wallets):
+        for wallet_b in wallets[i+1:]:
+            # Check for direct transactions
+            conn = WalletConnection(wallet_a=wallet_a, wallet_b=wallet_b)
+            
+            # Check if wallet_b appears in wallet_a's transactions
+            for tx in wallet_txs[wallet_a]:
+                accounts = wallet_accounts[wallet_a].get(tx["signature"], set())
+                if wallet_ids[wallet_b] in accounts:
+                    conn.tx_count += 1
+                    conn.signatures.append(tx["signature"])
+                    
+                    if tx["block_time"]:
+                        tx_time = datetime.fromtimestamp(tx["block_time"], tz=timezone.utc)
+                        if conn.first_interaction is None or tx_time < conn.first_interaction:
+                            conn.first_interaction = tx_time
+                        if conn.last_interaction is None or tx_time > conn.last_interaction:
+                            conn.last_interaction = tx_time
+            
+            # Check if wallet_a appears in wallet_b's transactions
+            for tx in wallet_txs[wallet_b]:
+                accounts = wallet_accounts[wallet_b].get(tx["signature"], set())
+                if wallet_ids[wallet_a] in accounts:
+                    if tx["signature"] not in conn.signatures:  # Avoid duplicates
+                        conn.tx_count += 1
+                        conn.signatures.append(tx["signature"])
+                        
+                        if tx["block_time"]:
+                            tx_time = datetime.fromtimestamp(tx["block_time"], tz=timezone.utc)
+                            if conn.first_interaction is None or tx_time < conn.first_interaction:
+                                conn.first_interaction = tx_time
+                            if conn.last_interaction is None or tx_time > conn.last_interaction:
+                                conn.last_interaction = tx_time
+            
+            if conn.tx_count > 0:
+                connections[(wallet_a, wallet_b)] = conn
+    
+    return connections
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SCAN COMMAND - Map Wallet Network (Future Feature)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def scan_network(wallet: str, depth: int = 1, limit: int = 50):
+    """Scan and map a wallet's network connections"""
+    
+    print(f"\n[*] Scanning network for {get_label(wallet)} (depth={depth})...")
+    
+    # Interned ids while scanning; addresses restored for the returned set
+    discovered: Set[int] = {intern_address(wallet)}
+    connections: Dict[Tuple[str, str], WalletConnection] = {}
+    current_level = {wallet}
+    
+    for level in range(depth):
+        print(f"\n[-] Level {level + 1}...")
+        next_level = set()
+        
+        for w in current_level:
+            print(f"    Analyzing {get_label(w)}...")
+            signatures = fetch_signatures(w, limit)
+            
+            # Fetch transactions in parallel
+            sig_strings = [sig_info["signature"] for sig_info in signatures[:limit]]
+            tx_details_map = fetch_transactions_parallel(sig_strings)
+            
+            for sig_info in signatures[:limit]:
+                tx_details = tx_details_map.get(sig_info["signature"])
+                accounts = extract_account_ids(tx_details)
+                
+                # Find new wallets (filter out programs)
+                for acc_id in accounts - discovered:
+                    acc = address_of(acc_id)
+                    if len(acc) > 40:  # Likely a wallet
+                        # Quick check: has this account made transactions?
+                        test_sigs = fetch_signatures(acc, 1)
+                        if test_sigs:
+                            next_level.add(acc)
+                            discovered.add(acc_id)
+                            
+                            # Record connection
+                            if (w, acc) not in connections and (acc, w) not in connections:
+                                connections[(w, acc)] = WalletConnection(
+                                    wallet_a=w, wallet_b=acc, tx_count=1,
+                                    signatures=[sig_info["signature"]]
+                                )
+        
+        current_level = next_level
+        print(f"    Discovered {len(next_level)} new wallets")
+    
+    return set(address_table().addresses(discovered)), connections
@@ -0,0 +1,282 @@
+"""LeakLens Async - asyncio fetch engine for Solana RPC and Helius REST upstreams."""
+
+import asyncio
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from leaklens_http import (
+    get_concurrency, rate_limit_async, RetryPolicy, UpstreamError, THROTTLED, SERVER, CLIENT,
+    classify_exception, classify_rpc_error, load_signal, parse_retry_after, Endpoint,
+)
+from leaklens_decode import loads, normalize_transaction
+from leaklens_rpc import TX_FETCH_OPTIONS, _normalize_signature_items, choose_endpoint, endpoint_concurrency, get_rpc_pool
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Hard ceiling on in-flight requests per upstream. getTransaction fan-out is further
+# limited by each RPC endpoint's adaptive window (leaklens_rpc.endpoint_concurrency).
+ASYNC_RPC_CONCURRENCY = int(os.getenv("LEAKLENS_ASYNC_RPC_CONCURRENCY", "4" if os.getenv("VERCEL") == "1" else "16"))
+ASYNC_REST_CONCURRENCY = int(os.getenv("LEAKLENS_ASYNC_REST_CONCURRENCY", "4"))
+HELIUS_API_BASE = "https://api.helius.xyz/v0"
+
+_stats = {"requests": 0, "errors": 0}
+_TX_RETRY = RetryPolicy("getTransaction")
+# Duration of the last HTTP exchange in this task, without semaphore and rate-limit waits
+_service_seconds: ContextVar[float] = ContextVar("leaklens_async_service_seconds", default=0.0)
+
+
+def async_stats() -> dict:
+    """Request/error counters for the async engine (exported via /upstream-stats)."""
+    return dict(_stats)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CLIENT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class AsyncLeakLensClient:
+    """
+    Async client for signatures, transactions, enhanced transactions and balances.
+    One keep-alive httpx.AsyncClient; concurrency per upstream is bounded by semaphores.
+
+        async with AsyncLeakLensClient() as client:
+            txs = await client.fetch_transactions(sigs)
+    """
+
+    def __init__(self, rpc_url: Optional[str] = None, helius_key: Optional[str] = None,
+                 rpc_concurrency: int = ASYNC_RPC_CONCURRENCY, rest_concurrency: int = ASYNC_REST_CONCURRENCY):
+        self.rpc_url = rpc_url  # None: pick from the shared RPC endpoint pool per request
+        self.helius_key = helius_key or os.getenv("HELIUS_API_KEY")
+        self._rpc_sem = asyncio.Semaphore(max(1, rpc_concurrency))
+        self._rest_sem = asyncio.Semaphore(max(1, rest_concurrency))
+        pool = max(rpc_concurrency, rest_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=15,
+            limits=httpx.Limits(max_connections=pool * 2, max_keepalive_connections=pool * 2),
+            headers={"Accept": "application/json"},
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def _send(self, sem: asyncio.Semaphore, method: str, url: str, **kwargs) -> httpx.Response:
+        async with sem:
+            await rate_limit_async(url)
+            _stats["requests"] += 1
+            start = time.perf_counter()
+            try:
+                return await self._client.request(method, url, **kwargs)
+            except Exception:
+                _stats["errors"] += 1
+                raise
+            finally:
+                _service_seconds.set(time.perf_counter() - start)
+
+    # ── RPC ──────────────────────────────────────────────────────────────────
+
+    async def rpc_call(self, method: str, params: list, ep: Optional[Endpoint] = None) -> Optional[dict]:
+        """
+        Make an RPC call (to ep, else rpc_url, else an endpoint picked from the pool).
+        Returns None on non-retryable RPC errors; raises UpstreamError
+        for throttling, server errors and transport failures so callers can retry.
+        """
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        pool = None
+        url = self.rpc_url
+        if ep is not None or url is None:
+            pool = get_rpc_pool()
+            ep = ep or pool.choose()
+            url = ep.url
+        _service_seconds.set(0.0)
+        try:
+            resp = await self._send(self._rpc_sem, "POST", url, json=payload)
+            if resp.status_code >= 400:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                kind = THROTTLED if resp.status_code == 429 else SERVER if resp.status_code >= 500 else CLIENT
+                raise UpstreamError(kind, f"HTTP {resp.status_code}", status=resp.status_code, retry_after=retry_after)
+            data = loads(resp.content)
+            err = classify_rpc_error(data["error"]) if isinstance(data, dict) and "error" in data else None
+        except Exception as e:
+            if pool is not None:
+                pool.report(ep, False, _service_seconds.get(), classify_exception(e))
+            raise
+        if pool is not None:
+            pool.report(ep, err is None or not err.retryable, _service_seconds.get(), err)
+        if not isinstance(data, dict):
+            return None
+        if err is not None:
+            if err.retryable:
+                raise err
+            return None
+        return data.get("result")
+
+    async def fetch_signatures(self, wallet: str, limit: int = 100) -> list:
+        try:
+            result = await self.rpc_call("getSignaturesForAddress", [wallet, {"limit": limit}])
+        except Exception:
+            return []
+        return _normalize_signature_items(result)
+
+    async def fetch_transaction(self, signature: str) -> Optional[dict]:
+        """
+        Fetch one transaction with the same retry policy as fetch_transaction_worker
+        (classified failures, decorrelated jitter, Retry-After).
+        Each attempt picks a pool endpoint and holds a slot of that endpoint's AIMD window,
+        shared with the thread-pool paths (a fixed rpc_url uses the "rpc" window).
+        """
+        delay = _TX_RETRY.base
+        for attempt in range(_TX_RETRY.attempts):
+            ep = choose_endpoint() if self.rpc_url is None else None
+            ctrl = endpoint_concurrency(ep) if ep is not None else get_concurrency("rpc")
+            await ctrl.acquire_async()
+            try:
+                result = normalize_transaction(await self.rpc_call("getTransaction", [signature, TX_FETCH_OPTIONS], ep=ep))
+            except Exception as e:
+                ctrl.release(load_signal(e), _service_seconds.get())
+                err = classify_exception(e)
+                retry = _TX_RETRY.should_retry(err, attempt)
+                _TX_RETRY.record(err, retried=retry)
+                if not retry:
+                    return None
+                delay = _TX_RETRY.next_delay(delay, err)
+                await asyncio.sleep(delay)
+                continue
+            ctrl.release(True if result is not None else None, _service_seconds.get())
+            _TX_RETRY.record(None, retried=False)
+            return result
+        return None
+
+    async def fetch_transactions(self, signatures: List[str]) -> Dict[str, Optional[dict]]:
+        """Fetch many transactions concurrently. Same contract as fetch_transactions_parallel."""
+        results = await asyncio.gather(*(self.fetch_transaction(sig) for sig in signatures))
+        return dict(zip(signatures, results))
+
+    # ── Helius REST ──────────────────────────────────────────────────────────
+
+    async def helius_transactions(self, wallet: str, limit: int = 100) -> Tuple[List[dict], dict]:
+        """Helius Enhanced Transactions; same (txs, debug) shape as backend_api.helius_get_transactions."""
+        if not self.helius_key:
+            return [], {"error": "missing_helius_key"}
+        try:
+            resp = await self._send(
+                self._rest_sem, "GET", f"{HELIUS_API_BASE}/addresses/{wallet}/transactions",
+                params={"api-key": self.helius_key, "limit": int(min(limit, 100))},
+            )
+            if resp.status_code != 200:
+                return [], {"error": f"helius_tx_status_{resp.status_code}", "body": resp.text[:200]}
+            data = resp.json()
+            if isinstance(data, list):
+                return data, {"status": "ok", "count": len(data)}
+            return [], {"error": "helius_tx_unexpected_shape"}
+        except Exception as e:
+            return [], {"error": f"helius_tx_exception_{str(e)[:120]}"}
+
+    async def helius_balances(self, wallet: str) -> Tuple[dict, dict]:
+        """Helius balances; same (payload, debug) shape as backend_api._helius_balances."""
+        if not self.helius_key:
+            return {"nativeBalance": 0, "tokens": []}, {"error": "missing_helius_key"}
+        try:
+            resp = await self._send(
+                self._rest_sem, "GET", f"{HELIUS_API_BASE}/addresses/{wallet}/balances",
+                params={"api-key": self.helius_key}, timeout=12,
+            )
+            if resp.status_code != 200:
+                return {"nativeBalance": 0, "tokens": []}, {"error": f"helius_balances_status_{resp.status_code}"}
+            return resp.json(), {"status": "ok"}
+        except Exception as e:
+            return {"nativeBalance": 0, "tokens": []}, {"error": f"helius_balances_exception_{str(e)[:80]}"}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REQUEST ENGINE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_current_engine: ContextVar[Optional["AsyncEngine"]] = ContextVar("leaklens_async_engine", default=None)
+
+
+class AsyncEngine:
+    """
+    One event loop (on its own thread) and one AsyncLeakLensClient for a whole request or CLI run.
+    While active, fetch_transactions_sync from any thread that inherited the context
+    (contextvars.copy_context) runs on this loop instead of starting one per call, so the
+    client's semaphores bound everything the request fetches.
+
+        with AsyncEngine():
+            ...
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="leaklens-async", daemon=True)
+        self._client: Optional[AsyncLeakLensClient] = None
+        self._token = None
+
+    def __enter__(self) -> "AsyncEngine":
+        self._thread.start()
+        self._client = self.run(self._open())
+        self._token = _current_engine.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current_engine.reset(self._token)
+        try:
+            self.run(self._client.aclose())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self.loop.close()
+
+    @staticmethod
+    async def _open() -> AsyncLeakLensClient:
+        return AsyncLeakLensClient()
+
+    def run(self, coro):
+        """Run a coroutine on the engine's loop and wait for its result (from any other thread)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def fetch_transactions(self, signatures: List[str]) -> Dict[str, Optional[dict]]:
+        return self.run(self._client.fetch_transactions(signatures))
+
+
+def current_engine() -> Optional[AsyncEngine]:
+    return _current_engine.get()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SYNC ENTRY POINTS (CLI / FastAPI threadpool)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def fetch_transactions_sync(signatures: List[str]) -> Dict[str, Optional[dict]]:
+    """
+    Run the async engine from synchronous code (CLI, sync FastAPI handlers): on the active
+    AsyncEngine when there is one, else on a loop of its own for this call.
+    Must not be called from a thread that already runs an event loop; await
+    AsyncLeakLensClient.fetch_transactions there instead.
+    """
+    async def _run():
+        async with AsyncLeakLensClient() as client:
+            return await client.fetch_transactions(signatures)
+
+    engine = current_engine()
+    if not signatures:
+        results = {}
+    elif engine is not None:
+        results = engine.fetch_transactions(signatures)
+    else:
+        results = asyncio.run(_run())
+    total_fetched = sum(1 for v in results.values() if v is not None)
+    print(f"\r    [+] Successfully fetched {total_fetched}/{len(signatures)} transactions (async)")
+    return results
@@ -0,0 +1,310 @@
+"""LeakLens Decode - Fast JSON decoding, local message decoding and projection of Solana transactions."""
+
+import base64
+import json
+import os
+from typing import Any, List, Optional, Tuple
+
+# orjson parses RPC payloads several times faster than the stdlib; optional dependency
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# getTransaction encoding: "jsonParsed" (largest, parsed by the provider), "json" or "base64"
+# (compact; messages are decoded locally into the same view the analyzers read)
+TX_ENCODING = os.getenv("LEAKLENS_TX_ENCODING", "jsonParsed")
+if TX_ENCODING not in ("jsonParsed", "json", "base64"):
+    print(f"[Decode] Unknown LEAKLENS_TX_ENCODING={TX_ENCODING!r}, using jsonParsed")
+    TX_ENCODING = "jsonParsed"
+
+# Project getTransaction results down to the fields the analyzers read (set to 0 to keep full payloads)
+TX_PROJECTION = os.getenv("LEAKLENS_TX_PROJECTION", "1") != "0"
+
+COMPUTE_BUDGET_PROGRAM = "ComputeBudget111111111111111111111111111111"
+MEMO_PROGRAMS = {"MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr", "Memo1UhkJRfHyvLMcVucJwxXeuD728EqVDDwQDxFMNo"}
+
+_META_FIELDS = ("err", "fee", "computeUnitsConsumed", "preBalances", "postBalances")
+_TOKEN_AMOUNT_FIELDS = ("amount", "decimals", "uiAmount", "uiAmountString")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# JSON
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def loads(data: Any) -> Any:
+    """Decode JSON from bytes/str with orjson when installed, json otherwise."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BASE58
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(_B58_ALPHABET)}
+
+
+def b58encode(data: bytes) -> str:
+    """Bitcoin-alphabet base58 (Solana pubkeys, signatures, instruction data)."""
+    n = int.from_bytes(data, "big")
+    out = []
+    while n:
+        n, rem = divmod(n, 58)
+        out.append(_B58_ALPHABET[rem])
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + "".join(reversed(out))
+
+
+def b58decode(text: str) -> bytes:
+    """Inverse of b58encode. Raises ValueError on characters outside the alphabet."""
+    n = 0
+    for ch in text:
+        try:
+            n = n * 58 + _B58_INDEX[ch]
+        except KeyError:
+            raise ValueError(f"invalid base58 character {ch!r}") from None
+    body = n.to_bytes((n.bit_length() + 7) // 8, "big") if n else b""
+    pad = len(text) - len(text.lstrip("1"))
+    return b"\0" * pad + body
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MESSAGE DECODING (json / base64 encodings)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _read_shortvec(buf: bytes, pos: int) -> Tuple[int, int]:
+    """Solana compact-u16 length prefix -> (value, new position)."""
+    value = 0
+    for shift in (0, 7, 14):
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+    return value, pos
+
+
+def _parse_wire_message(raw: bytes) -> dict:
+    """
+    Parse a serialized transaction (signatures + legacy or v0 message) into the same dict shape
+    the RPC uses for encoding=json: header, accountKeys, instructions, addressTableLookups.
+    """
+    n_sigs, pos = _read_shortvec(raw, 0)
+    pos += 64 * n_sigs
+    version = "legacy"
+    if raw[pos] & 0x80:
+        version = raw[pos] & 0x7F
+        pos += 1
+    header = {
+        "numRequiredSignatures": raw[pos],
+        "numReadonlySignedAccounts": raw[pos + 1],
+        "numReadonlyUnsignedAccounts": raw[pos + 2],
+    }
+    pos += 3
+    n_keys, pos = _read_shortvec(raw, pos)
+    keys = []
+    for _ in range(n_keys):
+        keys.append(b58encode(raw[pos:pos + 32]))
+        pos += 32
+    pos += 32  # recent blockhash
+    n_ix, pos = _read_shortvec(raw, pos)
+    instructions = []
+    for _ in range(n_ix):
+        program_idx = raw[pos]
+        pos += 1
+        n_acc, pos = _read_shortvec(raw, pos)
+        accounts = list(raw[pos:pos + n_acc])
+        pos += n_acc
+        n_data, pos = _read_shortvec(raw, pos)
+        data = raw[pos:pos + n_data]
+        pos += n_data
+        instructions.append({"programIdIndex": program_idx, "accounts": accounts, "data": b58encode(data)})
+    lookups = []
+    if version != "legacy":
+        n_lookups, pos = _read_shortvec(raw, pos)
+        for _ in range(n_lookups):
+            table = b58encode(raw[pos:pos + 32])
+            pos += 32
+            n_w, pos = _read_shortvec(raw, pos)
+            writable = list(raw[pos:pos + n_w])
+            pos += n_w
+            n_r, pos = _read_shortvec(raw, pos)
+            readonly = list(raw[pos:pos + n_r])
+            pos += n_r
+            lookups.append({"accountKey": table, "writableIndexes": writable, "readonlyIndexes": readonly})
+    return {"header": header, "accountKeys": keys, "instructions": instructions,
+            "addressTableLookups": lookups, "version": version}
+
+
+def _normalize_compiled_message(msg: dict, meta: Optional[dict]) -> dict:
+    """
+    Turn a compiled (encoding=json / decoded base64) message into the jsonParsed-like view:
+    accountKeys as {pubkey, signer, writable, source} including lookup-table addresses from
+    meta.loadedAddresses, and instructions with programId, account pubkeys and base58 data.
+    """
+    header = msg.get("header") or {}
+    static: List[str] = [str(k) for k in msg.get("accountKeys") or []]
+    n_req = int(header.get("numRequiredSignatures", 0))
+    n_ro_signed = int(header.get("numReadonlySignedAccounts", 0))
+    n_ro_unsigned = int(header.get("numReadonlyUnsignedAccounts", 0))
+
+    keys = []
+    for i, pubkey in enumerate(static):
+        if i < n_req:
+            writable = i < n_req - n_ro_signed
+        else:
+            writable = i < len(static) - n_ro_unsigned
+        keys.append({"pubkey": pubkey, "signer": i < n_req, "writable": writable, "source": "transaction"})
+    loaded = (meta or {}).get("loadedAddresses") or {}
+    for pubkey in loaded.get("writable") or []:
+        keys.append({"pubkey": pubkey, "signer": False, "writable": True, "source": "lookupTable"})
+    for pubkey in loaded.get("readonly") or []:
+        keys.append({"pubkey": pubkey, "signer": False, "writable": False, "source": "lookupTable"})
+
+    pubkeys = [k["pubkey"] for k in keys]
+    instructions = []
+    for ix in msg.get("instructions") or []:
+        if not isinstance(ix, dict):
+            continue
+        idx = ix.get("programIdIndex")
+        program_id = pubkeys[idx] if isinstance(idx, int) and idx < len(pubkeys) else None
+        accounts = [pubkeys[a] for a in ix.get("accounts") or [] if isinstance(a, int) and a < len(pubkeys)]
+        instructions.append({"programId": program_id, "programIdIndex": idx, "accounts": accounts,
+                             "data": ix.get("data", "")})
+    return {"accountKeys": keys, "instructions": instructions,
+            "addressTableLookups": msg.get("addressTableLookups") or []}
+
+
+def decode_transaction(tx: Optional[dict]) -> Optional[dict]:
+    """
+    Bring a getTransaction result of any encoding into the jsonParsed-like shape.
+    base64 ("transaction": [data, "base64"]) is parsed from the wire format; json messages
+    (with "header" and index-based instructions) are resolved against the account keys.
+    jsonParsed results pass through unchanged. Undecodable payloads return None.
+    """
+    if not isinstance(tx, dict):
+        return tx
+    transaction = tx.get("transaction")
+    try:
+        if isinstance(transaction, list) and transaction:
+            msg = _parse_wire_message(base64.b64decode(transaction[0]))
+        elif isinstance(transaction, dict) and isinstance(transaction.get("message"), dict) and "header" in transaction["message"]:
+            msg = transaction["message"]
+        else:
+            return tx
+        normalized = _normalize_compiled_message(msg, tx.get("meta"))
+    except (IndexError, ValueError, TypeError) as e:
+        print(f"[Decode] Could not decode transaction message: {str(e)[:100]}")
+        return None
+    out = dict(tx)
+    out["transaction"] = {"message": normalized}
+    return out
+
+
+def tx_fetch_options() -> dict:
+    """getTransaction options for the configured encoding."""
+    return {"encoding": TX_ENCODING, "maxSupportedTransactionVersion": 0}
+
+
+def tx_cache_kind() -> str:
+    """
+    Local cache kind (leaklens_store) for getTransaction bodies. Bodies are cached as normalized,
+    so the encoding and projection settings are part of the key: a jsonParsed run never gets
+    locally decoded instructions (no parsed type/args), nor a full-payload run projected bodies.
+    """
+    return f"rpc:{TX_ENCODING}:{'proj' if TX_PROJECTION else 'full'}"
+
+
+def normalize_transaction(tx: Optional[dict]) -> Optional[dict]:
+    """Decode (any encoding) and project a getTransaction result; the single entry point for fetch paths."""
+    return project_transaction(decode_transaction(tx))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROJECTION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _project_token_balances(items: Any) -> list:
+    out = []
+    for it in items or []:
+        if not isinstance(it, dict):
+            continue
+        ui = it.get("uiTokenAmount") or {}
+        out.append({
+            "accountIndex": it.get("accountIndex"),
+            "mint": it.get("mint"),
+            "owner": it.get("owner"),
+            "uiTokenAmount": {k: ui.get(k) for k in _TOKEN_AMOUNT_FIELDS if k in ui},
+        })
+    return out
+
+
+def _project_instruction(ix: Any) -> Any:
+    if not isinstance(ix, dict):
+        return ix
+    out = {}
+    for key in ("programId", "programIdIndex", "accounts"):
+        if key in ix:
+            out[key] = ix[key]
+    program_id = ix.get("programId")
+    # Raw data is only read for compute-budget and memo instructions
+    if "data" in ix and (program_id is None or program_id == COMPUTE_BUDGET_PROGRAM or program_id in MEMO_PROGRAMS):
+        out["data"] = ix["data"]
+    parsed = ix.get("parsed")
+    if isinstance(parsed, dict):
+        out["parsed"] = {k: parsed[k] for k in ("type", "args") if k in parsed}
+    elif parsed is not None:
+        out["parsed"] = parsed
+    return out
+
+
+def _project_account_key(key: Any) -> Any:
+    if isinstance(key, dict):
+        return {"pubkey": key.get("pubkey", ""), "signer": key.get("signer", False),
+                "writable": key.get("writable", False), "source": key.get("source", "transaction")}
+    return key
+
+
+def project_transaction(tx: Optional[dict]) -> Optional[dict]:
+    """
+    Reduce a getTransaction result to the fields LeakLens reads: balances, token balances,
+    fee, compute units, account keys and instructions (program ids, accounts, compute-budget
+    data, parsed types). The result keeps the RPC shape so analyzers need no changes;
+    logs, inner instructions, rewards and signatures are dropped.
+    """
+    if not isinstance(tx, dict) or not TX_PROJECTION:
+        return tx
+    meta = tx.get("meta")
+    transaction = tx.get("transaction")
+    msg = (transaction.get("message") or {}) if isinstance(transaction, dict) else {}
+    out = {"slot": tx.get("slot"), "blockTime": tx.get("blockTime")}
+    if isinstance(meta, dict):
+        pmeta = {k: meta[k] for k in _META_FIELDS if k in meta}
+        pmeta["preTokenBalances"] = _project_token_balances(meta.get("preTokenBalances"))
+        pmeta["postTokenBalances"] = _project_token_balances(meta.get("postTokenBalances"))
+        if meta.get("loadedAddresses"):
+            pmeta["loadedAddresses"] = meta["loadedAddresses"]
+        out["meta"] = pmeta
+    else:
+        out["meta"] = meta
+    out["transaction"] = {"message": {
+        "accountKeys": [_project_account_key(k) for k in msg.get("accountKeys") or []],
+        "instructions": [_project_instruction(ix) for ix in msg.get("instructions") or []],
+    }}
+    return out
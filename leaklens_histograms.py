@@ -0,0 +1,115 @@
+"""LeakLens Histograms - Vectorized activity histograms and complexity/failure aggregates for profile data."""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Complexity buckets shown by the API (compute units): Standard <= 150K < Jito Bundle <= 300K < Complex
+COMPLEXITY_TYPES = ("Standard", "Jito Bundle", "Complex")
+COMPLEXITY_EDGES = (150000, 300000)
+HIGH_COMPLEXITY_CU = 200000
+
+_SECONDS_PER_DAY = 86400
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday = 0)
+
+
+@dataclass
+class ActivityHistograms:
+    """Activity and complexity aggregates over one wallet's transactions (UTC)."""
+    total: int = 0
+    hourly: List[int] = field(default_factory=lambda: [0] * 24)
+    daily: List[int] = field(default_factory=lambda: [0] * 7)
+    hour_weekday: np.ndarray = field(default_factory=lambda: np.zeros((7, 24), dtype=np.int64))  # [weekday, hour]
+    minute_of_day: np.ndarray = field(default_factory=lambda: np.zeros(1440, dtype=np.int64))
+    complexity: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(COMPLEXITY_TYPES, 0))
+    fail_rate: float = 0.0
+    high_complexity_ratio: float = 0.0
+    avg_compute_units: float = 0.0
+
+
+def _column(df: pd.DataFrame, name: str) -> Optional[np.ndarray]:
+    return df[name].to_numpy() if name in df.columns else None
+
+
+def histograms_from_arrays(block_times: Optional[np.ndarray] = None, compute_units: Optional[np.ndarray] = None,
+                           success: Optional[np.ndarray] = None, hours: Optional[np.ndarray] = None,
+                           weekdays: Optional[np.ndarray] = None) -> ActivityHistograms:
+    """
+    All histograms in one vectorized pass. Hour, weekday and minute come from UTC unix block times
+    when given (else from hours / weekdays; minute-of-day then stays empty).
+    """
+    hist = ActivityHistograms()
+    if block_times is not None:
+        t = np.asarray(block_times, dtype=np.int64)
+        seconds = t % _SECONDS_PER_DAY
+        hours = seconds // 3600
+        weekdays = (t // _SECONDS_PER_DAY + _EPOCH_WEEKDAY) % 7
+        hist.minute_of_day = np.bincount(seconds // 60, minlength=1440)
+    if hours is None:
+        return hist
+    hours = np.asarray(hours, dtype=np.int64)
+    weekdays = np.asarray(weekdays, dtype=np.int64)
+    n = len(hours)
+    hist.total = n
+    if not n:
+        return hist
+
+    cells = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+    hist.hour_weekday = cells
+    hist.hourly = cells.sum(axis=0).tolist()
+    hist.daily = cells.sum(axis=1).tolist()
+
+    if compute_units is not None:
+        cu = np.asarray(compute_units)
+        buckets = np.bincount(np.searchsorted(COMPLEXITY_EDGES, cu, side="left"), minlength=len(COMPLEXITY_TYPES))
+        hist.complexity = dict(zip(COMPLEXITY_TYPES, buckets.tolist()))
+        hist.high_complexity_ratio = float(np.count_nonzero(cu > HIGH_COMPLEXITY_CU)) / n
+        hist.avg_compute_units = float(cu.mean())
+    if success is not None:
+        hist.fail_rate = float(n - np.count_nonzero(np.asarray(success, dtype=bool))) / n
+    return hist
+
+
+def activity_histograms(df: pd.DataFrame) -> ActivityHistograms:
+    """Histograms for a profile DataFrame (analyze_wallet / Helius Enhanced rows)."""
+    if df is None or df.empty:
+        return ActivityHistograms()
+    block_times = _column(df, "block_time")
+    if block_times is not None and not (block_times > 0).all():
+        block_times = None
+    return histograms_from_arrays(
+        block_times=block_times,
+        compute_units=_column(df, "compute_units"),
+        success=_column(df, "success"),
+        hours=None if block_times is not None else _column(df, "hour"),
+        weekdays=None if block_times is not None else _column(df, "day_of_week"),
+    )
+
+
+def complexity_types(compute_units: np.ndarray) -> np.ndarray:
+    """Complexity bucket name per transaction."""
+    names = np.array(COMPLEXITY_TYPES, dtype=object)
+    return names[np.searchsorted(COMPLEXITY_EDGES, np.asarray(compute_units), side="left")]
+
+
+def complexity_points(df: pd.DataFrame, limit: Optional[int] = None, field_name: str = "compute_units") -> List[dict]:
+    """[{hour, <field_name>, type}] per transaction (first limit rows), as returned by /analyze-wallet."""
+    if df is None or df.empty:
+        return []
+    rows = df.iloc[:limit] if limit is not None else df
+    hours = rows["hour"].to_numpy(dtype=np.int64).tolist()
+    cu = rows[field_name].to_numpy() if field_name in rows.columns else np.zeros(len(rows))
+    types = complexity_types(cu).tolist()
+    return [{"hour": h, field_name: int(c), "type": ty} for h, c, ty in zip(hours, cu.tolist(), types)]
+
+
+def sleep_mask(hours: np.ndarray, start_hour: int, length: int = 6) -> np.ndarray:
+    """True for hours inside the sleep window [start_hour, start_hour + length) (wrapping midnight)."""
+    hours = np.asarray(hours)
+    end = start_hour + length
+    mask = (hours >= start_hour) & (hours < end)
+    if end > 24:
+        mask |= hours < end % 24
+    return mask
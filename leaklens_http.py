@@ -0,0 +1,1111 @@
+"""LeakLens HTTP - Shared keep-alive transport for Solana RPC and REST upstreams."""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import copy_context
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Connections kept alive per upstream host. The largest fan-out is the 12-worker
+# getTransaction pool running inside the 7 /analyze-wallet workers, so size for that.
+POOL_MAXSIZE = int(os.getenv("LEAKLENS_POOL_MAXSIZE", "32"))
+DEFAULT_TIMEOUT = 15
+
+# Adaptive concurrency bounds for fetch paths. The window starts low on Vercel (free-tier
+# RPC keys throttle early) and grows toward the maximum while the upstream stays healthy.
+CONCURRENCY_INITIAL = int(os.getenv("LEAKLENS_CONCURRENCY_INITIAL", "4" if os.getenv("VERCEL") == "1" else "12"))
+CONCURRENCY_MAX = int(os.getenv("LEAKLENS_CONCURRENCY_MAX", "32"))
+# Completions slower than this (seconds) stop the window from growing
+CONCURRENCY_TARGET_LATENCY = float(os.getenv("LEAKLENS_CONCURRENCY_TARGET_LATENCY", "2.0"))
+
+# Token buckets per provider: (requests per second, burst). Shared by every request in the
+# process, so concurrent /analyze-wallet calls add up against one budget instead of each
+# assuming it owns the provider. Override with LEAKLENS_RATE_LIMITS="helius_rpc=50:100,coingecko=0.5:5"
+# (rate 0 disables a bucket). Hosts not listed here are not limited.
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "helius_rpc": (10.0, 20.0) if os.getenv("VERCEL") == "1" else (40.0, 60.0),
+    "helius_api": (5.0, 10.0),
+    "coingecko": (0.5, 5.0),  # free tier is ~30 calls/min
+    "jupiter": (5.0, 10.0),
+    "bonfida": (5.0, 10.0),
+}
+
+# Hostname suffix -> provider bucket
+PROVIDER_HOSTS = {
+    "helius-rpc.com": "helius_rpc",
+    "api.helius.xyz": "helius_api",
+    "api.coingecko.com": "coingecko",
+    "jup.ag": "jupiter",
+    "sns-api.bonfida.com": "bonfida",
+}
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Retries per call for transient failures (429, 5xx, timeouts, connection errors)
+RETRY_ATTEMPTS = int(os.getenv("LEAKLENS_RETRY_ATTEMPTS", "4"))
+# Hedged duplicates for slow calls: at most this fraction of calls may be duplicated
+HEDGE_ENABLED = os.getenv("LEAKLENS_HEDGE", "1") != "0"
+HEDGE_MAX_RATIO = float(os.getenv("LEAKLENS_HEDGE_MAX_RATIO", "0.1"))
+
+# RPC endpoint pool: consecutive transient failures before an endpoint is ejected,
+# and the first ejection period in seconds (doubles on each re-ejection, up to 2 minutes)
+ENDPOINT_EJECT_AFTER = int(os.getenv("LEAKLENS_RPC_EJECT_AFTER", "3"))
+ENDPOINT_EJECT_SECONDS = float(os.getenv("LEAKLENS_RPC_EJECT_SECONDS", "5"))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SESSIONS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_sessions: Dict[str, requests.Session] = {}
+_pool_sizes: Dict[str, int] = {}
+_stats: Dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+def _host_of(url: str) -> str:
+    """Host (with port) used to key sessions and stats. Never includes query strings/API keys."""
+    return urlsplit(url).netloc.lower()
+
+
+def _mount(session: requests.Session, pool_size: int):
+    """Mount a pool of ``pool_size`` connections and close the adapters it replaces."""
+    replaced = {id(a): a for a in (session.adapters.get("https://"), session.adapters.get("http://")) if a is not None}
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Connections still checked out of a closed pool are discarded when released, not leaked
+    for old in replaced.values():
+        old.close()
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the keep-alive session for the host of ``url``, creating it on first use."""
+    host = _host_of(url)
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            _mount(session, POOL_MAXSIZE)
+            _sessions[host] = session
+            _pool_sizes[host] = POOL_MAXSIZE
+        return session
+
+
+def ensure_pool_size(url: str, size: int):
+    """Grow the connection pool for ``url``'s host so ``size`` concurrent workers can reuse connections."""
+    host = _host_of(url)
+    session = get_session(url)
+    if size <= _pool_sizes.get(host, 0):
+        return
+    with _lock:
+        if size > _pool_sizes.get(host, 0):
+            _mount(session, size)
+            _pool_sizes[host] = size
+
+
+def close_sessions():
+    """Close every pooled connection (app shutdown)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _pool_sizes.clear()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REQUESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _record(host: str, elapsed: float, status: Optional[int] = None, error: bool = False):
+    with _lock:
+        st = _stats.setdefault(host, {"requests": 0, "errors": 0, "status": {}, "total_seconds": 0.0})
+        st["requests"] += 1
+        st["total_seconds"] += elapsed
+        if error:
+            st["errors"] += 1
+        if status is not None:
+            st["status"][str(status)] = st["status"].get(str(status), 0) + 1
+
+
+def http_request(method: str, url: str, timeout: float = DEFAULT_TIMEOUT, priority: Optional[str] = None,
+                 cost: float = 1.0, rate_key: Optional[str] = None, **kwargs) -> requests.Response:
+    """
+    Send a request over the pooled session for the URL's host. Raises the same exceptions as requests.
+    Waits for the provider's token bucket first; cost is the number of upstream calls the
+    request represents (e.g. the size of a JSON-RPC batch). rate_key selects a separate
+    bucket with the provider's limits (one per API key in the RPC endpoint pool).
+    """
+    host = _host_of(url)
+    session = get_session(url)
+    rate_limit(url, priority=priority, cost=cost, rate_key=rate_key)
+    start = time.perf_counter()
+    try:
+        resp = session.request(method, url, timeout=timeout, **kwargs)
+    except Exception:
+        _record(host, time.perf_counter() - start, error=True)
+        raise
+    _record(host, time.perf_counter() - start, status=resp.status_code)
+    return resp
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    return http_request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    return http_request("POST", url, **kwargs)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RATE LIMITING (TOKEN BUCKETS)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_priority = threading.local()
+
+
+def current_priority() -> str:
+    return getattr(_priority, "value", INTERACTIVE)
+
+
+# Seconds this thread has spent waiting for rate-limit tokens and concurrency slots
+_waits = threading.local()
+
+
+def _add_wait(seconds: float):
+    if seconds > 0:
+        _waits.seconds = getattr(_waits, "seconds", 0.0) + seconds
+
+
+def service_clock() -> Callable[[], float]:
+    """
+    Stopwatch for upstream latency: the returned function gives the seconds since this call
+    minus the time this thread spent meanwhile waiting on token buckets and concurrency slots,
+    so controllers react to the upstream and not to throttling of our own making.
+    """
+    start = time.perf_counter()
+    waited = getattr(_waits, "seconds", 0.0)
+    return lambda: max(0.0, time.perf_counter() - start - (getattr(_waits, "seconds", 0.0) - waited))
+
+
+@contextmanager
+def request_priority(priority: str):
+    """Run the enclosed upstream calls (in this thread) at the given priority."""
+    previous = current_priority()
+    _priority.value = priority
+    try:
+        yield
+    finally:
+        _priority.value = previous
+
+
+def run_in_background(fn: Callable, *args, **kwargs):
+    """Call fn at BACKGROUND priority, for work nobody is waiting on (e.g. cache revalidation)."""
+    with request_priority(BACKGROUND):
+        return fn(*args, **kwargs)
+
+
+def run_with_priority(priority: str, fn: Callable, *args, **kwargs):
+    """
+    Call fn at the given priority. executor.submit(run_with_priority, current_priority(), fn, ...)
+    carries the caller's priority into a worker thread, e.g. for a request's own next-page prefetch.
+    """
+    with request_priority(priority):
+        return fn(*args, **kwargs)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` tokens/second up to ``burst``.
+    Interactive callers are served first: background callers do not take a token while
+    an interactive caller is waiting on the same bucket.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._stats = {p: {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_ms": 0.0}
+                       for p in (INTERACTIVE, BACKGROUND)}
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, priority: str, cost: float) -> float:
+        """Take tokens if allowed; returns 0 on success, else seconds to wait before retrying."""
+        now = time.monotonic()
+        self._refill(now)
+        if priority == BACKGROUND and self._waiting[INTERACTIVE]:
+            return 0.05
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return max(0.005, (cost - self.tokens) / self.rate)
+
+    def _record(self, priority: str, waited: float):
+        st = self._stats[priority]
+        st["acquired"] += 1
+        if waited > 0:
+            st["waited"] += 1
+            st["wait_seconds"] += waited
+            st["max_wait_ms"] = max(st["max_wait_ms"], waited * 1000)
+
+    def acquire(self, priority: str = INTERACTIVE, cost: float = 1.0) -> float:
+        """Block until ``cost`` tokens are available. Returns seconds waited."""
+        priority = BACKGROUND if priority == BACKGROUND else INTERACTIVE
+        cost = min(max(cost, 0.0), self.burst)
+        start = time.monotonic()
+        with self._cond:
+            delay = self._try_take(priority, cost)
+            if delay:
+                self._waiting[priority] += 1
+                try:
+                    while delay:
+                        self._cond.wait(delay)
+                        delay = self._try_take(priority, cost)
+                finally:
+                    self._waiting[priority] -= 1
+                    self._cond.notify_all()
+                waited = time.monotonic() - start
+            else:
+                waited = 0.0
+            self._record(priority, waited)
+        return waited
+
+    async def acquire_async(self, priority: str = INTERACTIVE, cost: float = 1.0) -> float:
+        """Event-loop friendly acquire for the async engine (does not block the loop)."""
+        priority = BACKGROUND if priority == BACKGROUND else INTERACTIVE
+        cost = min(max(cost, 0.0), self.burst)
+        start = time.monotonic()
+        slept = False
+        while True:
+            with self._cond:
+                delay = self._try_take(priority, cost)
+                if not delay:
+                    waited = time.monotonic() - start if slept else 0.0
+                    self._record(priority, waited)
+                    return waited
+            slept = True
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            out = {"rate_per_sec": self.rate, "burst": self.burst, "tokens": round(self.tokens, 2),
+                   "waiting": dict(self._waiting)}
+            for p, st in self._stats.items():
+                out[p] = {
+                    "acquired": st["acquired"],
+                    "waited": st["waited"],
+                    "avg_wait_ms": round(st["wait_seconds"] / st["acquired"] * 1000, 2) if st["acquired"] else 0.0,
+                    "max_wait_ms": round(st["max_wait_ms"], 2),
+                }
+            return out
+
+
+def _parse_rate_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    limits = dict(DEFAULT_RATE_LIMITS)
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        name, _, value = part.partition("=")
+        try:
+            rate_s, _, burst_s = value.partition(":")
+            rate = float(rate_s)
+            limits[name.strip()] = (rate, float(burst_s) if burst_s else max(1.0, rate))
+        except ValueError:
+            print(f"[RateLimit] Ignoring bad LEAKLENS_RATE_LIMITS entry: {part!r}")
+    return limits
+
+
+RATE_LIMITS = _parse_rate_limits(os.getenv("LEAKLENS_RATE_LIMITS", ""))
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def provider_of(url: str) -> Optional[str]:
+    """Provider bucket name for a URL, or None if the host is not rate limited."""
+    hostname = urlsplit(url).hostname or ""
+    for suffix, provider in PROVIDER_HOSTS.items():
+        if hostname == suffix or hostname.endswith("." + suffix):
+            return provider
+    return None
+
+
+def get_bucket(name: str) -> Optional[TokenBucket]:
+    """
+    Process-wide token bucket (None when unlimited). name is a provider, optionally
+    suffixed "#<endpoint>" for a per-key bucket that uses the provider's limits.
+    """
+    bucket = _buckets.get(name)
+    if bucket is None:
+        rate, burst = RATE_LIMITS.get(name.split("#", 1)[0], (0.0, 0.0))
+        if rate <= 0:
+            return None
+        with _lock:
+            bucket = _buckets.get(name)
+            if bucket is None:
+                bucket = TokenBucket(name, rate, burst)
+                _buckets[name] = bucket
+    return bucket
+
+
+def _bucket_for(url: str, rate_key: Optional[str]) -> Optional[TokenBucket]:
+    provider = provider_of(url)
+    if not provider:
+        return None
+    return get_bucket(f"{provider}#{rate_key}" if rate_key else provider)
+
+
+def rate_limit(url: str, priority: Optional[str] = None, cost: float = 1.0, rate_key: Optional[str] = None) -> float:
+    """Wait for the URL's provider bucket. Returns seconds waited (0 for unlimited hosts)."""
+    bucket = _bucket_for(url, rate_key)
+    if bucket is None:
+        return 0.0
+    waited = bucket.acquire(priority or current_priority(), cost)
+    _add_wait(waited)
+    return waited
+
+
+async def rate_limit_async(url: str, priority: Optional[str] = None, cost: float = 1.0,
+                           rate_key: Optional[str] = None) -> float:
+    bucket = _bucket_for(url, rate_key)
+    if bucket is None:
+        return 0.0
+    return await bucket.acquire_async(priority or INTERACTIVE, cost)
+
+
+def rate_limit_stats() -> dict:
+    return {name: bucket.snapshot() for name, bucket in sorted(_buckets.items())}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ADAPTIVE CONCURRENCY (AIMD)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency window shared by every fetch path that hits one upstream.
+    Each healthy completion (success, latency under target) grows the window by
+    1/window, i.e. about +1 per round trip. A failure that signals load (LOAD_SIGNALS: 429,
+    5xx, timeout) halves it, at most once per cooldown so a burst of failures counts as one
+    signal. Outcomes that say nothing about load (client/RPC errors, null results) are neutral.
+    """
+
+    def __init__(self, name: str, initial: int = CONCURRENCY_INITIAL, minimum: int = 1,
+                 maximum: int = CONCURRENCY_MAX, target_latency: float = CONCURRENCY_TARGET_LATENCY,
+                 backoff: float = 0.5, cooldown: float = 1.0):
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = float(min(max(initial, self.minimum), self.maximum))
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self.failures = 0
+        self.completions = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def has_capacity(self) -> bool:
+        with self._cond:
+            return self.in_flight < int(self.window)
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.window):
+                self.in_flight += 1
+                return True
+            return False
+
+    @property
+    def limit(self) -> int:
+        """Requests currently allowed in flight (the window, rounded down)."""
+        return int(self.window)
+
+    def acquire(self):
+        start = time.perf_counter()
+        with self._cond:
+            while self.in_flight >= int(self.window):
+                self._cond.wait(0.5)
+            self.in_flight += 1
+        _add_wait(time.perf_counter() - start)
+
+    async def acquire_async(self):
+        """Event-loop friendly acquire for the async engine."""
+        while not self.try_acquire():
+            await asyncio.sleep(0.01)
+
+    def release(self, ok: Optional[bool], latency: float):
+        """Free a slot: ok=True grows the window, ok=False shrinks it, ok=None leaves it as is."""
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.completions += 1
+            if ok is None:
+                pass
+            elif ok:
+                if latency <= self.target_latency and self.window < self.maximum:
+                    self.window = min(self.maximum, self.window + 1.0 / self.window)
+                    self.increases += 1
+            else:
+                self.failures += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.window = max(float(self.minimum), self.window * self.backoff)
+                    self._last_decrease = now
+                    self.decreases += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one concurrency slot. Set ``token.ok = None`` on a neutral outcome (e.g. a null
+        result); exceptions shrink the window only when they signal load (load_signal). The
+        latency fed back starts once the slot is held and leaves out rate-limit waits (service_clock).
+
+            with controller.slot() as token:
+                token.ok = True if fetch() is not None else None
+        """
+        self.acquire()
+        token = _SlotToken()
+        clock = service_clock()
+        try:
+            yield token
+        except Exception as e:
+            token.ok = load_signal(e)
+            raise
+        finally:
+            self.release(token.ok, clock())
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "window": round(self.window, 2),
+                "limit": int(self.window),
+                "in_flight": self.in_flight,
+                "minimum": self.minimum,
+                "maximum": self.maximum,
+                "completions": self.completions,
+                "failures": self.failures,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
+
+
+class _SlotToken:
+    __slots__ = ("ok",)
+
+    def __init__(self):
+        self.ok: Optional[bool] = True
+
+
+_controllers: Dict[str, AdaptiveConcurrency] = {}
+
+
+def get_concurrency(name: str) -> AdaptiveConcurrency:
+    """Process-wide AIMD controller for an upstream (e.g. "rpc")."""
+    ctrl = _controllers.get(name)
+    if ctrl is None:
+        with _lock:
+            ctrl = _controllers.get(name)
+            if ctrl is None:
+                ctrl = AdaptiveConcurrency(name)
+                _controllers[name] = ctrl
+    return ctrl
+
+
+def concurrency_stats() -> dict:
+    return {name: ctrl.snapshot() for name, ctrl in sorted(_controllers.items())}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FAILURE CLASSIFICATION & RETRY POLICY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Failure kinds. Only the first four are worth retrying.
+THROTTLED = "throttled"      # HTTP 429 or RPC rate-limit error
+SERVER = "server"            # HTTP 5xx or RPC internal/unavailable error
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+CLIENT = "client"            # other HTTP 4xx
+RPC_ERROR = "rpc_error"      # JSON-RPC error that will not change on retry
+RETRYABLE = frozenset({THROTTLED, SERVER, TIMEOUT, CONNECTION})
+# Failures that mean the upstream is overloaded: the only ones that shrink a concurrency window
+LOAD_SIGNALS = frozenset({THROTTLED, SERVER, TIMEOUT})
+
+# JSON-RPC error codes seen from Solana RPC providers
+RPC_THROTTLE_CODES = {-32429, -32005}
+RPC_SERVER_CODES = {-32603, -32004, -32014}
+
+
+class UpstreamError(Exception):
+    """Classified upstream failure. kind is one of THROTTLED, SERVER, TIMEOUT, CONNECTION, CLIENT, RPC_ERROR."""
+
+    def __init__(self, kind: str, message: str = "", status: Optional[int] = None,
+                 code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(f"{kind}: {message}" if message else kind)
+        self.kind = kind
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (delta-seconds or HTTP date) -> seconds to wait."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def check_response(resp: requests.Response) -> requests.Response:
+    """Raise UpstreamError for 429/4xx/5xx responses; returns resp otherwise."""
+    status = resp.status_code
+    if status < 400:
+        return resp
+    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+    if status == 429:
+        raise UpstreamError(THROTTLED, "HTTP 429", status=status, retry_after=retry_after)
+    if status >= 500:
+        raise UpstreamError(SERVER, f"HTTP {status}", status=status, retry_after=retry_after)
+    raise UpstreamError(CLIENT, f"HTTP {status}", status=status)
+
+
+def classify_rpc_error(error: dict) -> UpstreamError:
+    """Classify a JSON-RPC error object."""
+    code = error.get("code") if isinstance(error, dict) else None
+    message = str(error.get("message", "")) if isinstance(error, dict) else str(error)
+    lowered = message.lower()
+    if code in RPC_THROTTLE_CODES or "rate limit" in lowered or "too many requests" in lowered:
+        kind = THROTTLED
+    elif code in RPC_SERVER_CODES:
+        kind = SERVER
+    else:
+        kind = RPC_ERROR
+    return UpstreamError(kind, message[:200], code=code)
+
+
+def classify_exception(exc: BaseException) -> UpstreamError:
+    """Map transport exceptions (requests/httpx) to UpstreamError."""
+    if isinstance(exc, UpstreamError):
+        return exc
+    name = type(exc).__name__.lower()
+    if isinstance(exc, requests.Timeout) or "timeout" in name:
+        return UpstreamError(TIMEOUT, str(exc)[:200])
+    if isinstance(exc, (requests.ConnectionError, ConnectionError)) or "connect" in name or "network" in name:
+        return UpstreamError(CONNECTION, str(exc)[:200])
+    if isinstance(exc, ValueError):
+        # Undecodable body (HTML error page from a proxy, truncated JSON)
+        return UpstreamError(SERVER, f"bad response: {str(exc)[:160]}")
+    return UpstreamError(CONNECTION, f"{type(exc).__name__}: {str(exc)[:160]}")
+
+
+def load_signal(exc: BaseException) -> Optional[bool]:
+    """Concurrency feedback for a failed call: False when it signals load, None (neutral) otherwise."""
+    return False if classify_exception(exc).kind in LOAD_SIGNALS else None
+
+
+_retry_stats: Dict[str, dict] = {}
+
+
+class RetryPolicy:
+    """
+    Retry transient failures with decorrelated jitter (sleep = U(base, 3 * previous sleep), capped).
+    Retry-After from the server is a lower bound on the wait. Non-retryable kinds fail at once.
+
+        RetryPolicy("rpc").call(fn, *args)
+    """
+
+    def __init__(self, name: str, attempts: int = RETRY_ATTEMPTS, base: float = 0.2, cap: float = 8.0,
+                 retry_on: frozenset = RETRYABLE):
+        self.name = name
+        self.attempts = max(1, attempts)
+        self.base = base
+        self.cap = cap
+        self.retry_on = retry_on
+        with _lock:
+            self._stats = _retry_stats.setdefault(name, {"calls": 0, "retries": 0, "gave_up": 0, "by_kind": {}})
+
+    def next_delay(self, previous: float, error: Optional[UpstreamError] = None) -> float:
+        delay = min(self.cap, random.uniform(self.base, max(self.base, previous * 3)))
+        if error is not None and error.retry_after:
+            delay = max(delay, min(error.retry_after, self.cap * 4))
+        return delay
+
+    def should_retry(self, error: UpstreamError, attempt: int) -> bool:
+        return error.kind in self.retry_on and attempt + 1 < self.attempts
+
+    def record(self, error: Optional[UpstreamError], retried: bool):
+        with _lock:
+            if error is None:
+                self._stats["calls"] += 1
+                return
+            by_kind = self._stats["by_kind"]
+            by_kind[error.kind] = by_kind.get(error.kind, 0) + 1
+            if retried:
+                self._stats["retries"] += 1
+            else:
+                self._stats["calls"] += 1
+                self._stats["gave_up"] += 1
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn until it succeeds or fails with a non-retryable/exhausted error (raised as UpstreamError)."""
+        delay = self.base
+        for attempt in range(self.attempts):
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                err = classify_exception(e)
+                retry = self.should_retry(err, attempt)
+                self.record(err, retried=retry)
+                if not retry:
+                    raise err from e
+                delay = self.next_delay(delay, err)
+                time.sleep(delay)
+                continue
+            self.record(None, retried=False)
+            return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HEDGED REQUESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedgers: Dict[str, "Hedger"] = {}
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    """
+    Threads for hedge duplicates: one per calibrated call in flight, waiting out its hedge delay
+    and then running the duplicate (or returning at once when the primary finished first).
+    Bounded by the largest window plus the hedge budget; threads start on demand.
+    """
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _lock:
+            if _hedge_pool is None:
+                workers = CONCURRENCY_MAX + max(1, int(CONCURRENCY_MAX * HEDGE_MAX_RATIO))
+                _hedge_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge")
+    return _hedge_pool
+
+
+# Returned by a duplicate that did not run because the primary finished within the hedge delay
+_SKIPPED = object()
+
+
+class Hedger:
+    """
+    Tail-latency hedging: the primary runs on the calling thread; if it has not finished after the
+    recent p95 latency, one duplicate is sent from the hedge pool (at the caller's priority, in its
+    context), e.g. to another endpoint. The caller keeps the primary's answer, or takes the
+    duplicate's when the primary fails. Duplicates are capped at HEDGE_MAX_RATIO of calls so a
+    slow provider is not hit with twice the load.
+    """
+
+    def __init__(self, name: str, quantile: float = 0.95, min_delay: float = 0.25,
+                 min_samples: int = 20, max_ratio: float = HEDGE_MAX_RATIO):
+        self.name = name
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self._latencies = deque(maxlen=256)
+        self._hlock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off/unbudgeted/not yet calibrated."""
+        with self._hlock:
+            if not HEDGE_ENABLED or len(self._latencies) < self.min_samples:
+                return None
+            if self.hedged >= self.max_ratio * max(1, self.calls):
+                return None
+            ordered = sorted(self._latencies)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))])
+
+    def _observe(self, seconds: float):
+        with self._hlock:
+            self._latencies.append(seconds)
+
+    def _timed(self, attempt: Callable[[], Any]):
+        # Slot and token waits inside the attempt are queueing, not upstream latency
+        clock = service_clock()
+        result = attempt()
+        self._observe(clock())
+        return result
+
+    def _duplicate(self, primary_over: threading.Event, deadline: float, attempt: Callable[[], Any]):
+        # The delay runs from the primary's start, whatever time this task spent queued
+        if primary_over.wait(max(0.0, deadline - time.monotonic())):
+            return _SKIPPED
+        with self._hlock:
+            self.hedged += 1
+        return self._timed(attempt)
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Hedge fn(*args, **kwargs) with an identical duplicate."""
+        attempt = lambda: fn(*args, **kwargs)
+        return self.hedge(attempt, attempt)
+
+    def hedge(self, primary: Callable[[], Any], duplicate: Callable[[], Any]) -> Any:
+        """Run primary here, with duplicate sent once it runs past the hedge delay."""
+        with self._hlock:
+            self.calls += 1
+        hedge_after = self.delay()
+        if hedge_after is None:
+            return self._timed(primary)
+
+        primary_over = threading.Event()
+        deadline = time.monotonic() + hedge_after
+        backup = _get_hedge_pool().submit(copy_context().run, run_with_priority, current_priority(),
+                                          self._duplicate, primary_over, deadline, duplicate)
+        try:
+            result = self._timed(primary)
+        except Exception as primary_error:
+            primary_over.set()
+            try:
+                result = backup.result()
+            except Exception:
+                raise primary_error
+            if result is _SKIPPED:
+                raise
+            with self._hlock:
+                self.hedge_wins += 1
+            return result
+        primary_over.set()
+        return result
+
+    def snapshot(self) -> dict:
+        with self._hlock:
+            ordered = sorted(self._latencies)
+
+            def pct(q: float) -> float:
+                return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1) if ordered else 0.0
+
+            return {"calls": self.calls, "hedged": self.hedged, "hedge_wins": self.hedge_wins,
+                    "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+def get_hedger(name: str) -> Hedger:
+    hedger = _hedgers.get(name)
+    if hedger is None:
+        with _lock:
+            hedger = _hedgers.get(name)
+            if hedger is None:
+                hedger = Hedger(name)
+                _hedgers[name] = hedger
+    return hedger
+
+
+def retry_stats() -> dict:
+    """Retry counters per policy and hedging counters per call type (exported via /upstream-stats)."""
+    with _lock:
+        retries = {name: {**st, "by_kind": dict(st["by_kind"])} for name, st in sorted(_retry_stats.items())}
+    return {"retries": retries, "hedging": {name: h.snapshot() for name, h in sorted(_hedgers.items())}}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RPC ENDPOINT POOL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def redact_url(url: str) -> str:
+    """scheme://host/path without query string (API keys live there)."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+class Endpoint:
+    """One RPC endpoint (URL + API key) with its weight and observed health."""
+
+    def __init__(self, url: str, weight: float = 1.0, name: Optional[str] = None):
+        self.url = url
+        self.weight = max(0.01, weight)
+        self.name = name or redact_url(url)
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_errors = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.probing = False
+        self.requests = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now and not self.probing and self.consecutive_errors < ENDPOINT_EJECT_AFTER
+
+    def snapshot(self, now: float) -> dict:
+        state = "healthy"
+        if self.probing:
+            state = "probing"
+        elif self.ejected_until > now:
+            state = "ejected"
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "state": state,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_errors": self.consecutive_errors,
+            "ejections": self.ejections,
+        }
+
+
+class EndpointPool:
+    """
+    Weighted RPC endpoint selection with health scoring.
+    Endpoints are picked at random in proportion to weight / EWMA latency. After
+    ENDPOINT_EJECT_AFTER consecutive transient failures an endpoint is ejected; when the
+    ejection expires it is probed (probe(url) -> bool, e.g. getHealth) in the background
+    and only readmitted once the probe passes. If every endpoint is out, the one due back
+    soonest is still used so requests degrade instead of stalling.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], probe: Optional[Callable[[str], bool]] = None,
+                 alpha: float = 0.2):
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.probe = probe
+        self.alpha = alpha
+        self._plock = threading.Lock()
+
+    @property
+    def urls(self) -> List[str]:
+        return [ep.url for ep in self.endpoints]
+
+    def choose(self, prefer: Optional[Callable[[Endpoint], bool]] = None,
+               exclude: Optional[Endpoint] = None) -> Endpoint:
+        """
+        Pick an endpoint. prefer narrows the choice to endpoints it accepts when there are
+        any (e.g. those with a free concurrency slot), so one saturated key is routed around.
+        exclude is only picked when no other endpoint is available (e.g. a hedge duplicate
+        avoids the endpoint its primary is slow on).
+        """
+        now = time.monotonic()
+        with self._plock:
+            for ep in self.endpoints:
+                if ep.ejected_until and ep.ejected_until <= now and not ep.probing:
+                    self._start_probe(ep)
+            candidates = [ep for ep in self.endpoints if ep.available(now)]
+            if exclude is not None:
+                candidates = [ep for ep in candidates if ep is not exclude] or candidates
+            if not candidates:
+                return min(self.endpoints, key=lambda ep: ep.ejected_until)
+            if prefer is not None:
+                candidates = [ep for ep in candidates if prefer(ep)] or candidates
+            if len(candidates) == 1:
+                return candidates[0]
+            known = [ep.ewma_latency for ep in candidates if ep.ewma_latency is not None]
+            default_latency = sorted(known)[len(known) // 2] if known else 0.5
+            scores = [ep.weight / max(0.02, ep.ewma_latency if ep.ewma_latency is not None else default_latency)
+                      for ep in candidates]
+            return random.choices(candidates, weights=scores, k=1)[0]
+
+    def report(self, ep: Endpoint, ok: bool, latency: float, error: Optional[UpstreamError] = None):
+        """Feed back one request's outcome. Only transient (retryable) failures count against health."""
+        with self._plock:
+            ep.requests += 1
+            if ok or (error is not None and not error.retryable):
+                ep.ewma_latency = latency if ep.ewma_latency is None else (
+                    self.alpha * latency + (1 - self.alpha) * ep.ewma_latency)
+                ep.consecutive_errors = 0
+                return
+            ep.errors += 1
+            ep.consecutive_errors += 1
+            if ep.consecutive_errors >= ENDPOINT_EJECT_AFTER and ep.ejected_until <= time.monotonic():
+                self._eject(ep)
+
+    def _eject(self, ep: Endpoint):
+        ep.ejections += 1
+        ep.ejected_until = time.monotonic() + min(120.0, ENDPOINT_EJECT_SECONDS * 2 ** (ep.ejections - 1))
+        print(f"[RPC] Ejected endpoint {ep.name} after {ep.consecutive_errors} consecutive failures")
+
+    def _start_probe(self, ep: Endpoint):
+        if self.probe is None:
+            ep.ejected_until = 0.0
+            ep.consecutive_errors = 0
+            return
+        ep.probing = True
+        threading.Thread(target=self._run_probe, args=(ep,), daemon=True).start()
+
+    def _run_probe(self, ep: Endpoint):
+        try:
+            healthy = bool(self.probe(ep.url))
+        except Exception:
+            healthy = False
+        with self._plock:
+            ep.probing = False
+            if healthy:
+                ep.ejected_until = 0.0
+                ep.consecutive_errors = 0
+                print(f"[RPC] Endpoint {ep.name} passed its health probe, readmitted")
+            else:
+                self._eject(ep)
+
+    def snapshot(self) -> List[dict]:
+        now = time.monotonic()
+        with self._plock:
+            return [ep.snapshot(now) for ep in self.endpoints]
+
+
+def parse_endpoints(spec: str) -> List[Endpoint]:
+    """
+    Parse "url[|weight],url[|weight],..." into endpoints. Endpoints sharing a host are
+    numbered (#1, #2, ...) so stats and rate-limit buckets stay per key without showing it.
+    """
+    endpoints: List[Endpoint] = []
+    seen: Dict[str, int] = {}
+    for part in (spec or "").replace("\n", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        url, _, weight_s = part.partition("|")
+        try:
+            weight = float(weight_s) if weight_s else 1.0
+        except ValueError:
+            print(f"[RPC] Ignoring bad weight in LEAKLENS_RPC_URLS entry for {redact_url(url)}")
+            weight = 1.0
+        base = redact_url(url)
+        seen[base] = seen.get(base, 0) + 1
+        endpoints.append(Endpoint(url.strip(), weight, name=f"{base}#{seen[base]}"))
+    return endpoints
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SINGLE-FLIGHT COALESCING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_flights: Dict[Hashable, _Flight] = {}
+_flight_lock = threading.Lock()
+_flight_stats: Dict[str, dict] = {}
+
+
+def single_flight(key: Tuple, fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run fn(*args, **kwargs) once for all concurrent callers with the same key.
+    The first caller executes it; callers arriving while it is in flight block and
+    receive the same result (or exception). Nothing is cached after completion.
+    key should be (provider, method, *params); the result object is shared, so
+    callers must copy it before mutating.
+    """
+    provider = str(key[0]) if key else "default"
+    with _flight_lock:
+        st = _flight_stats.setdefault(provider, {"calls": 0, "executed": 0, "coalesced": 0})
+        st["calls"] += 1
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            _flights[key] = flight
+            st["executed"] += 1
+        else:
+            st["coalesced"] += 1
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = fn(*args, **kwargs)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flight_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def single_flight_stats() -> dict:
+    with _flight_lock:
+        return {provider: dict(st) for provider, st in sorted(_flight_stats.items())}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STATISTICS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def pool_stats() -> dict:
+    """
+    Per-host transport statistics.
+    connections_opened counts TCP/TLS handshakes; with keep-alive it should stay
+    near the worker count while requests keeps growing.
+    """
+    out = {}
+    with _lock:
+        hosts = set(_sessions) | set(_stats)
+        for host in sorted(hosts):
+            st = _stats.get(host, {"requests": 0, "errors": 0, "status": {}, "total_seconds": 0.0})
+            opened = 0
+            idle = 0
+            session = _sessions.get(host)
+            if session is not None:
+                adapter = session.get_adapter("https://" + host)
+                for key in adapter.poolmanager.pools.keys():
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is None:
+                        continue
+                    opened += getattr(pool, "num_connections", 0)
+                    if getattr(pool, "pool", None) is not None:
+                        # The LIFO queue is pre-filled with None placeholders; count real connections only
+                        idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            out[host] = {
+                "requests": st["requests"],
+                "errors": st["errors"],
+                "status": dict(st["status"]),
+                "avg_latency_ms": round(st["total_seconds"] / st["requests"] * 1000, 2) if st["requests"] else 0.0,
+                "connections_opened": opened,
+                "idle_connections": idle,
+                "pool_maxsize": _pool_sizes.get(host, 0),
+            }
+    return out
@@ -0,0 +1,93 @@
+"""LeakLens Intern - Address interning (base58 address <-> compact int id), process-wide or per request."""
+
+import threading
+from array import array
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class AddressTable:
+    """
+    Maps each distinct address to a dense int id (0, 1, 2, ...) for the life of the table.
+    Analyzers key their sets, dicts and arrays on ids and restore strings only for output;
+    every record built from a transaction also shares the table's single copy of each string.
+    Lookups are lock-free; inserts take a lock.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._addresses: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    def intern(self, address: str) -> int:
+        """Id of an address, assigning the next one on first sight."""
+        i = self._ids.get(address)
+        if i is None:
+            with self._lock:
+                i = self._ids.get(address)
+                if i is None:
+                    i = len(self._addresses)
+                    self._addresses.append(address)
+                    self._ids[address] = i
+        return i
+
+    def intern_many(self, addresses: Iterable[str]) -> array:
+        return array("I", (self.intern(a) for a in addresses))
+
+    def lookup(self, address: str) -> Optional[int]:
+        """Id of an address already seen, else None (never inserts)."""
+        return self._ids.get(address)
+
+    def address(self, i: int) -> str:
+        return self._addresses[i]
+
+    def addresses(self, ids: Iterable[int]) -> List[str]:
+        table = self._addresses
+        return [table[i] for i in ids]
+
+    def stats(self) -> dict:
+        return {"addresses": len(self._addresses)}
+
+
+# Shared by every analyzer outside an address_scope (CLI runs: multi-wallet scans share ids)
+ADDRESSES = AddressTable()
+
+_current_table: ContextVar[Optional[AddressTable]] = ContextVar("leaklens_address_table", default=None)
+
+
+def address_table() -> AddressTable:
+    """The active table: the enclosing address_scope's, else the process-wide ADDRESSES."""
+    table = _current_table.get()
+    return ADDRESSES if table is None else table
+
+
+@contextmanager
+def address_scope() -> Iterator[AddressTable]:
+    """
+    Intern into a fresh table for the block (e.g. one API request), dropped on exit so a
+    long-running server does not keep every address it has ever seen. Nested scopes reuse the
+    active table. Ids are only meaningful within the scope that assigned them; worker threads
+    see the table when started under copy_context().
+    """
+    table = _current_table.get()
+    if table is not None:
+        yield table
+        return
+    table = AddressTable()
+    token = _current_table.set(table)
+    try:
+        yield table
+    finally:
+        _current_table.reset(token)
+
+
+def intern_address(address: str) -> int:
+    return address_table().intern(address)
+
+
+def address_of(i: int) -> str:
+    return address_table().address(i)
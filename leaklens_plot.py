@@ -0,0 +1,344 @@
+"""LeakLens Plot - matplotlib figures for the CLI. matplotlib is imported on first use, not at import."""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from leaklens_histograms import HIGH_COMPLEXITY_CU, ActivityHistograms, activity_histograms, sleep_mask
+from leaklens_analysis import (
+    ProfileProbabilities, SleepWindow, ReactionSpeedAnalysis, WalletConnection,
+    get_label, get_complexity_color,
+)
+
+
+def _pyplot():
+    """matplotlib.pyplot, imported on first use (the API server never plots)."""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def show():
+    """Show open figures (plt.show)."""
+    _pyplot().show()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROFILE FIGURE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def visualize_profile(df: pd.DataFrame, wallet: str, probs: ProfileProbabilities, sleep: SleepWindow, reaction: ReactionSpeedAnalysis,
+                      hist: Optional[ActivityHistograms] = None):
+    """Generate profile visualization"""
+    plt = _pyplot()
+    import matplotlib.patches as mpatches
+    
+    if hist is None:
+        hist = activity_histograms(df)
+    hourly_counts, daily_counts = hist.hourly, hist.daily
+    
+    peak_hour = hourly_counts.index(max(hourly_counts))
+    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    
+    weekend_tx = daily_counts[5] + daily_counts[6]
+    weekday_tx = sum(daily_counts[:5])
+    weekend_ratio = (weekend_tx / 2) / (weekday_tx / 5) if weekday_tx > 0 else 0
+    
+    # High-complexity transactions inside the sleep window
+    panic = sleep_mask(df["hour"].to_numpy(), sleep.start_hour) & (df["compute_units"].to_numpy() > HIGH_COMPLEXITY_CU)
+    
+    plt.style.use('dark_background')
+    fig = plt.figure(figsize=(16, 16))  # Increased height for reaction speed panel
+    
+    bg_color = '#0a0a0a'
+    panel_color = '#111111'
+    grid_color = '#1f2937'
+    text_color = '#9ca3af'
+    accent_cyan = '#06b6d4'
+    accent_yellow = '#eab308'
+    accent_orange = '#f97316'
+    accent_green = '#22c55e'
+    accent_red = '#ef4444'
+    accent_purple = '#a855f7'
+    
+    fig.patch.set_facecolor(bg_color)
+    fig.suptitle(f"LEAKLENS EXPOSURE - {wallet[:12]}...{wallet[-6:]}", 
+                 fontsize=16, color=accent_green, fontweight='bold', y=0.98)
+    
+    # Panel 1: Profile probabilities
+    ax0 = fig.add_subplot(5, 2, (1, 2))  # Changed to 5x2 grid
+    ax0.set_facecolor(panel_color)
+    
+    categories = ['Bot (Automated)', 'Europe/Africa', 'Americas', 'Asia/Pacific',
+                  'Retail/Hobbyist', 'Professional', 'Whale', 'Degen/High-Risk']
+    values = [probs.bot, probs.eu_trader, probs.us_trader, probs.asia_trader,
+              probs.retail_hobbyist, probs.professional, probs.whale, probs.degen]
+    colors = [accent_purple, accent_cyan, accent_cyan, accent_cyan,
+              accent_yellow, accent_yellow, accent_green, accent_red]
+    
+    bars = ax0.barh(categories, values, color=colors, alpha=0.7, edgecolor='white', linewidth=0.5)
+    
+    for bar, val in zip(bars, values):
+        ax0.text(val + 1, bar.get_y() + bar.get_height()/2, f'{val:.1f}%',
+                 va='center', ha='left', color='white', fontsize=9)
+    
+    ax0.set_xlim(0, 110)
+    ax0.set_title("PROFILE PROBABILITY ANALYSIS", color=accent_purple, fontsize=12, fontweight='bold', loc='left')
+    ax0.set_xlabel("Probability (%)", color=text_color)
+    ax0.tick_params(colors=text_color)
+    ax0.grid(True, alpha=0.2, color=grid_color, axis='x')
+    ax0.invert_yaxis()
+    
+    # Panel 2: Circadian rhythm
+    ax1 = fig.add_subplot(5, 2, 3)
+    ax1.set_facecolor(panel_color)
+    
+    bar_colors = []
+    for i in range(24):
+        in_sleep = (sleep.start_hour <= i < sleep.start_hour + 6) or \
+                   (sleep.start_hour + 6 > 24 and i < (sleep.start_hour + 6) % 24)
+        if i == peak_hour:
+            bar_colors.append(accent_green)
+        elif in_sleep:
+            bar_colors.append(accent_red)
+        else:
+            bar_colors.append(accent_cyan)
+    
+    ax1.bar(range(24), hourly_counts, color=bar_colors, alpha=0.7, edgecolor='white', linewidth=0.3)
+    
+    if sleep.start_hour + 6 <= 24:
+        ax1.axvspan(sleep.start_hour - 0.5, sleep.start_hour + 5.5, alpha=0.15, color='red')
+    else:
+        ax1.axvspan(sleep.start_hour - 0.5, 23.5, alpha=0.15, color='red')
+        ax1.axvspan(-0.5, (sleep.start_hour + 6) % 24 - 0.5, alpha=0.15, color='red')
+    
+    ax1.set_title("CIRCADIAN RHYTHM", color=accent_cyan, fontsize=11, fontweight='bold', loc='left')
+    ax1.set_xlabel("Hour (UTC)", color=text_color)
+    ax1.set_ylabel("Transactions", color=text_color)
+    ax1.set_xticks(range(0, 24, 2))
+    ax1.tick_params(colors=text_color)
+    ax1.grid(True, alpha=0.2, color=grid_color, axis='y')
+    
+    sleep_patch = mpatches.Patch(color=accent_red, alpha=0.5, label=f'Sleep ({sleep.start_hour}:00-{sleep.end_hour}:00 UTC)')
+    peak_patch = mpatches.Patch(color=accent_green, label=f'Peak ({peak_hour}:00 UTC)')
+    ax1.legend(handles=[sleep_patch, peak_patch], loc='upper right', facecolor=panel_color,
+               edgecolor=grid_color, fontsize=8)
+    
+    # Panel 3: Geographic pie
+    ax2 = fig.add_subplot(5, 2, 4)
+    ax2.set_facecolor(panel_color)
+    
+    geo_labels = ['Europe/Africa', 'Americas', 'Asia/Pacific']
+    geo_values = [probs.eu_trader, probs.us_trader, probs.asia_trader]
+    geo_colors = ['#3b82f6', '#ef4444', '#22c55e']
+    
+    ax2.pie(geo_values, labels=geo_labels, autopct='%1.1f%%', colors=geo_colors, startangle=90,
+            wedgeprops={'edgecolor': 'white', 'linewidth': 1}, textprops={'color': 'white', 'fontsize': 9})
+    ax2.set_title("GEOGRAPHIC PROBABILITY", color=accent_cyan, fontsize=11, fontweight='bold')
+    
+    # Panel 4: Weekly routine
+    ax3 = fig.add_subplot(5, 2, 5)
+    ax3.set_facecolor(panel_color)
+    
+    day_colors = [accent_cyan if i < 5 else accent_yellow for i in range(7)]
+    ax3.bar(days, daily_counts, color=day_colors, alpha=0.7, edgecolor='white', linewidth=0.5)
+    
+    ax3.set_title("WEEKLY ROUTINE", color=accent_yellow, fontsize=11, fontweight='bold', loc='left')
+    ax3.set_xlabel("Day of Week", color=text_color)
+    ax3.set_ylabel("Transactions", color=text_color)
+    ax3.tick_params(colors=text_color)
+    ax3.grid(True, alpha=0.2, color=grid_color, axis='y')
+    
+    occ_text = f"Weekend Ratio: {weekend_ratio:.2f}x\n"
+    occ_text += f"→ {probs.retail_hobbyist:.0f}% Retail" if probs.retail_hobbyist > probs.professional else f"→ {probs.professional:.0f}% Professional"
+    ax3.text(0.98, 0.95, occ_text, transform=ax3.transAxes, ha='right', va='top', color=accent_yellow, fontsize=9,
+             bbox=dict(boxstyle='round', facecolor=panel_color, edgecolor=accent_yellow, alpha=0.8))
+    
+    # Panel 5: Occupation pie
+    ax4 = fig.add_subplot(5, 2, 6)
+    ax4.set_facecolor(panel_color)
+    
+    ax4.pie([probs.retail_hobbyist, probs.professional], labels=['Retail/Hobbyist', 'Professional'],
+            autopct='%1.1f%%', colors=[accent_yellow, accent_cyan], startangle=90,
+            wedgeprops={'edgecolor': 'white', 'linewidth': 1}, textprops={'color': 'white', 'fontsize': 10})
+    ax4.set_title("OCCUPATION PROBABILITY", color=accent_yellow, fontsize=11, fontweight='bold')
+    
+    # Panel 6: Complexity scatter
+    ax5 = fig.add_subplot(5, 2, 7)
+    ax5.set_facecolor(panel_color)
+    
+    colors = [get_complexity_color(cu) for cu in df["compute_units"]]
+    sizes = np.where(panic, 120, 40)
+    
+    ax5.scatter(df["hour"] + np.random.uniform(-0.3, 0.3, len(df)), df["compute_units"],
+                c=colors, s=sizes, alpha=0.7, edgecolors='white', linewidths=0.3)
+    
+    if sleep.start_hour + 6 <= 24:
+        ax5.axvspan(sleep.start_hour - 0.5, sleep.start_hour + 5.5, alpha=0.1, color='red')
+    else:
+        ax5.axvspan(sleep.start_hour - 0.5, 23.5, alpha=0.1, color='red')
+        ax5.axvspan(-0.5, (sleep.start_hour + 6) % 24 - 0.5, alpha=0.1, color='red')
+    
+    ax5.set_title("BEHAVIORAL COMPLEXITY", color=accent_orange, fontsize=11, fontweight='bold', loc='left')
+    ax5.set_xlabel("Hour (UTC)", color=text_color)
+    ax5.set_ylabel("Compute Units", color=text_color)
+    ax5.set_xticks(range(0, 24, 2))
+    ax5.set_xlim(-0.5, 23.5)
+    ax5.tick_params(colors=text_color)
+    ax5.grid(True, alpha=0.2, color=grid_color)
+    
+    legend_elements = [
+        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#22c55e', markersize=8, label='Simple (<50K)', linestyle='None'),
+        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#eab308', markersize=8, label='Moderate', linestyle='None'),
+        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#f97316', markersize=8, label='Complex', linestyle='None'),
+        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#ef4444', markersize=8, label='Heavy (>300K)', linestyle='None'),
+    ]
+    ax5.legend(handles=legend_elements, loc='upper right', facecolor=panel_color, edgecolor=grid_color, fontsize=7, ncol=2)
+    
+    # Panel 7: Risk profile
+    ax6 = fig.add_subplot(5, 2, 8)
+    ax6.set_facecolor(panel_color)
+    
+    risk_labels = ['Whale\n(High Value)', 'Degen\n(High Risk)', 'Bot\n(Automated)']
+    risk_values = [probs.whale, probs.degen, probs.bot]
+    risk_colors = [accent_green, accent_red, accent_purple]
+    
+    bars = ax6.bar(risk_labels, risk_values, color=risk_colors, alpha=0.7, edgecolor='white', linewidth=0.5)
+    
+    for bar, val in zip(bars, risk_values):
+        ax6.text(bar.get_x() + bar.get_width()/2, val + 2, f'{val:.1f}%',
+                 ha='center', va='bottom', color='white', fontsize=10, fontweight='bold')
+    
+    ax6.set_title("RISK PROFILE", color=accent_red, fontsize=11, fontweight='bold', loc='left')
+    ax6.set_ylabel("Probability (%)", color=text_color)
+    ax6.set_ylim(0, 110)
+    ax6.tick_params(colors=text_color)
+    ax6.grid(True, alpha=0.2, color=grid_color, axis='y')
+    
+    # Panel 8: Reaction Speed Analysis (NEW)
+    ax7 = fig.add_subplot(5, 2, (9, 10))  # Spans both columns in row 5
+    ax7.set_facecolor(panel_color)
+    
+    if reaction.total_reaction_pairs > 0:
+        # Create data for visualization
+        categories = ['Instant\n(<5s)', 'Fast\n(5-30s)', 'Human\n(>30s)']
+        counts = [reaction.instant_reactions, reaction.fast_reactions, reaction.human_reactions]
+        colors_reaction = [accent_red, accent_orange, accent_green]
+        
+        # Bar chart of reaction categories
+        bars = ax7.bar(categories, counts, color=colors_reaction, alpha=0.7, edgecolor='white', linewidth=1)
+        
+        # Add counts on bars with better spacing
+        max_count = max(counts) if counts else 1
+        for bar, count in zip(bars, counts):
+            if count > 0:
+                percentage = (count / reaction.total_reaction_pairs) * 100
+                # Position text higher with more padding
+                text_y = bar.get_height() + max_count * 0.05
+                ax7.text(bar.get_x() + bar.get_width()/2, text_y,
+                        f'{count}\n({percentage:.1f}%)', ha='center', va='bottom', 
+                        color='white', fontsize=9, fontweight='bold')
+        
+        # Add metrics text box with smaller font
+        metrics_text = f"Bot: {reaction.bot_confidence:.1f}%\n"
+        metrics_text += f"Avg: {reaction.avg_reaction_time:.1f}s\n"
+        metrics_text += f"Med: {reaction.median_reaction_time:.1f}s\n"
+        metrics_text += f"Min: {reaction.fastest_reaction:.1f}s"
+        
+        # Color code the text box based on bot confidence
+        if reaction.bot_confidence > 70:
+            box_color = accent_red
+            verdict = "⚠️  HIGH BOT"
+        elif reaction.bot_confidence < 30:
+            box_color = accent_green
+            verdict = "✓ HUMAN-LIKE"
+        else:
+            box_color = accent_orange
+            verdict = "⚡ MIXED"
+        
+        ax7.text(0.98, 0.98, f"{verdict}\n{metrics_text}", transform=ax7.transAxes, 
+                ha='right', va='top', color='white', fontsize=8,
+                bbox=dict(boxstyle='round', facecolor=panel_color, edgecolor=box_color, 
+                         linewidth=2, alpha=0.9, pad=0.5))
+        
+        ax7.set_title("REACTION SPEED ANALYSIS", 
+                     color=accent_purple, fontsize=11, fontweight='bold', loc='left', pad=8)
+        ax7.set_ylabel("Count", color=text_color, fontsize=9)
+        # Increase ylim padding for text above bars
+        ax7.set_ylim(0, max_count * 1.35 if max_count > 0 else 10)
+        ax7.tick_params(colors=text_color, labelsize=8, axis='y')
+        ax7.tick_params(colors=text_color, labelsize=9, axis='x')
+        ax7.grid(True, alpha=0.2, color=grid_color, axis='y')
+        
+    else:
+        # No reaction data available
+        ax7.text(0.5, 0.5, "No Reaction Patterns Detected\n\n(Requires consecutive token receive→action sequences)", 
+                transform=ax7.transAxes, ha='center', va='center', 
+                color=text_color, fontsize=11, style='italic')
+        ax7.set_title("REACTION SPEED ANALYSIS", color=accent_purple, 
+                     fontsize=12, fontweight='bold', loc='left')
+        ax7.set_xticks([])
+        ax7.set_yticks([])
+    
+    plt.tight_layout(rect=[0, 0, 1, 0.98], h_pad=1.5, w_pad=1.0)
+    
+    return fig
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONNECTION GRAPH
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def visualize_connections(connections: Dict[Tuple[str, str], WalletConnection], wallets: List[str]):
+    """Visualize wallet connections as a network graph"""
+    plt = _pyplot()
+    
+    plt.style.use('dark_background')
+    fig, ax = plt.subplots(figsize=(12, 10))
+    
+    bg_color = '#0a0a0a'
+    fig.patch.set_facecolor(bg_color)
+    ax.set_facecolor(bg_color)
+    
+    # Position wallets in a circle
+    n = len(wallets)
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    radius = 3
+    
+    positions = {}
+    for i, wallet in enumerate(wallets):
+        positions[wallet] = (radius * np.cos(angles[i]), radius * np.sin(angles[i]))
+    
+    # Draw connections
+    max_tx = max([c.tx_count for c in connections.values()]) if connections else 1
+    
+    for (wallet_a, wallet_b), conn in connections.items():
+        x1, y1 = positions[wallet_a]
+        x2, y2 = positions[wallet_b]
+        
+        # Line width based on transaction count
+        width = 1 + (conn.tx_count / max_tx) * 5
+        alpha = 0.3 + (conn.tx_count / max_tx) * 0.5
+        
+        ax.plot([x1, x2], [y1, y2], color='#06b6d4', linewidth=width, alpha=alpha)
+        
+        # Label the connection
+        mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
+        ax.text(mid_x, mid_y, f"{conn.tx_count}", fontsize=8, color='white',
+                ha='center', va='center', bbox=dict(boxstyle='round', facecolor='#111111', alpha=0.8))
+    
+    # Draw wallet nodes
+    for wallet, (x, y) in positions.items():
+        circle = plt.Circle((x, y), 0.4, color='#22c55e', alpha=0.8)
+        ax.add_patch(circle)
+        
+        label = get_label(wallet)
+        ax.text(x, y - 0.7, label, fontsize=9, color='white', ha='center', va='top')
+    
+    ax.set_xlim(-5, 5)
+    ax.set_ylim(-5, 5)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    
+    ax.set_title("GATOR - Wallet Connection Map", fontsize=14, color='#22c55e', fontweight='bold')
+    
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,183 @@
+"""LeakLens PnL - Streaming FIFO lot accounting for realized trading PnL (checkpoint / resume)."""
+
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from leaklens_prices import SOL_MINT, USDC_MINT, USDT_MINT
+
+STABLE_MINTS = frozenset({USDC_MINT, USDT_MINT})
+
+# Bases a token is priced in: stables (already USD) or SOL
+BASE_STABLE = "STABLE"
+BASE_SOL = "SOL"
+
+# A lot at or below this size is used up; a sell short by more than DUST_SELL is not realized
+DUST_LOT = 1e-12
+DUST_SELL = 1e-9
+
+CHECKPOINT_VERSION = 1
+
+
+def _safe_float(x, default: float = 0.0) -> float:
+    try:
+        return default if x is None else float(x)
+    except (TypeError, ValueError):
+        return default
+
+
+class Position:
+    """FIFO lots and running totals for one (mint, base) pair. Lots are [qty, cost_per_unit] in a deque."""
+    __slots__ = ("lots", "trades", "spent", "received")
+
+    def __init__(self):
+        self.lots: deque = deque()
+        self.trades = 0
+        self.spent = 0.0
+        self.received = 0.0
+
+    def buy(self, qty: float, cost_per_unit: float):
+        self.lots.append([qty, cost_per_unit])
+
+    def consume(self, qty: float) -> Tuple[float, float]:
+        """Take qty from the oldest lots; returns (cost basis, quantity left uncovered)."""
+        remaining = qty
+        cost_basis = 0.0
+        lots = self.lots
+        while remaining > 0 and lots:
+            lot = lots[0]
+            take = min(remaining, lot[0])
+            cost_basis += take * lot[1]
+            lot[0] -= take
+            remaining -= take
+            if lot[0] <= DUST_LOT:
+                lots.popleft()
+        return cost_basis, remaining
+
+    def inventory(self) -> float:
+        return sum(qty for qty, _ in self.lots)
+
+
+class FifoLotBook:
+    """
+    Realized PnL per (mint, base) from swap events fed one at a time (add / add_many).
+    Base is a stable when one side is USDC/USDT, else SOL; lots of the same token bought in
+    different bases are kept apart. SOL-based PnL is converted with usd_price(timestamp) at
+    each sell. checkpoint() returns a JSON-serializable state that restore() resumes from,
+    so later swaps can be added without replaying the history.
+    """
+
+    def __init__(self, usd_price: Optional[Callable[[int], float]] = None):
+        self.usd_price = usd_price
+        self.positions: Dict[Tuple[str, str], Position] = {}
+        self.realized: Dict[Tuple[str, str], float] = {}      # first realization order = report order
+        self.realized_usd: Dict[Tuple[str, str], float] = {}
+        self.events = 0
+        self.debug = {"swaps_parsed": 0, "swaps_skipped": 0, "historical_prices_available": False}
+
+    def add(self, ev: dict):
+        """Apply one swap event {token_in, amount_in, token_out, amount_out, timestamp}."""
+        self.events += 1
+        token_in = ev.get("token_in")
+        token_out = ev.get("token_out")
+        amt_in = _safe_float(ev.get("amount_in"))
+        amt_out = _safe_float(ev.get("amount_out"))
+        if not token_in or not token_out or amt_in <= 0 or amt_out <= 0:
+            self.debug["swaps_skipped"] += 1
+            return
+
+        # Prefer a stable base over SOL
+        if token_in in STABLE_MINTS:
+            base, mint, qty, buying = BASE_STABLE, token_out, amt_out, True
+        elif token_out in STABLE_MINTS:
+            base, mint, qty, buying = BASE_STABLE, token_in, amt_in, False
+        elif token_in == SOL_MINT:
+            base, mint, qty, buying = BASE_SOL, token_out, amt_out, True
+        elif token_out == SOL_MINT:
+            base, mint, qty, buying = BASE_SOL, token_in, amt_in, False
+        else:
+            self.debug["swaps_skipped"] += 1
+            return
+
+        self.debug["swaps_parsed"] += 1
+        key = (mint, base)
+        pos = self.positions.get(key)
+        if pos is None:
+            pos = self.positions[key] = Position()
+        pos.trades += 1
+
+        if buying:
+            pos.buy(qty, amt_in / qty)
+            pos.spent += amt_in
+            return
+
+        # Lots taken by a sell that cannot be fully covered stay consumed (sold from outside the window)
+        cost_basis, uncovered = pos.consume(qty)
+        if uncovered > DUST_SELL:
+            return
+        pnl = amt_out - cost_basis
+        self.realized[key] = self.realized.get(key, 0.0) + pnl
+        pos.received += amt_out
+        if base == BASE_STABLE:
+            usd_price = 1.0
+        else:
+            usd_price = self.usd_price(ev.get("timestamp")) if self.usd_price else 0.0
+            if usd_price > 0:
+                self.debug["historical_prices_available"] = True
+        self.realized_usd[key] = self.realized_usd.get(key, 0.0) + pnl * usd_price
+
+    def add_many(self, events: Iterable[dict]) -> "FifoLotBook":
+        for ev in events:
+            self.add(ev)
+        return self
+
+    def rows(self) -> List[dict]:
+        """One row per (mint, base) with realized PnL, in order of first realization."""
+        rows = []
+        for (mint, base), pnl in self.realized.items():
+            pos = self.positions[(mint, base)]
+            rows.append({
+                "mint": mint,
+                "base": base,
+                "realized_pnl": pnl,
+                "realized_pnl_usd": self.realized_usd.get((mint, base), 0.0),
+                "trades": pos.trades,
+                "spent": pos.spent,
+                "received": pos.received,
+            })
+        return rows
+
+    def open_inventory(self) -> Dict[Tuple[str, str], float]:
+        """Unsold quantity per (mint, base)."""
+        return {key: pos.inventory() for key, pos in self.positions.items() if pos.lots}
+
+    # ─── Checkpoint / resume ─────────────────────────────────────────────────
+
+    def checkpoint(self) -> dict:
+        """JSON-serializable state; restore() continues exactly where this book stopped."""
+        return {
+            "version": CHECKPOINT_VERSION,
+            "events": self.events,
+            "debug": dict(self.debug),
+            "positions": [
+                [mint, base, pos.trades, pos.spent, pos.received, [list(lot) for lot in pos.lots]]
+                for (mint, base), pos in self.positions.items()
+            ],
+            "realized": [[mint, base, pnl, self.realized_usd.get((mint, base), 0.0)]
+                         for (mint, base), pnl in self.realized.items()],
+        }
+
+    @classmethod
+    def restore(cls, state: dict, usd_price: Optional[Callable[[int], float]] = None) -> "FifoLotBook":
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported PnL checkpoint version {state.get('version')!r}")
+        book = cls(usd_price)
+        book.events = int(state.get("events", 0))
+        book.debug.update(state.get("debug") or {})
+        for mint, base, trades, spent, received, lots in state.get("positions", []):
+            pos = book.positions[(mint, base)] = Position()
+            pos.trades, pos.spent, pos.received = int(trades), float(spent), float(received)
+            pos.lots.extend([float(q), float(c)] for q, c in lots)
+        for mint, base, pnl, pnl_usd in state.get("realized", []):
+            book.realized[(mint, base)] = float(pnl)
+            book.realized_usd[(mint, base)] = float(pnl_usd)
+        return book
@@ -0,0 +1,513 @@
+"""LeakLens Prices - Spot price oracle (batched, cached) and historical SOL/USD price store."""
+
+import bisect
+import csv
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import leaklens_store
+from leaklens_http import http_get, parse_retry_after, run_in_background, single_flight
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Optional offline price file: "timestamp,price" (unix seconds or ms) or "date,price" (YYYY-MM-DD) rows
+SOL_PRICE_CSV = os.getenv("LEAKLENS_SOL_PRICE_CSV", "")
+
+COINGECKO_SOL_RANGE_URL = "https://api.coingecko.com/api/v3/coins/solana/market_chart/range"
+COINGECKO_SIMPLE_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price"
+JUPITER_PRICE_URL = "https://lite-api.jup.ag/price/v3"
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
+
+# Spot quotes: fresh for PRICE_TTL seconds, then served while a background refresh runs until
+# PRICE_STALE_TTL; mints no provider can price are remembered for PRICE_NEGATIVE_TTL
+PRICE_TTL = float(os.getenv("LEAKLENS_PRICE_TTL", "60"))
+PRICE_STALE_TTL = float(os.getenv("LEAKLENS_PRICE_STALE_TTL", "600"))
+PRICE_NEGATIVE_TTL = float(os.getenv("LEAKLENS_PRICE_NEGATIVE_TTL", "900"))
+PRICE_CACHE_SIZE = int(os.getenv("LEAKLENS_PRICE_CACHE_SIZE", "4096"))
+# Providers asked in order; each gets the mints the previous ones could not price.
+# CoinGecko only knows SOL and the major stables, so Jupiter prices everything else.
+PRICE_PROVIDERS = os.getenv("LEAKLENS_PRICE_PROVIDERS", "coingecko,jupiter")
+# A provider whose call failed (429, non-200, error) is skipped for this long, doubling per
+# consecutive failure up to PRICE_BACKOFF_MAX (a Retry-After header is a lower bound)
+PRICE_BACKOFF = float(os.getenv("LEAKLENS_PRICE_BACKOFF", "30"))
+PRICE_BACKOFF_MAX = float(os.getenv("LEAKLENS_PRICE_BACKOFF_MAX", "600"))
+
+DAY = 86400
+# A lookup is answered by the nearest point at most this far away
+PRICE_MAX_GAP = 2 * DAY
+# Gaps left after a range request (failed, or no data for those days) are not re-requested for this long
+PRICE_RETRY_SECONDS = 300
+
+
+def _parse_time(value: str) -> Optional[int]:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        ts = float(value)
+        return int(ts / 1000) if ts > 1e11 else int(ts)
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def load_price_csv(path: str) -> List[Tuple[int, float]]:
+    """(unix seconds, price) points from a CSV with a time column and a price column; header optional."""
+    points = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            ts = _parse_time(row[0])
+            try:
+                price = float(row[1])
+            except ValueError:
+                continue
+            if ts and price > 0:
+                points.append((ts, price))
+    return points
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PRICE HISTORY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PriceHistory:
+    """
+    Sorted (timestamp, USD price) points for one asset.
+    Lookups are a bisect over in-memory arrays. Gaps are filled with one range request for
+    all missing timestamps (prefetch), and new points are written to the on-disk store.
+    Points come from the store and an optional CSV, loaded on first use.
+    """
+
+    def __init__(self, asset: str, csv_path: str = ""):
+        self.asset = asset
+        self.csv_path = csv_path
+        self._series: Tuple[List[int], List[float]] = ([], [])  # (sorted timestamps, prices), swapped whole
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._requested: List[Tuple[int, int, float]] = []  # (start, end, retry_after) of recent range requests
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "range_requests": 0, "failed_requests": 0}
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            points = dict(leaklens_store.get_price_points(self.asset))
+            if self.csv_path:
+                try:
+                    points.update(load_price_csv(self.csv_path))
+                except OSError as e:
+                    print(f"[Prices] Cannot read {self.csv_path}: {e}")
+            self._set(points)
+            self._loaded = True
+        if self._series[0]:
+            print(f"[Prices] {self.asset}: {len(self._series[0])} price points loaded")
+
+    def _set(self, points: Dict[int, float]):
+        items = sorted(points.items())
+        self._series = ([t for t, _ in items], [p for _, p in items])
+
+    def add(self, points: Iterable[Tuple[int, float]], persist: bool = True) -> int:
+        """Merge (timestamp, price) points; returns how many were new."""
+        self._load()
+        new = [(int(t), float(p)) for t, p in points if t and p and p > 0]
+        with self._lock:
+            merged = dict(zip(*self._series))
+            added = sum(1 for t, _ in new if t not in merged)
+            merged.update(new)
+            self._set(merged)
+        if persist and new:
+            leaklens_store.put_price_points(self.asset, new)
+        return added
+
+    def _nearest(self, ts: int) -> Optional[float]:
+        times, prices = self._series
+        i = bisect.bisect_left(times, ts)
+        best = None
+        if i < len(times) and times[i] - ts <= PRICE_MAX_GAP:
+            best = i
+        if i > 0 and ts - times[i - 1] <= PRICE_MAX_GAP and (best is None or ts - times[i - 1] <= times[best] - ts):
+            best = i - 1
+        return prices[best] if best is not None else None
+
+    def lookup(self, ts: int) -> float:
+        """Price nearest to ts from memory only (0.0 when no point is close enough)."""
+        self._load()
+        self._stats["lookups"] += 1
+        price = self._nearest(int(ts))
+        if price is None:
+            self._stats["misses"] += 1
+            return 0.0
+        self._stats["hits"] += 1
+        return price
+
+    def missing(self, timestamps: Iterable[int]) -> List[int]:
+        """Timestamps without a point close enough."""
+        self._load()
+        return sorted({int(t) for t in timestamps if t and t > 0 and self._nearest(int(t)) is None})
+
+    def prefetch(self, timestamps: Iterable[int]) -> int:
+        """Fill every gap among timestamps with a single range request. Returns points added."""
+        missing = [t for t in self.missing(timestamps) if not self._recently_requested(t)]
+        if not missing:
+            return 0
+        start = (missing[0] // DAY - 1) * DAY
+        end = (missing[-1] // DAY + 2) * DAY
+        end = min(end, int(time.time()))
+        if end <= start:
+            return 0
+        points = single_flight(("coingecko", "market_chart/range", self.asset, start, end),
+                               self._fetch_range, start, end)
+        with self._lock:
+            self._requested.append((start, end, time.time() + PRICE_RETRY_SECONDS))
+        return self.add(points) if points else 0
+
+    def _recently_requested(self, ts: int) -> bool:
+        now = time.time()
+        with self._lock:
+            self._requested = [r for r in self._requested if r[2] > now]
+            return any(start <= ts <= end for start, end, _ in self._requested)
+
+    def _fetch_range(self, start: int, end: int) -> List[Tuple[int, float]]:
+        self._stats["range_requests"] += 1
+        try:
+            resp = http_get(COINGECKO_SOL_RANGE_URL,
+                            params={"vs_currency": "usd", "from": start, "to": end}, timeout=15)
+            if resp.status_code == 200:
+                prices = (resp.json() or {}).get("prices") or []
+                points = [(int(ms) // 1000, float(p)) for ms, p in prices if p]
+                print(f"[Prices] {self.asset}: fetched {len(points)} points "
+                      f"{datetime.fromtimestamp(start, tz=timezone.utc):%Y-%m-%d}..{datetime.fromtimestamp(end, tz=timezone.utc):%Y-%m-%d}")
+                return points
+            print(f"[Prices] Range request failed: HTTP {resp.status_code}")
+        except Exception as e:
+            print(f"[Prices] Range request failed: {str(e)[:100]}")
+        self._stats["failed_requests"] += 1
+        return []
+
+    def price_at(self, ts: int) -> float:
+        """Price at ts: from memory, else after one range request for its gap. 0.0 if unavailable."""
+        if not ts or ts <= 0:
+            return 0.0
+        price = self.lookup(ts)
+        if price > 0:
+            return price
+        self.prefetch([ts])
+        return self._nearest(int(ts)) or 0.0
+
+    def stats(self) -> dict:
+        out = dict(self._stats)
+        times = self._series[0]
+        out["points"] = len(times)
+        if times:
+            out["first"] = times[0]
+            out["last"] = times[-1]
+        return out
+
+
+SOL_PRICES = PriceHistory("SOL", SOL_PRICE_CSV)
+
+
+def sol_price_at(unixtime: int) -> float:
+    """Historical SOL/USD price near unixtime (0.0 when unavailable)."""
+    return SOL_PRICES.price_at(unixtime)
+
+
+def prefetch_sol_prices(timestamps: Iterable[int]) -> int:
+    """Load SOL prices for all timestamps with at most one range request."""
+    return SOL_PRICES.prefetch(timestamps)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SPOT PRICE PROVIDERS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PriceProvider(ABC):
+    """
+    Source of current USD prices for many mints per call.
+    quote() returns the mints it could price, or None when the call failed (those mints are then
+    not negatively cached, and the provider backs off). chunks() splits the mints it can price
+    into calls of at most max_batch; mints left out are never sent to it.
+    """
+    name = "provider"
+    max_batch = 50
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+
+    @abstractmethod
+    def quote(self, mints: List[str]) -> Optional[Dict[str, float]]:
+        """mint -> USD price for the mints it could price, or None when the call failed."""
+
+    def chunks(self, mints: List[str]) -> List[List[str]]:
+        return [mints[i:i + self.max_batch] for i in range(0, len(mints), self.max_batch)]
+
+    def available(self) -> bool:
+        """False while backing off after a failed call."""
+        return time.time() >= self._retry_at
+
+    def failed(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self._failures += 1
+            delay = min(PRICE_BACKOFF * 2 ** (self._failures - 1), PRICE_BACKOFF_MAX)
+            self._retry_at = time.time() + max(delay, retry_after or 0.0)
+        print(f"[Prices] {self.name} failed, backing off {self._retry_at - time.time():.0f}s")
+
+    def succeeded(self):
+        with self._lock:
+            self._failures = 0
+            self._retry_at = 0.0
+
+    def _response_failed(self, resp) -> None:
+        """Back off after a non-200 response, honouring Retry-After."""
+        self.failed(parse_retry_after(resp.headers.get("Retry-After")))
+
+
+class CoinGeckoProvider(PriceProvider):
+    """
+    SOL and the major stables by CoinGecko id, in one simple/price call. Other mints are left
+    to providers that take many mints per request (jupiter): CoinGecko's contract-address
+    endpoint accepts too few per call on the public API to price a wallet.
+    """
+    name = "coingecko"
+    IDS = {SOL_MINT: "solana", USDC_MINT: "usd-coin", USDT_MINT: "tether"}
+
+    def chunks(self, mints: List[str]) -> List[List[str]]:
+        known = [m for m in mints if m in self.IDS]
+        return [known] if known else []
+
+    def quote(self, mints: List[str]) -> Optional[Dict[str, float]]:
+        ids = {self.IDS[m]: m for m in mints if m in self.IDS}
+        try:
+            resp = http_get(COINGECKO_SIMPLE_PRICE_URL,
+                            params={"ids": ",".join(ids), "vs_currencies": "usd"}, timeout=10)
+            if resp.status_code != 200:
+                self._response_failed(resp)
+                return None
+            data = resp.json() or {}
+        except Exception as e:
+            print(f"[Prices] CoinGecko quote failed: {str(e)[:100]}")
+            self.failed()
+            return None
+        out: Dict[str, float] = {}
+        for cg_id, mint in ids.items():
+            price = _positive((data.get(cg_id) or {}).get("usd"))
+            if price:
+                out[mint] = price
+        return out
+
+
+class JupiterProvider(PriceProvider):
+    """Jupiter Price API (lite), up to 50 mints per request."""
+    name = "jupiter"
+    max_batch = 50
+
+    def quote(self, mints: List[str]) -> Optional[Dict[str, float]]:
+        try:
+            resp = http_get(JUPITER_PRICE_URL, params={"ids": ",".join(mints)}, timeout=8)
+            if resp.status_code != 200:
+                self._response_failed(resp)
+                return None
+            data = resp.json() or {}
+        except Exception as e:
+            print(f"[Prices] Jupiter quote failed: {str(e)[:100]}")
+            self.failed()
+            return None
+        out = {}
+        for mint, row in (data.get("data", data) or {}).items():
+            if isinstance(row, dict):
+                price = _positive(row.get("usdPrice") or row.get("price"))
+                if price:
+                    out[mint] = price
+        return out
+
+
+PROVIDER_TYPES = {cls.name: cls for cls in (CoinGeckoProvider, JupiterProvider)}
+
+
+def _positive(value) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if value > 0 else 0.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PRICE ORACLE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PriceOracle:
+    """
+    Current USD prices for any set of mints, shared by every module in the process.
+    Quotes live in an LRU cache: fresh ones are returned directly, stale ones are returned
+    while a background refresh runs, and unpriceable mints are cached as misses. Everything
+    else is fetched in one batched round through the providers; concurrent callers asking
+    for the same mints share that round.
+    """
+
+    def __init__(self, providers: Optional[List[PriceProvider]] = None):
+        self._providers = providers
+        self._cache: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # mint -> (price, fetched_at); 0.0 = no price
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stats = {"hits": 0, "stale_hits": 0, "negative_hits": 0, "misses": 0, "rounds": 0, "provider_calls": 0}
+
+    @property
+    def providers(self) -> List[PriceProvider]:
+        """Configured providers (LEAKLENS_PRICE_PROVIDERS), built on first use."""
+        if self._providers is None:
+            names = [n.strip() for n in PRICE_PROVIDERS.split(",") if n.strip()]
+            self._providers = [PROVIDER_TYPES[n]() for n in names if n in PROVIDER_TYPES]
+        return self._providers
+
+    def prices(self, mints: Iterable[str]) -> Dict[str, float]:
+        """mint -> USD price for the mints that have one (unpriceable mints are omitted)."""
+        out: Dict[str, float] = {}
+        fetch: List[str] = []
+        refresh: List[str] = []
+        now = time.time()
+        with self._lock:
+            for mint in dict.fromkeys(m for m in mints if m):
+                entry = self._cache.get(mint)
+                if entry is None:
+                    fetch.append(mint)
+                    continue
+                price, fetched_at = entry
+                age = now - fetched_at
+                if not price:
+                    if age < PRICE_NEGATIVE_TTL:
+                        self._stats["negative_hits"] += 1
+                        self._cache.move_to_end(mint)
+                    else:
+                        fetch.append(mint)
+                    continue
+                if age >= PRICE_STALE_TTL:
+                    fetch.append(mint)
+                    continue
+                if age < PRICE_TTL:
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["stale_hits"] += 1
+                    if mint not in self._refreshing:
+                        self._refreshing.add(mint)
+                        refresh.append(mint)
+                self._cache.move_to_end(mint)
+                out[mint] = price
+            self._stats["misses"] += len(fetch)
+        if refresh:
+            self._background(refresh)
+        if fetch:
+            fetch.sort()
+            out.update(single_flight(("prices", "spot", *fetch), self._fetch, fetch))
+        return out
+
+    def price(self, mint: str) -> float:
+        return self.prices([mint]).get(mint, 0.0)
+
+    def sol_price(self) -> float:
+        return self.price(SOL_MINT)
+
+    def _fetch(self, mints: List[str]) -> Dict[str, float]:
+        """
+        One batched round through the providers; caches prices and definite misses. A mint is
+        only a definite miss when every provider that prices such mints answered for it: mints
+        in a failed chunk, or meant for a provider that is backing off, are retried next time.
+        """
+        self._stats["rounds"] += 1
+        found: Dict[str, float] = {}
+        unanswered: set = set()
+        remaining = list(mints)
+        for provider in self.providers:
+            if not remaining:
+                break
+            for chunk in provider.chunks(remaining):
+                # After one failure the rest of the round skips the provider too
+                if not provider.available():
+                    unanswered.update(chunk)
+                    continue
+                self._stats["provider_calls"] += 1
+                quotes = provider.quote(chunk)
+                if quotes is None:
+                    unanswered.update(chunk)
+                    continue
+                provider.succeeded()
+                found.update((m, p) for m, p in quotes.items() if p > 0)
+            remaining = [m for m in remaining if m not in found]
+        now = time.time()
+        with self._lock:
+            for mint, price in found.items():
+                self._cache[mint] = (price, now)
+                self._cache.move_to_end(mint)
+            for mint in remaining:
+                if mint not in unanswered:
+                    self._cache[mint] = (0.0, now)
+                    self._cache.move_to_end(mint)
+            self._trim()
+        return {m: p for m, p in found.items() if m in mints}
+
+    def _trim(self):
+        while len(self._cache) > PRICE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _background(self, mints: List[str]):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prices")
+        self._pool.submit(self._revalidate, mints)
+
+    def _revalidate(self, mints: List[str]):
+        try:
+            run_in_background(self._fetch, mints)
+        except Exception as e:
+            print(f"[Prices] Background refresh failed: {str(e)[:100]}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(mints)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["entries"] = len(self._cache)
+            out["negative_entries"] = sum(1 for p, _ in self._cache.values() if not p)
+        out["providers"] = [p.name for p in self.providers]
+        out["backing_off"] = [p.name for p in self.providers if not p.available()]
+        return out
+
+
+# Shared by every module in the process
+PRICES = PriceOracle()
+
+
+def spot_prices(mints: Iterable[str]) -> Dict[str, float]:
+    """Current USD prices (cached, batched) for the mints that have one."""
+    return PRICES.prices(mints)
+
+
+def spot_sol_price() -> float:
+    """Current SOL/USD price (0.0 when unavailable)."""
+    return PRICES.sol_price()
@@ -0,0 +1,67 @@
+"""LeakLens Reaction - Vectorized receive-to-action join for reaction-speed (bot) analysis."""
+
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Longest receive -> action delay (seconds) still counted as a reaction
+REACTION_WINDOW = float(os.getenv("LEAKLENS_REACTION_WINDOW", "300"))
+
+# Distribution buckets (seconds): [0, 1), [1, 5), [5, 10), [10, 30), [30, 60), [60, 120), [120, window]
+REACTION_BUCKET_EDGES = (1, 5, 10, 30, 60, 120)
+REACTION_PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+
+def join_reactions(timestamps: Sequence, receives: Sequence, actions: Sequence,
+                   window: float = REACTION_WINDOW) -> np.ndarray:
+    """
+    Delay from every token receive to the first wallet action after it, within window seconds.
+
+    Events are ordered by timestamp (stable, so same-block transactions keep their input order);
+    each receive joins the next action in that order via searchsorted, so unrelated transactions
+    in between do not hide a reaction. A transaction that both receives and acts is not its own
+    reaction. Events without a timestamp are dropped.
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    if ts.size == 0:
+        return np.empty(0)
+    ts = np.nan_to_num(ts, nan=0.0)
+    receives = np.asarray(receives, dtype=bool)
+    actions = np.asarray(actions, dtype=bool)
+
+    keep = ts > 0
+    ts, receives, actions = ts[keep], receives[keep], actions[keep]
+    order = np.argsort(ts, kind="stable")
+    ts, receives, actions = ts[order], receives[order], actions[order]
+
+    receive_pos = np.flatnonzero(receives)
+    action_pos = np.flatnonzero(actions)
+    if not receive_pos.size or not action_pos.size:
+        return np.empty(0)
+    nxt = np.searchsorted(action_pos, receive_pos, side="right")
+    matched = nxt < action_pos.size
+    deltas = ts[action_pos[nxt[matched]]] - ts[receive_pos[matched]]
+    return deltas[deltas <= window]
+
+
+def reaction_distribution(deltas: np.ndarray) -> Dict[str, object]:
+    """Bucket counts and percentiles of reaction times (seconds)."""
+    deltas = np.asarray(deltas, dtype=np.float64)
+    labels = _bucket_labels()
+    if not deltas.size:
+        return {"buckets": [{"label": label, "count": 0} for label in labels], "percentiles": {}}
+    counts = np.bincount(np.searchsorted(REACTION_BUCKET_EDGES, deltas, side="right"), minlength=len(labels))
+    values = np.percentile(deltas, REACTION_PERCENTILES)
+    return {
+        "buckets": [{"label": label, "count": int(c)} for label, c in zip(labels, counts.tolist())],
+        "percentiles": {f"p{p}": round(float(v), 2) for p, v in zip(REACTION_PERCENTILES, values)},
+    }
+
+
+def _bucket_labels() -> List[str]:
+    edges = REACTION_BUCKET_EDGES
+    labels = [f"<{edges[0]}s"]
+    labels += [f"{lo}-{hi}s" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f">={edges[-1]}s")
+    return labels
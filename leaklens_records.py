@@ -0,0 +1,409 @@
+"""LeakLens Records - Compact per-transaction records shared by the analyzers."""
+
+import threading
+from array import array
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from leaklens_decode import COMPUTE_BUDGET_PROGRAM, MEMO_PROGRAMS, b58decode
+from leaklens_intern import address_table
+
+SOURCE_RPC = "rpc"
+SOURCE_ENHANCED = "enhanced"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# COMPUTE BUDGET
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def parse_compute_budget_instruction(instruction_data: bytes) -> dict:
+    """
+    Parse Compute Budget instruction to extract priority fee and compute unit limit.
+    Returns dict with 'priority_fee_microlamports' and 'compute_unit_limit' or None.
+    """
+    if not instruction_data or len(instruction_data) < 1:
+        return None
+
+    # Compute Budget instruction discriminator (first byte)
+    # 2 = SetComputeUnitLimit, 3 = SetComputeUnitPrice (priority fee)
+    try:
+        if len(instruction_data) >= 5:
+            discriminator = instruction_data[0]
+
+            if discriminator == 2:  # SetComputeUnitLimit
+                # Next 4 bytes are u32 compute unit limit
+                if len(instruction_data) >= 5:
+                    cu_limit = int.from_bytes(instruction_data[1:5], byteorder='little')
+                    return {"compute_unit_limit": cu_limit}
+
+            elif discriminator == 3:  # SetComputeUnitPrice (priority fee)
+                # Next 8 bytes are u64 priority fee in microlamports
+                if len(instruction_data) >= 9:
+                    priority_fee = int.from_bytes(instruction_data[1:9], byteorder='little')
+                    return {"priority_fee_microlamports": priority_fee}
+    except:
+        pass
+
+    return None
+
+
+def _instruction_bytes(data: Any) -> Optional[bytes]:
+    """Raw instruction data: base58 (Solana standard), hex fallback, or a byte list."""
+    if isinstance(data, str):
+        try:
+            return b58decode(data)
+        except ValueError:
+            try:
+                return bytes.fromhex(data.replace("0x", ""))
+            except ValueError:
+                return None
+    if isinstance(data, list):
+        try:
+            return bytes(data)
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRANSACTION RECORD
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _safe_float(x: Any) -> float:
+    try:
+        return float(x) if x is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _ui_amount(ui: Any) -> float:
+    if not isinstance(ui, dict):
+        return 0.0
+    amount = ui.get("uiAmount")
+    if amount is None:
+        amount = ui.get("uiAmountString")
+    return _safe_float(amount)
+
+
+def is_enhanced(tx: Any) -> bool:
+    """Helius Enhanced format has nativeTransfers/tokenTransfers, not meta."""
+    if not isinstance(tx, dict):
+        return False
+    return bool(tx.get("nativeTransfers") is not None or tx.get("tokenTransfers") is not None) and not tx.get("meta")
+
+
+class TxRecord:
+    """
+    One transaction normalized once for every analyzer, from either the RPC (getTransaction)
+    or the Helius Enhanced shape.
+
+    accounts / account_ids / signers / writable are parallel (interned ids in an array, flags in
+    bytearrays; the account strings are the address table's shared copies), index maps an address to
+    its first position, sol_deltas holds post - pre lamports per account position, and
+    token_deltas maps owner -> mint -> UI amount change. cu_price / cu_limit are the largest
+    compute-budget values set by the transaction. native_transfers (from, to, lamports) and
+    token_transfers (from, to, mint, amount) are only present in the Enhanced shape.
+    """
+
+    __slots__ = (
+        "signature", "slot", "block_time", "fee", "compute_units", "success", "source", "has_meta",
+        "fee_payer", "accounts", "account_ids", "signers", "writable", "index", "sol_deltas", "token_deltas",
+        "program_ids", "n_instructions", "memo_count", "cu_price", "cu_limit",
+        "native_transfers", "token_transfers",
+    )
+
+    def __init__(self, source: str):
+        self.signature = ""
+        self.slot = 0
+        self.block_time = 0
+        self.fee = 0
+        self.compute_units = 0
+        self.success = True
+        self.source = source
+        self.has_meta = False
+        self.fee_payer = None
+        self.accounts: Tuple[str, ...] = ()
+        self.account_ids = array("I")
+        self.signers = bytearray()
+        self.writable = bytearray()
+        self.index: Dict[str, int] = {}
+        self.sol_deltas = array("q")
+        self.token_deltas: Dict[str, Dict[str, float]] = {}
+        self.program_ids: Tuple[str, ...] = ()
+        self.n_instructions = 0
+        self.memo_count = 0
+        self.cu_price = 0
+        self.cu_limit: Optional[int] = None
+        self.native_transfers: List[Tuple[str, str, int]] = []
+        self.token_transfers: List[Tuple[str, str, str, float]] = []
+
+    # ── lookups ────────────────────────────────────────────────────────────────
+
+    def account_index(self, address: str) -> Optional[int]:
+        return self.index.get(address)
+
+    def sol_delta(self, address: str) -> Optional[int]:
+        """Lamport change of an account, or None if it is not in the transaction (or has no balance)."""
+        idx = self.index.get(address)
+        if idx is None or idx >= len(self.sol_deltas):
+            return None
+        return self.sol_deltas[idx]
+
+    def is_signer(self, address: str) -> bool:
+        idx = self.index.get(address)
+        return idx is not None and bool(self.signers[idx])
+
+    def token_deltas_of(self, owner: str) -> Dict[str, float]:
+        """mint -> UI amount change across the owner's token accounts (read-only)."""
+        return self.token_deltas.get(owner, {})
+
+    # ── builders ───────────────────────────────────────────────────────────────
+
+    def _set_accounts(self, accounts: List[str], signers: bytearray, writable: bytearray):
+        table = address_table()
+        self.account_ids = table.intern_many(accounts)
+        accounts = table.addresses(self.account_ids)
+        self.accounts = tuple(accounts)
+        self.signers = signers
+        self.writable = writable
+        index: Dict[str, int] = {}
+        for i in range(len(accounts) - 1, -1, -1):
+            index[accounts[i]] = i
+        self.index = index
+
+    def _scan_instructions(self, instructions: Any):
+        """Program ids, memo count and compute-budget values (largest price and limit set)."""
+        programs = []
+        count = 0
+        for ix in instructions or []:
+            count += 1
+            if not isinstance(ix, dict):
+                continue
+            program_id = ix.get("programId")
+            if not program_id:
+                idx = ix.get("programIdIndex")
+                if isinstance(idx, int) and idx < len(self.accounts):
+                    program_id = self.accounts[idx]
+            if not program_id:
+                continue
+            programs.append(program_id)
+            if program_id in MEMO_PROGRAMS:
+                self.memo_count += 1
+            elif program_id == COMPUTE_BUDGET_PROGRAM:
+                self._apply_compute_budget(ix)
+        self.n_instructions = count
+        self.program_ids = tuple(programs)
+
+    def _apply_compute_budget(self, ix: dict):
+        parsed = ix.get("parsed")
+        if isinstance(parsed, dict):
+            args = parsed.get("args") or {}
+            if parsed.get("type") == "setComputeUnitPrice":
+                fee = int(args.get("microLamports", 0))
+                if fee > 0:
+                    self.cu_price = max(self.cu_price, fee)
+            elif parsed.get("type") == "setComputeUnitLimit":
+                units = int(args.get("units", 0))
+                if units > 0 and (self.cu_limit is None or units > self.cu_limit):
+                    self.cu_limit = units
+            return
+        budget = parse_compute_budget_instruction(_instruction_bytes(ix.get("data")))
+        if not budget:
+            return
+        if "priority_fee_microlamports" in budget:
+            self.cu_price = max(self.cu_price, budget["priority_fee_microlamports"])
+        if "compute_unit_limit" in budget:
+            units = budget["compute_unit_limit"]
+            if self.cu_limit is None or units > self.cu_limit:
+                self.cu_limit = units
+
+    @classmethod
+    def from_rpc(cls, tx: dict, signature: Optional[str] = None) -> "TxRecord":
+        """Record from a getTransaction result (any encoding, normalized by leaklens_decode)."""
+        rec = cls(SOURCE_RPC)
+        transaction = tx.get("transaction") if isinstance(tx.get("transaction"), dict) else {}
+        msg = transaction.get("message") or {}
+        sigs = transaction.get("signatures") or []
+        rec.signature = signature or (sigs[0] if sigs else "")
+        rec.slot = tx.get("slot") or 0
+        rec.block_time = tx.get("blockTime") or 0
+
+        accounts, signers, writable = [], bytearray(), bytearray()
+        for key in msg.get("accountKeys") or []:
+            if isinstance(key, dict):
+                accounts.append(key.get("pubkey", ""))
+                signers.append(1 if key.get("signer") else 0)
+                writable.append(1 if key.get("writable") else 0)
+            else:
+                accounts.append(str(key))
+                signers.append(0)
+                writable.append(0)
+        rec._set_accounts(accounts, signers, writable)
+        rec.fee_payer = accounts[0] if accounts else None
+
+        meta = tx.get("meta")
+        if isinstance(meta, dict) and meta:
+            rec.has_meta = True
+            rec.fee = meta.get("fee") or 0
+            rec.compute_units = meta.get("computeUnitsConsumed") or 0
+            rec.success = meta.get("err") is None
+            pre = meta.get("preBalances") or []
+            post = meta.get("postBalances") or []
+            rec.sol_deltas = array("q", ((post[i] or 0) - (pre[i] or 0) for i in range(min(len(pre), len(post)))))
+            rec.token_deltas = _token_balance_deltas(meta.get("preTokenBalances"), meta.get("postTokenBalances"))
+        rec._scan_instructions(msg.get("instructions"))
+        return rec
+
+    @classmethod
+    def from_enhanced(cls, tx: dict) -> "TxRecord":
+        """Record from a Helius Enhanced transaction (accountData, transfers)."""
+        rec = cls(SOURCE_ENHANCED)
+        rec.signature = tx.get("signature") or tx.get("transactionSignature") or ""
+        rec.slot = int(tx.get("slot") or 0)
+        rec.block_time = tx.get("timestamp") or tx.get("blockTime") or tx.get("block_time") or 0
+        rec.fee = int(_safe_float(tx.get("fee")))
+        rec.success = not tx.get("transactionError")
+        rec.fee_payer = tx.get("feePayer") or tx.get("fee_payer")
+
+        accounts, deltas, token_deltas = [], array("q"), {}
+        for ad in tx.get("accountData") or []:
+            if not isinstance(ad, dict):
+                continue
+            accounts.append(ad.get("account") or "")
+            deltas.append(int(_safe_float(ad.get("nativeBalanceChange"))))
+            for change in ad.get("tokenBalanceChanges") or []:
+                if not isinstance(change, dict):
+                    continue
+                owner, mint = change.get("userAccount"), change.get("mint")
+                raw = change.get("rawTokenAmount") or {}
+                try:
+                    amount = int(raw.get("tokenAmount") or 0) / (10 ** int(raw.get("decimals") or 0))
+                except (TypeError, ValueError):
+                    continue
+                if owner and mint and abs(amount) > 1e-12:
+                    per_owner = token_deltas.setdefault(owner, {})
+                    per_owner[mint] = per_owner.get(mint, 0.0) + amount
+        signers = bytearray(1 if a == rec.fee_payer else 0 for a in accounts)
+        rec._set_accounts(accounts, signers, bytearray(signers))
+        rec.sol_deltas = deltas
+        rec.token_deltas = token_deltas
+
+        for nt in tx.get("nativeTransfers") or []:
+            if isinstance(nt, dict):
+                rec.native_transfers.append((nt.get("fromUserAccount") or nt.get("from"),
+                                             nt.get("toUserAccount") or nt.get("to"),
+                                             int(_safe_float(nt.get("amount")))))
+        for tt in tx.get("tokenTransfers") or []:
+            if isinstance(tt, dict):
+                rec.token_transfers.append((tt.get("fromUserAccount") or tt.get("from"),
+                                            tt.get("toUserAccount") or tt.get("to"),
+                                            tt.get("mint"),
+                                            _safe_float(tt.get("tokenAmount") or tt.get("amount"))))
+        rec._scan_instructions(tx.get("instructions"))
+        return rec
+
+
+def _token_balance_deltas(pre: Any, post: Any) -> Dict[str, Dict[str, float]]:
+    """owner -> mint -> summed UI amount change over that owner's token accounts."""
+
+    def to_map(items: Any) -> Dict[Tuple[str, str, int], float]:
+        m = {}
+        for it in items or []:
+            if not isinstance(it, dict):
+                continue
+            owner, mint, idx = it.get("owner"), it.get("mint"), it.get("accountIndex")
+            if owner and mint and idx is not None:
+                m[(owner, mint, int(idx))] = _ui_amount(it.get("uiTokenAmount"))
+        return m
+
+    pre_m = to_map(pre)
+    post_m = to_map(post)
+    deltas: Dict[str, Dict[str, float]] = {}
+    for key in pre_m.keys() | post_m.keys():
+        d = post_m.get(key, 0.0) - pre_m.get(key, 0.0)
+        if abs(d) > 1e-12:
+            owner, mint, _ = key
+            per_owner = deltas.setdefault(owner, {})
+            per_owner[mint] = per_owner.get(mint, 0.0) + d
+    return deltas
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RECORD CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class RecordCache:
+    """
+    Records memoized per transaction dict for one traversal or request (see record_scope).
+    Each dict is kept alongside its record so its id cannot be reused while cached; dropping the
+    cache releases both.
+    """
+
+    def __init__(self):
+        self._records: Dict[int, Tuple[dict, TxRecord]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tx: dict) -> Optional[TxRecord]:
+        with self._lock:
+            hit = self._records.get(id(tx))
+        return hit[1] if hit is not None and hit[0] is tx else None
+
+    def put(self, tx: dict, rec: TxRecord):
+        with self._lock:
+            self._records[id(tx)] = (tx, rec)
+
+    def discard(self, tx: Any):
+        """Forget a transaction no later reader will see (e.g. once every streaming analyzer has it)."""
+        with self._lock:
+            hit = self._records.get(id(tx))
+            if hit is not None and hit[0] is tx:
+                del self._records[id(tx)]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+_current_records: ContextVar[Optional[RecordCache]] = ContextVar("leaklens_record_cache", default=None)
+
+
+@contextmanager
+def record_scope() -> Iterator[RecordCache]:
+    """
+    Share records between the analyzers inside the block. Nested scopes reuse the active cache;
+    the outermost one drops it on exit, so no transaction outlives the traversal or request that
+    fetched it. Worker threads see the cache when started under copy_context().
+    """
+    cache = _current_records.get()
+    if cache is not None:
+        yield cache
+        return
+    cache = RecordCache()
+    token = _current_records.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_records.reset(token)
+
+
+def as_record(tx: Any, signature: Optional[str] = None) -> Optional[TxRecord]:
+    """
+    The TxRecord for a transaction dict (RPC or Enhanced). Inside a record_scope it is built on
+    first use and reused by every analyzer that sees the same dict; outside one it is built per
+    call. Transaction dicts are treated as immutable once fetched.
+    Records pass through; anything else gives None.
+    """
+    if isinstance(tx, TxRecord):
+        return tx
+    if not isinstance(tx, dict) or not tx:
+        return None
+    cache = _current_records.get()
+    rec = cache.get(tx) if cache is not None else None
+    if rec is not None:
+        if signature and not rec.signature:
+            rec.signature = signature
+        return rec
+    rec = TxRecord.from_enhanced(tx) if is_enhanced(tx) else TxRecord.from_rpc(tx, signature)
+    if cache is not None:
+        cache.put(tx, rec)
+    return rec
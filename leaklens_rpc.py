@@ -0,0 +1,846 @@
+"""LeakLens RPC - Solana RPC access: signatures, transactions, wallet sync and the streaming fetch pipeline."""
+
+import os
+import json
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Set, Tuple, Iterable, Iterator
+from dotenv import load_dotenv
+from leaklens_http import (
+    http_post, ensure_pool_size, get_concurrency, current_priority, run_with_priority, single_flight,
+    RetryPolicy, UpstreamError, SERVER, check_response, classify_exception, classify_rpc_error, get_hedger,
+    EndpointPool, Endpoint, AdaptiveConcurrency, parse_endpoints, service_clock,
+)
+import leaklens_store
+from leaklens_decode import loads, normalize_transaction, tx_cache_kind, tx_fetch_options
+from leaklens_records import record_scope
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Helius RPC URL, resolved from HELIUS_API_KEY on first use (get_rpc_url) so that importing
+# this module has no side effects. Assign it directly to point at another endpoint.
+RPC_URL: Optional[str] = None
+# Optional pool of RPC endpoints ("url|weight,url|weight"), e.g. several Helius keys or providers.
+# Defaults to RPC_URL alone.
+RPC_URLS = os.getenv("LEAKLENS_RPC_URLS", "")
+DEFAULT_LIMIT = 100
+
+# getTransaction calls packed into one JSON-RPC array request (0 = one request per signature).
+# On by default on Vercel, where per-request rate limits make round trips the bottleneck.
+RPC_BATCH_SIZE = int(os.getenv("LEAKLENS_RPC_BATCH_SIZE", "20" if os.getenv("VERCEL") == "1" else "0"))
+
+# Transaction fetch engine: "threads" (ThreadPoolExecutor) or "async" (leaklens_async, one event loop)
+FETCH_ENGINE = os.getenv("LEAKLENS_FETCH_ENGINE", "threads")
+
+# Transactions the streaming pipeline (run_pipeline) may hold at once: in flight, queued for the
+# analyzers or awaiting the cache write, so raw payloads held by the pipeline do not grow with
+# history length (what the analyzers keep is up to them)
+STREAM_QUEUE_SIZE = int(os.getenv("LEAKLENS_STREAM_QUEUE", "64"))
+
+
+def fetch_scope():
+    """
+    Context for one request's fetches: with LEAKLENS_FETCH_ENGINE=async, one event loop
+    (leaklens_async.AsyncEngine) serves every transaction fetch made inside it; otherwise a no-op.
+    Threads started inside must run in a copy of the context (contextvars.copy_context) to use it.
+    """
+    if FETCH_ENGINE != "async":
+        return nullcontext()
+    from leaklens_async import AsyncEngine
+    return AsyncEngine()
+
+
+def get_rpc_url() -> str:
+    """Helius RPC URL from HELIUS_API_KEY (environment or .env). Raises RuntimeError if the key is missing."""
+    global RPC_URL
+    if RPC_URL is None:
+        load_dotenv()
+        api_key = os.getenv("HELIUS_API_KEY")
+        if not api_key:
+            print("[!] ERROR: HELIUS_API_KEY not found in environment variables")
+            raise RuntimeError("HELIUS_API_KEY not found in environment variables (see .env.example)")
+        RPC_URL = f"https://mainnet.helius-rpc.com/?api-key={api_key}"
+    return RPC_URL
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RPC FUNCTIONS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def rpc_call(method: str, params: list) -> Optional[dict]:
+    """
+    Make an RPC call to Solana.
+    Identical calls already in flight (same method and params) share one request and its result.
+    """
+    try:
+        key = ("rpc", method, json.dumps(params, sort_keys=True, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return _rpc_call(method, params)
+    return single_flight(key, _rpc_call, method, params)
+
+
+# Transient failures (429, 5xx, timeouts) are retried with decorrelated jitter and Retry-After
+RPC_RETRY = RetryPolicy("rpc")
+
+_rpc_pool: Optional[EndpointPool] = None
+
+
+def _probe_endpoint(url: str) -> bool:
+    """Health probe for an ejected endpoint: getHealth must answer "ok"."""
+    resp = http_post(url, json={"jsonrpc": "2.0", "id": 1, "method": "getHealth"}, timeout=5)
+    return resp.status_code == 200 and (resp.json() or {}).get("result") == "ok"
+
+
+def get_rpc_pool() -> EndpointPool:
+    """
+    The process-wide RPC endpoint pool (LEAKLENS_RPC_URLS, or RPC_URL alone).
+    Every RPC request picks an endpoint here, so batched and parallel fetches spread across keys.
+    """
+    global _rpc_pool
+    if _rpc_pool is None or (not RPC_URLS and _rpc_pool.urls != [get_rpc_url()]):
+        endpoints = parse_endpoints(RPC_URLS) or [Endpoint(get_rpc_url(), name="rpc#1")]
+        _rpc_pool = EndpointPool(endpoints, probe=_probe_endpoint)
+        for ep in endpoints:
+            # Keys on one host share its connection pool: room for every key's full window
+            ensure_pool_size(ep.url, endpoint_concurrency(ep).maximum * len(endpoints))
+    return _rpc_pool
+
+
+def endpoint_concurrency(ep: Endpoint) -> AdaptiveConcurrency:
+    """AIMD window of one pool endpoint: throttling on one key only shrinks that key's window."""
+    return get_concurrency(f"rpc:{ep.name}")
+
+
+def choose_endpoint(exclude: Optional[Endpoint] = None) -> Endpoint:
+    """Pick a pool endpoint, preferring ones with a free slot in their window (and other than exclude)."""
+    return get_rpc_pool().choose(prefer=lambda ep: endpoint_concurrency(ep).has_capacity(), exclude=exclude)
+
+
+def rpc_window() -> int:
+    """Requests the pool may have in flight now: the sum of its endpoints' current windows."""
+    return sum(endpoint_concurrency(ep).limit for ep in get_rpc_pool().endpoints)
+
+
+def _rpc_call(method: str, params: list) -> Optional[dict]:
+    try:
+        return RPC_RETRY.call(rpc_request, method, params)
+    except UpstreamError:
+        return None
+
+
+def _post_rpc(payload, timeout: float, cost: float = 1.0, ep: Optional[Endpoint] = None):
+    """
+    POST a JSON-RPC payload to an endpoint from the pool (or to ep) and decode the body; raises
+    UpstreamError on HTTP/transport failures. The outcome (including RPC-level throttling
+    inside a 200 response) feeds the endpoint's health score.
+    """
+    pool = get_rpc_pool()
+    ep = ep or pool.choose()
+    # With several keys on one host, each gets its own rate-limit bucket
+    rate_key = ep.name.rsplit("#", 1)[-1] if len(pool.endpoints) > 1 else None
+    clock = service_clock()  # the endpoint's latency, without our own rate-limit wait
+    try:
+        response = check_response(http_post(ep.url, json=payload, timeout=timeout, cost=cost, rate_key=rate_key))
+        data = loads(response.content)
+    except Exception as e:
+        err = classify_exception(e)
+        pool.report(ep, False, clock(), err)
+        if err is e:
+            raise
+        raise err from e
+    err = _transient_rpc_error(data)
+    pool.report(ep, err is None, clock(), err)
+    return data
+
+
+def _transient_rpc_error(data) -> Optional[UpstreamError]:
+    """First retryable JSON-RPC error in a response (single object or batch array), if any."""
+    for item in (data if isinstance(data, list) else [data]):
+        if isinstance(item, dict) and "error" in item:
+            err = classify_rpc_error(item["error"])
+            if err.retryable:
+                return err
+    return None
+
+
+def rpc_request(method: str, params: list, timeout: float = 15, ep: Optional[Endpoint] = None) -> Optional[dict]:
+    """
+    One JSON-RPC call without retries or coalescing, to ep or an endpoint picked from the pool.
+    Returns the result (None for a null result); raises UpstreamError for HTTP, transport and RPC errors.
+    """
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": method,
+        "params": params
+    }
+    data = _post_rpc(payload, timeout, ep=ep)
+    if not isinstance(data, dict):
+        raise UpstreamError(SERVER, "unexpected response shape")
+    if "error" in data:
+        raise classify_rpc_error(data["error"])
+    return data.get("result")
+
+
+# getSignaturesForAddress returns at most this many entries per call
+SIGNATURES_PAGE_SIZE = 1000
+# Attempts per signature page (each already retried by RPC_RETRY) before the listing fails
+SIGNATURES_PAGE_ATTEMPTS = 3
+
+
+def fetch_signatures(wallet: str, limit: int = 100, before: Optional[str] = None, until: Optional[str] = None,
+                     min_block_time: Optional[int] = None, min_slot: Optional[int] = None) -> list:
+    """
+    Fetch transaction signatures for a wallet (newest first). Normalizes to list of dicts.
+    Limits above one page (1000) are paginated with the before cursor. If a page still fails
+    after retries, the signatures listed so far are returned and the cut is logged.
+    """
+    out: list = []
+    try:
+        for page in iter_signature_pages(
+            wallet, before=before, until=until, max_signatures=limit,
+            min_block_time=min_block_time, min_slot=min_slot,
+            prefetch=limit > SIGNATURES_PAGE_SIZE,
+        ):
+            out.extend(page)
+    except UpstreamError as e:
+        print(f"[!] Signature listing for {wallet[:8]}... stopped after {len(out)}: {e}")
+    return out
+
+
+def iter_signature_pages(wallet: str, before: Optional[str] = None, until: Optional[str] = None,
+                         max_signatures: Optional[int] = None, min_block_time: Optional[int] = None,
+                         min_slot: Optional[int] = None, page_size: int = SIGNATURES_PAGE_SIZE,
+                         prefetch: bool = True, status: Optional[dict] = None) -> Iterator[list]:
+    """
+    Walk a wallet's signature history newest -> oldest, one getSignaturesForAddress page at a time.
+    Follows the before cursor until the history is exhausted, max_signatures is reached,
+    the until signature is hit, or entries get older than min_block_time / min_slot.
+    With prefetch, page N+1 is already in flight while the caller processes page N
+    (at the caller's priority: the caller is waiting on it).
+    Only a short page from a successful call ends the history: a page that keeps failing
+    (throttled, server errors) is retried, then raises UpstreamError after the pages already yielded.
+    Pass a status dict to learn why the listing ended: status["exhausted"] is True only when the
+    RPC confirmed there is nothing older (or nothing newer than until) with a short page.
+    """
+    page_size = max(1, min(page_size, SIGNATURES_PAGE_SIZE))
+
+    def fetch_page(cursor: Optional[str], n: int) -> list:
+        opts = {"limit": n}
+        if cursor:
+            opts["before"] = cursor
+        if until:
+            opts["until"] = until
+        for attempt in range(SIGNATURES_PAGE_ATTEMPTS):
+            # A successful call always returns a list (possibly empty); None is a failed call
+            result = rpc_call("getSignaturesForAddress", [wallet, opts])
+            if result is not None:
+                return _normalize_signature_items(result)
+            if attempt + 1 < SIGNATURES_PAGE_ATTEMPTS:
+                time.sleep(2 ** attempt)
+        raise UpstreamError(SERVER, f"getSignaturesForAddress failed {SIGNATURES_PAGE_ATTEMPTS}x "
+                                    f"before {cursor[:12] + '...' if cursor else 'the newest signature'}")
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    priority = current_priority()
+
+    def request(cursor: Optional[str], remaining: Optional[int]):
+        n = page_size if remaining is None else min(page_size, remaining)
+        if executor is None:
+            return fetch_page(cursor, n), n
+        return executor.submit(run_with_priority, priority, fetch_page, cursor, n), n
+
+    remaining = max_signatures
+    try:
+        if remaining is not None and remaining <= 0:
+            return
+        pending, requested = request(before, remaining)
+        while pending is not None:
+            page = pending.result() if executor is not None else pending
+
+            kept = []
+            done = len(page) < requested  # short page from a successful call: history exhausted
+            if done and status is not None:
+                status["exhausted"] = True
+            for rec in page:
+                bt = rec.get("blockTime") or 0
+                if min_block_time and bt and bt < min_block_time:
+                    done = True
+                    break
+                if min_slot and rec.get("slot") is not None and rec["slot"] < min_slot:
+                    done = True
+                    break
+                kept.append(rec)
+            if remaining is not None:
+                kept = kept[:remaining]
+                remaining -= len(kept)
+                if remaining <= 0:
+                    done = True
+
+            pending = None
+            if not done and executor is not None:
+                pending, requested = request(page[-1]["signature"], remaining)
+            if kept:
+                yield kept
+            if not done and executor is None:
+                pending, requested = request(page[-1]["signature"], remaining)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def iter_signatures(wallet: str, **kwargs) -> Iterator[dict]:
+    """Signature records newest -> oldest across pages. Accepts iter_signature_pages options."""
+    for page in iter_signature_pages(wallet, **kwargs):
+        yield from page
+
+
+# New signatures fetched per refresh before the stored history is considered stale and rebuilt
+SYNC_MAX_NEW = int(os.getenv("LEAKLENS_SYNC_MAX_NEW", "5000"))
+
+
+def sync_wallet(wallet: str, limit: int = 100) -> dict:
+    """
+    Bring a wallet's stored signature history (leaklens_store) up to date.
+    First sync lists the newest `limit` signatures; later syncs fetch only signatures newer
+    than the watermark (until=newest_signature) and merge them on top. If fewer than `limit`
+    are stored and the history is not exhausted, older ones are backfilled with before=.
+    The history is marked complete only when the RPC confirmed its oldest signature; a listing
+    that fails leaves the watermark where it was and is reported in "error" (never as an empty delta).
+    Returns the delta: {"new": [...], "new_count", "backfilled", "state", "synced", "error"};
+    synced is False when the local store is unavailable or the first listing failed.
+    """
+    if not leaklens_store.available():
+        return {"new": [], "new_count": 0, "backfilled": 0, "state": None, "synced": False, "error": None}
+    state = leaklens_store.get_wallet_sync(wallet)
+
+    status: dict = {}
+    try:
+        if state is None or not state.get("newest_signature"):
+            new = list(iter_signatures(wallet, max_signatures=limit, status=status))
+            state = leaklens_store.record_wallet_signatures(
+                wallet, new, reset=True, complete=bool(status.get("exhausted"))
+            )
+        else:
+            new = list(iter_signatures(wallet, until=state["newest_signature"], max_signatures=SYNC_MAX_NEW))
+            if len(new) >= SYNC_MAX_NEW:
+                # Too far behind to bridge the gap: keep only the fresh page as the new history
+                print(f"[Sync] {wallet[:8]}... more than {SYNC_MAX_NEW} new signatures, rebuilding history")
+                state = leaklens_store.record_wallet_signatures(wallet, new[:limit], reset=True, complete=False)
+            elif new:
+                state = leaklens_store.record_wallet_signatures(wallet, new, position="newer")
+    except UpstreamError as e:
+        # Newer pages are only mergeable once they reach the watermark: keep the stored history as is
+        print(f"[Sync] {wallet[:8]}... listing failed, watermark unchanged: {e}")
+        return {"new": [], "new_count": 0, "backfilled": 0, "state": state,
+                "synced": bool(state and state.get("newest_signature")), "error": str(e)}
+
+    backfilled = 0
+    error = None
+    if state and state["count"] < limit and not state["complete"] and state.get("oldest_signature"):
+        wanted = limit - state["count"]
+        older: list = []
+        status = {}
+        try:
+            for page in iter_signature_pages(wallet, before=state["oldest_signature"], max_signatures=wanted,
+                                             status=status):
+                older.extend(page)
+        except UpstreamError as e:
+            # Older pages continue the stored history, so the part listed before the failure is kept
+            print(f"[Sync] {wallet[:8]}... backfill stopped after {len(older)}: {e}")
+            error = str(e)
+        if older or status.get("exhausted"):
+            backfilled = len(older)
+            state = leaklens_store.record_wallet_signatures(
+                wallet, older, position="older", complete=bool(status.get("exhausted"))
+            )
+
+    return {"new": new, "new_count": len(new), "backfilled": backfilled, "state": state,
+            "synced": state is not None, "error": error}
+
+
+def synced_signatures(wallet: str, limit: int = 100) -> list:
+    """Newest `limit` signatures via the incremental sync; falls back to a full listing without a store."""
+    delta = sync_wallet(wallet, limit)
+    if not delta["synced"]:
+        return fetch_signatures(wallet, limit)
+    stale = " (sync failed, stored history may be stale)" if delta["error"] else ""
+    print(f"    [Sync] {delta['new_count']} new, {delta['backfilled']} backfilled, {delta['state']['count']} stored{stale}")
+    return leaklens_store.get_wallet_signatures(wallet, limit)
+
+
+def _normalize_signature_items(result: Optional[list]) -> list:
+    """Normalize a getSignaturesForAddress result to list of {"signature", "blockTime", ...} dicts."""
+    if not result:
+        return []
+    out = []
+    for item in result:
+        if isinstance(item, dict):
+            sig = item.get("signature") or item.get("transactionSignature") or ""
+            bt = item.get("blockTime") or item.get("block_time") or 0
+            if not sig:
+                continue
+            rec = {"signature": sig, "blockTime": bt}
+            for k in ("err", "slot", "blockHeight", "memo"):
+                if k in item:
+                    rec[k] = item[k]
+            out.append(rec)
+        elif isinstance(item, str):
+            out.append({"signature": item, "blockTime": 0})
+    return out
+
+
+def rpc_batch_call(calls: List[Tuple[str, list]], ep: Optional[Endpoint] = None) -> Optional[List[Optional[dict]]]:
+    """
+    Send several RPC calls as one JSON-RPC array request (to ep, or an endpoint from the pool).
+    Returns one result per call in call order (None where that call errored),
+    or None when the endpoint rejected the batch as a whole.
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    try:
+        # Providers meter each call inside a batch, so charge the rate limiter per call
+        data = RPC_RETRY.call(_post_rpc, payload, 30, len(calls), ep)
+    except UpstreamError:
+        return None
+
+    # A rejected batch comes back as a single error object instead of an array
+    if not isinstance(data, list):
+        return None
+
+    by_id = {}
+    for item in data:
+        if isinstance(item, dict) and item.get("id") is not None:
+            by_id[item["id"]] = item
+    results = []
+    for i in range(len(calls)):
+        item = by_id.get(i)
+        if not item or "error" in item:
+            results.append(None)
+        else:
+            results.append(item.get("result"))
+    return results
+
+
+# Encoding follows LEAKLENS_TX_ENCODING; json/base64 messages are decoded locally (leaklens_decode)
+TX_FETCH_OPTIONS = tx_fetch_options()
+
+
+def fetch_transaction(signature: str) -> Optional[dict]:
+    """
+    Fetch full transaction details.
+    Finalized transactions never change, so they are served from / written to the local cache.
+    """
+    cached = leaklens_store.get_transaction(signature, tx_cache_kind())
+    if cached is not None:
+        return cached
+    result = _fetch_transaction_rpc(signature)
+    if result is not None:
+        leaklens_store.put_transaction(signature, result, tx_cache_kind())
+    return result
+
+
+def _fetch_transaction_rpc(signature: str) -> Optional[dict]:
+    # No commitment given, so the RPC answers at "finalized" and the result is safe to cache
+    return normalize_transaction(rpc_call("getTransaction", [signature, TX_FETCH_OPTIONS]))
+
+
+TX_RETRY = RetryPolicy("getTransaction")
+
+
+def _fetch_transaction_attempt(sig: str, ep: Endpoint) -> Optional[dict]:
+    """One getTransaction request to ep, holding a slot of that endpoint's concurrency window."""
+    with endpoint_concurrency(ep).slot() as token:
+        # Project as soon as it arrives so the full jsonParsed blob can be freed
+        result = normalize_transaction(rpc_request("getTransaction", [sig, TX_FETCH_OPTIONS], ep=ep))
+        # Not found is an answer, not a sign of load
+        token.ok = True if result is not None else None
+        return result
+
+
+def _fetch_transaction_hedged(sig: str) -> Optional[dict]:
+    """
+    Pick an endpoint, then hedge against that endpoint's own latency profile. The duplicate goes
+    to another healthy endpoint when there is one, not to the one that is being slow.
+    """
+    ep = choose_endpoint()
+    return get_hedger(f"getTransaction:{ep.name}").hedge(
+        lambda: _fetch_transaction_attempt(sig, ep),
+        lambda: _fetch_transaction_attempt(sig, choose_endpoint(exclude=ep)),
+    )
+
+
+def fetch_transaction_worker(sig: str) -> tuple:
+    """
+    Worker function to fetch a single transaction.
+    Transient failures are retried by TX_RETRY (jittered backoff, Retry-After), each attempt on a
+    freshly picked endpoint; a call slower than that endpoint's recent p95 gets one hedged
+    duplicate on another endpoint, whose answer is used if the primary fails.
+    """
+    try:
+        return (sig, TX_RETRY.call(_fetch_transaction_hedged, sig))
+    except UpstreamError:
+        return (sig, None)
+
+
+def _fetch_transaction_batch(signatures: List[str]) -> Dict[str, Optional[dict]]:
+    """
+    Fetch one batch of transactions. Signatures the batch could not return
+    (rejected batch, per-call error or null result) are split in two and retried;
+    a batch of one falls back to the single-request worker.
+    """
+    if len(signatures) == 1:
+        sig, result = fetch_transaction_worker(signatures[0])
+        return {sig: result}
+
+    ep = choose_endpoint()
+    with endpoint_concurrency(ep).slot() as token:
+        results = rpc_batch_call([("getTransaction", [sig, TX_FETCH_OPTIONS]) for sig in signatures], ep=ep)
+        token.ok = False if results is None else (True if all(r is not None for r in results) else None)
+    out: Dict[str, Optional[dict]] = {}
+    if results is None:
+        failed = list(signatures)
+    else:
+        failed = []
+        for sig, result in zip(signatures, results):
+            if result is None:
+                failed.append(sig)
+            else:
+                out[sig] = normalize_transaction(result)
+
+    if failed:
+        mid = (len(failed) + 1) // 2
+        for half in (failed[:mid], failed[mid:]):
+            if half:
+                out.update(_fetch_transaction_batch(half))
+    return out
+
+
+def fetch_transactions_batched(signatures: List[str], batch_size: int = 20, max_workers: Optional[int] = None) -> Dict[str, Optional[dict]]:
+    """
+    Fetch multiple transactions with JSON-RPC batch requests (batch_size calls per HTTP request).
+    Same contract as fetch_transactions_parallel: signature -> transaction data or None.
+    Batches in flight are limited by each endpoint's concurrency window.
+    """
+    batch_size = max(1, batch_size)
+    batches = [signatures[i:i + batch_size] for i in range(0, len(signatures), batch_size)]
+    results: Dict[str, Optional[dict]] = {sig: None for sig in signatures}
+    workers = max(1, min(max_workers or rpc_window(), len(batches)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_fetch_transaction_batch, batch) for batch in batches]
+        completed = 0
+        for future in as_completed(futures):
+            results.update(future.result())
+            completed += 1
+            print(f"\r    [{completed}/{len(batches)}] batches fetched...", end="", flush=True)
+
+    total_fetched = sum(1 for s in signatures if results.get(s) is not None)
+    print(f"\r    [+] Successfully fetched {total_fetched}/{len(signatures)} transactions ({len(batches)} batches)")
+    return results
+
+
+def fetch_transactions_parallel(signatures: List[str], max_workers: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, Optional[dict]]:
+    """
+    Fetch multiple transactions, serving already-seen signatures from the local cache
+    (leaklens_store) and fetching only the rest from the RPC.
+    Returns dict mapping signature -> transaction data (None if it could not be fetched)
+    """
+    results: Dict[str, Optional[dict]] = leaklens_store.get_transactions(signatures, tx_cache_kind())
+    missing = [s for s in dict.fromkeys(signatures) if s not in results]
+    if results:
+        print(f"    [Cache] {len(results)}/{len(results) + len(missing)} transactions from local cache")
+    if missing:
+        fetched = _fetch_transactions_uncached(missing, max_workers=max_workers, batch_size=batch_size)
+        leaklens_store.put_transactions(fetched, tx_cache_kind())
+        results.update(fetched)
+    return results
+
+
+def _fetch_transactions_uncached(signatures: List[str], max_workers: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, Optional[dict]]:
+    """
+    Fetch multiple transactions in parallel using ThreadPoolExecutor.
+    More reliable than batch RPC calls for rate-limited endpoints.
+    Requests in flight follow each endpoint's AIMD window (endpoint_concurrency):
+    it grows while that endpoint is fast and halves on its throttling or null results.
+    max_workers only caps the thread count (default: the endpoints' current windows combined).
+    With batch_size > 1 (default: LEAKLENS_RPC_BATCH_SIZE) uses JSON-RPC batches instead;
+    with LEAKLENS_FETCH_ENGINE=async everything runs as coroutines on one event loop.
+    Returns dict mapping signature -> transaction data
+    """
+    if FETCH_ENGINE == "async":
+        from leaklens_async import fetch_transactions_sync
+        return fetch_transactions_sync(signatures)
+    if batch_size is None:
+        batch_size = RPC_BATCH_SIZE
+    if batch_size > 1:
+        return fetch_transactions_batched(signatures, batch_size=batch_size, max_workers=max_workers)
+
+    max_workers = max(1, min(max_workers or rpc_window(), len(signatures) or 1))
+    # Let every worker keep its own warm connection instead of re-handshaking per call
+    for url in get_rpc_pool().urls:
+        ensure_pool_size(url, max_workers)
+    results = {}
+    total_fetched = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_sig = {executor.submit(fetch_transaction_worker, sig): sig for sig in signatures}
+        completed = 0
+        for future in as_completed(future_to_sig):
+            sig, result = future.result()
+            results[sig] = result
+            if result is not None:
+                total_fetched += 1
+            completed += 1
+            if completed % 20 == 0:
+                print(f"\r    [{completed}/{len(signatures)}] fetched...", end="", flush=True)
+
+    total_fetched = sum(1 for s in signatures if results.get(s) is not None)
+    print(f"\r    [+] Successfully fetched {total_fetched}/{len(signatures)} transactions")
+    return results
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STREAMING PIPELINE - Analyze transactions as they arrive
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_STREAM_DONE = object()
+
+
+def iter_transactions(signatures: List[str], queue_size: Optional[int] = None) -> Iterator[Tuple[str, Optional[dict]]]:
+    """
+    Yield (signature, transaction) in arrival order while later ones are still being fetched.
+    A producer thread serves cached signatures (leaklens_store) and fetches the rest. One budget
+    of queue_size covers every transaction the stream holds: a unit is taken before a signature is
+    read from the cache or fetched and given back when the consumer dequeues it (a fetched one once
+    it is written to the cache). So at most queue_size transactions are in flight, queued or awaiting
+    the cache write, plus the one being consumed; a slow consumer throttles the fetchers instead of
+    growing memory. Closing the generator early stops the producer.
+    """
+    queue_size = max(1, queue_size or STREAM_QUEUE_SIZE)
+    sigs = list(dict.fromkeys(signatures))
+    # Chunks take half the budget, so the next one is fetched while the last is consumed
+    step = max(1, queue_size // 2)
+    # Units held by the cache-write buffer never keep the next chunk waiting
+    flush_at = max(1, min(50, queue_size - step + 1))
+    budget = threading.Semaphore(queue_size)
+    q: "queue.Queue" = queue.Queue()
+    stop = threading.Event()
+
+    def release(n: int):
+        for _ in range(n):
+            budget.release()
+
+    def reserve(n: int) -> bool:
+        taken = 0
+        while taken < n:
+            if stop.is_set():
+                release(taken)
+                return False
+            if budget.acquire(timeout=0.2):
+                taken += 1
+        return True
+
+    def fetch(sig):
+        if stop.is_set():
+            q.put((sig, None, False))
+            return
+        try:
+            item = fetch_transaction_worker(sig) + (False,)
+        except Exception as e:
+            print(f"\n    [!] Fetch failed for {sig[:12]}...: {str(e)[:80]}")
+            item = (sig, None, False)
+        q.put(item)
+
+    def produce():
+        executor = None
+        try:
+            # Batched/async engines fetch a chunk per call; otherwise one thread per request in the window
+            batched = FETCH_ENGINE == "async" or RPC_BATCH_SIZE > 1
+            if not batched:
+                workers = max(1, min(rpc_window(), len(sigs) or 1))
+                for url in get_rpc_pool().urls:
+                    ensure_pool_size(url, workers)
+                executor = ThreadPoolExecutor(max_workers=workers)
+            for start in range(0, len(sigs), step):
+                chunk = sigs[start:start + step]
+                if not reserve(len(chunk)):
+                    return
+                cached = leaklens_store.get_transactions(chunk, tx_cache_kind())
+                missing = [s for s in chunk if s not in cached]
+                for sig, tx in cached.items():
+                    q.put((sig, tx, True))
+                del cached
+                if not missing:
+                    continue
+                if batched:
+                    fetched = _fetch_transactions_uncached(missing)
+                    for sig in missing:
+                        q.put((sig, fetched.get(sig), False))
+                    del fetched
+                else:
+                    for sig in missing:
+                        executor.submit(fetch, sig)
+        except Exception as e:
+            q.put(e)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            q.put(_STREAM_DONE)
+
+    # The producer inherits the caller's context, so it fetches on the request's AsyncEngine
+    producer = threading.Thread(target=copy_context().run, args=(produce,), name="leaklens-stream", daemon=True)
+    producer.start()
+    fetched: Dict[str, dict] = {}
+
+    def flush():
+        leaklens_store.put_transactions(fetched, tx_cache_kind())
+        release(len(fetched))
+        fetched.clear()
+
+    try:
+        while True:
+            item = q.get()
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            sig, tx, from_cache = item
+            if tx is not None and not from_cache:
+                fetched[sig] = tx
+                if len(fetched) >= flush_at:
+                    flush()
+            else:
+                release(1)
+            yield sig, tx
+    finally:
+        stop.set()
+        if fetched:
+            flush()
+
+
+class StreamAnalyzer(ABC):
+    """
+    Incremental analyzer fed by run_pipeline (while fetching) or run_analyzers (already fetched).
+    start() receives the signature records in wallet order before anything arrives, update() is
+    the per-transaction hook and sees each transaction once (in arrival order), result() is the
+    finalize hook and produces the same output as the batch counterpart.
+    limit restricts the analyzer to the newest N signatures.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.signatures: List[dict] = []
+        self._wanted: Optional[Set[str]] = None
+
+    def start(self, signatures: List[dict]):
+        self.signatures = signatures[:self.limit] if self.limit is not None else list(signatures)
+        self._wanted = {_signature_of(s) for s in self.signatures}
+
+    def wants(self, signature: str) -> bool:
+        return self._wanted is None or signature in self._wanted
+
+    @abstractmethod
+    def update(self, sig_info: dict, tx: dict):
+        """Fold one transaction (and its signature record) into the analyzer's state."""
+
+    @abstractmethod
+    def result(self):
+        """Final output, same shape as the batch counterpart."""
+
+
+def _signature_of(sig_info) -> str:
+    if isinstance(sig_info, dict):
+        return sig_info.get("signature") or sig_info.get("transactionSignature") or ""
+    return sig_info if isinstance(sig_info, str) else ""
+
+
+def run_pipeline(signatures: List, analyzers: Iterable[StreamAnalyzer], queue_size: Optional[int] = None) -> int:
+    """
+    Fetch the transactions for signature records and feed every analyzer as each one arrives,
+    so analysis overlaps the fetch instead of following it. Payloads are not retained here:
+    each transaction's record is shared by the analyzers and dropped once they all have it;
+    analyzers keep only what they need. Returns the number of transactions analyzed.
+    """
+    analyzers = list(analyzers)
+    records = [s if isinstance(s, dict) else {"signature": s} for s in signatures]
+    for analyzer in analyzers:
+        analyzer.start(records)
+    by_sig = {}
+    for record in records:
+        sig = _signature_of(record)
+        if sig:
+            by_sig.setdefault(sig, record)
+    total = len(by_sig)
+    done = analyzed = 0
+    with record_scope() as cache:
+        for sig, tx in iter_transactions(list(by_sig), queue_size=queue_size):
+            done += 1
+            if done % 20 == 0:
+                print(f"\r    [{done}/{total}] fetched...", end="", flush=True)
+            if not isinstance(tx, dict):
+                continue
+            analyzed += 1
+            record = by_sig[sig]
+            for analyzer in analyzers:
+                if analyzer.wants(sig):
+                    analyzer.update(record, tx)
+            cache.discard(tx)
+    print(f"\r    [+] Successfully fetched {analyzed}/{total} transactions")
+    return analyzed
+
+
+def run_analyzers(signatures: List, tx_details_map: Dict[str, dict], analyzers: Iterable[StreamAnalyzer]) -> int:
+    """
+    Feed already-fetched transactions to every analyzer in one traversal, in signature order:
+    each transaction is visited once however many analyzers read it. Returns the number of
+    transactions analyzed.
+    """
+    analyzers = list(analyzers)
+    records = [s if isinstance(s, dict) else {"signature": s} for s in signatures]
+    for analyzer in analyzers:
+        analyzer.start(records)
+    if not analyzers or not tx_details_map:
+        return 0
+    seen: Set[str] = set()
+    analyzed = 0
+    with record_scope():
+        for record in records:
+            sig = _signature_of(record)
+            if not sig or sig in seen:
+                continue
+            seen.add(sig)
+            tx = tx_details_map.get(sig)
+            if not isinstance(tx, dict) or not tx:
+                continue
+            interested = [a for a in analyzers if a.wants(sig)]
+            if not interested:
+                continue
+            analyzed += 1
+            for analyzer in interested:
+                analyzer.update(record, tx)
+    return analyzed
+
+
+def index_transactions(txs: Iterable[dict]) -> Tuple[List[dict], Dict[str, dict]]:
+    """Signature records and signature -> tx map for transactions that carry their own signature (Helius Enhanced)."""
+    signatures: List[dict] = []
+    tx_map: Dict[str, dict] = {}
+    for tx in txs or []:
+        if not isinstance(tx, dict):
+            continue
+        sig = _signature_of(tx)
+        if not sig or sig in tx_map:
+            continue
+        tx_map[sig] = tx
+        signatures.append({"signature": sig, "blockTime": tx.get("timestamp") or tx.get("blockTime") or tx.get("block_time") or 0})
+    return signatures, tx_map
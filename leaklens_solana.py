@@ -1,1655 +1,71 @@
 #!/usr/bin/env python3
-"""LeakLens Solana - Surveillance exposure analysis for Solana wallets."""
+"""
+LeakLens Solana - Surveillance exposure analysis for Solana wallets (CLI).
+
+The implementation is split into leaklens_rpc (RPC access and fetch pipeline), leaklens_analysis
+(analyzers) and leaklens_plot (matplotlib, loaded on first plot); this module keeps the CLI and
+re-exports their names for existing imports. Importing it has no side effects: configuration
+such as HELIUS_API_KEY is resolved on first use.
+"""
 
 import sys
 import os
+import io
 import argparse
-import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import numpy as np
 from datetime import datetime, timezone
-from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Set, Tuple
-from collections import defaultdict
-import json
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
-from decimal import Decimal
-
-# Load environment variables from .env file
-load_dotenv()
-
-# ═══════════════════════════════════════════════════════════════════════════════
-# CONFIGURATION
-# ═══════════════════════════════════════════════════════════════════════════════
-
-# Load API key from environment variable
-HELIUS_API_KEY = os.getenv("HELIUS_API_KEY")
-if not HELIUS_API_KEY:
-    print("[!] ERROR: HELIUS_API_KEY not found in environment variables")
-    print("[!] Please create a .env file with your API key (see .env.example)")
-    sys.exit(1)
-
-RPC_URL = f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}"
-DEFAULT_LIMIT = 100
-
-# Configure stdout encoding for Windows compatibility
-import sys
-import io
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
-# Known labels for common addresses
-KNOWN_LABELS = {
-    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": "Raydium LP V4",
-    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": "Jupiter V6",
-    "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P": "Pump.fun",
-    "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc": "Orca Whirlpool",
-    "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin": "Serum DEX V3",
-    "So11111111111111111111111111111111111111112": "Wrapped SOL",
-    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA": "Token Program",
-    "11111111111111111111111111111111": "System Program",
-    "ComputeBudget111111111111111111111111111111": "Compute Budget Program",
-}
-
-# Jito tip accounts for private execution detection
-JITO_TIP_ACCOUNTS = [
-    "96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5",
-    "HFqU5x63VTqvTsszeoPhtUYj9rdag4djXeFQiDmJzTMX",
-    "Cw8CFyM9FkoPhlTnrKMhTHqXheqJZNs4Fl31iWBP6UBu",
-    "ADuUkR4ykG49feZ5bwhvq0A25pl1QMrBSnXRKKkeoX8q",
-    "DttWaMuVvTiduZRNgLcGW9t66tePvm6znsc5tqQZFQk6",
-    "3AVi9Tg9Uo68tJfuvoKvqKNWKkC5wPdSSdeBnIzKZ6jJ",
-    "DoPtqvycNsD9nuNSqMZ5J1GzV91qfQ4t7x1qF4aPiPce",
+import leaklens_rpc
+from leaklens_rpc import (
+    DEFAULT_LIMIT, rpc_call, fetch_signatures,
+    fetch_transaction, fetch_transaction_worker, fetch_transactions_parallel,
+)
+from leaklens_analysis import (
+    KNOWN_LABELS, JITO_TIP_ACCOUNTS, get_label,
+    ProfileProbabilities, SleepWindow, WalletConnection, ReactionSpeedAnalysis,
+    detect_jito_tip, analyze_execution_profile, analyze_wallet_execution_profiles, analyze_wallet,
+    analyze_opsec_failures, analyze_opsec_failures_from_enhanced,
+    detect_sleep_window, analyze_reaction_speed, has_token_receive, has_token_action, calculate_probabilities,
+    get_complexity_color, get_complexity_label,
+    extract_accounts_from_tx, find_connections, scan_network,
+)
+from leaklens_histograms import ActivityHistograms, activity_histograms
+from leaklens_plot import visualize_profile, visualize_connections, show as show_plots
+
+# Names this module had before the split, kept importable from here; new code imports them from
+# leaklens_rpc / leaklens_analysis / leaklens_plot directly
+__all__ = [
+    "DEFAULT_LIMIT", "rpc_call", "fetch_signatures",
+    "fetch_transaction", "fetch_transaction_worker", "fetch_transactions_parallel",
+    "KNOWN_LABELS", "JITO_TIP_ACCOUNTS", "get_label",
+    "ProfileProbabilities", "SleepWindow", "WalletConnection", "ReactionSpeedAnalysis",
+    "detect_jito_tip", "analyze_execution_profile", "analyze_wallet_execution_profiles", "analyze_wallet",
+    "analyze_opsec_failures", "analyze_opsec_failures_from_enhanced",
+    "detect_sleep_window", "analyze_reaction_speed", "has_token_receive", "has_token_action", "calculate_probabilities",
+    "get_complexity_color", "get_complexity_label",
+    "extract_accounts_from_tx", "find_connections", "scan_network",
+    "visualize_profile", "visualize_connections",
+    "print_profile_report", "print_connection_report", "print_banner", "main",
 ]
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# DATA CLASSES
-# ═══════════════════════════════════════════════════════════════════════════════
-
-@dataclass
-class ProfileProbabilities:
-    """Probability estimates for different wallet profiles"""
-    bot: float = 0.0
-    eu_trader: float = 0.0
-    us_trader: float = 0.0
-    asia_trader: float = 0.0
-    retail_hobbyist: float = 0.0
-    professional: float = 0.0
-    whale: float = 0.0
-    degen: float = 0.0
-    
-    def normalize(self):
-        geo_total = self.eu_trader + self.us_trader + self.asia_trader
-        if geo_total > 0:
-            self.eu_trader = (self.eu_trader / geo_total) * 100
-            self.us_trader = (self.us_trader / geo_total) * 100
-            self.asia_trader = (self.asia_trader / geo_total) * 100
-        
-        occ_total = self.retail_hobbyist + self.professional
-        if occ_total > 0:
-            self.retail_hobbyist = (self.retail_hobbyist / occ_total) * 100
-            self.professional = (self.professional / occ_total) * 100
-
-
-@dataclass
-class SleepWindow:
-    start_hour: int
-    end_hour: int
-    activity_during_sleep: int
-    confidence: float
-
-
-@dataclass
-class WalletConnection:
-    """Represents a connection between two wallets"""
-    wallet_a: str
-    wallet_b: str
-    tx_count: int = 0
-    total_volume: float = 0.0
-    first_interaction: Optional[datetime] = None
-    last_interaction: Optional[datetime] = None
-    signatures: List[str] = field(default_factory=list)
-    direction: str = "bidirectional"  # "a_to_b", "b_to_a", "bidirectional"
-
-
-@dataclass
-class ReactionSpeedAnalysis:
-    """Analysis of reaction speed for bot detection"""
-    bot_confidence: float = 0.0
-    avg_reaction_time: float = 0.0
-    median_reaction_time: float = 0.0
-    fastest_reaction: float = 0.0
-    instant_reactions: int = 0  # < 5 seconds
-    fast_reactions: int = 0  # 5-30 seconds
-    human_reactions: int = 0  # > 30 seconds
-    total_reaction_pairs: int = 0
-
-
-# ═══════════════════════════════════════════════════════════════════════════════
-# RPC FUNCTIONS
-# ═══════════════════════════════════════════════════════════════════════════════
-
-def rpc_call(method: str, params: list) -> Optional[dict]:
-    """Make an RPC call to Solana"""
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": method,
-        "params": params
-    }
-    
-    try:
-        response = requests.post(RPC_URL, json=payload, timeout=15)
-        data = response.json()
-        
-        if "error" in data:
-            return None
-        
-        return data.get("result")
-    except:
-        return None
-
-
-def fetch_signatures(wallet: str, limit: int = 100) -> list:
-    """Fetch transaction signatures for a wallet. Normalizes to list of dicts."""
-    result = rpc_call("getSignaturesForAddress", [wallet, {"limit": limit}])
-    if not result:
-        return []
-    out = []
-    for item in result:
-        if isinstance(item, dict):
-            sig = item.get("signature") or item.get("transactionSignature") or ""
-            bt = item.get("blockTime") or item.get("block_time") or 0
-            if not sig:
-                continue
-            rec = {"signature": sig, "blockTime": bt}
-            for k in ("err", "slot", "blockHeight", "memo"):
-                if k in item:
-                    rec[k] = item[k]
-            out.append(rec)
-        elif isinstance(item, str):
-            out.append({"signature": item, "blockTime": 0})
-    return out
-
-
-def fetch_transaction(signature: str) -> Optional[dict]:
-    """Fetch full transaction details"""
-    return rpc_call("getTransaction", [signature, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}])
-
-
-def fetch_transaction_worker(sig: str, retries: int = 2) -> tuple:
-    """Worker function to fetch a single transaction. Retries on failure (helps on Vercel/serverless rate limits)."""
-    for attempt in range(retries + 1):
-        try:
-            result = fetch_transaction(sig)
-            return (sig, result)
-        except Exception:
-            if attempt < retries:
-                time.sleep(0.25 * (attempt + 1))
-            else:
-                return (sig, None)
-    return (sig, None)
-
-
-def fetch_transactions_parallel(signatures: List[str], max_workers: int = 12) -> Dict[str, Optional[dict]]:
-    """
-    Fetch multiple transactions in parallel using ThreadPoolExecutor.
-    More reliable than batch RPC calls for rate-limited endpoints.
-    On Vercel/serverless, uses lower concurrency to avoid RPC rate limits.
-    Returns dict mapping signature -> transaction data
-    """
-    # Lower concurrency on Vercel to avoid Helius RPC rate limits (fewer failed fetches)
-    if os.getenv("VERCEL") == "1":
-        max_workers = min(max_workers, 4)
-    results = {}
-    total_fetched = 0
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_sig = {executor.submit(fetch_transaction_worker, sig): sig for sig in signatures}
-        completed = 0
-        for future in as_completed(future_to_sig):
-            sig, result = future.result()
-            results[sig] = result
-            if result is not None:
-                total_fetched += 1
-            completed += 1
-            if completed % 20 == 0:
-                print(f"\r    [{completed}/{len(signatures)}] fetched...", end="", flush=True)
-
-    # Retry failed fetches with low concurrency (helps on Vercel rate limits)
-    failed = [s for s in signatures if results.get(s) is None]
-    if failed:
-        retry_workers = 2 if os.getenv("VERCEL") == "1" else 4
-        with ThreadPoolExecutor(max_workers=retry_workers) as executor:
-            futures = {executor.submit(fetch_transaction_worker, s, retries=3): s for s in failed}
-            for future in as_completed(futures):
-                sig, result = future.result()
-                if result is not None:
-                    results[sig] = result
-    total_fetched = sum(1 for s in signatures if results.get(s) is not None)
-    print(f"\r    [+] Successfully fetched {total_fetched}/{len(signatures)} transactions")
-    return results
-
-
-def get_label(address: str) -> str:
-    """Get human-readable label for an address"""
-    return KNOWN_LABELS.get(address, address[:8] + "..." + address[-4:])
-
-
-# ═══════════════════════════════════════════════════════════════════════════════
-# MEMPOOL FORENSICS - Priority Fee & Execution Style Detection
-# ═══════════════════════════════════════════════════════════════════════════════
-
-def parse_compute_budget_instruction(instruction_data: bytes) -> dict:
-    """
-    Parse Compute Budget instruction to extract priority fee and compute unit limit.
-    Returns dict with 'priority_fee_microlamports' and 'compute_unit_limit' or None.
-    """
-    if not instruction_data or len(instruction_data) < 1:
-        return None
-    
-    # Compute Budget instruction discriminator (first byte)
-    # 2 = SetComputeUnitLimit, 3 = SetComputeUnitPrice (priority fee)
-    try:
-        if len(instruction_data) >= 5:
-            discriminator = instruction_data[0]
-            
-            if discriminator == 2:  # SetComputeUnitLimit
-                # Next 4 bytes are u32 compute unit limit
-                if len(instruction_data) >= 5:
-                    cu_limit = int.from_bytes(instruction_data[1:5], byteorder='little')
-                    return {"compute_unit_limit": cu_limit}
-            
-            elif discriminator == 3:  # SetComputeUnitPrice (priority fee)
-                # Next 8 bytes are u64 priority fee in microlamports
-                if len(instruction_data) >= 9:
-                    priority_fee = int.from_bytes(instruction_data[1:9], byteorder='little')
-                    return {"priority_fee_microlamports": priority_fee}
-    except:
-        pass
-    
-    return None
-
-
-def detect_jito_tip(tx_details: dict) -> Tuple[bool, float]:
-    """
-    Detect if transaction includes Jito tip (private execution indicator).
-    Returns (has_jito_tip, tip_amount_sol).
-    """
-    if not tx_details or not tx_details.get("meta"):
-        return False, 0.0
-    
-    try:
-        meta = tx_details["meta"]
-        msg = tx_details.get("transaction", {}).get("message", {})
-        
-        # Get all account keys
-        account_keys = msg.get("accountKeys", [])
-        if isinstance(account_keys, list) and len(account_keys) > 0:
-            # Handle both string and dict formats
-            accounts = []
-            for key in account_keys:
-                if isinstance(key, dict):
-                    accounts.append(key.get("pubkey", ""))
-                else:
-                    accounts.append(str(key))
-        else:
-            accounts = []
-        
-        # Check pre/post balances for Jito tip accounts
-        pre_balances = meta.get("preBalances", [])
-        post_balances = meta.get("postBalances", [])
-        
-        for i, account in enumerate(accounts):
-            if i < len(pre_balances) and i < len(post_balances):
-                if account in JITO_TIP_ACCOUNTS:
-                    tip_lamports = post_balances[i] - pre_balances[i]
-                    if tip_lamports > 0:
-                        return True, tip_lamports / 1e9  # Convert to SOL
-    except:
-        pass
-    
-    return False, 0.0
-
-
-def analyze_execution_profile(tx_details: dict) -> dict:
-    """
-    Analyze transaction for execution profile classification.
-    Returns dict with execution_profile, priority_fee, compute_unit_limit, jito_tip, etc.
-    """
-    result = {
-        "execution_profile": "RETAIL",
-        "priority_fee_microlamports": 0,
-        "compute_unit_limit": None,
-        "has_jito_tip": False,
-        "jito_tip_sol": 0.0,
-        "indicators": []
-    }
-    
-    if not tx_details:
-        return result
-    
-    try:
-        msg = tx_details.get("transaction", {}).get("message", {})
-        instructions = msg.get("instructions", [])
-        account_keys = msg.get("accountKeys", [])
-        
-        # Normalize account keys format
-        accounts = []
-        for key in account_keys:
-            if isinstance(key, dict):
-                accounts.append(key.get("pubkey", ""))
-            else:
-                accounts.append(str(key))
-        
-        # Parse instructions for Compute Budget
-        compute_budget_program = "ComputeBudget111111111111111111111111111111"
-        max_priority_fee = 0
-        max_cu_limit = None
-        
-        for ix in instructions:
-            if isinstance(ix, dict):
-                # Handle both parsed and unparsed instruction formats
-                program_id_index = ix.get("programIdIndex")
-                program_id_str = ix.get("programId")
-                
-                # Determine program ID
-                if program_id_str:
-                    program_id = program_id_str
-                elif program_id_index is not None and program_id_index < len(accounts):
-                    program_id = accounts[program_id_index]
-                else:
-                    continue
-                
-                if program_id == compute_budget_program:
-                    # Parse instruction data
-                    ix_data = ix.get("data")
-                    parsed_data = ix.get("parsed")
-                    
-                    # Try parsed format first (jsonParsed encoding)
-                    if parsed_data:
-                        parsed_type = parsed_data.get("type")
-                        if parsed_type == "setComputeUnitPrice":
-                            # Priority fee in microlamports
-                            fee = int(parsed_data.get("args", {}).get("microLamports", 0))
-                            if fee > 0:
-                                max_priority_fee = max(max_priority_fee, fee)
-                                result["priority_fee_microlamports"] = max_priority_fee
-                        elif parsed_type == "setComputeUnitLimit":
-                            # Compute unit limit
-                            cu_limit = int(parsed_data.get("args", {}).get("units", 0))
-                            if cu_limit > 0:
-                                if max_cu_limit is None or cu_limit > max_cu_limit:
-                                    max_cu_limit = cu_limit
-                                    result["compute_unit_limit"] = max_cu_limit
-                    
-                    # Fallback to raw data parsing
-                    elif ix_data:
-                        data_bytes = None
-                        # Handle base58 or hex encoded data
-                        if isinstance(ix_data, str):
-                            try:
-                                # Try to decode as base58 (Solana standard)
-                                try:
-                                    import base58
-                                    data_bytes = base58.b58decode(ix_data)
-                                except ImportError:
-                                    # Fallback: try hex if base58 not available
-                                    data_bytes = bytes.fromhex(ix_data.replace("0x", ""))
-                            except:
-                                try:
-                                    # Try hex
-                                    data_bytes = bytes.fromhex(ix_data.replace("0x", ""))
-                                except:
-                                    continue
-                        elif isinstance(ix_data, list):
-                            data_bytes = bytes(ix_data)
-                        
-                        if data_bytes:
-                            budget_data = parse_compute_budget_instruction(data_bytes)
-                            if budget_data:
-                                if "priority_fee_microlamports" in budget_data:
-                                    fee = budget_data["priority_fee_microlamports"]
-                                    max_priority_fee = max(max_priority_fee, fee)
-                                    result["priority_fee_microlamports"] = max_priority_fee
-                                
-                                if "compute_unit_limit" in budget_data:
-                                    cu_limit = budget_data["compute_unit_limit"]
-                                    if max_cu_limit is None or cu_limit > max_cu_limit:
-                                        max_cu_limit = cu_limit
-                                        result["compute_unit_limit"] = max_cu_limit
-        
-        # Check for Jito tip
-        has_jito, jito_tip = detect_jito_tip(tx_details)
-        result["has_jito_tip"] = has_jito
-        result["jito_tip_sol"] = jito_tip
-        
-        # Classify execution profile
-        if has_jito and jito_tip > 0:
-            result["execution_profile"] = "MEV_STYLE"
-            result["indicators"].append(f"Jito tip: {jito_tip:.6f} SOL")
-        elif max_priority_fee > 1000000 or (max_cu_limit and max_cu_limit > 1400000):
-            # High priority fee (>1M microlamports) or very high CU limit indicates urgent/pro trader
-            if max_priority_fee > 1000000:
-                result["execution_profile"] = "URGENT_USER"
-                result["indicators"].append(f"High priority fee: {max_priority_fee/1e6:.2f}M microlamports")
-            if max_cu_limit and max_cu_limit > 1400000:
-                result["execution_profile"] = "PRO_TRADER"
-                result["indicators"].append(f"High CU limit: {max_cu_limit:,}")
-        elif max_priority_fee > 100000 or (max_cu_limit and max_cu_limit > 200000):
-            # Moderate priority indicates urgent user
-            result["execution_profile"] = "URGENT_USER"
-            if max_priority_fee > 100000:
-                result["indicators"].append(f"Moderate priority fee: {max_priority_fee/1e6:.2f}M microlamports")
-        else:
-            result["execution_profile"] = "RETAIL"
-            if max_priority_fee > 0:
-                result["indicators"].append(f"Low priority fee: {max_priority_fee/1e6:.3f}M microlamports")
-            else:
-                result["indicators"].append("No priority fee set")
-    
-    except Exception as e:
-        result["indicators"].append(f"Analysis error: {str(e)}")
-    
-    return result
-
-
-def analyze_wallet_execution_profiles(wallet: str, limit: int = 100, signatures: Optional[List[dict]] = None, tx_details_map: Optional[Dict[str, dict]] = None) -> dict:
-    """
-    Analyze wallet's execution profiles across multiple transactions.
-    Allows passing pre-fetched signatures and transaction details to avoid re-fetch.
-    """
-    if signatures is None:
-        signatures = fetch_signatures(wallet, limit)
-    else:
-        signatures = signatures[:limit]
-    
-    if not signatures:
-        return {
-            "wallet": wallet,
-            "total_transactions": 0,
-            "profiles": {},
-            "aggregate_profile": "UNKNOWN"
-        }
-    
-    profile_counts = {"RETAIL": 0, "URGENT_USER": 0, "PRO_TRADER": 0, "MEV_STYLE": 0}
-    total_priority_fee = 0
-    total_jito_tips = 0.0
-    jito_tip_count = 0
-    
-    if tx_details_map is None:
-        sig_strings = []
-        for si in signatures:
-            if isinstance(si, dict):
-                s = si.get("signature") or si.get("transactionSignature")
-                if s:
-                    sig_strings.append(s)
-            elif isinstance(si, str):
-                sig_strings.append(si)
-        tx_details_map = fetch_transactions_parallel(sig_strings, max_workers=12) if sig_strings else {}
-    
-    for sig_info in signatures:
-        if not isinstance(sig_info, dict):
-            continue
-        signature = sig_info.get("signature") or sig_info.get("transactionSignature") or ""
-        if not signature:
-            continue
-        tx_details = tx_details_map.get(signature) if tx_details_map else None
-        
-        if tx_details and isinstance(tx_details, dict):
-            profile_data = analyze_execution_profile(tx_details)
-            profile = profile_data["execution_profile"]
-            profile_counts[profile] = profile_counts.get(profile, 0) + 1
-            
-            if profile_data["priority_fee_microlamports"] > 0:
-                total_priority_fee += profile_data["priority_fee_microlamports"]
-            
-            if profile_data["has_jito_tip"]:
-                total_jito_tips += profile_data["jito_tip_sol"]
-                jito_tip_count += 1
-    
-    total_tx = len(signatures)
-    
-    # Determine aggregate profile
-    if profile_counts["MEV_STYLE"] > total_tx * 0.3:
-        aggregate = "MEV_STYLE"
-    elif profile_counts["PRO_TRADER"] > total_tx * 0.3:
-        aggregate = "PRO_TRADER"
-    elif profile_counts["URGENT_USER"] > total_tx * 0.3:
-        aggregate = "URGENT_USER"
-    else:
-        aggregate = "RETAIL"
-    
-    return {
-        "wallet": wallet,
-        "total_transactions": total_tx,
-        "profiles": {
-            "RETAIL": profile_counts["RETAIL"],
-            "URGENT_USER": profile_counts["URGENT_USER"],
-            "PRO_TRADER": profile_counts["PRO_TRADER"],
-            "MEV_STYLE": profile_counts["MEV_STYLE"]
-        },
-        "profile_percentages": {
-            "RETAIL": round((profile_counts["RETAIL"] / total_tx * 100) if total_tx > 0 else 0, 2),
-            "URGENT_USER": round((profile_counts["URGENT_USER"] / total_tx * 100) if total_tx > 0 else 0, 2),
-            "PRO_TRADER": round((profile_counts["PRO_TRADER"] / total_tx * 100) if total_tx > 0 else 0, 2),
-            "MEV_STYLE": round((profile_counts["MEV_STYLE"] / total_tx * 100) if total_tx > 0 else 0, 2)
-        },
-        "aggregate_profile": aggregate,
-        "statistics": {
-            "avg_priority_fee_microlamports": round(total_priority_fee / total_tx if total_tx > 0 else 0, 2),
-            "total_jito_tips_sol": round(total_jito_tips, 6),
-            "jito_tip_count": jito_tip_count,
-            "jito_tip_percentage": round((jito_tip_count / total_tx * 100) if total_tx > 0 else 0, 2)
-        }
-    }
-
-
-# ═══════════════════════════════════════════════════════════════════════════════
-# PROFILE COMMAND - Single Wallet Analysis
-# ═══════════════════════════════════════════════════════════════════════════════
-
-def analyze_wallet(wallet: str, limit: int = 100) -> tuple:
-    """Fetch and analyze wallet transactions - returns (DataFrame, tx_details_list, tx_details_map, signatures)"""
-    print(f"\n[*] Fetching last {limit} transactions...")
-    
-    signatures = fetch_signatures(wallet, limit)
-    
-    if not signatures:
-        return pd.DataFrame(), [], {}, []
-    
-    print(f"[+] Found {len(signatures)} transactions")
-    print(f"[-] Analyzing details...\n")
-    
-    # Extract signature strings for batch fetching
-    sig_strings = []
-    for si in signatures:
-        if isinstance(si, dict):
-            s = si.get("signature") or si.get("transactionSignature")
-            if s:
-                sig_strings.append(s)
-        elif isinstance(si, str):
-            sig_strings.append(si)
-    
-    # Fetch transactions in parallel (faster and more reliable)
-    print(f"    [*] Fetching {len(sig_strings)} transactions in parallel...")
-    tx_details_map = fetch_transactions_parallel(sig_strings, max_workers=12)
-    
-    # Check if batch fetch worked - if too many failures, warn user
-    valid_results = sum(1 for v in tx_details_map.values() if v is not None)
-    if valid_results < len(sig_strings) * 0.5:
-        print(f"    [!] Warning: Only {valid_results}/{len(sig_strings)} transactions fetched successfully")
-        print(f"    [!] Some data may be incomplete (RPC connection issues)")
-    
-    print()
-    
-    transactions = []
-    tx_details_list = []
-    
-    for idx, sig_info in enumerate(signatures):
-        if not isinstance(sig_info, dict):
-            continue
-        # Reduced progress bar updates for speed (update every 10 transactions)
-        if idx % 10 == 0 or idx == len(signatures) - 1:
-            progress = (idx + 1) / len(signatures)
-            bar_len = 40
-            filled = int(bar_len * progress)
-            bar = '█' * filled + '░' * (bar_len - filled)
-            print(f"\r    [{bar}] {idx + 1}/{len(signatures)}", end="", flush=True)
-        
-        signature = sig_info.get("signature") or sig_info.get("transactionSignature") or ""
-        block_time = sig_info.get("blockTime") or sig_info.get("block_time")
-        
-        if not block_time or not signature:
-            continue
-        
-        tx_details = tx_details_map.get(signature)
-        
-        # Skip if transaction details couldn't be fetched
-        if not tx_details or not isinstance(tx_details, dict):
-            continue
-        
-        compute_units = 0
-        fee = 0
-        instructions = 0
-        
-        if tx_details.get("meta"):
-            compute_units = tx_details["meta"].get("computeUnitsConsumed", 0) or 0
-            fee = tx_details["meta"].get("fee", 0) or 0
-            
-            msg = tx_details.get("transaction", {}).get("message", {})
-            if msg.get("instructions"):
-                instructions = len(msg["instructions"])
-        
-        utc_time = datetime.fromtimestamp(block_time, tz=timezone.utc)
-        
-        transactions.append({
-            "signature": signature,
-            "timestamp": utc_time,
-            "hour": utc_time.hour,
-            "day_of_week": utc_time.weekday(),
-            "day_name": utc_time.strftime("%A"),
-            "compute_units": compute_units,
-            "fee_lamports": fee,
-            "fee_sol": fee / 1e9,
-            "instructions": instructions,
-            "success": sig_info.get("err") is None,
-            "slot": sig_info.get("slot", 0),
-            "block_time": block_time
-        })
-        
-        # Store tx details for reaction speed analysis (only if valid)
-        tx_details_list.append({
-            "timestamp": block_time,
-            "details": tx_details
-        })
-    
-    print(f"\n[+] Analyzed {len(transactions)} transactions\n")
-    
-    return pd.DataFrame(transactions), tx_details_list, tx_details_map, signatures
-
-
-# ═══════════════════════════════════════════════════════════════════════════════
-# OPSEC FAILURES - Deanonymization Surface Mapping
+# REPORTS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-
-def _normalize_account_keys(msg: dict) -> List[str]:
-    """Extract a flat list of account keys from a transaction message."""
-    keys = msg.get("accountKeys", []) if msg else []
-    normalized = []
-    for key in keys:
-        if isinstance(key, dict):
-            normalized.append(key.get("pubkey", ""))
-        else:
-            normalized.append(str(key))
-    return normalized
-
-
-def _is_program_account(account: str) -> bool:
-    """Heuristic to filter out obvious program IDs from counterparty analysis."""
-    if not account or len(account) < 30:
-        return True
-    return account in KNOWN_LABELS or account == "ComputeBudget111111111111111111111111111111"
-
-
-def _detect_memo_usage(instructions: list, accounts: List[str]) -> int:
-    """Count memo occurrences in a transaction."""
-    memo_program = "MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr"
-    count = 0
-    for ix in instructions or []:
-        program_id = None
-        if isinstance(ix, dict):
-            if ix.get("programId"):
-                program_id = ix["programId"]
-            elif ix.get("programIdIndex") is not None and ix["programIdIndex"] < len(accounts):
-                program_id = accounts[ix["programIdIndex"]]
-            parsed = ix.get("parsed", {})
-            if parsed and parsed.get("type") == "memo":
-                count += 1
-        if program_id == memo_program:
-            count += 1
-    return count
-
-
-def analyze_opsec_failures(wallet: str, limit: int = 100, signatures: Optional[List[dict]] = None, tx_details_map: Optional[Dict[str, dict]] = None) -> dict:
-    """
-    Map operational security failures for a wallet.
-
-    Signals:
-    - Reused funding sources (same wallet topping up multiple times)
-    - Reused withdrawal targets (same exit wallet repeatedly used)
-    - Memo usage (human-readable breadcrumbs)
-    - Balance-change deltas to infer counterparties without labels
-    """
-    if signatures is None:
-        signatures = fetch_signatures(wallet, limit)
-    else:
-        signatures = signatures[:limit]
-    
-    if not signatures:
-        return {
-            "wallet": wallet,
-            "total_transactions": 0,
-            "critical_leaks": [],
-            "funding_sources": [],
-            "withdrawal_targets": [],
-            "memo_usage": 0,
-            "exposure_score": 0,
-            "cumulative_exposure": "UNKNOWN",
-            "weakest_link": "No on-chain activity found to analyze."
-        }
-
-    if tx_details_map is None:
-        sig_strings = []
-        for s in signatures:
-            if isinstance(s, dict):
-                x = s.get("signature") or s.get("transactionSignature")
-                if x:
-                    sig_strings.append(x)
-            elif isinstance(s, str):
-                sig_strings.append(s)
-        tx_details_map = fetch_transactions_parallel(sig_strings, max_workers=12) if sig_strings else {}
-
-    funding_counterparties: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "lamports": 0})
-    withdrawal_counterparties: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "lamports": 0})
-    memo_hits = 0
-
-    for sig_info in signatures:
-        if not isinstance(sig_info, dict):
-            continue
-        signature = sig_info.get("signature") or sig_info.get("transactionSignature") or ""
-        if not signature:
-            continue
-        tx_details = tx_details_map.get(signature)
-        if not tx_details or not isinstance(tx_details, dict) or not tx_details.get("meta"):
-            continue
-
-        meta = tx_details["meta"]
-        msg = tx_details.get("transaction", {}).get("message", {})
-        accounts = _normalize_account_keys(msg)
-
-        # Skip if wallet not in account list
-        if wallet not in accounts:
-            continue
-
-        wallet_idx = accounts.index(wallet)
-        pre_balances = meta.get("preBalances", [])
-        post_balances = meta.get("postBalances", [])
-
-        if wallet_idx >= len(pre_balances) or wallet_idx >= len(post_balances):
-            continue
-
-        wallet_delta = (post_balances[wallet_idx] or 0) - (pre_balances[wallet_idx] or 0)
-
-        # Count memo usage
-        memo_hits += _detect_memo_usage(msg.get("instructions", []), accounts)
-
-        # We need a counterparty to attribute the movement to; pick the account with the largest opposite delta
-        deltas = []
-        for idx, acc in enumerate(accounts):
-            if idx >= len(pre_balances) or idx >= len(post_balances):
-                continue
-            if acc == wallet:
-                continue
-            delta = (post_balances[idx] or 0) - (pre_balances[idx] or 0)
-            deltas.append((acc, delta))
-
-        if wallet_delta > 0:
-            # Incoming funds: look for most negative delta as likely funder
-            possible_sources = [d for d in deltas if d[1] < 0 and not _is_program_account(d[0])]
-            if possible_sources:
-                source, amt = sorted(possible_sources, key=lambda x: x[1])[0]
-                funding_counterparties[source]["count"] += 1
-                funding_counterparties[source]["lamports"] += abs(amt)
-        elif wallet_delta < 0:
-            # Outgoing funds: look for most positive delta as likely receiver
-            possible_targets = [d for d in deltas if d[1] > 0 and not _is_program_account(d[0])]
-            if possible_targets:
-                target, amt = sorted(possible_targets, key=lambda x: x[1], reverse=True)[0]
-                withdrawal_counterparties[target]["count"] += 1
-                withdrawal_counterparties[target]["lamports"] += abs(amt)
-
-    def summarize(counter: Dict[str, Dict[str, float]]):
-        summary = []
-        for acc, stats in counter.items():
-            summary.append({
-                "wallet": acc,
-                "label": get_label(acc),
-                "count": int(stats["count"]),
-                "total_sol": float(Decimal(stats["lamports"]) / Decimal(1e9))
-            })
-        return sorted(summary, key=lambda x: (x["count"], x["total_sol"]), reverse=True)
-
-    funding_summary = summarize(funding_counterparties)
-    withdrawal_summary = summarize(withdrawal_counterparties)
-
-    critical_leaks = []
-    exposure_score = 10  # Base for simply being active
-
-    if funding_summary and funding_summary[0]["count"] >= 3:
-        leak = funding_summary[0]
-        critical_leaks.append({
-            "type": "repeat_funding_source",
-            "detail": f"Wallet funded {leak['count']}x by {leak['wallet']} (≈{leak['total_sol']:.3f} SOL)",
-            "deanon_impact": "Strong linkage to a single funding wallet"
-        })
-        exposure_score += 30
-
-    if withdrawal_summary and withdrawal_summary[0]["count"] >= 3:
-        leak = withdrawal_summary[0]
-        critical_leaks.append({
-            "type": "repeat_cashout_target",
-            "detail": f"Wallet frequently pays out to {leak['wallet']} ({leak['count']}x, ≈{leak['total_sol']:.3f} SOL)",
-            "deanon_impact": "Likely owned exit wallet; ties identity"
-        })
-        exposure_score += 30
-
-    if memo_hits > 0:
-        critical_leaks.append({
-            "type": "memo_breadcrumbs",
-            "detail": f"Found {memo_hits} memo instructions attached to transactions",
-            "deanon_impact": "Memos can carry human-readable identifiers"
-        })
-        exposure_score += 15
-
-    # If no critical leaks were found but there is activity, provide a softer note
-    if not critical_leaks and (funding_summary or withdrawal_summary or memo_hits > 0):
-        critical_leaks.append({
-            "type": "low_signal",
-            "detail": "Limited deanonymization signals detected; still review funding/withdrawal patterns.",
-            "deanon_impact": "Monitor reuse of sources/targets and memo usage."
-        })
-
-    # Clamp exposure score
-    exposure_score = min(100, exposure_score)
-    if exposure_score >= 70:
-        cumulative = "HIGH"
-    elif exposure_score >= 40:
-        cumulative = "MEDIUM"
-    else:
-        cumulative = "LOW"
-
-    weakest_link = critical_leaks[0]["detail"] if critical_leaks else "No critical exposure detected."
-
-    return {
-        "wallet": wallet,
-        "total_transactions": len(signatures),
-        "critical_leaks": critical_leaks,
-        "funding_sources": funding_summary[:5],
-        "withdrawal_targets": withdrawal_summary[:5],
-        "memo_usage": memo_hits,
-        "exposure_score": exposure_score,
-        "cumulative_exposure": cumulative,
-        "weakest_link": weakest_link
-    }
-
-
-def analyze_opsec_failures_from_enhanced(wallet: str, enhanced_txs: List[dict]) -> dict:
-    """
-    Opsec signals from Helius Enhanced (nativeTransfers). No memo (enhanced lacks instructions).
-    Same return shape as analyze_opsec_failures for API compatibility.
-    """
-    funding_counterparties: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "lamports": 0})
-    withdrawal_counterparties: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "lamports": 0})
-
-    for tx in enhanced_txs or []:
-        if not isinstance(tx, dict):
-            continue
-        for nt in tx.get("nativeTransfers") or []:
-            if not isinstance(nt, dict):
-                continue
-            fr = nt.get("fromUserAccount") or nt.get("from")
-            to = nt.get("toUserAccount") or nt.get("to")
-            amt_lamports = int(float(nt.get("amount") or 0))
-            if not fr or not to or amt_lamports <= 0:
-                continue
-            if _is_program_account(fr) or _is_program_account(to):
-                continue
-            if to == wallet and fr != wallet:
-                funding_counterparties[fr]["count"] += 1
-                funding_counterparties[fr]["lamports"] += amt_lamports
-            elif fr == wallet and to != wallet:
-                withdrawal_counterparties[to]["count"] += 1
-                withdrawal_counterparties[to]["lamports"] += amt_lamports
-
-    def summarize(counter: Dict[str, Dict[str, float]]):
-        out = []
-        for acc, st in counter.items():
-            out.append({
-                "wallet": acc,
-                "label": get_label(acc),
-                "count": int(st["count"]),
-                "total_sol": float(Decimal(st["lamports"]) / Decimal(1e9))
-            })
-        return sorted(out, key=lambda x: (x["count"], x["total_sol"]), reverse=True)
-
-    funding_summary = summarize(funding_counterparties)
-    withdrawal_summary = summarize(withdrawal_counterparties)
-    memo_hits = 0
-    critical_leaks = []
-    exposure_score = 10
-
-    if funding_summary and funding_summary[0]["count"] >= 3:
-        leak = funding_summary[0]
-        critical_leaks.append({
-            "type": "repeat_funding_source",
-            "detail": f"Wallet funded {leak['count']}x by {leak['wallet']} (≈{leak['total_sol']:.3f} SOL)",
-            "deanon_impact": "Strong linkage to a single funding wallet"
-        })
-        exposure_score += 30
-    if withdrawal_summary and withdrawal_summary[0]["count"] >= 3:
-        leak = withdrawal_summary[0]
-        critical_leaks.append({
-            "type": "repeat_cashout_target",
-            "detail": f"Wallet frequently pays out to {leak['wallet']} ({leak['count']}x, ≈{leak['total_sol']:.3f} SOL)",
-            "deanon_impact": "Likely owned exit wallet; ties identity"
-        })
-        exposure_score += 30
-    if not critical_leaks and (funding_summary or withdrawal_summary):
-        critical_leaks.append({
-            "type": "low_signal",
-            "detail": "Limited deanonymization signals detected; still review funding/withdrawal patterns.",
-            "deanon_impact": "Monitor reuse of sources/targets and memo usage."
-        })
-
-    exposure_score = min(100, exposure_score)
-    cumulative = "HIGH" if exposure_score >= 70 else "MEDIUM" if exposure_score >= 40 else "LOW"
-    weakest = critical_leaks[0]["detail"] if critical_leaks else "No critical exposure detected."
-
-    return {
-        "wallet": wallet,
-        "total_transactions": len(enhanced_txs) if enhanced_txs else 0,
-        "critical_leaks": critical_leaks,
-        "funding_sources": funding_summary[:5],
-        "withdrawal_targets": withdrawal_summary[:5],
-        "memo_usage": memo_hits,
-        "exposure_score": exposure_score,
-        "cumulative_exposure": cumulative,
-        "weakest_link": weakest
-    }
-
-
-def detect_sleep_window(hourly_counts: list) -> SleepWindow:
-    min_sum = float('inf')
-    sleep_start = 0
-    total_tx = sum(hourly_counts)
-    
-    for i in range(24):
-        window_sum = sum(hourly_counts[(i + j) % 24] for j in range(6))
-        if window_sum < min_sum:
-            min_sum = window_sum
-            sleep_start = i
-    
-    sleep_ratio = min_sum / total_tx if total_tx > 0 else 0
-    confidence = max(0, min(100, (1 - sleep_ratio * 4) * 100))
-    
-    return SleepWindow(
-        start_hour=sleep_start,
-        end_hour=(sleep_start + 6) % 24,
-        activity_during_sleep=min_sum,
-        confidence=confidence
-    )
-
-
-def analyze_reaction_speed(wallet: str, tx_details_list: list) -> ReactionSpeedAnalysis:
-    """
-    Analyze reaction speed between token receives and subsequent actions.
-    Bot Detection Logic: Humans take time to think (>30s), Bots react instantly (<5s)
-    """
-    print(f"\n[*] Analyzing reaction speed for bot detection...")
-    
-    if not tx_details_list or not isinstance(tx_details_list, list):
-        return ReactionSpeedAnalysis()
-    
-    # Filter to only dict items with required fields
-    valid_txs = []
-    for tx in tx_details_list:
-        if isinstance(tx, dict) and "timestamp" in tx and "details" in tx:
-            valid_txs.append(tx)
-    
-    if len(valid_txs) < 2:
-        return ReactionSpeedAnalysis()
-    
-    # Sort by timestamp (oldest first)
-    transactions = sorted(valid_txs, key=lambda x: x.get("timestamp", 0))
-    
-    reaction_times = []
-    instant_count = 0
-    fast_count = 0
-    human_count = 0
-    
-    total_pairs = len(transactions) - 1
-    
-    # Analyze consecutive transactions for reaction patterns
-    for i in range(total_pairs):
-        # Show progress
-        if i % 10 == 0 or i == total_pairs - 1:
-            progress = (i + 1) / total_pairs
-            bar_len = 30
-            filled = int(bar_len * progress)
-            bar = '█' * filled + '░' * (bar_len - filled)
-            print(f"\r    [{bar}] {i + 1}/{total_pairs} pairs", end="", flush=True)
-        
-        current_tx = transactions[i]
-        next_tx = transactions[i + 1]
-        
-        if not isinstance(current_tx, dict) or not isinstance(next_tx, dict):
-            continue
-        
-        # Calculate time delta in seconds
-        current_ts = current_tx.get("timestamp", 0)
-        next_ts = next_tx.get("timestamp", 0)
-        if not current_ts or not next_ts:
-            continue
-        time_delta = next_ts - current_ts
-        
-        # Check if current transaction involves receiving tokens
-        # and next transaction involves sending/swapping
-        current_details = current_tx.get("details")
-        next_details = next_tx.get("details")
-        if not current_details or not next_details:
-            continue
-        if not isinstance(current_details, dict) or not isinstance(next_details, dict):
-            continue
-        current_has_receive = has_token_receive(current_details, wallet)
-        next_has_action = has_token_action(next_details, wallet)
-        
-        # If pattern detected: receive -> action
-        if current_has_receive and next_has_action and time_delta <= 300:  # Within 5 minutes
-            reaction_times.append(time_delta)
-            
-            if time_delta < 5:
-                instant_count += 1
-            elif time_delta < 30:
-                fast_count += 1
-            else:
-                human_count += 1
-    
-    print()  # New line after progress bar
-    
-    # Calculate metrics
-    total_reactions = len(reaction_times)
-    
-    if total_reactions == 0:
-        return ReactionSpeedAnalysis()
-    
-    avg_reaction = sum(reaction_times) / total_reactions
-    median_reaction = sorted(reaction_times)[total_reactions // 2] if total_reactions > 0 else 0
-    fastest_reaction = min(reaction_times) if reaction_times else 0
-    
-    # Bot confidence calculation
-    instant_ratio = instant_count / total_reactions
-    fast_ratio = fast_count / total_reactions
-    human_ratio = human_count / total_reactions
-    
-    # High confidence bot if mostly instant reactions
-    if instant_ratio > 0.7:
-        bot_confidence = 95.0
-    elif instant_ratio > 0.5:
-        bot_confidence = 85.0
-    elif instant_ratio + fast_ratio > 0.7:
-        bot_confidence = 70.0
-    elif avg_reaction < 10:
-        bot_confidence = 60.0
-    elif avg_reaction < 30:
-        bot_confidence = 40.0
-    else:
-        bot_confidence = max(0, 30 - (human_ratio * 40))
-    
-    print(f"[+] Analyzed {total_reactions} reaction patterns")
-    
-    return ReactionSpeedAnalysis(
-        bot_confidence=bot_confidence,
-        avg_reaction_time=avg_reaction,
-        median_reaction_time=median_reaction,
-        fastest_reaction=fastest_reaction,
-        instant_reactions=instant_count,
-        fast_reactions=fast_count,
-        human_reactions=human_count,
-        total_reaction_pairs=total_reactions
-    )
-
-
-def _is_enhanced_tx(tx: dict) -> bool:
-    """Helius Enhanced format has nativeTransfers/tokenTransfers, not meta."""
-    if not isinstance(tx, dict):
-        return False
-    return bool(tx.get("nativeTransfers") is not None or tx.get("tokenTransfers") is not None) and not tx.get("meta")
-
-
-def has_token_receive(tx_details: dict, wallet: str) -> bool:
-    """Check if transaction involves receiving tokens. Supports RPC meta and Helius enhanced."""
-    if not tx_details or not isinstance(tx_details, dict):
-        return False
-    # Helius enhanced: tokenTransfers/nativeTransfers
-    if _is_enhanced_tx(tx_details):
-        try:
-            for tt in tx_details.get("tokenTransfers") or []:
-                if not isinstance(tt, dict):
-                    continue
-                if (tt.get("toUserAccount") or tt.get("to")) == wallet:
-                    amt = float(tt.get("tokenAmount") or tt.get("amount") or 0)
-                    if amt > 0:
-                        return True
-            for nt in tx_details.get("nativeTransfers") or []:
-                if not isinstance(nt, dict):
-                    continue
-                if (nt.get("toUserAccount") or nt.get("to")) == wallet:
-                    amt = float(nt.get("amount") or 0)
-                    if amt > 0:
-                        return True
-        except Exception:
-            pass
-        return False
-    if not tx_details.get("meta"):
-        return False
-    try:
-        # Check post token balances - if balance increased, tokens were received
-        post_balances = tx_details["meta"].get("postTokenBalances", [])
-        pre_balances = tx_details["meta"].get("preTokenBalances", [])
-        
-        # Create a map of pre-balances
-        pre_balance_map = {}
-        for balance in pre_balances:
-            owner = balance.get("owner")
-            if owner == wallet:
-                mint = balance.get("mint", "")
-                amount = float(balance.get("uiTokenAmount", {}).get("uiAmount", 0))
-                pre_balance_map[mint] = amount
-        
-        # Check if any post-balance increased
-        for balance in post_balances:
-            owner = balance.get("owner")
-            if owner == wallet:
-                mint = balance.get("mint", "")
-                post_amount = float(balance.get("uiTokenAmount", {}).get("uiAmount", 0))
-                pre_amount = pre_balance_map.get(mint, 0)
-                
-                if post_amount > pre_amount:
-                    return True
-        
-        # Also check SOL balance increase
-        account_keys = tx_details.get("transaction", {}).get("message", {}).get("accountKeys", [])
-        pre_sol = tx_details["meta"].get("preBalances", [])
-        post_sol = tx_details["meta"].get("postBalances", [])
-        
-        for idx, key in enumerate(account_keys):
-            addr = key.get("pubkey", "") if isinstance(key, dict) else str(key)
-            if addr == wallet and idx < len(pre_sol) and idx < len(post_sol):
-                if post_sol[idx] > pre_sol[idx]:
-                    return True
-        
-    except Exception:
-        pass
-    
-    return False
-
-
-def has_token_action(tx_details: dict, wallet: str) -> bool:
-    """Check if transaction involves sending/swapping tokens. Supports RPC meta and Helius enhanced."""
-    if not tx_details or not isinstance(tx_details, dict):
-        return False
-    # Helius enhanced: feePayer + tokenTransfers/nativeTransfers
-    if _is_enhanced_tx(tx_details):
-        try:
-            if (tx_details.get("feePayer") or tx_details.get("fee_payer")) != wallet:
-                return False
-            for tt in tx_details.get("tokenTransfers") or []:
-                if not isinstance(tt, dict):
-                    continue
-                if (tt.get("fromUserAccount") or tt.get("from")) == wallet:
-                    return True
-            for nt in tx_details.get("nativeTransfers") or []:
-                if not isinstance(nt, dict):
-                    continue
-                fr = nt.get("fromUserAccount") or nt.get("from")
-                to = nt.get("toUserAccount") or nt.get("to")
-                if fr == wallet and to != wallet and float(nt.get("amount") or 0) > 0:
-                    return True
-        except Exception:
-            pass
-        return False
-    if not tx_details.get("meta"):
-        return False
-    try:
-        # Check if wallet initiated the transaction (is signer)
-        account_keys = tx_details.get("transaction", {}).get("message", {}).get("accountKeys", [])
-        
-        for key in account_keys:
-            addr = key.get("pubkey", "") if isinstance(key, dict) else str(key)
-            is_signer = key.get("signer", False) if isinstance(key, dict) else False
-            
-            if addr == wallet and is_signer:
-                # Check if tokens were sent (balance decreased)
-                post_balances = tx_details["meta"].get("postTokenBalances", [])
-                pre_balances = tx_details["meta"].get("preTokenBalances", [])
-                
-                # Create a map of pre-balances
-                pre_balance_map = {}
-                for balance in pre_balances:
-                    owner = balance.get("owner")
-                    if owner == wallet:
-                        mint = balance.get("mint", "")
-                        amount = float(balance.get("uiTokenAmount", {}).get("uiAmount", 0))
-                        pre_balance_map[mint] = amount
-                
-                # Check if any balance decreased
-                for balance in post_balances:
-                    owner = balance.get("owner")
-                    if owner == wallet:
-                        mint = balance.get("mint", "")
-                        post_amount = float(balance.get("uiTokenAmount", {}).get("uiAmount", 0))
-                        pre_amount = pre_balance_map.get(mint, 0)
-                        
-                        if post_amount < pre_amount:
-                            return True
-                
-                # Also check SOL balance decrease (excluding fees)
-                pre_sol = tx_details["meta"].get("preBalances", [])
-                post_sol = tx_details["meta"].get("postBalances", [])
-                fee = tx_details["meta"].get("fee", 0)
-                
-                for idx, key2 in enumerate(account_keys):
-                    addr2 = key2.get("pubkey", "") if isinstance(key2, dict) else str(key2)
-                    if addr2 == wallet and idx < len(pre_sol) and idx < len(post_sol):
-                        balance_decrease = pre_sol[idx] - post_sol[idx]
-                        # If decrease is more than just the fee, tokens were sent
-                        if balance_decrease > fee * 1.5:  # 1.5x buffer
-                            return True
-                
-                return True  # Is signer, so some action was taken
-        
-    except Exception:
-        pass
-    
-    return False
-
-
-def calculate_probabilities(df: pd.DataFrame, hourly_counts: list, daily_counts: list, sleep: SleepWindow) -> ProfileProbabilities:
-    probs = ProfileProbabilities()
-    total_tx = len(df)
-    
-    if total_tx == 0:
-        return probs
-    
-    # Bot detection
-    hourly_std = np.std(hourly_counts)
-    hourly_range = max(hourly_counts) - min(hourly_counts)
-    
-    if hourly_range < 3 or hourly_std < 1.5:
-        probs.bot = 95.0
-    elif hourly_range < 5:
-        probs.bot = 70.0
-    elif sleep.activity_during_sleep > total_tx * 0.2:
-        probs.bot = 60.0
-    elif sleep.confidence < 50:
-        probs.bot = 40.0
-    else:
-        probs.bot = max(0, 30 - sleep.confidence * 0.3)
-    
-    # Geographic inference
-    s = sleep.start_hour
-    
-    if 20 <= s or s <= 2:
-        probs.eu_trader = 80 + (10 if s in [22, 23, 0] else 0)
-    elif 18 <= s <= 19 or 3 <= s <= 4:
-        probs.eu_trader = 40
-    else:
-        probs.eu_trader = 10
-    
-    if 3 <= s <= 8:
-        probs.us_trader = 80 + (10 if s in [5, 6, 7] else 0)
-    elif 9 <= s <= 10 or 1 <= s <= 2:
-        probs.us_trader = 40
-    else:
-        probs.us_trader = 10
-    
-    if 12 <= s <= 18:
-        probs.asia_trader = 80 + (10 if s in [14, 15, 16] else 0)
-    elif 10 <= s <= 11 or 19 <= s <= 20:
-        probs.asia_trader = 40
-    else:
-        probs.asia_trader = 10
-    
-    # Occupation inference
-    weekend_tx = daily_counts[5] + daily_counts[6]
-    weekday_tx = sum(daily_counts[:5])
-    
-    if weekday_tx > 0:
-        weekend_ratio = (weekend_tx / 2) / (weekday_tx / 5)
-    else:
-        weekend_ratio = 2.0 if weekend_tx > 0 else 1.0
-    
-    if weekend_ratio > 2.0:
-        probs.retail_hobbyist = 90
-        probs.professional = 10
-    elif weekend_ratio > 1.3:
-        probs.retail_hobbyist = 70
-        probs.professional = 30
-    elif weekend_ratio < 0.3:
-        probs.retail_hobbyist = 10
-        probs.professional = 90
-    elif weekend_ratio < 0.6:
-        probs.retail_hobbyist = 30
-        probs.professional = 70
-    else:
-        probs.retail_hobbyist = 50
-        probs.professional = 50
-    
-    # Whale detection
-    avg_cu = df["compute_units"].mean()
-    avg_fee = df["fee_sol"].mean()
-    
-    if avg_cu > 300000 or avg_fee > 0.01:
-        probs.whale = 85
-    elif avg_cu > 200000 or avg_fee > 0.005:
-        probs.whale = 60
-    elif avg_cu > 100000:
-        probs.whale = 30
-    else:
-        probs.whale = 10
-    
-    # Degen detection
-    fail_rate = (~df["success"]).sum() / total_tx
-    high_cu_ratio = (df["compute_units"] > 200000).sum() / total_tx
-    
-    if fail_rate > 0.3 or high_cu_ratio > 0.5:
-        probs.degen = 85
-    elif fail_rate > 0.15 or high_cu_ratio > 0.3:
-        probs.degen = 60
-    elif fail_rate > 0.08:
-        probs.degen = 40
-    else:
-        probs.degen = 15
-    
-    probs.normalize()
-    return probs
-
-
-def get_complexity_color(cu: int) -> str:
-    if cu < 50000:
-        return '#22c55e'
-    elif cu < 150000:
-        return '#eab308'
-    elif cu < 300000:
-        return '#f97316'
-    else:
-        return '#ef4444'
-
-
-def get_complexity_label(cu: float) -> str:
-    if cu < 50000:
-        return 'Simple'
-    elif cu < 150000:
-        return 'Moderate'
-    elif cu < 300000:
-        return 'Complex'
-    else:
-        return 'Heavy'
-
-
-def visualize_profile(df: pd.DataFrame, wallet: str, probs: ProfileProbabilities, sleep: SleepWindow, reaction: ReactionSpeedAnalysis):
-    """Generate profile visualization"""
-    
-    hourly_counts = [0] * 24
-    daily_counts = [0] * 7
-    
-    for _, row in df.iterrows():
-        hourly_counts[row["hour"]] += 1
-        daily_counts[row["day_of_week"]] += 1
-    
-    peak_hour = hourly_counts.index(max(hourly_counts))
-    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    
-    weekend_tx = daily_counts[5] + daily_counts[6]
-    weekday_tx = sum(daily_counts[:5])
-    weekend_ratio = (weekend_tx / 2) / (weekday_tx / 5) if weekday_tx > 0 else 0
-    
-    panic_count = 0
-    for _, row in df.iterrows():
-        in_sleep = (sleep.start_hour <= row["hour"] < sleep.start_hour + 6) or \
-                   (sleep.start_hour + 6 > 24 and row["hour"] < (sleep.start_hour + 6) % 24)
-        if in_sleep and row["compute_units"] > 200000:
-            panic_count += 1
-    
-    plt.style.use('dark_background')
-    fig = plt.figure(figsize=(16, 16))  # Increased height for reaction speed panel
-    
-    bg_color = '#0a0a0a'
-    panel_color = '#111111'
-    grid_color = '#1f2937'
-    text_color = '#9ca3af'
-    accent_cyan = '#06b6d4'
-    accent_yellow = '#eab308'
-    accent_orange = '#f97316'
-    accent_green = '#22c55e'
-    accent_red = '#ef4444'
-    accent_purple = '#a855f7'
-    
-    fig.patch.set_facecolor(bg_color)
-    fig.suptitle(f"LEAKLENS EXPOSURE - {wallet[:12]}...{wallet[-6:]}", 
-                 fontsize=16, color=accent_green, fontweight='bold', y=0.98)
-    
-    # Panel 1: Profile probabilities
-    ax0 = fig.add_subplot(5, 2, (1, 2))  # Changed to 5x2 grid
-    ax0.set_facecolor(panel_color)
-    
-    categories = ['Bot (Automated)', 'Europe/Africa', 'Americas', 'Asia/Pacific',
-                  'Retail/Hobbyist', 'Professional', 'Whale', 'Degen/High-Risk']
-    values = [probs.bot, probs.eu_trader, probs.us_trader, probs.asia_trader,
-              probs.retail_hobbyist, probs.professional, probs.whale, probs.degen]
-    colors = [accent_purple, accent_cyan, accent_cyan, accent_cyan,
-              accent_yellow, accent_yellow, accent_green, accent_red]
-    
-    bars = ax0.barh(categories, values, color=colors, alpha=0.7, edgecolor='white', linewidth=0.5)
-    
-    for bar, val in zip(bars, values):
-        ax0.text(val + 1, bar.get_y() + bar.get_height()/2, f'{val:.1f}%',
-                 va='center', ha='left', color='white', fontsize=9)
-    
-    ax0.set_xlim(0, 110)
-    ax0.set_title("PROFILE PROBABILITY ANALYSIS", color=accent_purple, fontsize=12, fontweight='bold', loc='left')
-    ax0.set_xlabel("Probability (%)", color=text_color)
-    ax0.tick_params(colors=text_color)
-    ax0.grid(True, alpha=0.2, color=grid_color, axis='x')
-    ax0.invert_yaxis()
-    
-    # Panel 2: Circadian rhythm
-    ax1 = fig.add_subplot(5, 2, 3)
-    ax1.set_facecolor(panel_color)
-    
-    bar_colors = []
-    for i in range(24):
-        in_sleep = (sleep.start_hour <= i < sleep.start_hour + 6) or \
-                   (sleep.start_hour + 6 > 24 and i < (sleep.start_hour + 6) % 24)
-        if i == peak_hour:
-            bar_colors.append(accent_green)
-        elif in_sleep:
-            bar_colors.append(accent_red)
-        else:
-            bar_colors.append(accent_cyan)
-    
-    ax1.bar(range(24), hourly_counts, color=bar_colors, alpha=0.7, edgecolor='white', linewidth=0.3)
-    
-    if sleep.start_hour + 6 <= 24:
-        ax1.axvspan(sleep.start_hour - 0.5, sleep.start_hour + 5.5, alpha=0.15, color='red')
-    else:
-        ax1.axvspan(sleep.start_hour - 0.5, 23.5, alpha=0.15, color='red')
-        ax1.axvspan(-0.5, (sleep.start_hour + 6) % 24 - 0.5, alpha=0.15, color='red')
-    
-    ax1.set_title("CIRCADIAN RHYTHM", color=accent_cyan, fontsize=11, fontweight='bold', loc='left')
-    ax1.set_xlabel("Hour (UTC)", color=text_color)
-    ax1.set_ylabel("Transactions", color=text_color)
-    ax1.set_xticks(range(0, 24, 2))
-    ax1.tick_params(colors=text_color)
-    ax1.grid(True, alpha=0.2, color=grid_color, axis='y')
-    
-    sleep_patch = mpatches.Patch(color=accent_red, alpha=0.5, label=f'Sleep ({sleep.start_hour}:00-{sleep.end_hour}:00 UTC)')
-    peak_patch = mpatches.Patch(color=accent_green, label=f'Peak ({peak_hour}:00 UTC)')
-    ax1.legend(handles=[sleep_patch, peak_patch], loc='upper right', facecolor=panel_color,
-               edgecolor=grid_color, fontsize=8)
-    
-    # Panel 3: Geographic pie
-    ax2 = fig.add_subplot(5, 2, 4)
-    ax2.set_facecolor(panel_color)
-    
-    geo_labels = ['Europe/Africa', 'Americas', 'Asia/Pacific']
-    geo_values = [probs.eu_trader, probs.us_trader, probs.asia_trader]
-    geo_colors = ['#3b82f6', '#ef4444', '#22c55e']
-    
-    ax2.pie(geo_values, labels=geo_labels, autopct='%1.1f%%', colors=geo_colors, startangle=90,
-            wedgeprops={'edgecolor': 'white', 'linewidth': 1}, textprops={'color': 'white', 'fontsize': 9})
-    ax2.set_title("GEOGRAPHIC PROBABILITY", color=accent_cyan, fontsize=11, fontweight='bold')
-    
-    # Panel 4: Weekly routine
-    ax3 = fig.add_subplot(5, 2, 5)
-    ax3.set_facecolor(panel_color)
-    
-    day_colors = [accent_cyan if i < 5 else accent_yellow for i in range(7)]
-    ax3.bar(days, daily_counts, color=day_colors, alpha=0.7, edgecolor='white', linewidth=0.5)
-    
-    ax3.set_title("WEEKLY ROUTINE", color=accent_yellow, fontsize=11, fontweight='bold', loc='left')
-    ax3.set_xlabel("Day of Week", color=text_color)
-    ax3.set_ylabel("Transactions", color=text_color)
-    ax3.tick_params(colors=text_color)
-    ax3.grid(True, alpha=0.2, color=grid_color, axis='y')
-    
-    occ_text = f"Weekend Ratio: {weekend_ratio:.2f}x\n"
-    occ_text += f"→ {probs.retail_hobbyist:.0f}% Retail" if probs.retail_hobbyist > probs.professional else f"→ {probs.professional:.0f}% Professional"
-    ax3.text(0.98, 0.95, occ_text, transform=ax3.transAxes, ha='right', va='top', color=accent_yellow, fontsize=9,
-             bbox=dict(boxstyle='round', facecolor=panel_color, edgecolor=accent_yellow, alpha=0.8))
-    
-    # Panel 5: Occupation pie
-    ax4 = fig.add_subplot(5, 2, 6)
-    ax4.set_facecolor(panel_color)
-    
-    ax4.pie([probs.retail_hobbyist, probs.professional], labels=['Retail/Hobbyist', 'Professional'],
-            autopct='%1.1f%%', colors=[accent_yellow, accent_cyan], startangle=90,
-            wedgeprops={'edgecolor': 'white', 'linewidth': 1}, textprops={'color': 'white', 'fontsize': 10})
-    ax4.set_title("OCCUPATION PROBABILITY", color=accent_yellow, fontsize=11, fontweight='bold')
-    
-    # Panel 6: Complexity scatter
-    ax5 = fig.add_subplot(5, 2, 7)
-    ax5.set_facecolor(panel_color)
-    
-    colors = [get_complexity_color(cu) for cu in df["compute_units"]]
-    sizes = []
-    for _, row in df.iterrows():
-        in_sleep = (sleep.start_hour <= row["hour"] < sleep.start_hour + 6) or \
-                   (sleep.start_hour + 6 > 24 and row["hour"] < (sleep.start_hour + 6) % 24)
-        sizes.append(120 if in_sleep and row["compute_units"] > 200000 else 40)
-    
-    ax5.scatter(df["hour"] + np.random.uniform(-0.3, 0.3, len(df)), df["compute_units"],
-                c=colors, s=sizes, alpha=0.7, edgecolors='white', linewidths=0.3)
-    
-    if sleep.start_hour + 6 <= 24:
-        ax5.axvspan(sleep.start_hour - 0.5, sleep.start_hour + 5.5, alpha=0.1, color='red')
-    else:
-        ax5.axvspan(sleep.start_hour - 0.5, 23.5, alpha=0.1, color='red')
-        ax5.axvspan(-0.5, (sleep.start_hour + 6) % 24 - 0.5, alpha=0.1, color='red')
-    
-    ax5.set_title("BEHAVIORAL COMPLEXITY", color=accent_orange, fontsize=11, fontweight='bold', loc='left')
-    ax5.set_xlabel("Hour (UTC)", color=text_color)
-    ax5.set_ylabel("Compute Units", color=text_color)
-    ax5.set_xticks(range(0, 24, 2))
-    ax5.set_xlim(-0.5, 23.5)
-    ax5.tick_params(colors=text_color)
-    ax5.grid(True, alpha=0.2, color=grid_color)
-    
-    legend_elements = [
-        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#22c55e', markersize=8, label='Simple (<50K)', linestyle='None'),
-        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#eab308', markersize=8, label='Moderate', linestyle='None'),
-        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#f97316', markersize=8, label='Complex', linestyle='None'),
-        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='#ef4444', markersize=8, label='Heavy (>300K)', linestyle='None'),
-    ]
-    ax5.legend(handles=legend_elements, loc='upper right', facecolor=panel_color, edgecolor=grid_color, fontsize=7, ncol=2)
-    
-    # Panel 7: Risk profile
-    ax6 = fig.add_subplot(5, 2, 8)
-    ax6.set_facecolor(panel_color)
-    
-    risk_labels = ['Whale\n(High Value)', 'Degen\n(High Risk)', 'Bot\n(Automated)']
-    risk_values = [probs.whale, probs.degen, probs.bot]
-    risk_colors = [accent_green, accent_red, accent_purple]
-    
-    bars = ax6.bar(risk_labels, risk_values, color=risk_colors, alpha=0.7, edgecolor='white', linewidth=0.5)
-    
-    for bar, val in zip(bars, risk_values):
-        ax6.text(bar.get_x() + bar.get_width()/2, val + 2, f'{val:.1f}%',
-                 ha='center', va='bottom', color='white', fontsize=10, fontweight='bold')
-    
-    ax6.set_title("RISK PROFILE", color=accent_red, fontsize=11, fontweight='bold', loc='left')
-    ax6.set_ylabel("Probability (%)", color=text_color)
-    ax6.set_ylim(0, 110)
-    ax6.tick_params(colors=text_color)
-    ax6.grid(True, alpha=0.2, color=grid_color, axis='y')
-    
-    # Panel 8: Reaction Speed Analysis (NEW)
-    ax7 = fig.add_subplot(5, 2, (9, 10))  # Spans both columns in row 5
-    ax7.set_facecolor(panel_color)
-    
-    if reaction.total_reaction_pairs > 0:
-        # Create data for visualization
-        categories = ['Instant\n(<5s)', 'Fast\n(5-30s)', 'Human\n(>30s)']
-        counts = [reaction.instant_reactions, reaction.fast_reactions, reaction.human_reactions]
-        colors_reaction = [accent_red, accent_orange, accent_green]
-        
-        # Bar chart of reaction categories
-        bars = ax7.bar(categories, counts, color=colors_reaction, alpha=0.7, edgecolor='white', linewidth=1)
-        
-        # Add counts on bars with better spacing
-        max_count = max(counts) if counts else 1
-        for bar, count in zip(bars, counts):
-            if count > 0:
-                percentage = (count / reaction.total_reaction_pairs) * 100
-                # Position text higher with more padding
-                text_y = bar.get_height() + max_count * 0.05
-                ax7.text(bar.get_x() + bar.get_width()/2, text_y,
-                        f'{count}\n({percentage:.1f}%)', ha='center', va='bottom', 
-                        color='white', fontsize=9, fontweight='bold')
-        
-        # Add metrics text box with smaller font
-        metrics_text = f"Bot: {reaction.bot_confidence:.1f}%\n"
-        metrics_text += f"Avg: {reaction.avg_reaction_time:.1f}s\n"
-        metrics_text += f"Med: {reaction.median_reaction_time:.1f}s\n"
-        metrics_text += f"Min: {reaction.fastest_reaction:.1f}s"
-        
-        # Color code the text box based on bot confidence
-        if reaction.bot_confidence > 70:
-            box_color = accent_red
-            verdict = "⚠️  HIGH BOT"
-        elif reaction.bot_confidence < 30:
-            box_color = accent_green
-            verdict = "✓ HUMAN-LIKE"
-        else:
-            box_color = accent_orange
-            verdict = "⚡ MIXED"
-        
-        ax7.text(0.98, 0.98, f"{verdict}\n{metrics_text}", transform=ax7.transAxes, 
-                ha='right', va='top', color='white', fontsize=8,
-                bbox=dict(boxstyle='round', facecolor=panel_color, edgecolor=box_color, 
-                         linewidth=2, alpha=0.9, pad=0.5))
-        
-        ax7.set_title("REACTION SPEED ANALYSIS", 
-                     color=accent_purple, fontsize=11, fontweight='bold', loc='left', pad=8)
-        ax7.set_ylabel("Count", color=text_color, fontsize=9)
-        # Increase ylim padding for text above bars
-        ax7.set_ylim(0, max_count * 1.35 if max_count > 0 else 10)
-        ax7.tick_params(colors=text_color, labelsize=8, axis='y')
-        ax7.tick_params(colors=text_color, labelsize=9, axis='x')
-        ax7.grid(True, alpha=0.2, color=grid_color, axis='y')
-        
-    else:
-        # No reaction data available
-        ax7.text(0.5, 0.5, "No Reaction Patterns Detected\n\n(Requires consecutive token receive→action sequences)", 
-                transform=ax7.transAxes, ha='center', va='center', 
-                color=text_color, fontsize=11, style='italic')
-        ax7.set_title("REACTION SPEED ANALYSIS", color=accent_purple, 
-                     fontsize=12, fontweight='bold', loc='left')
-        ax7.set_xticks([])
-        ax7.set_yticks([])
-    
-    plt.tight_layout(rect=[0, 0, 1, 0.98], h_pad=1.5, w_pad=1.0)
-    
-    return fig
-
-
-def print_profile_report(df: pd.DataFrame, wallet: str, probs: ProfileProbabilities, sleep: SleepWindow, reaction: ReactionSpeedAnalysis):
+def print_profile_report(df: pd.DataFrame, wallet: str, probs: ProfileProbabilities, sleep: SleepWindow, reaction: ReactionSpeedAnalysis,
+                         hist: Optional[ActivityHistograms] = None):
     """Print profile intelligence report"""
+    if hist is None:
+        hist = activity_histograms(df)
     
-    total_tx = len(df)
-    avg_cu = df["compute_units"].mean()
-    fail_rate = (~df["success"]).sum() / total_tx * 100
+    total_tx = hist.total
+    avg_cu = hist.avg_compute_units
+    fail_rate = hist.fail_rate * 100
     
-    daily_counts = [0] * 7
-    for _, row in df.iterrows():
-        daily_counts[row["day_of_week"]] += 1
+    daily_counts = hist.daily
     weekend_tx = daily_counts[5] + daily_counts[6]
     weekday_tx = sum(daily_counts[:5])
     weekend_ratio = (weekend_tx / 2) / (weekday_tx / 5) if weekday_tx > 0 else 0
@@ -1723,6 +139,9 @@ def print_profile_report(df: pd.DataFrame, wallet: str, probs: ProfileProbabilit
         print(f" ├─ Instant (<5s):      {reaction.instant_reactions} ({reaction.instant_reactions/reaction.total_reaction_pairs*100:.1f}%)")
         print(f" ├─ Fast (5-30s):       {reaction.fast_reactions} ({reaction.fast_reactions/reaction.total_reaction_pairs*100:.1f}%)")
         print(f" ├─ Human (>30s):       {reaction.human_reactions} ({reaction.human_reactions/reaction.total_reaction_pairs*100:.1f}%)")
+        pct = reaction.distribution.get("percentiles", {})
+        if pct:
+            print(f" ├─ p10 / p50 / p90:    {pct['p10']:.2f}s / {pct['p50']:.2f}s / {pct['p90']:.2f}s")
         print(f" └─ Bot Confidence:     {reaction.bot_confidence:.1f}%")
         
         if reaction.bot_confidence > 70:
@@ -1736,131 +155,6 @@ def print_profile_report(df: pd.DataFrame, wallet: str, probs: ProfileProbabilit
     print("═" * 70 + "\n")
 
 
-# ═══════════════════════════════════════════════════════════════════════════════
-# CONNECT COMMAND - Find Connections Between Wallets
-# ═══════════════════════════════════════════════════════════════════════════════
-
-def extract_accounts_from_tx(tx_details: dict) -> Set[str]:
-    """Extract all account addresses involved in a transaction"""
-    accounts = set()
-    
-    if not tx_details:
-        return accounts
-    
-    try:
-        # Get account keys from message
-        msg = tx_details.get("transaction", {}).get("message", {})
-        account_keys = msg.get("accountKeys", [])
-        
-        for key in account_keys:
-            if isinstance(key, dict):
-                accounts.add(key.get("pubkey", ""))
-            else:
-                accounts.add(str(key))
-        
-        # Also check instructions for program IDs
-        for ix in msg.get("instructions", []):
-            if isinstance(ix, dict):
-                if "programId" in ix:
-                    accounts.add(ix["programId"])
-                if "accounts" in ix:
-                    accounts.update(ix["accounts"])
-    except:
-        pass
-    
-    # Remove empty strings and system programs
-    accounts.discard("")
-    accounts.discard("11111111111111111111111111111111")
-    accounts.discard("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
-    
-    return accounts
-
-
-def find_connections(wallets: List[str], limit: int = 100) -> Dict[Tuple[str, str], WalletConnection]:
-    """Find connections between multiple wallets"""
-    
-    print(f"\n[*] Analyzing connections between {len(wallets)} wallets...")
-    
-    # Collect all transactions for each wallet
-    wallet_txs: Dict[str, List[dict]] = {}
-    wallet_accounts: Dict[str, Dict[str, Set[str]]] = {}  # wallet -> {signature -> accounts}
-    
-    for wallet in wallets:
-        print(f"\n[-] Fetching transactions for {get_label(wallet)}...")
-        signatures = fetch_signatures(wallet, limit)
-        
-        wallet_txs[wallet] = []
-        wallet_accounts[wallet] = {}
-        
-        # Fetch all transactions in parallel (MUCH FASTER!)
-        sig_strings = [sig_info["signature"] for sig_info in signatures]
-        tx_details_map = fetch_transactions_parallel(sig_strings, max_workers=12)
-        
-        for idx, sig_info in enumerate(signatures):
-            progress = (idx + 1) / len(signatures)
-            bar_len = 30
-            filled = int(bar_len * progress)
-            bar = '█' * filled + '░' * (bar_len - filled)
-            print(f"\r    [{bar}] {idx + 1}/{len(signatures)}", end="", flush=True)
-            
-            signature = sig_info["signature"]
-            tx_details = tx_details_map.get(signature)
-            
-            if tx_details:
-                wallet_txs[wallet].append({
-                    "signature": signature,
-                    "block_time": sig_info.get("blockTime"),
-                    "details": tx_details
-                })
-                wallet_accounts[wallet][signature] = extract_accounts_from_tx(tx_details)
-        
-        print()
-    
-    # Find connections
-    connections: Dict[Tuple[str, str], WalletConnection] = {}
-    
-    print("\n[*] Analyzing connections...")
-    
-    for i, wallet_a in enumerate(wallets):
-        for wallet_b in wallets[i+1:]:
-            # Check for direct transactions
-            conn = WalletConnection(wallet_a=wallet_a, wallet_b=wallet_b)
-            
-            # Check if wallet_b appears in wallet_a's transactions
-            for tx in wallet_txs[wallet_a]:
-                accounts = wallet_accounts[wallet_a].get(tx["signature"], set())
-                if wallet_b in accounts:
-                    conn.tx_count += 1
-                    conn.signatures.append(tx["signature"])
-                    
-                    if tx["block_time"]:
-                        tx_time = datetime.fromtimestamp(tx["block_time"], tz=timezone.utc)
-                        if conn.first_interaction is None or tx_time < conn.first_interaction:
-                            conn.first_interaction = tx_time
-                        if conn.last_interaction is None or tx_time > conn.last_interaction:
-                            conn.last_interaction = tx_time
-            
-            # Check if wallet_a appears in wallet_b's transactions
-            for tx in wallet_txs[wallet_b]:
-                accounts = wallet_accounts[wallet_b].get(tx["signature"], set())
-                if wallet_a in accounts:
-                    if tx["signature"] not in conn.signatures:  # Avoid duplicates
-                        conn.tx_count += 1
-                        conn.signatures.append(tx["signature"])
-                        
-                        if tx["block_time"]:
-                            tx_time = datetime.fromtimestamp(tx["block_time"], tz=timezone.utc)
-                            if conn.first_interaction is None or tx_time < conn.first_interaction:
-                                conn.first_interaction = tx_time
-                            if conn.last_interaction is None or tx_time > conn.last_interaction:
-                                conn.last_interaction = tx_time
-            
-            if conn.tx_count > 0:
-                connections[(wallet_a, wallet_b)] = conn
-    
-    return connections
-
-
 def print_connection_report(connections: Dict[Tuple[str, str], WalletConnection], wallets: List[str]):
     """Print connection analysis report"""
     
@@ -1905,113 +199,6 @@ def print_connection_report(connections: Dict[Tuple[str, str], WalletConnection]
     print("═" * 70 + "\n")
 
 
-def visualize_connections(connections: Dict[Tuple[str, str], WalletConnection], wallets: List[str]):
-    """Visualize wallet connections as a network graph"""
-    
-    plt.style.use('dark_background')
-    fig, ax = plt.subplots(figsize=(12, 10))
-    
-    bg_color = '#0a0a0a'
-    fig.patch.set_facecolor(bg_color)
-    ax.set_facecolor(bg_color)
-    
-    # Position wallets in a circle
-    n = len(wallets)
-    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
-    radius = 3
-    
-    positions = {}
-    for i, wallet in enumerate(wallets):
-        positions[wallet] = (radius * np.cos(angles[i]), radius * np.sin(angles[i]))
-    
-    # Draw connections
-    max_tx = max([c.tx_count for c in connections.values()]) if connections else 1
-    
-    for (wallet_a, wallet_b), conn in connections.items():
-        x1, y1 = positions[wallet_a]
-        x2, y2 = positions[wallet_b]
-        
-        # Line width based on transaction count
-        width = 1 + (conn.tx_count / max_tx) * 5
-        alpha = 0.3 + (conn.tx_count / max_tx) * 0.5
-        
-        ax.plot([x1, x2], [y1, y2], color='#06b6d4', linewidth=width, alpha=alpha)
-        
-        # Label the connection
-        mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-        ax.text(mid_x, mid_y, f"{conn.tx_count}", fontsize=8, color='white',
-                ha='center', va='center', bbox=dict(boxstyle='round', facecolor='#111111', alpha=0.8))
-    
-    # Draw wallet nodes
-    for wallet, (x, y) in positions.items():
-        circle = plt.Circle((x, y), 0.4, color='#22c55e', alpha=0.8)
-        ax.add_patch(circle)
-        
-        label = get_label(wallet)
-        ax.text(x, y - 0.7, label, fontsize=9, color='white', ha='center', va='top')
-    
-    ax.set_xlim(-5, 5)
-    ax.set_ylim(-5, 5)
-    ax.set_aspect('equal')
-    ax.axis('off')
-    
-    ax.set_title("GATOR - Wallet Connection Map", fontsize=14, color='#22c55e', fontweight='bold')
-    
-    plt.tight_layout()
-    return fig
-
-
-# ═══════════════════════════════════════════════════════════════════════════════
-# SCAN COMMAND - Map Wallet Network (Future Feature)
-# ═══════════════════════════════════════════════════════════════════════════════
-
-def scan_network(wallet: str, depth: int = 1, limit: int = 50):
-    """Scan and map a wallet's network connections"""
-    
-    print(f"\n[*] Scanning network for {get_label(wallet)} (depth={depth})...")
-    
-    discovered: Set[str] = {wallet}
-    connections: Dict[Tuple[str, str], WalletConnection] = {}
-    current_level = {wallet}
-    
-    for level in range(depth):
-        print(f"\n[-] Level {level + 1}...")
-        next_level = set()
-        
-        for w in current_level:
-            print(f"    Analyzing {get_label(w)}...")
-            signatures = fetch_signatures(w, limit)
-            
-            # Fetch transactions in parallel
-            sig_strings = [sig_info["signature"] for sig_info in signatures[:limit]]
-            tx_details_map = fetch_transactions_parallel(sig_strings, max_workers=12)
-            
-            for sig_info in signatures[:limit]:
-                tx_details = tx_details_map.get(sig_info["signature"])
-                accounts = extract_accounts_from_tx(tx_details)
-                
-                # Find new wallets (filter out programs)
-                for acc in accounts:
-                    if acc not in discovered and len(acc) > 40:  # Likely a wallet
-                        # Quick check: has this account made transactions?
-                        test_sigs = fetch_signatures(acc, 1)
-                        if test_sigs:
-                            next_level.add(acc)
-                            discovered.add(acc)
-                            
-                            # Record connection
-                            if (w, acc) not in connections and (acc, w) not in connections:
-                                connections[(w, acc)] = WalletConnection(
-                                    wallet_a=w, wallet_b=acc, tx_count=1,
-                                    signatures=[sig_info["signature"]]
-                                )
-        
-        current_level = next_level
-        print(f"    Discovered {len(next_level)} new wallets")
-    
-    return discovered, connections
-
-
 # ═══════════════════════════════════════════════════════════════════════════════
 # MAIN
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -2054,6 +241,8 @@ Examples:
     profile_parser.add_argument("--limit", "-l", type=int, default=100, help="Transaction limit")
     profile_parser.add_argument("--no-plot", action="store_true", help="Skip visualization")
     profile_parser.add_argument("--save", "-s", type=str, help="Save plot to file")
+    profile_parser.add_argument("--since", type=str, help="Only analyze transactions on/after this UTC date (YYYY-MM-DD)")
+    profile_parser.add_argument("--min-slot", type=int, help="Only analyze transactions at/after this slot")
     
     # Connect command
     connect_parser = subparsers.add_parser("connect", help="Find connections between wallets")
@@ -2068,22 +257,39 @@ Examples:
     scan_parser.add_argument("--depth", "-d", type=int, default=1, help="Network depth")
     scan_parser.add_argument("--limit", "-l", type=int, default=30, help="Transactions per wallet")
     
+    for sub in (profile_parser, connect_parser, scan_parser):
+        sub.add_argument("--engine", choices=["threads", "async"], default=None,
+                         help="Transaction fetch engine (default: LEAKLENS_FETCH_ENGINE or threads)")
+    
     args = parser.parse_args()
     
+    # Configure stdout encoding for Windows compatibility
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    
+    load_dotenv()
+    if not os.getenv("HELIUS_API_KEY") and not leaklens_rpc.RPC_URLS:
+        print("[!] ERROR: HELIUS_API_KEY not found in environment variables")
+        print("[!] Please create a .env file with your API key (see .env.example)")
+        sys.exit(1)
+    
+    if getattr(args, "engine", None):
+        leaklens_rpc.FETCH_ENGINE = args.engine
+    
     print_banner()
     
     if args.command == "profile":
-        df, tx_details_list, _, _ = analyze_wallet(args.address, args.limit)
+        min_block_time = None
+        if args.since:
+            min_block_time = int(datetime.strptime(args.since, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+        df, tx_details_list, _, _ = analyze_wallet(args.address, args.limit, min_block_time=min_block_time, min_slot=args.min_slot)
         
         if df.empty:
             print("[!] No data. Exiting.")
             sys.exit(1)
         
-        hourly_counts = [0] * 24
-        daily_counts = [0] * 7
-        for _, row in df.iterrows():
-            hourly_counts[row["hour"]] += 1
-            daily_counts[row["day_of_week"]] += 1
+        hist = activity_histograms(df)
+        hourly_counts, daily_counts = hist.hourly, hist.daily
         
         sleep = detect_sleep_window(hourly_counts)
         probs = calculate_probabilities(df, hourly_counts, daily_counts, sleep)
@@ -2091,18 +297,18 @@ Examples:
         # Analyze reaction speed for bot detection (reuse already-fetched data)
         reaction = analyze_reaction_speed(args.address, tx_details_list)
         
-        print_profile_report(df, args.address, probs, sleep, reaction)
+        print_profile_report(df, args.address, probs, sleep, reaction, hist=hist)
         
         csv_path = f"leaklens_profile_{args.address[:8]}.csv"
         df.to_csv(csv_path, index=False)
         print(f"[+] Data saved: {csv_path}")
         
         if not args.no_plot:
-            fig = visualize_profile(df, args.address, probs, sleep, reaction)
+            fig = visualize_profile(df, args.address, probs, sleep, reaction, hist=hist)
             if args.save:
                 fig.savefig(args.save, dpi=150, facecolor='#0a0a0a', bbox_inches='tight')
                 print(f"[+] Plot saved: {args.save}")
-            plt.show()
+            show_plots()
     
     elif args.command == "connect":
         if len(args.addresses) < 2:
@@ -2117,7 +323,7 @@ Examples:
             if args.save:
                 fig.savefig(args.save, dpi=150, facecolor='#0a0a0a', bbox_inches='tight')
                 print(f"[+] Plot saved: {args.save}")
-            plt.show()
+            show_plots()
     
     elif args.command == "scan":
         discovered, connections = scan_network(args.address, args.depth, args.limit)
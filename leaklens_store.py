@@ -0,0 +1,387 @@
+"""LeakLens Store - On-disk SQLite cache for finalized Solana transactions and per-wallet sync state."""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from leaklens_decode import dumps, loads
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Vercel functions can only write under /tmp (and it does not survive cold starts)
+CACHE_DIR = os.getenv("LEAKLENS_CACHE_DIR") or (
+    "/tmp/leaklens" if os.getenv("VERCEL") == "1" else os.path.join(os.path.expanduser("~"), ".cache", "leaklens")
+)
+CACHE_MAX_BYTES = int(float(os.getenv("LEAKLENS_CACHE_MAX_MB", "256")) * 1024 * 1024)
+CACHE_ENABLED = os.getenv("LEAKLENS_TX_CACHE", "1") != "0"
+
+# Cache kinds: getTransaction (jsonParsed) responses and Helius Enhanced Transactions
+KIND_RPC = "rpc"
+KIND_ENHANCED = "enhanced"
+
+# SQLite limits bound parameters per statement; stay well below it
+_CHUNK = 500
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONNECTION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.RLock()
+_disabled = not CACHE_ENABLED
+_total_bytes = 0
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tx_cache (
+    signature   TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    body        BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (signature, kind)
+);
+CREATE INDEX IF NOT EXISTS tx_cache_last_access ON tx_cache (last_access);
+
+CREATE TABLE IF NOT EXISTS wallet_sync (
+    wallet           TEXT PRIMARY KEY,
+    newest_signature TEXT,
+    newest_slot      INTEGER,
+    oldest_signature TEXT,
+    complete         INTEGER NOT NULL DEFAULT 0,
+    updated_at       REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS wallet_signatures (
+    wallet     TEXT NOT NULL,
+    signature  TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    slot       INTEGER,
+    block_time INTEGER,
+    err        INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (wallet, signature)
+);
+CREATE INDEX IF NOT EXISTS wallet_signatures_seq ON wallet_signatures (wallet, seq);
+
+CREATE TABLE IF NOT EXISTS price_points (
+    asset TEXT NOT NULL,
+    ts    INTEGER NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (asset, ts)
+);
+"""
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Open (once) the cache database. Returns None when the cache is disabled or unusable."""
+    global _conn, _disabled, _total_bytes
+    if _conn is not None or _disabled:
+        return _conn
+    with _lock:
+        if _conn is not None or _disabled:
+            return _conn
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(CACHE_DIR, "leaklens.sqlite3"), check_same_thread=False,
+                                   isolation_level=None, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            _total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM tx_cache").fetchone()[0]
+            _conn = conn
+        except Exception as e:
+            print(f"[Cache] Disabled, cannot open {CACHE_DIR}: {str(e)[:120]}")
+            _disabled = True
+        return _conn
+
+
+def available() -> bool:
+    """True when the on-disk store can be used (enabled and writable)."""
+    return _connect() is not None
+
+
+def _encode(tx: dict) -> bytes:
+    return zlib.compress(dumps(tx), 1)
+
+
+def _decode(body: bytes) -> dict:
+    return loads(zlib.decompress(body))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRANSACTION CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def get_transactions(signatures: Iterable[str], kind: str = KIND_RPC) -> Dict[str, dict]:
+    """Cached transactions for the given signatures (misses are simply absent)."""
+    sigs = [s for s in dict.fromkeys(signatures) if s]
+    conn = _connect()
+    if conn is None or not sigs:
+        return {}
+    found: Dict[str, dict] = {}
+    with _lock:
+        try:
+            for i in range(0, len(sigs), _CHUNK):
+                chunk = sigs[i:i + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT signature, body FROM tx_cache WHERE kind = ? AND signature IN ({marks})", [kind, *chunk]
+                ).fetchall()
+                for sig, body in rows:
+                    try:
+                        found[sig] = _decode(body)
+                    except Exception:
+                        pass
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE tx_cache SET last_access = ? WHERE signature = ? AND kind = ?",
+                                 [(now, sig, kind) for sig in found])
+        except sqlite3.Error as e:
+            print(f"[Cache] Read failed: {str(e)[:120]}")
+        _stats["hits"] += len(found)
+        _stats["misses"] += len(sigs) - len(found)
+    return found
+
+
+def get_transaction(signature: str, kind: str = KIND_RPC) -> Optional[dict]:
+    return get_transactions([signature], kind).get(signature)
+
+
+def put_transactions(transactions: Dict[str, Optional[dict]], kind: str = KIND_RPC):
+    """
+    Store finalized transactions by signature (None values are skipped).
+    Evicts least recently used entries once the cache exceeds LEAKLENS_CACHE_MAX_MB.
+    """
+    global _total_bytes
+    rows = []
+    now = time.time()
+    for sig, tx in transactions.items():
+        if not sig or not tx:
+            continue
+        try:
+            body = _encode(tx)
+        except (TypeError, ValueError):
+            continue
+        rows.append((sig, kind, body, len(body), now))
+    conn = _connect()
+    if conn is None or not rows:
+        return
+    with _lock:
+        try:
+            conn.execute("BEGIN")
+            replaced = 0
+            for i in range(0, len(rows), _CHUNK):
+                chunk = rows[i:i + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                replaced += conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM tx_cache WHERE kind = ? AND signature IN ({marks})",
+                    [kind, *(r[0] for r in chunk)],
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO tx_cache (signature, kind, body, size, last_access) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+            _total_bytes += sum(r[3] for r in rows) - replaced
+            _stats["writes"] += len(rows)
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"[Cache] Write failed: {str(e)[:120]}")
+            return
+        if _total_bytes > CACHE_MAX_BYTES:
+            _evict(conn)
+
+
+def put_transaction(signature: str, tx: Optional[dict], kind: str = KIND_RPC):
+    put_transactions({signature: tx}, kind)
+
+
+def _evict(conn: sqlite3.Connection):
+    """Drop least recently used entries until the cache is back under 90% of its budget."""
+    global _total_bytes
+    target = int(CACHE_MAX_BYTES * 0.9)
+    try:
+        while _total_bytes > target:
+            rows = conn.execute(
+                "SELECT rowid, size FROM tx_cache ORDER BY last_access LIMIT ?", (_CHUNK,)
+            ).fetchall()
+            if not rows:
+                _total_bytes = 0
+                break
+            drop = []
+            for rowid, size in rows:
+                drop.append((rowid,))
+                _total_bytes -= size
+                if _total_bytes <= target:
+                    break
+            conn.executemany("DELETE FROM tx_cache WHERE rowid = ?", drop)
+            _stats["evictions"] += len(drop)
+    except sqlite3.Error as e:
+        print(f"[Cache] Eviction failed: {str(e)[:120]}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WALLET SYNC STATE
+# ═══════════════════════════════════════════════════════════════════════════════
+# Each wallet's known signature history is stored with a seq number (higher = newer),
+# so newer signatures are added above the newest and backfilled ones below the oldest.
+
+def get_wallet_sync(wallet: str) -> Optional[dict]:
+    """Watermarks for a wallet: newest/oldest signature, newest slot, count, complete; None if never synced."""
+    conn = _connect()
+    if conn is None:
+        return None
+    with _lock:
+        try:
+            row = conn.execute(
+                "SELECT newest_signature, newest_slot, oldest_signature, complete, updated_at FROM wallet_sync WHERE wallet = ?",
+                (wallet,),
+            ).fetchone()
+            if row is None:
+                return None
+            count = conn.execute("SELECT COUNT(*) FROM wallet_signatures WHERE wallet = ?", (wallet,)).fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"[Sync] Read failed: {str(e)[:120]}")
+            return None
+    return {
+        "wallet": wallet,
+        "newest_signature": row[0],
+        "newest_slot": row[1],
+        "oldest_signature": row[2],
+        "complete": bool(row[3]),
+        "updated_at": row[4],
+        "count": count,
+    }
+
+
+def record_wallet_signatures(wallet: str, records: List[dict], position: str = "newer",
+                             reset: bool = False, complete: Optional[bool] = None) -> Optional[dict]:
+    """
+    Merge getSignaturesForAddress records (newest first) into a wallet's history.
+    position="newer" places them above the current newest signature, "older" below the oldest.
+    reset drops the stored history first (e.g. after a gap). Returns the updated sync state.
+    """
+    conn = _connect()
+    if conn is None:
+        return None
+    now = time.time()
+    with _lock:
+        try:
+            conn.execute("BEGIN")
+            if reset:
+                conn.execute("DELETE FROM wallet_signatures WHERE wallet = ?", (wallet,))
+            lo, hi = conn.execute(
+                "SELECT MIN(seq), MAX(seq) FROM wallet_signatures WHERE wallet = ?", (wallet,)
+            ).fetchone()
+            n = len(records)
+            # records are newest first: the first one gets the highest seq
+            if position == "older":
+                start = (lo if lo is not None else 0) - 1
+                seqs = [start - i for i in range(n)]
+            else:
+                start = (hi if hi is not None else 0) + n
+                seqs = [start - i for i in range(n)]
+            conn.executemany(
+                "INSERT OR IGNORE INTO wallet_signatures (wallet, signature, seq, slot, block_time, err) VALUES (?, ?, ?, ?, ?, ?)",
+                [(wallet, r["signature"], seq, r.get("slot"), r.get("blockTime"), 1 if r.get("err") else 0)
+                 for r, seq in zip(records, seqs) if r.get("signature")],
+            )
+            newest = conn.execute(
+                "SELECT signature, slot FROM wallet_signatures WHERE wallet = ? ORDER BY seq DESC LIMIT 1", (wallet,)
+            ).fetchone()
+            oldest = conn.execute(
+                "SELECT signature FROM wallet_signatures WHERE wallet = ? ORDER BY seq ASC LIMIT 1", (wallet,)
+            ).fetchone()
+            prev = conn.execute("SELECT complete FROM wallet_sync WHERE wallet = ?", (wallet,)).fetchone()
+            done = complete if complete is not None else (bool(prev[0]) if prev and not reset else False)
+            conn.execute(
+                "INSERT OR REPLACE INTO wallet_sync (wallet, newest_signature, newest_slot, oldest_signature, complete, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (wallet, newest[0] if newest else None, newest[1] if newest else None,
+                 oldest[0] if oldest else None, int(done), now),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"[Sync] Write failed: {str(e)[:120]}")
+            return None
+    return get_wallet_sync(wallet)
+
+
+def get_wallet_signatures(wallet: str, limit: Optional[int] = None) -> List[dict]:
+    """Stored history for a wallet, newest first, in the same shape as fetch_signatures."""
+    conn = _connect()
+    if conn is None:
+        return []
+    sql = "SELECT signature, slot, block_time, err FROM wallet_signatures WHERE wallet = ? ORDER BY seq DESC"
+    params: list = [wallet]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    with _lock:
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"[Sync] Read failed: {str(e)[:120]}")
+            return []
+    return [{"signature": sig, "slot": slot, "blockTime": bt or 0, "err": bool(err) or None}
+            for sig, slot, bt, err in rows]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PRICE HISTORY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def get_price_points(asset: str) -> List[tuple]:
+    """Stored (unix seconds, USD price) points for an asset, oldest first."""
+    conn = _connect()
+    if conn is None:
+        return []
+    with _lock:
+        try:
+            return conn.execute("SELECT ts, price FROM price_points WHERE asset = ? ORDER BY ts", (asset,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"[Prices] Read failed: {str(e)[:120]}")
+            return []
+
+
+def put_price_points(asset: str, points: Iterable[tuple]):
+    """Store (unix seconds, USD price) points for an asset (existing timestamps are overwritten)."""
+    rows = [(asset, int(ts), float(price)) for ts, price in points]
+    conn = _connect()
+    if conn is None or not rows:
+        return
+    with _lock:
+        try:
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR REPLACE INTO price_points (asset, ts, price) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"[Prices] Write failed: {str(e)[:120]}")
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters and current size (exported via /upstream-stats)."""
+    conn = _connect()
+    with _lock:
+        out = dict(_stats)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else 0.0
+        out["enabled"] = conn is not None
+        out["bytes"] = _total_bytes
+        out["max_bytes"] = CACHE_MAX_BYTES
+        out["entries"] = 0
+        if conn is not None:
+            try:
+                out["entries"] = conn.execute("SELECT COUNT(*) FROM tx_cache").fetchone()[0]
+            except sqlite3.Error:
+                pass
+    return out